@@ -0,0 +1,11 @@
+from .horario import parsear_horario, combinar_intervalos
+from .disponibilidad import restar_intervalos, calcular_disponibilidad
+from .icalendar import generar_ics
+
+__all__ = [
+    'parsear_horario',
+    'combinar_intervalos',
+    'restar_intervalos',
+    'calcular_disponibilidad',
+    'generar_ics'
+]
@@ -0,0 +1,62 @@
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from .horario import combinar_intervalos
+
+def restar_intervalos(intervalos: list, ocupados: list, primero: int = 0) -> list:
+    """
+    intervalos menos ocupados, ambos ordenados y sin traslapes. Un solo recorrido con dos
+    punteros: O(n + m). primero permite saltar ocupados ya descartados sin copiar la lista.
+    """
+    libres = []
+    j = primero
+    for inicio, fin in intervalos:
+        while j < len(ocupados) and ocupados[j][1] <= inicio:
+            j += 1
+        cursor = inicio
+        k = j
+        while k < len(ocupados) and ocupados[k][0] < fin:
+            if ocupados[k][0] > cursor:
+                libres.append((cursor, ocupados[k][0]))
+            cursor = max(cursor, ocupados[k][1])
+            k += 1
+        if cursor < fin:
+            libres.append((cursor, fin))
+    return libres
+
+def calcular_disponibilidad(horario: dict, ocupados: list, desde: date, hasta: date,
+                            duracion: int, ahora: datetime = None) -> list:
+    """
+    Espacios libres de `duracion` minutos por día entre desde y hasta (inclusive).
+    horario es el resultado de parsear_horario y ocupados una lista de (inicio, fin) de
+    las citas existentes. Los espacios se alinean al inicio de cada bloque del horario
+    y nunca empiezan antes de `ahora`.
+    """
+    ocupados = combinar_intervalos(ocupados)
+    fines = [fin for _, fin in ocupados]
+    paso = timedelta(minutes=duracion)
+    dias = []
+
+    dia = desde
+    while dia <= hasta:
+        bloques = horario.get(dia.weekday())
+        if bloques:
+            medianoche = datetime.combine(dia, datetime.min.time())
+            bloques = [(medianoche + timedelta(minutes=inicio), medianoche + timedelta(minutes=fin))
+                       for inicio, fin in bloques]
+            # Solo las citas que terminan después del primer bloque del día
+            primero = bisect_right(fines, bloques[0][0])
+            espacios = []
+            for bloque_inicio, bloque_fin in bloques:
+                for libre_inicio, libre_fin in restar_intervalos(
+                        [(bloque_inicio, bloque_fin)], ocupados, primero):
+                    # Primer punto de la rejilla del bloque dentro del hueco libre
+                    saltos = -(-(libre_inicio - bloque_inicio) // paso)
+                    inicio = bloque_inicio + saltos * paso
+                    while inicio + paso <= libre_fin:
+                        if ahora is None or inicio >= ahora:
+                            espacios.append({"inicio": inicio, "fin": inicio + paso})
+                        inicio += paso
+            if espacios:
+                dias.append({"fecha": dia, "espacios": espacios})
+        dia += timedelta(days=1)
+    return dias
@@ -0,0 +1,113 @@
+import json
+import re
+import unicodedata
+
+# Días de la semana según date.weekday(): lunes = 0
+DIAS = {
+    "lunes": 0, "lun": 0,
+    "martes": 1, "mar": 1,
+    "miercoles": 2, "mie": 2,
+    "jueves": 3, "jue": 3,
+    "viernes": 4, "vie": 4,
+    "sabado": 5, "sab": 5,
+    "domingo": 6, "dom": 6,
+}
+
+_PATRON_DIA = r"\b(" + "|".join(sorted(DIAS, key=len, reverse=True)) + r")\b\.?"
+_PATRON_RANGO_DIAS = re.compile(_PATRON_DIA + r"\s*(?:a|al|-)\s*" + _PATRON_DIA)
+_PATRON_DIAS = re.compile(_PATRON_DIA)
+_PATRON_HORAS = re.compile(
+    r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?\s*(?:-|a|hasta)\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm)?"
+)
+
+def _normalizar(texto: str) -> str:
+    sin_acentos = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return sin_acentos.lower().replace("–", "-")
+
+def _minutos(hora: str, minutos: str, sufijo: str) -> int:
+    hora = int(hora)
+    if sufijo == "pm" and hora < 12:
+        hora += 12
+    elif sufijo == "am" and hora == 12:
+        hora = 0
+    return hora * 60 + int(minutos or 0)
+
+def _dias_de(segmento: str) -> set:
+    dias = set()
+    for rango in _PATRON_RANGO_DIAS.finditer(segmento):
+        inicio, fin = DIAS[rango.group(1)], DIAS[rango.group(2)]
+        dia = inicio
+        while True:
+            dias.add(dia)
+            if dia == fin:
+                break
+            dia = (dia + 1) % 7
+    # Días sueltos fuera de los rangos ("lunes, miércoles y viernes")
+    resto = _PATRON_RANGO_DIAS.sub(" ", segmento)
+    dias.update(DIAS[dia.group(1)] for dia in _PATRON_DIAS.finditer(resto))
+    return dias
+
+def combinar_intervalos(intervalos: list) -> list:
+    """Ordena y une intervalos [inicio, fin) que se traslapan o se tocan"""
+    combinados = []
+    for inicio, fin in sorted(intervalos):
+        if combinados and inicio <= combinados[-1][1]:
+            if fin > combinados[-1][1]:
+                combinados[-1] = (combinados[-1][0], fin)
+        else:
+            combinados.append((inicio, fin))
+    return combinados
+
+def _horario_json(datos: dict) -> dict:
+    horario = {}
+    for nombre, bloques in datos.items():
+        dia = DIAS.get(_normalizar(nombre))
+        if dia is None:
+            raise ValueError(f"Día no reconocido en el horario: {nombre}")
+        for inicio, fin in bloques:
+            horario.setdefault(dia, []).append(
+                (_minutos(*inicio.split(":"), None), _minutos(*fin.split(":"), None))
+            )
+    return horario
+
+def parsear_horario(texto: str) -> dict:
+    """
+    Convierte medico.horario_consultorio en {día de la semana: [(minuto_inicio, minuto_fin)]}.
+    Acepta JSON ({"lunes": [["09:00", "14:00"]]}) o texto libre separado por ';' o saltos
+    de línea, por ejemplo "Lunes a Viernes 9:00-14:00 y 16:00-19:00; Sábado 9 a 13".
+    Un segmento sin días hereda los del segmento anterior; horas sin ningún día antes
+    ("9:00-14:00", "L-V 9-17") son ValueError, no un médico sin espacios. Devuelve {} si no
+    hay horario.
+    """
+    if not texto or not texto.strip():
+        return {}
+    if texto.lstrip().startswith("{"):
+        try:
+            horario = _horario_json(json.loads(texto))
+        except (ValueError, TypeError, AttributeError) as e:
+            raise ValueError(f"Horario de consultorio no válido: {e}")
+    else:
+        horario = {}
+        dias = set()
+        for segmento in re.split(r"[;\n]", _normalizar(texto)):
+            dias = _dias_de(segmento) or dias
+            if not dias and _PATRON_HORAS.search(segmento):
+                raise ValueError(
+                    f"Horario de consultorio no válido: '{segmento.strip()}' tiene horas pero no días "
+                    "(por ejemplo 'Lunes a Viernes 9:00-14:00')"
+                )
+            for horas in _PATRON_HORAS.finditer(segmento):
+                inicio = _minutos(horas.group(1), horas.group(2), horas.group(3))
+                fin = _minutos(horas.group(4), horas.group(5), horas.group(6))
+                # "1-5pm": la hora inicial sin sufijo toma el de la final si sigue siendo anterior
+                if horas.group(3) is None and horas.group(6) == "pm" and inicio + 12 * 60 < fin:
+                    inicio += 12 * 60
+                for dia in dias:
+                    horario.setdefault(dia, []).append((inicio, fin))
+
+    for dia, bloques in horario.items():
+        for inicio, fin in bloques:
+            if not 0 <= inicio < fin <= 24 * 60:
+                raise ValueError("Horario de consultorio no válido: bloque con horas fuera de rango")
+        horario[dia] = combinar_intervalos(bloques)
+    return horario
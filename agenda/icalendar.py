@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+ESTATUS_ICS = {"programada": "CONFIRMED", "completada": "CONFIRMED", "cancelada": "CANCELLED"}
+
+def _escapar(texto) -> str:
+    return (str(texto or "").replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n"))
+
+def _plegar(linea: str) -> str:
+    """Parte líneas de más de 75 octetos como pide RFC 5545 (continuación con un espacio)"""
+    datos = linea.encode("utf-8")
+    if len(datos) <= 75:
+        return linea + "\r\n"
+    partes = []
+    limite = 75
+    while datos:
+        corte = min(limite, len(datos))
+        # No cortar a mitad de un carácter UTF-8
+        while corte < len(datos) and (datos[corte] & 0xC0) == 0x80:
+            corte -= 1
+        partes.append(datos[:corte].decode("utf-8"))
+        datos = datos[corte:]
+        limite = 74
+    return "\r\n ".join(partes) + "\r\n"
+
+def _fecha_local(fecha: datetime) -> str:
+    # Las citas se guardan en hora local sin zona: se publican como hora "flotante"
+    return fecha.strftime("%Y%m%dT%H%M%S")
+
+def _fecha_utc(epoch) -> str:
+    return datetime.fromtimestamp(int(epoch), tz=timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+def evento_ics(cita: dict, resumen: str) -> str:
+    fin = cita["fecha_cita"] + timedelta(minutes=cita["duracion_minutos"])
+    lineas = [
+        "BEGIN:VEVENT",
+        f"UID:cita-{cita['id_cita']}@cuidartek",
+        f"DTSTAMP:{_fecha_utc(cita['actualizada_epoch'])}",
+        f"SEQUENCE:{int(cita['actualizada_epoch'])}",
+        f"DTSTART:{_fecha_local(cita['fecha_cita'])}",
+        f"DTEND:{_fecha_local(fin)}",
+        f"SUMMARY:{_escapar(resumen)}",
+        f"STATUS:{ESTATUS_ICS.get(cita['estatus'], 'CONFIRMED')}",
+    ]
+    if cita.get("motivo"):
+        lineas.append(f"DESCRIPTION:{_escapar(cita['motivo'])}")
+    lineas.append("END:VEVENT")
+    return "".join(_plegar(linea) for linea in lineas)
+
+def generar_ics(citas, nombre_calendario: str, resumen):
+    """
+    Genera el calendario por partes a partir de un iterable de citas, sin armarlo
+    completo en memoria. resumen(cita) devuelve el título de cada evento.
+    """
+    yield "".join(_plegar(linea) for linea in [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//CuidarTek//Citas medicas//ES",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escapar(nombre_calendario)}",
+    ])
+    for cita in citas:
+        yield evento_ics(cita, resumen(cita))
+    yield "END:VCALENDAR\r\n"
@@ -5,7 +5,7 @@ from passlib.context import CryptContext
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from database import db
-from models.usuario_model import UsuarioModel
+from cargadores import CargadoresPeticion, get_cargadores
 
 # Configuración
 SECRET_KEY = "tu_clave_secreta_super_segura_cambiar_en_produccion"  # Cambiar en producción!
@@ -79,8 +79,12 @@ class AuthHandler:
 auth_handler = AuthHandler()
 
 # Dependencias para diferentes roles
-async def get_current_user(usuario_id: int = Depends(auth_handler.verify_token)):
-    usuario = UsuarioModel.get_by_id(usuario_id)
+async def get_current_user(
+    usuario_id: int = Depends(auth_handler.verify_token),
+    cargadores: CargadoresPeticion = Depends(get_cargadores)
+):
+    # Por el cargador de la petición: si el endpoint vuelve a pedir este usuario no hay consulta
+    usuario = await cargadores.usuarios.cargar(usuario_id)
     if not usuario:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,35 @@
+import os
+from .backends import BackendMemoriaLRU, BackendCompartido, ClienteCompartidoLocal
+from .etiquetas import CacheEtiquetada
+from .singleflight import GrupoSingleFlight
+from .etag import calcular_etag, responder_con_etag
+
+def _crear_backend():
+    """Selecciona el backend con CACHE_BACKEND: memoria (por defecto), redis o local"""
+    tipo = os.getenv("CACHE_BACKEND", "memoria")
+    if tipo == "redis":
+        try:
+            return BackendCompartido.desde_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        except Exception as e:
+            print(f"⚠️  No se pudo usar Redis para la caché, se usa memoria local: {e}")
+    elif tipo == "local":
+        return BackendCompartido(ClienteCompartidoLocal())
+    return BackendMemoriaLRU(int(os.getenv("CACHE_MAX_ENTRADAS", "10000")))
+
+# Instancia global usada por los modelos
+cache = CacheEtiquetada(_crear_backend(), ttl_por_defecto=int(os.getenv("CACHE_TTL", "300")))
+cacheado = cache.cacheado
+invalidar = cache.invalidar
+
+__all__ = [
+    'BackendMemoriaLRU',
+    'BackendCompartido',
+    'ClienteCompartidoLocal',
+    'CacheEtiquetada',
+    'GrupoSingleFlight',
+    'cache',
+    'cacheado',
+    'invalidar',
+    'calcular_etag',
+    'responder_con_etag'
+]
@@ -0,0 +1,147 @@
+import itertools
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # Dependencia opcional, solo necesaria con CACHE_BACKEND=redis
+    redis = None
+
+
+class BackendMemoriaLRU:
+    """
+    Caché local al proceso con política LRU y TTL por entrada. Las versiones de las
+    etiquetas también son locales: en despliegues con varios workers cada uno invalida
+    solo su propia caché, y el TTL acota cuánto tiempo puede quedar desactualizada.
+
+    Las versiones también tienen tope (LRU). Salen de un contador global creciente y una
+    etiqueta que no está en el diccionario vale el piso: al desalojar una versión el piso
+    sube hasta ella, así ninguna etiqueta vuelve a una versión anterior (a lo sumo las
+    etiquetas sin versión propia pierden sus entradas, nunca se sirve una vieja).
+    """
+
+    def __init__(self, max_entradas: int = 10000, max_versiones: int = None):
+        self.max_entradas = max_entradas
+        self.max_versiones = max_versiones or max_entradas
+        self._datos = OrderedDict()
+        self._versiones = OrderedDict()
+        self._contador = itertools.count(1)
+        self._piso = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: str):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                return None
+            valor, expira = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return None
+            self._datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave: str, valor, ttl: int):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+
+    def versiones(self, etiquetas: list) -> list:
+        with self._lock:
+            return [self._versiones.get(etiqueta, self._piso) for etiqueta in etiquetas]
+
+    def incrementar_version(self, etiqueta: str):
+        with self._lock:
+            self._versiones[etiqueta] = next(self._contador)
+            self._versiones.move_to_end(etiqueta)
+            while len(self._versiones) > self.max_versiones:
+                _, version = self._versiones.popitem(last=False)
+                self._piso = max(self._piso, version)
+
+    def tamano(self) -> int:
+        return len(self._datos)
+
+
+class ClienteCompartidoLocal:
+    """
+    Sustituto en memoria del cliente Redis (get/set/mget/incr) para pruebas y desarrollo
+    local. Se usa con CACHE_BACKEND=local para ejercitar BackendCompartido sin servidor.
+    """
+
+    def __init__(self):
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    def _vigente(self, clave):
+        entrada = self._datos.get(clave)
+        if entrada is None:
+            return None
+        valor, expira = entrada
+        if expira is not None and expira < time.monotonic():
+            del self._datos[clave]
+            return None
+        return valor
+
+    def get(self, clave):
+        with self._lock:
+            return self._vigente(clave)
+
+    def mget(self, claves):
+        with self._lock:
+            return [self._vigente(clave) for clave in claves]
+
+    def set(self, clave, valor, ex=None):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + ex if ex else None)
+        return True
+
+    def incr(self, clave):
+        with self._lock:
+            valor = int(self._vigente(clave) or 0) + 1
+            self._datos[clave] = (str(valor).encode(), None)
+            return valor
+
+    def dbsize(self):
+        with self._lock:
+            return len(self._datos)
+
+
+class BackendCompartido:
+    """
+    Caché compartida entre workers (Redis o un cliente compatible). Las versiones de
+    las etiquetas viven en el mismo servidor, así una escritura en un worker invalida
+    la caché de todos.
+    """
+
+    def __init__(self, cliente, prefijo: str = "cuidartek"):
+        self.cliente = cliente
+        self.prefijo = prefijo
+
+    @classmethod
+    def desde_url(cls, url: str):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND=redis requiere el paquete 'redis'")
+        return cls(redis.Redis.from_url(url))
+
+    def obtener(self, clave: str):
+        valor = self.cliente.get(f"{self.prefijo}:v:{clave}")
+        return pickle.loads(valor) if valor is not None else None
+
+    def guardar(self, clave: str, valor, ttl: int):
+        self.cliente.set(f"{self.prefijo}:v:{clave}", pickle.dumps(valor), ex=ttl)
+
+    def versiones(self, etiquetas: list) -> list:
+        if not etiquetas:
+            return []
+        valores = self.cliente.mget([f"{self.prefijo}:tag:{e}" for e in etiquetas])
+        return [int(v) if v is not None else 0 for v in valores]
+
+    def incrementar_version(self, etiqueta: str):
+        self.cliente.incr(f"{self.prefijo}:tag:{etiqueta}")
+
+    def tamano(self) -> int:
+        return self.cliente.dbsize()
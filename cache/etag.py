@@ -0,0 +1,30 @@
+import hashlib
+import json
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+def calcular_etag(datos) -> str:
+    """ETag fuerte: hash del contenido serializado de la respuesta"""
+    contenido = json.dumps(jsonable_encoder(datos), sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.sha256(contenido.encode("utf-8")).hexdigest() + '"'
+
+def etag_coincide(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etiquetas = [e.strip().removeprefix("W/") for e in if_none_match.split(",")]
+    return etag in etiquetas
+
+def responder_con_etag(request: Request, response: Response, datos):
+    """
+    Agrega ETag a la respuesta y devuelve 304 sin cuerpo cuando el cliente ya tiene
+    esa versión (If-None-Match).
+    """
+    etag = calcular_etag(datos)
+    if etag_coincide(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return datos
@@ -0,0 +1,102 @@
+import copy
+import functools
+import hashlib
+import threading
+from collections import defaultdict
+from .singleflight import GrupoSingleFlight
+
+class CacheEtiquetada:
+    """
+    Caché de lecturas de modelos con invalidación por etiquetas (p. ej. 'paciente:5').
+    Cada clave incluye la versión actual de sus etiquetas; invalidar una etiqueta
+    incrementa su versión, con lo que todas las entradas que la usan dejan de leerse
+    (y expiran solas por TTL). Así un valor calculado durante una invalidación nunca
+    se sirve después de ella. Los fallos concurrentes de una misma clave se coalescen
+    para que una expiración no dispare varias consultas idénticas a la vez.
+
+    El valor guardado (y el que comparten las llamadas coalescidas) es el mismo objeto,
+    así que cada llamador recibe una copia: modificar el resultado no toca la caché.
+    """
+
+    def __init__(self, backend, ttl_por_defecto: int = 300):
+        self.backend = backend
+        self.ttl_por_defecto = ttl_por_defecto
+        self._metricas = defaultdict(lambda: {"aciertos": 0, "fallos": 0})
+        self._invalidaciones = 0
+        self._lock = threading.Lock()
+        self._singleflight = GrupoSingleFlight()
+
+    def _clave(self, nombre: str, args: tuple, kwargs: dict, versiones: list) -> str:
+        firma = repr((args, sorted(kwargs.items()), versiones))
+        return f"{nombre}:{hashlib.sha1(firma.encode('utf-8')).hexdigest()}"
+
+    def _contar(self, nombre: str, campo: str):
+        with self._lock:
+            self._metricas[nombre][campo] += 1
+
+    def cacheado(self, nombre: str, etiquetas, ttl: int = None):
+        """
+        Decorador para métodos de lectura de los modelos. `etiquetas` recibe los mismos
+        argumentos que la función y devuelve la lista de etiquetas del resultado.
+        Los resultados None no se guardan.
+        """
+        def decorador(funcion):
+            @functools.wraps(funcion)
+            def envoltura(*args, **kwargs):
+                tags = etiquetas(*args, **kwargs)
+                try:
+                    clave = self._clave(nombre, args, kwargs, self.backend.versiones(tags))
+                    valor = self.backend.obtener(clave)
+                except Exception as e:
+                    print(f"⚠️  Caché no disponible ({nombre}): {e}")
+                    return funcion(*args, **kwargs)
+
+                if valor is not None:
+                    self._contar(nombre, "aciertos")
+                    return copy.deepcopy(valor)
+
+                self._contar(nombre, "fallos")
+
+                def calcular():
+                    resultado = funcion(*args, **kwargs)
+                    if resultado is not None:
+                        try:
+                            self.backend.guardar(clave, resultado, ttl or self.ttl_por_defecto)
+                        except Exception as e:
+                            print(f"⚠️  No se pudo guardar en caché ({nombre}): {e}")
+                    return resultado
+
+                return copy.deepcopy(self._singleflight.ejecutar(clave, calcular))
+            return envoltura
+        return decorador
+
+    def invalidar(self, *etiquetas: str):
+        for etiqueta in etiquetas:
+            try:
+                self.backend.incrementar_version(etiqueta)
+            except Exception as e:
+                print(f"⚠️  No se pudo invalidar la etiqueta '{etiqueta}': {e}")
+        with self._lock:
+            self._invalidaciones += len(etiquetas)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            por_funcion = {}
+            for nombre, m in self._metricas.items():
+                total = m["aciertos"] + m["fallos"]
+                por_funcion[nombre] = {
+                    **m,
+                    "tasa_aciertos": round(m["aciertos"] / total, 4) if total else 0.0
+                }
+            aciertos = sum(m["aciertos"] for m in self._metricas.values())
+            fallos = sum(m["fallos"] for m in self._metricas.values())
+            invalidaciones = self._invalidaciones
+        return {
+            "backend": type(self.backend).__name__,
+            "entradas": self.backend.tamano(),
+            "aciertos": aciertos,
+            "fallos": fallos,
+            "invalidaciones": invalidaciones,
+            "singleflight": self._singleflight.estadisticas(),
+            "por_funcion": por_funcion
+        }
@@ -0,0 +1,57 @@
+import threading
+
+class _LlamadaEnCurso:
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+class GrupoSingleFlight:
+    """
+    Coalescencia de llamadas idénticas concurrentes: el primer hilo que pide una clave
+    ejecuta la función y los demás esperan y reciben el mismo resultado (o excepción).
+    El resultado se comparte, por lo que los llamadores no deben modificarlo.
+    """
+
+    def __init__(self):
+        self._en_curso = {}
+        self._lock = threading.Lock()
+        self.ejecuciones = 0
+        self.coalescidas = 0
+
+    def ejecutar(self, clave, funcion):
+        with self._lock:
+            llamada = self._en_curso.get(clave)
+            lider = llamada is None
+            if lider:
+                llamada = _LlamadaEnCurso()
+                self._en_curso[clave] = llamada
+                self.ejecuciones += 1
+            else:
+                self.coalescidas += 1
+
+        if not lider:
+            llamada.evento.wait()
+            if llamada.error is not None:
+                raise llamada.error
+            return llamada.resultado
+
+        try:
+            llamada.resultado = funcion()
+            return llamada.resultado
+        except Exception as e:
+            llamada.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._en_curso[clave]
+            llamada.evento.set()
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "ejecuciones": self.ejecuciones,
+                "coalescidas": self.coalescidas,
+                "en_curso": len(self._en_curso)
+            }
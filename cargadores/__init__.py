@@ -0,0 +1,37 @@
+from models.paciente_model import PacienteModel
+from models.usuario_model import UsuarioModel
+from .cargador import Cargador
+
+# Ids por pedido en los endpoints ?ids=1,2,3
+MAX_IDS = 100
+
+class CargadoresPeticion:
+    """Cargadores de una petición; get_cargadores los comparte entre sus dependencias"""
+
+    def __init__(self):
+        self.usuarios = Cargador(UsuarioModel.get_by_ids)
+        self.pacientes = Cargador(PacienteModel.get_by_ids)
+
+def get_cargadores() -> CargadoresPeticion:
+    # FastAPI cachea la dependencia por petición: auth y el endpoint reciben la misma instancia
+    return CargadoresPeticion()
+
+def parsear_ids(texto: str, maximo: int = MAX_IDS) -> list:
+    """'1,2,3' -> [1, 2, 3], sin repetidos y en el orden pedido"""
+    try:
+        ids = list(dict.fromkeys(int(parte) for parte in texto.split(",") if parte.strip()))
+    except ValueError:
+        raise ValueError("ids debe ser una lista de enteros separados por comas")
+    if not ids:
+        raise ValueError("ids no puede estar vacío")
+    if len(ids) > maximo:
+        raise ValueError(f"Se pueden pedir hasta {maximo} ids a la vez")
+    return ids
+
+__all__ = [
+    'Cargador',
+    'CargadoresPeticion',
+    'MAX_IDS',
+    'get_cargadores',
+    'parsear_ids'
+]
@@ -0,0 +1,56 @@
+import asyncio
+from fastapi.concurrency import run_in_threadpool
+
+class Cargador:
+    """
+    Agrupa las búsquedas por id de una petición (patrón DataLoader). Las claves que se piden
+    en la misma vuelta del event loop, por ejemplo desde un asyncio.gather, se resuelven con
+    una sola llamada a funcion_lote(claves) -> {clave: fila}, en el pool de hilos para no
+    bloquear el loop. Cada clave se busca una sola vez: los pedidos repetidos comparten el
+    resultado, así que un cargador vive lo que dura la petición y no hace de caché.
+    """
+
+    def __init__(self, funcion_lote, max_lote: int = 500):
+        self.funcion_lote = funcion_lote
+        self.max_lote = max_lote
+        self._futuros = {}
+        self._pendientes = []
+        self._tareas = set()
+        self.lotes = 0
+
+    async def cargar(self, clave):
+        """Fila de la clave, o None si no existe"""
+        futuro = self._futuros.get(clave)
+        if futuro is None:
+            loop = asyncio.get_running_loop()
+            futuro = loop.create_future()
+            self._futuros[clave] = futuro
+            if not self._pendientes:
+                # Después de las corrutinas que ya están listas: juntan sus claves primero
+                loop.call_soon(self._despachar)
+            self._pendientes.append(clave)
+        # Si se cancela quien espera, el lote sigue para los demás
+        return await asyncio.shield(futuro)
+
+    async def cargar_muchos(self, claves: list) -> list:
+        """Filas de las claves en el mismo orden (None las que no existen)"""
+        return await asyncio.gather(*(self.cargar(clave) for clave in claves))
+
+    def _despachar(self):
+        pendientes, self._pendientes = self._pendientes, []
+        for desde in range(0, len(pendientes), self.max_lote):
+            tarea = asyncio.ensure_future(self._ejecutar(pendientes[desde:desde + self.max_lote]))
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+
+    async def _ejecutar(self, claves: list):
+        self.lotes += 1
+        try:
+            filas = await run_in_threadpool(self.funcion_lote, claves)
+        except Exception as e:
+            # Sin memorizar el error: un pedido posterior de la misma clave vuelve a intentar
+            for clave in claves:
+                self._futuros.pop(clave).set_exception(e)
+            return
+        for clave in claves:
+            self._futuros[clave].set_result(filas.get(clave))
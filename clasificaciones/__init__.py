@@ -0,0 +1,28 @@
+import os
+from .almacenes import TableroOrdenado, AlmacenMemoria, AlmacenRedis
+from .servicio import Clasificaciones, TABLERO_GLOBAL, tablero_plantilla, tablero_medico
+
+def _crear_almacen():
+    """Con CACHE_BACKEND=redis los tableros se comparten entre workers; si no, en memoria"""
+    ttl = int(os.getenv("CLASIFICACIONES_TTL", "300"))
+    if os.getenv("CACHE_BACKEND", "memoria") == "redis":
+        try:
+            import redis
+            return AlmacenRedis(redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0")), ttl)
+        except Exception as e:
+            print(f"⚠️  No se pudo usar Redis para las clasificaciones, se usa memoria local: {e}")
+    return AlmacenMemoria(ttl)
+
+# Instancia global: RetosProgresoModel la avisa cuando cambia el progreso de un paciente
+clasificaciones = Clasificaciones(_crear_almacen())
+
+__all__ = [
+    'TableroOrdenado',
+    'AlmacenMemoria',
+    'AlmacenRedis',
+    'Clasificaciones',
+    'TABLERO_GLOBAL',
+    'tablero_plantilla',
+    'tablero_medico',
+    'clasificaciones'
+]
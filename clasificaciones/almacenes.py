@@ -0,0 +1,187 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+# Redis ordena los empates de ZREVRANGE por miembro en orden lexicográfico inverso; para
+# que gane el id menor, como en TableroOrdenado, el desempate va dentro del score:
+# puntaje * ESCALA_DESEMPATE - id. Los puntajes son sumas de progreso (enteros) y los ids
+# menores que la escala, así que el score es exacto en un double (hasta ~2 millones de puntos).
+ESCALA_DESEMPATE = 2 ** 32
+
+def _score(miembro, puntaje: float) -> float:
+    return puntaje * ESCALA_DESEMPATE - int(miembro)
+
+def _puntaje(miembro, score: float) -> float:
+    return (score + int(miembro)) / ESCALA_DESEMPATE
+
+class TableroOrdenado:
+    """
+    Tablero en memoria: lista ordenada de (-puntaje, miembro) más un índice miembro ->
+    puntaje. La posición se obtiene con búsqueda binaria, O(log n); una página top-K es
+    un corte de la lista. Empates: gana el id menor.
+    """
+
+    def __init__(self, puntajes: dict = None):
+        self._puntajes = dict(puntajes or {})
+        self._orden = sorted((-puntaje, miembro) for miembro, puntaje in self._puntajes.items())
+
+    def actualizar(self, miembro, puntaje: float):
+        anterior = self._puntajes.get(miembro)
+        if anterior == puntaje:
+            return
+        if anterior is not None:
+            del self._orden[bisect_left(self._orden, (-anterior, miembro))]
+        self._puntajes[miembro] = puntaje
+        insort(self._orden, (-puntaje, miembro))
+
+    def quitar(self, miembro):
+        anterior = self._puntajes.pop(miembro, None)
+        if anterior is not None:
+            del self._orden[bisect_left(self._orden, (-anterior, miembro))]
+
+    def posicion(self, miembro):
+        """Posición base 0, o None si el miembro no está en el tablero"""
+        puntaje = self._puntajes.get(miembro)
+        if puntaje is None:
+            return None
+        return bisect_left(self._orden, (-puntaje, miembro))
+
+    def puntaje(self, miembro):
+        return self._puntajes.get(miembro)
+
+    def rango(self, inicio: int, cantidad: int) -> list:
+        return [(miembro, -negativo) for negativo, miembro in self._orden[inicio:inicio + cantidad]]
+
+    def total(self) -> int:
+        return len(self._orden)
+
+
+class AlmacenMemoria:
+    """
+    Tableros locales al proceso. Como la caché en memoria, cada worker tiene los suyos:
+    los cambios de otros workers no le llegan, así que cada tablero se reconstruye al
+    vencer su TTL.
+    """
+
+    def __init__(self, ttl_segundos: int = 300):
+        self.ttl_segundos = ttl_segundos
+        self._tableros = {}
+        self._lock = threading.Lock()
+
+    def _vigente(self, nombre: str):
+        entrada = self._tableros.get(nombre)
+        if entrada is None:
+            return None
+        tablero, expira = entrada
+        if expira < time.monotonic():
+            del self._tableros[nombre]
+            return None
+        return tablero
+
+    def existe(self, nombre: str) -> bool:
+        with self._lock:
+            return self._vigente(nombre) is not None
+
+    def nombres(self, prefijo: str) -> list:
+        with self._lock:
+            return [nombre for nombre in list(self._tableros)
+                    if nombre.startswith(prefijo) and self._vigente(nombre) is not None]
+
+    def reemplazar(self, nombre: str, puntajes: dict):
+        tablero = TableroOrdenado(puntajes)
+        with self._lock:
+            self._tableros[nombre] = (tablero, time.monotonic() + self.ttl_segundos)
+
+    def actualizar(self, nombre: str, puntajes: dict, quitar: list = ()):
+        with self._lock:
+            tablero = self._vigente(nombre)
+            if tablero is None:
+                return
+            for miembro, puntaje in puntajes.items():
+                tablero.actualizar(miembro, puntaje)
+            for miembro in quitar:
+                tablero.quitar(miembro)
+
+    def descartar(self, nombre: str):
+        with self._lock:
+            self._tableros.pop(nombre, None)
+
+    def posicion(self, nombre: str, miembro):
+        with self._lock:
+            tablero = self._vigente(nombre)
+            if tablero is None:
+                return None
+            posicion = tablero.posicion(miembro)
+            return None if posicion is None else (posicion, tablero.puntaje(miembro))
+
+    def pagina(self, nombre: str, inicio: int, cantidad: int):
+        with self._lock:
+            tablero = self._vigente(nombre)
+            if tablero is None:
+                return 0, []
+            return tablero.total(), tablero.rango(inicio, cantidad)
+
+
+class AlmacenRedis:
+    """
+    Tableros compartidos entre workers como sorted sets de Redis (ZADD, ZREVRANK y
+    ZREVRANGE son O(log n)). Una clave de marca con TTL indica que el tablero está
+    construido; al vencer se reconstruye desde la base de datos. El score guarda el
+    desempate (ver ESCALA_DESEMPATE): el orden es el mismo que el de AlmacenMemoria.
+    """
+
+    def __init__(self, cliente, ttl_segundos: int = 300, prefijo: str = "cuidartek:clasificacion"):
+        self.cliente = cliente
+        self.ttl_segundos = ttl_segundos
+        self.prefijo = prefijo
+
+    def _clave(self, nombre: str) -> str:
+        return f"{self.prefijo}:{nombre}"
+
+    def existe(self, nombre: str) -> bool:
+        return bool(self.cliente.exists(f"{self._clave(nombre)}:listo"))
+
+    def nombres(self, prefijo: str) -> list:
+        inicio = len(self.prefijo) + 1
+        return [nombre for nombre in (clave.decode()[inicio:-len(":listo")]
+                                      for clave in self.cliente.scan_iter(f"{self._clave(prefijo)}*:listo"))]
+
+    def reemplazar(self, nombre: str, puntajes: dict):
+        clave = self._clave(nombre)
+        tuberia = self.cliente.pipeline()
+        tuberia.delete(clave)
+        if puntajes:
+            tuberia.zadd(clave, {str(miembro): _score(miembro, puntaje) for miembro, puntaje in puntajes.items()})
+        tuberia.set(f"{clave}:listo", 1, ex=self.ttl_segundos)
+        tuberia.execute()
+
+    def actualizar(self, nombre: str, puntajes: dict, quitar: list = ()):
+        if not self.existe(nombre):
+            return
+        clave = self._clave(nombre)
+        tuberia = self.cliente.pipeline()
+        if puntajes:
+            tuberia.zadd(clave, {str(miembro): _score(miembro, puntaje) for miembro, puntaje in puntajes.items()})
+        if quitar:
+            tuberia.zrem(clave, *[str(miembro) for miembro in quitar])
+        tuberia.execute()
+
+    def descartar(self, nombre: str):
+        clave = self._clave(nombre)
+        self.cliente.delete(clave, f"{clave}:listo")
+
+    def posicion(self, nombre: str, miembro):
+        clave = self._clave(nombre)
+        tuberia = self.cliente.pipeline()
+        tuberia.zrevrank(clave, str(miembro))
+        tuberia.zscore(clave, str(miembro))
+        posicion, score = tuberia.execute()
+        return None if posicion is None else (posicion, _puntaje(miembro, score))
+
+    def pagina(self, nombre: str, inicio: int, cantidad: int):
+        clave = self._clave(nombre)
+        tuberia = self.cliente.pipeline()
+        tuberia.zcard(clave)
+        tuberia.zrevrange(clave, inicio, inicio + cantidad - 1, withscores=True)
+        total, filas = tuberia.execute()
+        return total, [(int(miembro), _puntaje(miembro, score)) for miembro, score in filas]
@@ -0,0 +1,99 @@
+import threading
+from models.clasificaciones_model import ClasificacionesModel
+from models.paciente_medico_model import PacienteMedicoModel
+
+TABLERO_GLOBAL = "global"
+
+def tablero_plantilla(plantilla: str) -> str:
+    return f"plantilla:{plantilla}"
+
+def tablero_medico(medico_id: int) -> str:
+    return f"medico:{medico_id}"
+
+class Clasificaciones:
+    """
+    Tableros de clasificación de retos: global, por plantilla y por panel de médico.
+    Un tablero se construye desde la base de datos la primera vez que se consulta (o al
+    vencer) y después se mantiene con cambios puntuales cuando cambia el progreso de
+    los retos de un paciente, sin volver a ordenar todos los retos.
+    """
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _construir(self, nombre: str):
+        if nombre == TABLERO_GLOBAL:
+            return ClasificacionesModel.get_puntajes_globales()
+        tipo, clave = nombre.split(":", 1)
+        if tipo == "plantilla":
+            return ClasificacionesModel.get_puntajes_plantilla(clave)
+        return ClasificacionesModel.get_puntajes_medico(int(clave))
+
+    def _asegurar(self, nombre: str):
+        if self.almacen.existe(nombre):
+            return
+        with self._lock:
+            lock = self._locks.setdefault(nombre, threading.Lock())
+        # Una sola reconstrucción por tablero aunque lleguen varias peticiones a la vez
+        with lock:
+            if not self.almacen.existe(nombre):
+                self.almacen.reemplazar(nombre, self._construir(nombre))
+
+    def pagina(self, nombre: str, inicio: int = 0, cantidad: int = 20):
+        self._asegurar(nombre)
+        total, filas = self.almacen.pagina(nombre, inicio, cantidad)
+        return total, [
+            {"posicion": inicio + indice + 1, "id_paciente": miembro, "puntaje": puntaje}
+            for indice, (miembro, puntaje) in enumerate(filas)
+        ]
+
+    def posicion(self, nombre: str, paciente_id: int):
+        self._asegurar(nombre)
+        resultado = self.almacen.posicion(nombre, paciente_id)
+        if resultado is None:
+            return None
+        posicion, puntaje = resultado
+        return {"posicion": posicion + 1, "id_paciente": paciente_id, "puntaje": puntaje}
+
+    def actualizar_pacientes(self, paciente_ids):
+        """
+        Lleva a los tableros ya construidos el nuevo puntaje de los pacientes dados. Una
+        consulta agrupada por paciente y plantilla, más la de sus médicos.
+        """
+        paciente_ids = sorted(set(paciente_ids))
+        if not paciente_ids:
+            return
+        puntajes = ClasificacionesModel.get_puntajes_pacientes(paciente_ids)
+        sin_retos = [paciente_id for paciente_id in paciente_ids if paciente_id not in puntajes]
+        totales = {paciente_id: datos["total"] for paciente_id, datos in puntajes.items()}
+
+        self.almacen.actualizar(TABLERO_GLOBAL, totales, sin_retos)
+
+        medicos = PacienteMedicoModel.get_medicos_de_pacientes(paciente_ids)
+        por_medico = {}
+        for paciente_id, medico_ids in medicos.items():
+            for medico_id in medico_ids:
+                por_medico.setdefault(medico_id, []).append(paciente_id)
+        for medico_id, pacientes in por_medico.items():
+            self.almacen.actualizar(
+                tablero_medico(medico_id),
+                {paciente_id: totales[paciente_id] for paciente_id in pacientes if paciente_id in totales},
+                [paciente_id for paciente_id in pacientes if paciente_id not in totales]
+            )
+
+        # Un paciente pudo entrar o salir de cualquier plantilla ya construida
+        for nombre in self.almacen.nombres("plantilla:"):
+            plantilla = nombre.split(":", 1)[1]
+            dentro = {paciente_id: datos["plantillas"][plantilla]
+                      for paciente_id, datos in puntajes.items() if plantilla in datos["plantillas"]}
+            self.almacen.actualizar(nombre, dentro, [p for p in paciente_ids if p not in dentro])
+
+    def descartar_medicos(self, medico_ids):
+        """El panel de un médico cambió: su tablero se reconstruye en la próxima consulta"""
+        for medico_id in medico_ids:
+            self.almacen.descartar(tablero_medico(medico_id))
+
+    def nombres(self, paciente_ids: list) -> dict:
+        return ClasificacionesModel.get_nombres(paciente_ids)
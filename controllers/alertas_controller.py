@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from models.alertas_model import AlertasModel
+from models.alertas_recurrentes_model import AlertasRecurrentesModel
 from models.paciente_model import PacienteModel
-from schemas.alertas_schema import Alertas, AlertasCreate, AlertasUpdate
+from models.adherencia_model import AdherenciaModel
+from schemas.alertas_schema import Alertas, AlertasCreate, AlertasUpdate, Adherencia
 from auth import get_current_active_user
-from typing import List
+from typing import List, Optional
+import os
+from datetime import datetime, timedelta
 
 router = APIRouter(prefix="/alertas", tags=["alertas"])
 
+ALERTAS_RECURRENTES_DIAS = int(os.getenv("ALERTAS_RECURRENTES_DIAS", "7"))
+
 @router.post("/", response_model=Alertas)
 async def crear_alerta(
     alerta: AlertasCreate,
@@ -49,17 +55,22 @@ async def listar_alertas(current_user: dict = Depends(get_current_active_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/pendientes/", response_model=List[Alertas])
-async def listar_alertas_pendientes(current_user: dict = Depends(get_current_active_user)):
+async def listar_alertas_pendientes(
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_active_user)
+):
     try:
         if current_user["rol"] == "paciente":
             paciente = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
             if paciente:
-                alertas = AlertasModel.get_by_paciente_id(paciente["id_paciente"])
-                return [a for a in alertas if a["estatus"] == "pendiente"]
+                return AlertasModel.buscar(
+                    paciente_id=paciente["id_paciente"], estatus="pendiente", desde=desde, hasta=hasta
+                )
             return []
         else:
             # Médicos y admin ven todas las alertas pendientes
-            alertas = AlertasModel.get_pendientes()
+            alertas = AlertasModel.get_pendientes(desde, hasta)
             return alertas
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -87,6 +98,9 @@ async def obtener_alerta(
 @router.get("/paciente/{paciente_id}", response_model=List[Alertas])
 async def obtener_alertas_por_paciente(
     paciente_id: int,
+    estatus: Optional[str] = Query(None, pattern="^(pendiente|completada|omitida)$"),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
     current_user: dict = Depends(get_current_active_user)
 ):
     try:
@@ -99,11 +113,39 @@ async def obtener_alertas_por_paciente(
         # Médicos pueden ver alertas de cualquier paciente
         # Admin puede ver todas las alertas
         
-        alertas = AlertasModel.get_by_paciente_id(paciente_id)
+        alertas = AlertasModel.buscar(paciente_id=paciente_id, estatus=estatus, desde=desde, hasta=hasta)
+        
+        # Ocurrencias de las alertas recurrentes, generadas solo para la ventana pedida
+        # (por defecto desde ahora y los próximos ALERTAS_RECURRENTES_DIAS días)
+        inicio_ventana = desde or datetime.now()
+        fin_ventana = hasta or inicio_ventana + timedelta(days=ALERTAS_RECURRENTES_DIAS)
+        ocurrencias = AlertasRecurrentesModel.get_ocurrencias_paciente(
+            paciente_id, inicio_ventana, fin_ventana, estatus
+        )
+        if ocurrencias:
+            alertas = sorted(list(alertas) + ocurrencias, key=lambda alerta: alerta["fecha_programada"])
         return alertas
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/paciente/{paciente_id}/adherencia", response_model=Adherencia)
+async def obtener_adherencia_paciente(
+    paciente_id: int,
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        if current_user["rol"] == "paciente":
+            paciente = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
+            if not paciente or paciente["id_paciente"] != paciente_id:
+                raise HTTPException(status_code=403, detail="No tiene permisos para ver esta adherencia")
+
+        # Tasas de 7, 30 y 90 días y rachas, leídas del resumen diario de adherencia
+        return AdherenciaModel.get_adherencia(paciente_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{alerta_id}", response_model=Alertas)
 async def actualizar_alerta(
     alerta_id: int, 
@@ -0,0 +1,131 @@
+from fastapi import APIRouter, HTTPException, Depends
+from models.alertas_recurrentes_model import AlertasRecurrentesModel
+from models.paciente_model import PacienteModel
+from schemas.alertas_schema import Alertas
+from schemas.alertas_recurrentes_schema import (
+    AlertasRecurrentes, AlertasRecurrentesCreate, AlertasRecurrentesUpdate, OcurrenciaUpdate
+)
+from auth import get_current_active_user
+from typing import List
+
+router = APIRouter(prefix="/alertas/recurrentes", tags=["alertas"])
+
+def _verificar_paciente(current_user: dict, paciente_id: int, detalle: str):
+    # Pacientes solo pueden operar sobre sus propias reglas
+    if current_user["rol"] == "paciente":
+        paciente = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
+        if not paciente or paciente["id_paciente"] != paciente_id:
+            raise HTTPException(status_code=403, detail=detalle)
+
+@router.post("/", response_model=AlertasRecurrentes)
+async def crear_alerta_recurrente(
+    regla: AlertasRecurrentesCreate,
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        _verificar_paciente(current_user, regla.id_paciente, "Solo puedes crear alertas para tu propio perfil")
+        
+        nueva_regla = AlertasRecurrentesModel.create(regla.dict())
+        if not nueva_regla:
+            raise HTTPException(status_code=500, detail="Error al crear alerta recurrente")
+        return nueva_regla
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/paciente/{paciente_id}", response_model=List[AlertasRecurrentes])
+async def obtener_alertas_recurrentes_por_paciente(
+    paciente_id: int,
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        _verificar_paciente(current_user, paciente_id, "No tiene permisos para ver estas alertas")
+        return AlertasRecurrentesModel.get_by_paciente_id(paciente_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{regla_id}", response_model=AlertasRecurrentes)
+async def obtener_alerta_recurrente(
+    regla_id: int,
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        regla = AlertasRecurrentesModel.get_by_id(regla_id)
+        if not regla:
+            raise HTTPException(status_code=404, detail="Alerta recurrente no encontrada")
+        
+        _verificar_paciente(current_user, regla["id_paciente"], "No tiene permisos para ver esta alerta")
+        return regla
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/{regla_id}", response_model=AlertasRecurrentes)
+async def actualizar_alerta_recurrente(
+    regla_id: int,
+    regla: AlertasRecurrentesUpdate,
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        regla_existente = AlertasRecurrentesModel.get_by_id(regla_id)
+        if not regla_existente:
+            raise HTTPException(status_code=404, detail="Alerta recurrente no encontrada")
+        
+        _verificar_paciente(current_user, regla_existente["id_paciente"], "No tiene permisos para actualizar esta alerta")
+        return AlertasRecurrentesModel.update(regla_id, regla.dict(exclude_unset=True))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/{regla_id}/ocurrencias", response_model=Alertas)
+async def actualizar_ocurrencia(
+    regla_id: int,
+    ocurrencia: OcurrenciaUpdate,
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        regla_existente = AlertasRecurrentesModel.get_by_id(regla_id)
+        if not regla_existente:
+            raise HTTPException(status_code=404, detail="Alerta recurrente no encontrada")
+        
+        _verificar_paciente(current_user, regla_existente["id_paciente"], "No tiene permisos para actualizar esta alerta")
+        return AlertasRecurrentesModel.actualizar_ocurrencia(
+            regla_id, ocurrencia.fecha_ocurrencia, ocurrencia.estatus
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/{regla_id}")
+async def eliminar_alerta_recurrente(
+    regla_id: int,
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        regla_existente = AlertasRecurrentesModel.get_by_id(regla_id)
+        if not regla_existente:
+            raise HTTPException(status_code=404, detail="Alerta recurrente no encontrada")
+        
+        _verificar_paciente(current_user, regla_existente["id_paciente"], "No tiene permisos para eliminar esta alerta")
+        
+        eliminado = AlertasRecurrentesModel.delete(regla_id)
+        if not eliminado:
+            raise HTTPException(status_code=500, detail="Error al eliminar alerta recurrente")
+        
+        return {"message": "Alerta recurrente eliminada correctamente"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,17 +1,31 @@
-from fastapi import APIRouter, HTTPException, Depends
-from models.citas_medicas_model import CitasMedicasModel
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from models.citas_medicas_model import CitasMedicasModel, ConflictoCita
 from models.paciente_model import PacienteModel
-from models.usuario_model import UsuarioModel
-from schemas.citas_medicas_schema import CitasMedicas, CitasMedicasCreate, CitasMedicasUpdate
+from models.medico_model import MedicoModel
+from models.calendario_model import CalendarioModel
+from schemas.citas_medicas_schema import CitasMedicas, CitasMedicasCreate, CitasMedicasUpdate, DisponibilidadDia
 from auth import require_role, require_medico, get_current_active_user
-from typing import List
+from cargadores import CargadoresPeticion, get_cargadores
+from agenda import parsear_horario, calcular_disponibilidad, generar_ics
+from cache.etag import etag_coincide
+from typing import List, Optional
+from datetime import datetime, date, timedelta
+from email.utils import formatdate, parsedate_to_datetime
+
+# Rango máximo de una consulta de disponibilidad (una vista mensual con margen)
+DISPONIBILIDAD_MAX_DIAS = 62
+# Ventana de citas publicada en los calendarios .ics
+CALENDARIO_DIAS_ATRAS = 90
+CALENDARIO_DIAS_ADELANTE = 365
 
 router = APIRouter(prefix="/citas-medicas", tags=["citas_medicas"])
 
 @router.post("/", response_model=CitasMedicas)
 async def crear_cita(
     cita: CitasMedicasCreate,
-    current_user: dict = Depends(get_current_active_user)
+    current_user: dict = Depends(get_current_active_user),
+    cargadores: CargadoresPeticion = Depends(get_cargadores)
 ):
     try:
         # Verificar permisos para crear cita
@@ -20,8 +34,8 @@ async def crear_cita(
             if not paciente or paciente["id_paciente"] != cita.id_paciente:
                 raise HTTPException(status_code=403, detail="Solo puede crear citas para su propio perfil")
         
-        # Verificar que el médico existe y es médico
-        medico = UsuarioModel.get_by_id(cita.id_medico)
+        # Verificar que el médico existe y es médico (sin consulta si el médico es quien agenda)
+        medico = await cargadores.usuarios.cargar(cita.id_medico)
         if not medico or medico["rol"] not in ["medico", "admin"]:
             raise HTTPException(status_code=400, detail="El médico especificado no existe o no tiene rol válido")
         
@@ -29,6 +43,12 @@ async def crear_cita(
         if not nueva_cita:
             raise HTTPException(status_code=500, detail="Error al crear cita médica")
         return nueva_cita
+    except HTTPException:
+        raise
+    except ConflictoCita as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -41,23 +61,95 @@ async def listar_citas():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/programadas", response_model=List[CitasMedicas])
-async def listar_citas_programadas(current_user: dict = Depends(get_current_active_user)):
+async def listar_citas_programadas(
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_active_user)
+):
     try:
         if current_user["rol"] == "paciente":
             paciente = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
             if paciente:
-                citas = CitasMedicasModel.get_by_paciente_id(paciente["id_paciente"])
-                return [c for c in citas if c["estatus"] == "programada"]
+                return CitasMedicasModel.buscar(
+                    paciente_id=paciente["id_paciente"], estatus="programada", desde=desde, hasta=hasta
+                )
             return []
         elif current_user["rol"] == "medico":
-            citas = CitasMedicasModel.get_by_medico_id(current_user["id_usuario"])
-            return [c for c in citas if c["estatus"] == "programada"]
+            return CitasMedicasModel.buscar(
+                medico_id=current_user["id_usuario"], estatus="programada", desde=desde, hasta=hasta
+            )
         else:
-            citas = CitasMedicasModel.get_programadas()
+            citas = CitasMedicasModel.get_programadas(desde, hasta)
             return citas
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/calendario/token")
+async def crear_token_calendario(current_user: dict = Depends(get_current_active_user)):
+    """Genera la URL de suscripción .ics del usuario; si ya tenía una, la anterior se revoca"""
+    try:
+        token = CalendarioModel.crear_token(current_user["id_usuario"])
+        return {"token": token, "url": f"{router.prefix}/calendario/{token}.ics"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/calendario/token")
+async def revocar_token_calendario(current_user: dict = Depends(get_current_active_user)):
+    try:
+        if not CalendarioModel.revocar_token(current_user["id_usuario"]):
+            raise HTTPException(status_code=404, detail="No hay un calendario suscrito")
+        return {"message": "Suscripción al calendario revocada"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _sin_cambios(request: Request, etag: str, modificado) -> bool:
+    if request.headers.get("If-None-Match"):
+        return etag_coincide(request, etag)
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since and modificado is not None:
+        try:
+            return parsedate_to_datetime(if_modified_since).timestamp() >= int(modificado)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+@router.get("/calendario/{token}.ics")
+async def obtener_calendario(token: str, request: Request):
+    """
+    Feed iCalendar de las citas del usuario dueño del token (médico o paciente). Sin
+    cambios desde la última consulta responde 304 tras una sola consulta de índice.
+    """
+    try:
+        suscripcion = CalendarioModel.get_suscripcion(token)
+        if not suscripcion or (suscripcion["rol"] == "paciente" and not suscripcion["id_paciente"]):
+            raise HTTPException(status_code=404, detail="Calendario no encontrado")
+        
+        version = CalendarioModel.get_version(suscripcion)
+        hoy = date.today()
+        # La ventana se mueve cada día, así que la fecha forma parte de la versión
+        etag = f'"{suscripcion["id_usuario"]}-{version["modificado"] or 0}-{version["total"]}-{hoy:%Y%m%d}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if version["modificado"] is not None:
+            headers["Last-Modified"] = formatdate(int(version["modificado"]), usegmt=True)
+        if _sin_cambios(request, etag, version["modificado"]):
+            return Response(status_code=304, headers=headers)
+        
+        desde = datetime.combine(hoy - timedelta(days=CALENDARIO_DIAS_ATRAS), datetime.min.time())
+        hasta = datetime.combine(hoy + timedelta(days=CALENDARIO_DIAS_ADELANTE), datetime.min.time())
+        citas = CalendarioModel.iterar_citas(suscripcion, desde, hasta)
+        prefijo = "Consulta con" if suscripcion["rol"] != "paciente" else "Cita con"
+        contenido = generar_ics(
+            citas, f"CuidarTek - {suscripcion['nombre']}",
+            lambda cita: f"{prefijo} {cita['contraparte']}"
+        )
+        return StreamingResponse(contenido, media_type="text/calendar", headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{cita_id}", response_model=CitasMedicas)
 async def obtener_cita(
     cita_id: int,
@@ -83,6 +175,9 @@ async def obtener_cita(
 @router.get("/paciente/{paciente_id}", response_model=List[CitasMedicas])
 async def obtener_citas_por_paciente(
     paciente_id: int,
+    estatus: Optional[str] = Query(None, pattern="^(programada|completada|cancelada)$"),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
     current_user: dict = Depends(get_current_active_user)
 ):
     try:
@@ -92,7 +187,7 @@ async def obtener_citas_por_paciente(
             if not paciente or paciente["id_paciente"] != paciente_id:
                 raise HTTPException(status_code=403, detail="No tiene permisos para ver estas citas")
         
-        citas = CitasMedicasModel.get_by_paciente_id(paciente_id)
+        citas = CitasMedicasModel.buscar(paciente_id=paciente_id, estatus=estatus, desde=desde, hasta=hasta)
         return citas
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -100,6 +195,9 @@ async def obtener_citas_por_paciente(
 @router.get("/medico/{medico_id}", response_model=List[CitasMedicas])
 async def obtener_citas_por_medico(
     medico_id: int,
+    estatus: Optional[str] = Query(None, pattern="^(programada|completada|cancelada)$"),
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
     current_user: dict = Depends(get_current_active_user)
 ):
     try:
@@ -107,11 +205,49 @@ async def obtener_citas_por_medico(
         if current_user["rol"] == "medico" and current_user["id_usuario"] != medico_id:
             raise HTTPException(status_code=403, detail="No tiene permisos para ver estas citas")
         
-        citas = CitasMedicasModel.get_by_medico_id(medico_id)
+        citas = CitasMedicasModel.buscar(medico_id=medico_id, estatus=estatus, desde=desde, hasta=hasta)
         return citas
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/medico/{medico_id}/disponibilidad", response_model=List[DisponibilidadDia])
+async def obtener_disponibilidad_medico(
+    medico_id: int,
+    desde: date,
+    hasta: Optional[date] = None,
+    duracion: int = Query(30, ge=5, le=240),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """Espacios libres del médico por día, según su horario de consultorio y sus citas"""
+    try:
+        hasta = hasta or desde + timedelta(days=30)
+        if hasta < desde:
+            raise HTTPException(status_code=400, detail="El rango de fechas no es válido")
+        if (hasta - desde).days >= DISPONIBILIDAD_MAX_DIAS:
+            raise HTTPException(
+                status_code=400, detail=f"El rango no puede superar {DISPONIBILIDAD_MAX_DIAS} días"
+            )
+        
+        medico = MedicoModel.get_by_user_id(medico_id)
+        if not medico:
+            raise HTTPException(status_code=404, detail="Médico no encontrado")
+        
+        horario = parsear_horario(medico.get("horario_consultorio"))
+        if not horario:
+            return []
+        
+        ocupados = CitasMedicasModel.get_ocupados(
+            medico_id, datetime.combine(desde, datetime.min.time()),
+            datetime.combine(hasta + timedelta(days=1), datetime.min.time())
+        )
+        return calcular_disponibilidad(horario, ocupados, desde, hasta, duracion, ahora=datetime.now())
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{cita_id}", response_model=CitasMedicas)
 async def actualizar_cita(
     cita_id: int, 
@@ -133,6 +269,12 @@ async def actualizar_cita(
         
         cita_actualizada = CitasMedicasModel.update(cita_id, cita.dict(exclude_unset=True))
         return cita_actualizada
+    except HTTPException:
+        raise
+    except ConflictoCita as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
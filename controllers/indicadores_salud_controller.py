@@ -1,9 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from models.indicadores_salud_model import IndicadoresSaludModel
 from models.paciente_model import PacienteModel
-from schemas.indicadores_salud_schema import IndicadoresSalud, IndicadoresSaludCreate, IndicadoresSaludUpdate
+from models.indicadores_ultimos_model import IndicadoresUltimosModel
+from models.indicadores_resumen_model import IndicadoresResumenModel, METRICAS_RESUMEN
+from schemas.indicadores_salud_schema import (
+    IndicadoresSalud, IndicadoresSaludCreate, IndicadoresSaludUpdate, IndicadoresUltimos, TendenciaIndicador
+)
 from auth import require_role, require_any_user, get_current_active_user
-from typing import List
+from typing import List, Optional
+from datetime import date, timedelta
 
 router = APIRouter(prefix="/indicadores-salud", tags=["indicadores_salud"])
 
@@ -71,6 +76,58 @@ async def obtener_indicadores_por_paciente(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/paciente/{paciente_id}/ultimo", response_model=IndicadoresUltimos)
+async def obtener_ultimos_indicadores_paciente(
+    paciente_id: int,
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        # Verificar permisos
+        if current_user["rol"] == "paciente":
+            paciente = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
+            if not paciente or paciente["id_paciente"] != paciente_id:
+                raise HTTPException(status_code=403, detail="No tiene permisos para ver estos indicadores")
+        
+        # Lectura directa de la proyección: una fila por paciente
+        ultimos = IndicadoresUltimosModel.get_by_paciente_id(paciente_id)
+        if not ultimos:
+            raise HTTPException(status_code=404, detail="El paciente no tiene indicadores registrados")
+        return ultimos
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/paciente/{paciente_id}/tendencia", response_model=List[TendenciaIndicador])
+async def obtener_tendencia_paciente(
+    paciente_id: int,
+    metrica: str,
+    granularidad: str = Query("dia", pattern="^(dia|semana)$"),
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        if metrica not in METRICAS_RESUMEN:
+            raise HTTPException(
+                status_code=400, detail=f"Métrica no válida. Opciones: {', '.join(METRICAS_RESUMEN)}"
+            )
+        
+        # Verificar permisos
+        if current_user["rol"] == "paciente":
+            paciente = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
+            if not paciente or paciente["id_paciente"] != paciente_id:
+                raise HTTPException(status_code=403, detail="No tiene permisos para ver estos indicadores")
+        
+        # Por defecto, los últimos 12 meses
+        hasta = hasta or date.today()
+        desde = desde or hasta - timedelta(days=365)
+        return IndicadoresResumenModel.get_tendencia(paciente_id, metrica, granularidad, desde, hasta)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{indicador_id}", response_model=IndicadoresSalud)
 async def actualizar_indicador(
     indicador_id: int, 
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from models.medico_model import MedicoModel
 from models.usuario_model import UsuarioModel
 from schemas.medico_schema import Medico, MedicoCreate, MedicoUpdate, MedicoConUsuario, MedicoConPacientes
 from auth import get_current_active_user, require_admin, require_medico
+from cache import responder_con_etag
 from typing import List
 
 router = APIRouter(prefix="/medicos", tags=["medicos"])
@@ -32,30 +34,31 @@ async def crear_medico(medico: MedicoCreate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/", response_model=List[MedicoConPacientes])
-async def listar_medicos():
+async def listar_medicos(request: Request, response: Response):
     try:
-        medicos = MedicoModel.get_medicos_activos()
-        return medicos
+        # En un hilo aparte para que las peticiones simultáneas compartan la consulta
+        medicos = await run_in_threadpool(MedicoModel.get_medicos_activos)
+        return responder_con_etag(request, response, medicos)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{medico_id}", response_model=MedicoConUsuario)
-async def obtener_medico(medico_id: int):
+async def obtener_medico(medico_id: int, request: Request, response: Response):
     try:
         medico = MedicoModel.get_by_id(medico_id)
         if not medico:
             raise HTTPException(status_code=404, detail="Médico no encontrado")
-        return medico
+        return responder_con_etag(request, response, medico)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/usuario/{usuario_id}", response_model=MedicoConUsuario)
-async def obtener_medico_por_usuario(usuario_id: int):
+async def obtener_medico_por_usuario(usuario_id: int, request: Request, response: Response):
     try:
         medico = MedicoModel.get_by_user_id(usuario_id)
         if not medico:
             raise HTTPException(status_code=404, detail="Perfil médico no encontrado")
-        return medico
+        return responder_con_etag(request, response, medico)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
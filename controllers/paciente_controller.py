@@ -1,9 +1,12 @@
 # paciente_controllers.py
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from models.paciente_model import PacienteModel
-from schemas.paciente_schema import Paciente, PacienteCreate, PacienteUpdate
+from models.timeline_model import TimelineModel, FUENTES, decodificar_cursor
+from schemas.paciente_schema import Paciente, PacienteCreate, PacienteUpdate, TimelinePaciente
 from auth import get_current_active_user
-from typing import List
+from cargadores import CargadoresPeticion, get_cargadores, parsear_ids
+from typing import List, Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -44,18 +47,30 @@ async def crear_paciente(
         raise HTTPException(status_code=500, detail="Error interno al crear paciente")
 
 @router.get("/", response_model=List[Paciente])
-async def listar_pacientes(current_user: dict = Depends(get_current_active_user)):
+async def listar_pacientes(
+    ids: Optional[str] = None,
+    current_user: dict = Depends(get_current_active_user),
+    cargadores: CargadoresPeticion = Depends(get_cargadores)
+):
+    """Todos los pacientes, o solo los de ?ids=1,2,3 en ese orden y en una consulta"""
     try:
         if current_user["rol"] not in ["medico", "admin"]:
             raise HTTPException(
                 status_code=403,
                 detail="No tienes permisos para listar pacientes"
             )
-        
+
+        if ids is not None:
+            # Los que no existen se omiten
+            pacientes = await cargadores.pacientes.cargar_muchos(parsear_ids(ids))
+            return [paciente for paciente in pacientes if paciente]
+
         pacientes = PacienteModel.get_all()
         return pacientes
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.exception("Error en listar_pacientes")
         raise HTTPException(status_code=500, detail="Error interno al listar pacientes")
@@ -85,6 +100,42 @@ async def obtener_paciente(
         logger.exception("Error en obtener_paciente")
         raise HTTPException(status_code=500, detail="Error interno al obtener paciente")
 
+@router.get("/{paciente_id}/timeline", response_model=TimelinePaciente)
+async def obtener_timeline_paciente(
+    paciente_id: int,
+    before: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Indicadores, alertas, citas, reportes, recomendaciones y sesiones de wearable en un solo
+    feed, del más reciente al más antiguo. 'before' es el cursor 'siguiente' de la página
+    anterior (o una fecha ISO para saltar a ella).
+    """
+    try:
+        if current_user["rol"] == "paciente":
+            paciente_del_usuario = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
+            if not paciente_del_usuario or paciente_del_usuario.get("id_paciente") != paciente_id:
+                raise HTTPException(
+                    status_code=403,
+                    detail="No tienes permisos para ver este paciente"
+                )
+        antes = decodificar_cursor(before) if before else None
+
+        # Una consulta por fuente en paralelo, cada una limitada a limit + 1 eventos
+        listas = await asyncio.gather(*(
+            asyncio.to_thread(TimelineModel.get_eventos, fuente[0], paciente_id, antes, limit + 1)
+            for fuente in FUENTES
+        ))
+        return {"id_paciente": paciente_id, **TimelineModel.fusionar(listas, limit)}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.exception("Error en obtener_timeline_paciente")
+        raise HTTPException(status_code=500, detail="Error interno al obtener la línea de tiempo")
+
 @router.get("/usuario/{usuario_id}", response_model=Paciente)
 async def obtener_paciente_por_usuario(
     usuario_id: int,
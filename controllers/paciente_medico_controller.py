@@ -1,13 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from models.paciente_medico_model import PacienteMedicoModel
 from models.paciente_model import PacienteModel
-from models.usuario_model import UsuarioModel
 from models.medico_model import MedicoModel
 from schemas.paciente_medico_schema import (
     PacienteMedico, PacienteMedicoCreate, PacienteMedicoUpdate,
-    PacienteMedicoConNombres, SolicitudPendiente, PacienteConInfo
+    PacienteMedicoConNombres, SolicitudPendiente, PacienteConInfo, PacienteResumen
 )
 from auth import get_current_active_user, require_medico, require_paciente
+from cargadores import CargadoresPeticion, get_cargadores
 from typing import List, Dict, Any
 
 router = APIRouter(prefix="/paciente-medico", tags=["paciente-medico"])
@@ -15,7 +16,8 @@ router = APIRouter(prefix="/paciente-medico", tags=["paciente-medico"])
 @router.post("/solicitud", response_model=PacienteMedico)
 async def crear_solicitud(
     solicitud: PacienteMedicoCreate,
-    current_user: dict = Depends(get_current_active_user)
+    current_user: dict = Depends(get_current_active_user),
+    cargadores: CargadoresPeticion = Depends(get_cargadores)
 ):
     try:
         print(f"📥 Recibiendo solicitud: {solicitud.dict()}")
@@ -39,7 +41,7 @@ async def crear_solicitud(
         print(f"👨‍⚕️ Perfil médico encontrado: {medico_perfil}")
         
         # Verificar que el usuario médico existe y es médico
-        medico_usuario = UsuarioModel.get_by_id(solicitud.id_medico)
+        medico_usuario = await cargadores.usuarios.cargar(solicitud.id_medico)
         if not medico_usuario or medico_usuario["rol"] not in ["medico", "admin"]:
             raise HTTPException(status_code=404, detail="Médico no encontrado")
         
@@ -100,14 +102,33 @@ async def obtener_mis_medicos(
 
 @router.get("/mis-pacientes", response_model=List[PacienteConInfo])
 async def obtener_mis_pacientes(
+    orden: str = Query("fecha", pattern="^(fecha|riesgo)$"),
     current_user: dict = Depends(require_medico)
 ):
     try:
-        pacientes = PacienteMedicoModel.get_pacientes_del_medico(current_user["id_usuario"])
+        # En un hilo aparte para que las peticiones simultáneas compartan la consulta
+        pacientes = await run_in_threadpool(
+            PacienteMedicoModel.get_pacientes_del_medico, current_user["id_usuario"], orden
+        )
         return pacientes
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/mis-pacientes/resumen", response_model=List[PacienteResumen])
+async def obtener_resumen_mis_pacientes(
+    orden: str = Query("fecha", pattern="^(fecha|riesgo)$"),
+    current_user: dict = Depends(require_medico)
+):
+    try:
+        # Panel del médico: últimos signos vitales, alertas pendientes, próxima cita y
+        # riesgo de todos sus pacientes en una sola llamada
+        resumen = await run_in_threadpool(
+            PacienteMedicoModel.get_resumen_pacientes, current_user["id_usuario"], orden
+        )
+        return resumen
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.put("/{relacion_id}", response_model=PacienteMedico)
 async def actualizar_solicitud(
     relacion_id: int,
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, HTTPException, Depends
+from models.reglas_clinicas_model import ReglasClinicasModel
+from schemas.reglas_clinicas_schema import ReglasClinicas, ReglasClinicasCreate, ReglasClinicasUpdate
+from auth import require_medico
+from typing import List, Optional
+
+router = APIRouter(prefix="/reglas-clinicas", tags=["reglas_clinicas"])
+
+def _verificar_alcance(current_user: dict, paciente_id: Optional[int]):
+    # Las reglas globales afectan a todos los pacientes: solo el admin las administra
+    if paciente_id is None and current_user["rol"] != "admin":
+        raise HTTPException(status_code=403, detail="Solo un administrador puede modificar reglas globales")
+
+@router.post("/", response_model=ReglasClinicas)
+async def crear_regla_clinica(
+    regla: ReglasClinicasCreate,
+    current_user: dict = Depends(require_medico)
+):
+    try:
+        _verificar_alcance(current_user, regla.id_paciente)
+        
+        nueva_regla = ReglasClinicasModel.create(regla.dict())
+        if not nueva_regla:
+            raise HTTPException(status_code=500, detail="Error al crear regla clínica")
+        return nueva_regla
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/", response_model=List[ReglasClinicas])
+async def listar_reglas_clinicas(
+    paciente_id: Optional[int] = None,
+    current_user: dict = Depends(require_medico)
+):
+    try:
+        # Con paciente_id: las globales más las propias del paciente
+        return ReglasClinicasModel.get_all(paciente_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.put("/{regla_id}", response_model=ReglasClinicas)
+async def actualizar_regla_clinica(
+    regla_id: int,
+    regla: ReglasClinicasUpdate,
+    current_user: dict = Depends(require_medico)
+):
+    try:
+        regla_existente = ReglasClinicasModel.get_by_id(regla_id)
+        if not regla_existente:
+            raise HTTPException(status_code=404, detail="Regla clínica no encontrada")
+        
+        _verificar_alcance(current_user, regla_existente["id_paciente"])
+        return ReglasClinicasModel.update(regla_id, regla.dict(exclude_unset=True))
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/{regla_id}")
+async def eliminar_regla_clinica(
+    regla_id: int,
+    current_user: dict = Depends(require_medico)
+):
+    try:
+        regla_existente = ReglasClinicasModel.get_by_id(regla_id)
+        if not regla_existente:
+            raise HTTPException(status_code=404, detail="Regla clínica no encontrada")
+        
+        _verificar_alcance(current_user, regla_existente["id_paciente"])
+        
+        eliminado = ReglasClinicasModel.delete(regla_id)
+        if not eliminado:
+            raise HTTPException(status_code=500, detail="Error al eliminar regla clínica")
+        
+        return {"message": "Regla clínica eliminada correctamente"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
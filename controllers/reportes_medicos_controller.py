@@ -1,13 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from models.reportes_medicos_model import ReportesMedicosModel
 from models.paciente_model import PacienteModel
 from models.usuario_model import UsuarioModel
-from schemas.reportes_medicos_schema import ReportesMedicos, ReportesMedicosCreate, ReportesMedicosUpdate
+from models.exportaciones_model import ExportacionesModel
+from schemas.reportes_medicos_schema import ReportesMedicos, ReportesMedicosCreate, ReportesMedicosUpdate, ReporteExportacion
 from auth import require_role, require_medico, get_current_active_user
+from exportaciones import almacen, exportador, respuesta_archivo
 from typing import List
 
 router = APIRouter(prefix="/reportes-medicos", tags=["reportes_medicos"])
 
+def _verificar_acceso_paciente(current_user: dict, paciente_id: int):
+    # Los pacientes solo exportan su propio reporte; médicos y admin, el de cualquiera
+    if current_user["rol"] == "paciente":
+        paciente = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
+        if not paciente or paciente["id_paciente"] != paciente_id:
+            raise HTTPException(status_code=403, detail="No tiene permisos para exportar este reporte")
+
+def _con_descarga(exportacion: dict) -> dict:
+    if exportacion["estado"] == "listo":
+        return {**exportacion, "url_descarga": f"/reportes-medicos/exportaciones/{exportacion['id_exportacion']}/descarga"}
+    return exportacion
+
 @router.post("/", response_model=ReportesMedicos, dependencies=[Depends(require_medico)])
 async def crear_reporte(reporte: ReportesMedicosCreate):
     try:
@@ -31,6 +47,83 @@ async def listar_reportes():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/paciente/{paciente_id}/export", response_model=ReporteExportacion)
+async def exportar_reporte_paciente(
+    paciente_id: int,
+    response: Response,
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Encola la exportación del reporte consolidado del paciente (202). Si sus datos no
+    cambiaron desde la última exportación, devuelve esa al instante (200) sin encolar nada.
+    """
+    try:
+        _verificar_acceso_paciente(current_user, paciente_id)
+        if not PacienteModel.get_by_id(paciente_id):
+            raise HTTPException(status_code=404, detail="Paciente no encontrado")
+
+        firma = ExportacionesModel.get_firma(paciente_id)
+        exportacion = ExportacionesModel.get_vigente(paciente_id, firma)
+        if exportacion and exportacion["estado"] == "listo" and almacen.existe(exportacion["hash_contenido"]):
+            return _con_descarga(exportacion)
+        if not exportacion or exportacion["estado"] == "listo":
+            exportacion = ExportacionesModel.crear(paciente_id, current_user["id_usuario"], firma)
+            exportador.avisar()
+        response.status_code = 202
+        return exportacion
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/exportaciones/{exportacion_id}", response_model=ReporteExportacion)
+async def obtener_exportacion(
+    exportacion_id: int,
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        exportacion = ExportacionesModel.get_by_id(exportacion_id)
+        if not exportacion:
+            raise HTTPException(status_code=404, detail="Exportación no encontrada")
+        _verificar_acceso_paciente(current_user, exportacion["id_paciente"])
+        return _con_descarga(exportacion)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/exportaciones/{exportacion_id}/descarga")
+async def descargar_exportacion(
+    exportacion_id: int,
+    request: Request,
+    current_user: dict = Depends(get_current_active_user)
+):
+    """Descarga el artefacto con soporte de Range para reanudar descargas"""
+    try:
+        exportacion = ExportacionesModel.get_by_id(exportacion_id)
+        if not exportacion:
+            raise HTTPException(status_code=404, detail="Exportación no encontrada")
+        _verificar_acceso_paciente(current_user, exportacion["id_paciente"])
+        if exportacion["estado"] == "error":
+            raise HTTPException(status_code=409, detail=f"La exportación falló: {exportacion['error']}")
+        if exportacion["estado"] == "listo" and not almacen.existe(exportacion["hash_contenido"]):
+            # El artefacto salió de la caché (o se generó en otra instancia): se vuelve a generar
+            ExportacionesModel.reencolar(exportacion_id)
+            exportador.avisar()
+            exportacion = ExportacionesModel.get_by_id(exportacion_id)
+        if exportacion["estado"] != "listo":
+            return JSONResponse(status_code=202, content=jsonable_encoder(exportacion))
+
+        fecha = (exportacion["fecha_fin"] or exportacion["fecha_solicitud"]).strftime("%Y%m%d")
+        return respuesta_archivo(
+            request, almacen.ruta(exportacion["hash_contenido"]), exportacion["hash_contenido"],
+            "text/html", f"reporte_paciente_{exportacion['id_paciente']}_{fecha}.html"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{reporte_id}", response_model=ReportesMedicos)
 async def obtener_reporte(
     reporte_id: int,
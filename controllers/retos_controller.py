@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from models.retos_model import RetosModel
+from models.retos_progreso_model import RetosProgresoModel
 from models.paciente_model import PacienteModel
-from schemas.retos_schema import Retos, RetosCreate, RetosUpdate
+from models.paciente_medico_model import PacienteMedicoModel
+from schemas.retos_schema import Retos, RetosCreate, RetosUpdate, RetoDia, Clasificacion
+from clasificaciones import clasificaciones, TABLERO_GLOBAL, tablero_plantilla, tablero_medico
 from auth import require_role, require_medico, get_current_active_user
 from typing import List
 
@@ -23,6 +26,10 @@ async def crear_reto(
         if not nuevo_reto:
             raise HTTPException(status_code=500, detail="Error al crear reto")
         return nuevo_reto
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -41,7 +48,7 @@ async def listar_retos_activos(current_user: dict = Depends(get_current_active_u
             paciente = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
             if paciente:
                 retos = RetosModel.get_by_paciente_id(paciente["id_paciente"])
-                return [r for r in retos if r["progreso"] < 100]
+                return [r for r in retos if r["estado"] == "activo"]
             return []
         else:
             retos = RetosModel.get_activos()
@@ -49,6 +56,74 @@ async def listar_retos_activos(current_user: dict = Depends(get_current_active_u
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _responder_clasificacion(tablero: str, current_user: dict, offset: int, limit: int):
+    """
+    Página top-K del tablero. Los pacientes solo ven su propio nombre; médicos y
+    administradores ven todos.
+    """
+    total, entradas = clasificaciones.pagina(tablero, offset, limit)
+    paciente = None
+    if current_user["rol"] == "paciente":
+        paciente = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
+        nombres = {paciente["id_paciente"]: current_user["nombre"]} if paciente else {}
+    else:
+        nombres = clasificaciones.nombres([entrada["id_paciente"] for entrada in entradas])
+    for entrada in entradas:
+        entrada["nombre"] = nombres.get(entrada["id_paciente"])
+    
+    posicion_propia = None
+    if paciente:
+        posicion_propia = clasificaciones.posicion(tablero, paciente["id_paciente"])
+        if posicion_propia:
+            posicion_propia["nombre"] = current_user["nombre"]
+    return {"total": total, "entradas": entradas, "posicion_propia": posicion_propia}
+
+@router.get("/clasificacion/global", response_model=Clasificacion)
+async def obtener_clasificacion_global(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        return _responder_clasificacion(TABLERO_GLOBAL, current_user, offset, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/clasificacion/plantilla/{plantilla}", response_model=Clasificacion)
+async def obtener_clasificacion_plantilla(
+    plantilla: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        return _responder_clasificacion(tablero_plantilla(plantilla), current_user, offset, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/clasificacion/medico/{medico_id}", response_model=Clasificacion)
+async def obtener_clasificacion_medico(
+    medico_id: int,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: dict = Depends(get_current_active_user)
+):
+    try:
+        # El panel lo ven el propio médico, el admin y los pacientes activos de ese médico
+        if current_user["rol"] == "medico" and current_user["id_usuario"] != medico_id:
+            raise HTTPException(status_code=403, detail="No tiene permisos para ver esta clasificación")
+        if current_user["rol"] == "paciente":
+            paciente = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
+            relacion = paciente and PacienteMedicoModel.verificar_relacion(paciente["id_paciente"], medico_id)
+            if not relacion or relacion["estatus"] != "activo":
+                raise HTTPException(status_code=403, detail="No tiene permisos para ver esta clasificación")
+        
+        return _responder_clasificacion(tablero_medico(medico_id), current_user, offset, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{reto_id}", response_model=Retos)
 async def obtener_reto(
     reto_id: int,
@@ -69,6 +144,28 @@ async def obtener_reto(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{reto_id}/dias", response_model=List[RetoDia])
+async def obtener_dias_reto(
+    reto_id: int,
+    current_user: dict = Depends(get_current_active_user)
+):
+    """Valor registrado por día de un reto automático y si el día se cumplió"""
+    try:
+        reto = RetosModel.get_by_id(reto_id)
+        if not reto:
+            raise HTTPException(status_code=404, detail="Reto no encontrado")
+        
+        if current_user["rol"] == "paciente":
+            paciente = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
+            if not paciente or paciente["id_paciente"] != reto["id_paciente"]:
+                raise HTTPException(status_code=403, detail="No tiene permisos para ver este reto")
+        
+        return RetosProgresoModel.get_dias(reto_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/paciente/{paciente_id}", response_model=List[Retos])
 async def obtener_retos_por_paciente(
     paciente_id: int,
@@ -105,6 +202,8 @@ async def actualizar_reto(
         
         reto_actualizado = RetosModel.update(reto_id, reto.dict(exclude_unset=True))
         return reto_actualizado
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
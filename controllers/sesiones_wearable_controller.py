@@ -23,6 +23,10 @@ async def crear_sesion(
         if not nueva_sesion:
             raise HTTPException(status_code=500, detail="Error al crear sesión wearable")
         return nueva_sesion
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from models.paciente_model import PacienteModel
+from models.sync_model import SyncModel, decodificar_token
+from schemas.sync_schema import CambiosSync
+from auth import get_current_active_user
+from typing import Optional
+import asyncio
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+@router.get("", response_model=CambiosSync)
+async def sincronizar(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=2000),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Cambios de los datos del paciente logueado desde el token 'since' (sin token, todo).
+    Se entregan a lo sumo 'limit' cambios; mientras 'mas' sea true la app sigue pidiendo
+    con el token nuevo.
+    """
+    try:
+        if current_user["rol"] != "paciente":
+            raise HTTPException(status_code=403, detail="Solo los pacientes sincronizan sus datos")
+        paciente = PacienteModel.get_by_usuario_id(current_user["id_usuario"])
+        if not paciente:
+            raise HTTPException(status_code=404, detail="Perfil de paciente no encontrado")
+        desde = decodificar_token(since) if since else None
+        return await asyncio.to_thread(SyncModel.get_cambios, paciente["id_paciente"], desde, limit)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error al sincronizar: {str(e)}")
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, HTTPException, Depends
+from models.trabajos_model import TrabajosModel
+from schemas.trabajos_schema import Trabajo, TrabajoCreate, ResumenCola
+from auth import require_admin
+from trabajos import TAREAS, encolar
+from typing import List
+
+router = APIRouter(prefix="/trabajos", tags=["trabajos"], dependencies=[Depends(require_admin)])
+
+@router.post("/", response_model=Trabajo, status_code=202)
+async def encolar_trabajo(trabajo: TrabajoCreate):
+    """Encola un trabajo de un tipo registrado (backfills, lotes) para el proceso worker"""
+    try:
+        opciones = trabajo.dict(exclude={"tipo", "carga"}, exclude_none=True)
+        trabajo_id = encolar(trabajo.tipo, trabajo.carga, **opciones)
+        return TrabajosModel.get_by_id(trabajo_id)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tipos", response_model=List[str])
+async def listar_tipos_trabajo():
+    return sorted(TAREAS)
+
+@router.get("/resumen", response_model=List[ResumenCola])
+async def resumen_trabajos():
+    try:
+        return TrabajosModel.get_resumen()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{trabajo_id}", response_model=Trabajo)
+async def obtener_trabajo(trabajo_id: int):
+    try:
+        trabajo = TrabajosModel.get_by_id(trabajo_id)
+        if not trabajo:
+            raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+        return trabajo
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -2,7 +2,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from models.usuario_model import UsuarioModel
 from schemas.usuario_schema import Usuario, UsuarioCreate, UsuarioUpdate
 from auth import require_role, require_admin, get_current_active_user
-from typing import List
+from cargadores import CargadoresPeticion, get_cargadores, parsear_ids
+from typing import List, Optional
 
 router = APIRouter(prefix="/usuarios", tags=["usuarios"])
 
@@ -21,25 +22,44 @@ async def crear_usuario(usuario: UsuarioCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/", response_model=List[Usuario], dependencies=[Depends(require_admin)])
-async def listar_usuarios():
+@router.get("/", response_model=List[Usuario])
+async def listar_usuarios(
+    ids: Optional[str] = None,
+    current_user: dict = Depends(get_current_active_user),
+    cargadores: CargadoresPeticion = Depends(get_cargadores)
+):
+    """Todos los usuarios (admin), o solo los de ?ids=1,2,3 en ese orden y en una consulta"""
     try:
-        usuarios = UsuarioModel.get_all()
-        return usuarios
+        if ids is None:
+            if current_user["rol"] != "admin":
+                raise HTTPException(status_code=403, detail="No tiene permisos suficientes para realizar esta acción")
+            return UsuarioModel.get_all()
+
+        usuario_ids = parsear_ids(ids)
+        # Mismo permiso que GET /usuarios/{id}: fuera de admin, solo el propio usuario
+        if current_user["rol"] != "admin" and any(usuario_id != current_user["id_usuario"] for usuario_id in usuario_ids):
+            raise HTTPException(status_code=403, detail="No tiene permisos para ver estos usuarios")
+        usuarios = await cargadores.usuarios.cargar_muchos(usuario_ids)
+        return [usuario for usuario in usuarios if usuario]
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/{usuario_id}", response_model=Usuario)
 async def obtener_usuario(
     usuario_id: int, 
-    current_user: dict = Depends(get_current_active_user)
+    current_user: dict = Depends(get_current_active_user),
+    cargadores: CargadoresPeticion = Depends(get_cargadores)
 ):
     try:
         # Usuarios solo pueden ver su propia información, admin puede ver todo
         if current_user["rol"] != "admin" and current_user["id_usuario"] != usuario_id:
             raise HTTPException(status_code=403, detail="No tiene permisos para ver este usuario")
         
-        usuario = UsuarioModel.get_by_id(usuario_id)
+        usuario = await cargadores.usuarios.cargar(usuario_id)
         if not usuario:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
         return usuario
@@ -50,7 +70,8 @@ async def obtener_usuario(
 async def actualizar_usuario(
     usuario_id: int, 
     usuario: UsuarioUpdate,
-    current_user: dict = Depends(get_current_active_user)
+    current_user: dict = Depends(get_current_active_user),
+    cargadores: CargadoresPeticion = Depends(get_cargadores)
 ):
     try:
         # Usuarios solo pueden actualizar su propia información, admin puede actualizar todo
@@ -58,7 +79,7 @@ async def actualizar_usuario(
             raise HTTPException(status_code=403, detail="No tiene permisos para actualizar este usuario")
         
         # Verificar si el usuario existe
-        usuario_existente = UsuarioModel.get_by_id(usuario_id)
+        usuario_existente = await cargadores.usuarios.cargar(usuario_id)
         if not usuario_existente:
             raise HTTPException(status_code=404, detail="Usuario no encontrado")
         
@@ -3,6 +3,7 @@ from pymysql import Error
 import os
 from dotenv import load_dotenv
 import ssl
+from cache.singleflight import GrupoSingleFlight
 
 load_dotenv()
 
@@ -14,6 +15,7 @@ class Database:
         self.password = os.getenv("DB_PASSWORD")
         self.database = os.getenv("DB_NAME", "defaultdb")  # Aiven usa defaultdb
         self.port = int(os.getenv("DB_PORT", "3306"))
+        self.singleflight = GrupoSingleFlight()
         
         self._check_environment_variables()
 
@@ -68,6 +70,29 @@ class Database:
             print(f"❌ Error inesperado: {e}")
             return None
 
+    def consultar_compartido(self, query: str, params: tuple = (), uno: bool = False):
+        """
+        Ejecuta una lectura. Si otra petición ya está ejecutando la misma consulta con los
+        mismos parámetros, espera y comparte su resultado en lugar de repetirla.
+        """
+        clave = (query, tuple(params), uno)
+        return self.singleflight.ejecutar(clave, lambda: self._consultar(query, params, uno))
+
+    def _consultar(self, query: str, params: tuple, uno: bool):
+        connection = self.get_connection()
+        if not connection:
+            raise Error("No hay conexión con la base de datos")
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            cursor.execute(query, params)
+            return cursor.fetchone() if uno else cursor.fetchall()
+        finally:
+            if cursor:
+                cursor.close()
+            if connection.open:
+                connection.close()
+
     def create_database_and_tables(self):
         """Crea las tablas en la base de datos defaultdb de Aiven"""
         connection = None
@@ -113,6 +138,7 @@ class Database:
                     enfermedades_cronicas TEXT,
                     medicamentos TEXT,
                     doctor_asignado INT,
+                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                     FOREIGN KEY (id_usuario) REFERENCES usuario(id_usuario) ON DELETE CASCADE,
                     FOREIGN KEY (doctor_asignado) REFERENCES usuario(id_usuario) ON DELETE SET NULL
                 )
@@ -133,24 +159,161 @@ class Database:
                     estado_animo VARCHAR(100),
                     actividad_fisica VARCHAR(100),
                     fuente_dato ENUM('manual', 'wearable') DEFAULT 'manual',
+                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX idx_indicadores_paciente_fecha (id_paciente, fecha_registro),
+                    INDEX idx_indicadores_paciente_actualizacion (id_paciente, fecha_actualizacion),
                     FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE
                 )
             """)
             print("✅ Tabla 'indicadores_salud' creada/verificada")
+
+            # Proyección con la última lectura de cada métrica por paciente
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS indicadores_ultimos (
+                    id_paciente INT PRIMARY KEY,
+                    presion_sistolica INT,
+                    presion_diastolica INT,
+                    fecha_presion DATETIME NULL,
+                    id_indicador_presion INT NULL,
+                    glucosa DECIMAL(5,2),
+                    fecha_glucosa DATETIME NULL,
+                    id_indicador_glucosa INT NULL,
+                    peso DECIMAL(5,2),
+                    fecha_peso DATETIME NULL,
+                    id_indicador_peso INT NULL,
+                    frecuencia_cardiaca INT,
+                    fecha_frecuencia_cardiaca DATETIME NULL,
+                    id_indicador_frecuencia_cardiaca INT NULL,
+                    FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE
+                )
+            """)
+            print("✅ Tabla 'indicadores_ultimos' creada/verificada")
+
+            # Resúmenes diarios y semanales por paciente y métrica
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS indicadores_resumen (
+                    id_paciente INT NOT NULL,
+                    metrica VARCHAR(30) NOT NULL,
+                    granularidad ENUM('dia', 'semana') NOT NULL,
+                    inicio DATE NOT NULL,
+                    cantidad INT NOT NULL DEFAULT 0,
+                    minimo DECIMAL(10,2),
+                    maximo DECIMAL(10,2),
+                    suma DECIMAL(16,2) NOT NULL DEFAULT 0,
+                    suma_cuadrados DECIMAL(20,4) NOT NULL DEFAULT 0,
+                    PRIMARY KEY (id_paciente, metrica, granularidad, inicio),
+                    FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE
+                )
+            """)
+            print("✅ Tabla 'indicadores_resumen' creada/verificada")
             
             # Crear tabla Alertas
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS alertas (
                     id_alerta INT AUTO_INCREMENT PRIMARY KEY,
                     id_paciente INT NOT NULL,
-                    tipo_alerta ENUM('medicación', 'cita', 'actividad', 'agua') NOT NULL,
+                    tipo_alerta ENUM('medicación', 'cita', 'actividad', 'agua', 'indicador') NOT NULL,
                     descripcion TEXT NOT NULL,
                     fecha_programada DATETIME NOT NULL,
                     estatus ENUM('pendiente', 'completada', 'omitida') DEFAULT 'pendiente',
+                    notificada_en DATETIME NULL,
+                    id_regla_clinica INT NULL,
+                    id_cita INT NULL,
+                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    UNIQUE INDEX uq_alertas_cita (id_cita),
+                    INDEX idx_alertas_paciente_estatus_fecha (id_paciente, estatus, fecha_programada),
+                    INDEX idx_alertas_estatus_fecha (estatus, fecha_programada),
+                    INDEX idx_alertas_notificacion (estatus, notificada_en, fecha_programada),
+                    INDEX idx_alertas_regla_clinica (id_paciente, id_regla_clinica, fecha_programada),
+                    INDEX idx_alertas_paciente_fecha (id_paciente, fecha_programada),
+                    INDEX idx_alertas_paciente_actualizacion (id_paciente, fecha_actualizacion),
                     FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE
                 )
             """)
             print("✅ Tabla 'alertas' creada/verificada")
+
+            # Reglas de alertas recurrentes; las ocurrencias se generan al consultarlas
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS alertas_recurrentes (
+                    id_regla INT AUTO_INCREMENT PRIMARY KEY,
+                    id_paciente INT NOT NULL,
+                    tipo_alerta ENUM('medicación', 'cita', 'actividad', 'agua') NOT NULL,
+                    descripcion TEXT NOT NULL,
+                    inicio DATETIME NOT NULL,
+                    frecuencia ENUM('horaria', 'diaria', 'semanal') NOT NULL,
+                    intervalo INT NOT NULL DEFAULT 1,
+                    fin DATETIME NULL,
+                    repeticiones INT NULL,
+                    ultima_ocurrencia DATETIME NULL,
+                    proxima_ocurrencia DATETIME NULL,
+                    activa BOOLEAN NOT NULL DEFAULT TRUE,
+                    version INT NOT NULL DEFAULT 1,
+                    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX idx_recurrentes_paciente (id_paciente, activa),
+                    INDEX idx_recurrentes_proxima (activa, proxima_ocurrencia),
+                    INDEX idx_recurrentes_paciente_actualizacion (id_paciente, fecha_actualizacion),
+                    FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE
+                )
+            """)
+            print("✅ Tabla 'alertas_recurrentes' creada/verificada")
+
+            # Estatus de ocurrencias: solo las que se completaron, omitieron o notificaron
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS alertas_ocurrencias (
+                    id_regla INT NOT NULL,
+                    fecha_ocurrencia DATETIME NOT NULL,
+                    estatus ENUM('pendiente', 'completada', 'omitida') NOT NULL DEFAULT 'pendiente',
+                    notificada_en DATETIME NULL,
+                    PRIMARY KEY (id_regla, fecha_ocurrencia),
+                    FOREIGN KEY (id_regla) REFERENCES alertas_recurrentes(id_regla) ON DELETE CASCADE
+                )
+            """)
+            print("✅ Tabla 'alertas_ocurrencias' creada/verificada")
+
+            # Adherencia a la medicación: dosis completadas y omitidas por paciente y día
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS adherencia_dias (
+                    id_paciente INT NOT NULL,
+                    fecha DATE NOT NULL,
+                    completadas INT NOT NULL DEFAULT 0,
+                    omitidas INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (id_paciente, fecha),
+                    FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE
+                )
+            """)
+            print("✅ Tabla 'adherencia_dias' creada/verificada")
+
+            # Reglas clínicas: umbrales y tendencias globales (id_paciente NULL) o por paciente
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS reglas_clinicas (
+                    id_regla_clinica INT AUTO_INCREMENT PRIMARY KEY,
+                    id_paciente INT NULL,
+                    metrica VARCHAR(30) NOT NULL,
+                    tipo ENUM('umbral', 'tendencia') NOT NULL DEFAULT 'umbral',
+                    operador ENUM('>', '>=', '<', '<=') NOT NULL,
+                    valor DECIMAL(10,2) NOT NULL,
+                    ventana_horas INT NULL,
+                    severidad ENUM('advertencia', 'critica') NOT NULL DEFAULT 'advertencia',
+                    descripcion VARCHAR(255) NOT NULL,
+                    activa BOOLEAN NOT NULL DEFAULT TRUE,
+                    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_reglas_clinicas_paciente (id_paciente, activa),
+                    FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE
+                )
+            """)
+            print("✅ Tabla 'reglas_clinicas' creada/verificada")
+            self._sembrar_reglas_clinicas(cursor)
+
+            # Arrendamientos para procesos que deben correr en una sola instancia
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS arrendamientos (
+                    nombre VARCHAR(50) PRIMARY KEY,
+                    propietario VARCHAR(100) NOT NULL,
+                    expira DATETIME NOT NULL
+                )
+            """)
+            print("✅ Tabla 'arrendamientos' creada/verificada")
             
             # Crear tabla Recomendaciones
             cursor.execute("""
@@ -160,10 +323,42 @@ class Database:
                     fecha_generacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     contenido TEXT NOT NULL,
                     origen ENUM('IA', 'médico') NOT NULL,
+                    clave VARCHAR(50) NULL,
+                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX idx_recomendaciones_paciente_origen_fecha (id_paciente, origen, fecha_generacion),
+                    INDEX idx_recomendaciones_paciente_fecha (id_paciente, fecha_generacion),
+                    INDEX idx_recomendaciones_paciente_actualizacion (id_paciente, fecha_actualizacion),
                     FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE
                 )
             """)
             print("✅ Tabla 'recomendaciones' creada/verificada")
+
+            # Puntaje de riesgo por paciente y cola de recálculo incremental
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS riesgo_pacientes (
+                    id_paciente INT PRIMARY KEY,
+                    puntaje DECIMAL(5,2) NOT NULL,
+                    nivel ENUM('bajo', 'moderado', 'alto') NOT NULL,
+                    signos DECIMAL(5,2) NOT NULL DEFAULT 0,
+                    cronicas DECIMAL(5,2) NOT NULL DEFAULT 0,
+                    alertas DECIMAL(5,2) NOT NULL DEFAULT 0,
+                    citas DECIMAL(5,2) NOT NULL DEFAULT 0,
+                    calculado_en DATETIME NOT NULL,
+                    INDEX idx_riesgo_puntaje (puntaje),
+                    FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE
+                )
+            """)
+            print("✅ Tabla 'riesgo_pacientes' creada/verificada")
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS riesgo_pendientes (
+                    id_paciente INT PRIMARY KEY,
+                    marcado_en TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+                    INDEX idx_riesgo_pendientes_marcado (marcado_en),
+                    FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE
+                )
+            """)
+            print("✅ Tabla 'riesgo_pendientes' creada/verificada")
             
             # Crear tabla Retos
             cursor.execute("""
@@ -176,10 +371,33 @@ class Database:
                     recompensa VARCHAR(255),
                     fecha_inicio DATE,
                     fecha_fin DATE,
+                    metrica VARCHAR(50) NULL,
+                    meta_diaria DECIMAL(10,2) NULL,
+                    dias_objetivo INT NULL,
+                    dias_cumplidos INT NOT NULL DEFAULT 0,
+                    estado ENUM('activo', 'completado', 'vencido') NOT NULL DEFAULT 'activo',
+                    plantilla VARCHAR(100) NULL,
+                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX idx_retos_plantilla (plantilla, id_paciente),
+                    INDEX idx_retos_paciente_estado_metrica (id_paciente, estado, metrica),
+                    INDEX idx_retos_estado_fin (estado, fecha_fin),
+                    INDEX idx_retos_paciente_actualizacion (id_paciente, fecha_actualizacion),
                     FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE
                 )
             """)
             print("✅ Tabla 'retos' creada/verificada")
+
+            # Valor acumulado por reto y día, base del progreso automático
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS retos_dias (
+                    id_reto INT NOT NULL,
+                    fecha DATE NOT NULL,
+                    valor DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    PRIMARY KEY (id_reto, fecha),
+                    FOREIGN KEY (id_reto) REFERENCES retos(id_reto) ON DELETE CASCADE
+                )
+            """)
+            print("✅ Tabla 'retos_dias' creada/verificada")
             
             # Crear tabla Citas_Medicas
             cursor.execute("""
@@ -188,14 +406,33 @@ class Database:
                     id_paciente INT NOT NULL,
                     id_medico INT NOT NULL,
                     fecha_cita DATETIME NOT NULL,
+                    duracion_minutos INT NOT NULL DEFAULT 30,
                     motivo TEXT,
                     observaciones TEXT,
                     estatus ENUM('programada', 'completada', 'cancelada') DEFAULT 'programada',
+                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX idx_citas_medico_fecha (id_medico, fecha_cita),
+                    INDEX idx_citas_paciente_estatus_fecha (id_paciente, estatus, fecha_cita),
+                    INDEX idx_citas_estatus_fecha (estatus, fecha_cita),
+                    INDEX idx_citas_paciente_fecha (id_paciente, fecha_cita),
+                    INDEX idx_citas_medico_actualizacion (id_medico, fecha_actualizacion),
+                    INDEX idx_citas_paciente_actualizacion (id_paciente, fecha_actualizacion),
                     FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE,
                     FOREIGN KEY (id_medico) REFERENCES usuario(id_usuario) ON DELETE CASCADE
                 )
             """)
             print("✅ Tabla 'citas_medicas' creada/verificada")
+
+            # Tokens de suscripción a los calendarios .ics (solo se guarda el hash)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS calendario_tokens (
+                    id_usuario INT PRIMARY KEY,
+                    token_hash CHAR(64) NOT NULL UNIQUE,
+                    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (id_usuario) REFERENCES usuario(id_usuario) ON DELETE CASCADE
+                )
+            """)
+            print("✅ Tabla 'calendario_tokens' creada/verificada")
             
             # Crear tabla Reportes_Medicos
             cursor.execute("""
@@ -207,11 +444,120 @@ class Database:
                     descripcion_general TEXT,
                     diagnostico TEXT,
                     recomendaciones_medicas TEXT,
+                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX idx_reportes_paciente_fecha (id_paciente, fecha_reporte),
+                    INDEX idx_reportes_paciente_actualizacion (id_paciente, fecha_actualizacion),
                     FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE,
                     FOREIGN KEY (id_medico) REFERENCES usuario(id_usuario) ON DELETE CASCADE
                 )
             """)
             print("✅ Tabla 'reportes_medicos' creada/verificada")
+
+            # Exportaciones del reporte consolidado; el artefacto vive en disco bajo hash_contenido
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS reportes_exportaciones (
+                    id_exportacion INT AUTO_INCREMENT PRIMARY KEY,
+                    id_paciente INT NOT NULL,
+                    solicitado_por INT NOT NULL,
+                    estado ENUM('pendiente', 'procesando', 'listo', 'error') NOT NULL DEFAULT 'pendiente',
+                    firma CHAR(64) NOT NULL,
+                    hash_contenido CHAR(64) NULL,
+                    tamano INT NULL,
+                    desde_cache BOOLEAN NOT NULL DEFAULT FALSE,
+                    intentos INT NOT NULL DEFAULT 0,
+                    error TEXT,
+                    fecha_solicitud TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    fecha_inicio DATETIME NULL,
+                    fecha_fin DATETIME NULL,
+                    INDEX idx_exportaciones_estado (estado, id_exportacion),
+                    INDEX idx_exportaciones_paciente_firma (id_paciente, firma),
+                    FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE,
+                    FOREIGN KEY (solicitado_por) REFERENCES usuario(id_usuario) ON DELETE CASCADE
+                )
+            """)
+            print("✅ Tabla 'reportes_exportaciones' creada/verificada")
+
+            # Cola durable de trabajos en segundo plano (la consume worker.py)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS trabajos (
+                    id_trabajo BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    cola VARCHAR(50) NOT NULL DEFAULT 'default',
+                    tipo VARCHAR(100) NOT NULL,
+                    carga JSON NOT NULL,
+                    prioridad INT NOT NULL DEFAULT 0,
+                    estado ENUM('pendiente', 'procesando', 'completado', 'fallido') NOT NULL DEFAULT 'pendiente',
+                    ejecutar_en DATETIME(6) NOT NULL,
+                    intentos INT NOT NULL DEFAULT 0,
+                    max_intentos INT NOT NULL DEFAULT 5,
+                    visibilidad_segundos INT NOT NULL DEFAULT 300,
+                    visible_hasta DATETIME(6) NULL,
+                    propietario VARCHAR(100) NULL,
+                    ultimo_error TEXT,
+                    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    fecha_inicio DATETIME(6) NULL,
+                    fecha_fin DATETIME(6) NULL,
+                    clave VARCHAR(191) NULL,
+                    UNIQUE KEY uq_trabajos_clave (clave),
+                    INDEX idx_trabajos_reclamo (cola, estado, prioridad, ejecutar_en),
+                    INDEX idx_trabajos_visibles (estado, visible_hasta),
+                    INDEX idx_trabajos_fin (estado, fecha_fin)
+                )
+            """)
+            print("✅ Tabla 'trabajos' creada/verificada")
+
+            # Lápidas de filas borradas para la sincronización incremental (GET /sync)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS sync_eliminados (
+                    id_eliminado BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    id_paciente INT NOT NULL,
+                    entidad VARCHAR(30) NOT NULL,
+                    id_entidad INT NOT NULL,
+                    fecha_eliminacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_sync_eliminados_paciente_fecha (id_paciente, fecha_eliminacion),
+                    INDEX idx_sync_eliminados_fecha (fecha_eliminacion)
+                )
+            """)
+            print("✅ Tabla 'sync_eliminados' creada/verificada")
+
+            # Outbox transaccional: eventos publicados por los modelos y offsets de sus suscriptores
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS eventos_outbox (
+                    id_evento BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    tipo VARCHAR(100) NOT NULL,
+                    id_paciente INT NULL,
+                    carga JSON NOT NULL,
+                    fecha_creacion DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+                    INDEX idx_eventos_fecha (fecha_creacion)
+                )
+            """)
+            print("✅ Tabla 'eventos_outbox' creada/verificada")
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS eventos_offsets (
+                    consumidor VARCHAR(100) PRIMARY KEY,
+                    ultimo_evento BIGINT NOT NULL,
+                    intentos INT NOT NULL DEFAULT 0,
+                    reintentar_en DATETIME(6) NULL,
+                    ultimo_error TEXT,
+                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                )
+            """)
+            print("✅ Tabla 'eventos_offsets' creada/verificada")
+            # Eventos que un suscriptor durable no pudo procesar tras agotar los reintentos
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS eventos_descartados (
+                    id_descarte BIGINT AUTO_INCREMENT PRIMARY KEY,
+                    consumidor VARCHAR(100) NOT NULL,
+                    id_evento BIGINT NOT NULL,
+                    tipo VARCHAR(100) NOT NULL,
+                    id_paciente INT NULL,
+                    carga JSON NOT NULL,
+                    intentos INT NOT NULL,
+                    error TEXT,
+                    fecha_descarte DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+                    INDEX idx_eventos_descartados_consumidor (consumidor, id_evento)
+                )
+            """)
+            print("✅ Tabla 'eventos_descartados' creada/verificada")
             
             # Crear tabla Sesiones_Wearable
             cursor.execute("""
@@ -221,6 +567,9 @@ class Database:
                     dispositivo VARCHAR(255),
                     fecha_sincronizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     datos_recibidos JSON,
+                    fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    INDEX idx_sesiones_paciente_fecha (id_paciente, fecha_sincronizacion),
+                    INDEX idx_sesiones_paciente_actualizacion (id_paciente, fecha_actualizacion),
                     FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE
                 )
             """)
@@ -269,7 +618,10 @@ class Database:
                     estatus ENUM('pendiente', 'activo', 'rechazado', 'finalizado') DEFAULT 'pendiente',
                     notas TEXT,
                     fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    riesgo_puntaje DECIMAL(5,2) NULL,
                     UNIQUE KEY unique_paciente_medico (id_paciente, id_medico),
+                    INDEX idx_pm_medico_estatus (id_medico, estatus),
+                    INDEX idx_pm_medico_estatus_riesgo (id_medico, estatus, riesgo_puntaje),
                     FOREIGN KEY (id_paciente) REFERENCES paciente(id_paciente) ON DELETE CASCADE,
                     FOREIGN KEY (id_medico) REFERENCES usuario(id_usuario) ON DELETE CASCADE
                 )
@@ -290,10 +642,135 @@ class Database:
                     universidad VARCHAR(255),
                     estatus ENUM('Activo', 'Inactivo') DEFAULT 'Activo',
                     fecha_registro TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    total_pacientes INT NOT NULL DEFAULT 0,
+                    INDEX idx_medico_estatus (estatus),
                     FOREIGN KEY (id_usuario) REFERENCES usuario(id_usuario) ON DELETE CASCADE
                 )
             """)
             print("✅ Tabla 'medico' creada/verificada")
+
+            # Migraciones para bases de datos creadas antes de estos cambios
+            self._agregar_columna_si_no_existe(
+                cursor, "medico", "total_pacientes", "INT NOT NULL DEFAULT 0"
+            )
+            self._crear_indice_si_no_existe(cursor, "medico", "idx_medico_estatus", "estatus")
+            self._crear_indice_si_no_existe(
+                cursor, "paciente_medico", "idx_pm_medico_estatus", "id_medico, estatus"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "indicadores_salud", "idx_indicadores_paciente_fecha", "id_paciente, fecha_registro"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "citas_medicas", "idx_citas_medico_fecha", "id_medico, fecha_cita"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "alertas", "idx_alertas_paciente_estatus_fecha", "id_paciente, estatus, fecha_programada"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "alertas", "idx_alertas_estatus_fecha", "estatus, fecha_programada"
+            )
+            self._agregar_columna_si_no_existe(cursor, "alertas", "notificada_en", "DATETIME NULL")
+            self._agregar_columna_si_no_existe(cursor, "alertas", "id_regla_clinica", "INT NULL")
+            self._agregar_valor_enum_si_no_existe(
+                cursor, "alertas", "tipo_alerta",
+                "ENUM('medicación', 'cita', 'actividad', 'agua', 'indicador') NOT NULL", "indicador"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "alertas", "idx_alertas_regla_clinica", "id_paciente, id_regla_clinica, fecha_programada"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "alertas", "idx_alertas_notificacion", "estatus, notificada_en, fecha_programada"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "citas_medicas", "idx_citas_paciente_estatus_fecha", "id_paciente, estatus, fecha_cita"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "citas_medicas", "idx_citas_estatus_fecha", "estatus, fecha_cita"
+            )
+            self._agregar_columna_si_no_existe(
+                cursor, "citas_medicas", "duracion_minutos", "INT NOT NULL DEFAULT 30"
+            )
+            self._agregar_columna_si_no_existe(
+                cursor, "citas_medicas", "fecha_actualizacion",
+                "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "citas_medicas", "idx_citas_paciente_fecha", "id_paciente, fecha_cita"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "citas_medicas", "idx_citas_medico_actualizacion", "id_medico, fecha_actualizacion"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "citas_medicas", "idx_citas_paciente_actualizacion", "id_paciente, fecha_actualizacion"
+            )
+            self._agregar_columna_si_no_existe(cursor, "alertas", "id_cita", "INT NULL")
+            self._agregar_columna_si_no_existe(cursor, "retos", "metrica", "VARCHAR(50) NULL")
+            self._agregar_columna_si_no_existe(cursor, "retos", "meta_diaria", "DECIMAL(10,2) NULL")
+            self._agregar_columna_si_no_existe(cursor, "retos", "dias_objetivo", "INT NULL")
+            self._agregar_columna_si_no_existe(cursor, "retos", "dias_cumplidos", "INT NOT NULL DEFAULT 0")
+            if self._agregar_columna_si_no_existe(
+                cursor, "retos", "estado", "ENUM('activo', 'completado', 'vencido') NOT NULL DEFAULT 'activo'"
+            ):
+                cursor.execute("""
+                    UPDATE retos SET estado = CASE
+                        WHEN progreso >= 100 THEN 'completado'
+                        WHEN fecha_fin < CURDATE() THEN 'vencido'
+                        ELSE 'activo' END
+                """)
+            self._crear_indice_si_no_existe(
+                cursor, "retos", "idx_retos_paciente_estado_metrica", "id_paciente, estado, metrica"
+            )
+            self._crear_indice_si_no_existe(cursor, "retos", "idx_retos_estado_fin", "estado, fecha_fin")
+            self._agregar_columna_si_no_existe(cursor, "retos", "plantilla", "VARCHAR(100) NULL")
+            self._crear_indice_si_no_existe(cursor, "retos", "idx_retos_plantilla", "plantilla, id_paciente")
+            self._crear_indice_si_no_existe(cursor, "alertas", "uq_alertas_cita", "id_cita", unica=True)
+            self._agregar_columna_si_no_existe(cursor, "recomendaciones", "clave", "VARCHAR(50) NULL")
+            self._crear_indice_si_no_existe(
+                cursor, "recomendaciones", "idx_recomendaciones_paciente_origen_fecha",
+                "id_paciente, origen, fecha_generacion"
+            )
+            self._agregar_columna_si_no_existe(cursor, "paciente_medico", "riesgo_puntaje", "DECIMAL(5,2) NULL")
+            self._crear_indice_si_no_existe(
+                cursor, "paciente_medico", "idx_pm_medico_estatus_riesgo", "id_medico, estatus, riesgo_puntaje"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "reportes_medicos", "idx_reportes_paciente_fecha", "id_paciente, fecha_reporte"
+            )
+            # Índices (id_paciente, fecha) de las fuentes de la línea de tiempo del paciente
+            self._crear_indice_si_no_existe(
+                cursor, "alertas", "idx_alertas_paciente_fecha", "id_paciente, fecha_programada"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "recomendaciones", "idx_recomendaciones_paciente_fecha", "id_paciente, fecha_generacion"
+            )
+            self._crear_indice_si_no_existe(
+                cursor, "sesiones_wearable", "idx_sesiones_paciente_fecha", "id_paciente, fecha_sincronizacion"
+            )
+            # Fecha de última modificación e índice (id_paciente, fecha_actualizacion) de las
+            # tablas que sincroniza GET /sync; paciente se lee por su clave primaria
+            for tabla, indice in [
+                ("paciente", None),
+                ("indicadores_salud", "idx_indicadores_paciente_actualizacion"),
+                ("alertas", "idx_alertas_paciente_actualizacion"),
+                ("alertas_recurrentes", "idx_recurrentes_paciente_actualizacion"),
+                ("reportes_medicos", "idx_reportes_paciente_actualizacion"),
+                ("recomendaciones", "idx_recomendaciones_paciente_actualizacion"),
+                ("retos", "idx_retos_paciente_actualizacion"),
+                ("sesiones_wearable", "idx_sesiones_paciente_actualizacion"),
+            ]:
+                self._agregar_columna_si_no_existe(
+                    cursor, tabla, "fecha_actualizacion",
+                    "TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"
+                )
+                if indice:
+                    self._crear_indice_si_no_existe(cursor, tabla, indice, "id_paciente, fecha_actualizacion")
+            # Clave de las tareas programadas: una sola por tramo aunque haya varias instancias
+            self._agregar_columna_si_no_existe(cursor, "trabajos", "clave", "VARCHAR(191) NULL")
+            self._crear_indice_si_no_existe(cursor, "trabajos", "uq_trabajos_clave", "clave", unica=True)
+            # Reintentos de los suscriptores durables del outbox
+            self._agregar_columna_si_no_existe(cursor, "eventos_offsets", "intentos", "INT NOT NULL DEFAULT 0")
+            self._agregar_columna_si_no_existe(cursor, "eventos_offsets", "reintentar_en", "DATETIME(6) NULL")
+            self._agregar_columna_si_no_existe(cursor, "eventos_offsets", "ultimo_error", "TEXT")
             
             print("🎉 ¡Todas las tablas creadas exitosamente en Aiven!")
             
@@ -307,5 +784,61 @@ class Database:
                 connection.close()
                 print("🔒 Conexión cerrada")
 
+    def _agregar_columna_si_no_existe(self, cursor, tabla: str, columna: str, definicion: str) -> bool:
+        """
+        Agrega una columna a una tabla existente (CREATE TABLE IF NOT EXISTS no la agrega).
+        Devuelve True si la agregó, para poder completar los datos existentes.
+        """
+        cursor.execute("""
+            SELECT COUNT(*) AS existe FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (tabla, columna))
+        if not cursor.fetchone()["existe"]:
+            cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}")
+            print(f"✅ Columna '{tabla}.{columna}' agregada")
+            return True
+        return False
+
+    def _crear_indice_si_no_existe(self, cursor, tabla: str, indice: str, columnas: str, unica: bool = False):
+        """Crea un índice en una tabla existente si todavía no existe"""
+        cursor.execute("""
+            SELECT COUNT(*) AS existe FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """, (tabla, indice))
+        if not cursor.fetchone()["existe"]:
+            cursor.execute(f"CREATE {'UNIQUE ' if unica else ''}INDEX {indice} ON {tabla} ({columnas})")
+            print(f"✅ Índice '{indice}' creado en '{tabla}'")
+
+    def _agregar_valor_enum_si_no_existe(self, cursor, tabla: str, columna: str, definicion: str, valor: str):
+        """Redefine una columna ENUM existente si todavía no admite el valor"""
+        cursor.execute("""
+            SELECT COLUMN_TYPE FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (tabla, columna))
+        fila = cursor.fetchone()
+        if fila and f"'{valor}'" not in fila["COLUMN_TYPE"]:
+            cursor.execute(f"ALTER TABLE {tabla} MODIFY COLUMN {columna} {definicion}")
+            print(f"✅ Valor '{valor}' agregado a '{tabla}.{columna}'")
+
+    def _sembrar_reglas_clinicas(self, cursor):
+        """Reglas globales por defecto, solo si la tabla está vacía"""
+        cursor.execute("SELECT COUNT(*) AS total FROM reglas_clinicas")
+        if cursor.fetchone()["total"]:
+            return
+        cursor.executemany("""
+            INSERT INTO reglas_clinicas (metrica, tipo, operador, valor, ventana_horas, severidad, descripcion)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, [
+            ("presion_sistolica", "umbral", ">=", 180, None, "critica", "Posible crisis hipertensiva"),
+            ("presion_diastolica", "umbral", ">=", 120, None, "critica", "Posible crisis hipertensiva"),
+            ("presion_sistolica", "umbral", "<=", 90, None, "advertencia", "Presión arterial baja"),
+            ("glucosa", "umbral", ">=", 300, None, "critica", "Hiperglucemia severa"),
+            ("glucosa", "umbral", "<=", 70, None, "critica", "Hipoglucemia"),
+            ("frecuencia_cardiaca", "umbral", ">=", 130, None, "advertencia", "Taquicardia"),
+            ("frecuencia_cardiaca", "umbral", "<=", 40, None, "advertencia", "Bradicardia"),
+            ("peso", "tendencia", ">=", 2, 72, "advertencia", "Aumento rápido de peso"),
+        ])
+        print("✅ Reglas clínicas por defecto creadas")
+
 # ✅ ESTA LÍNEA ES CRÍTICA - CREA LA INSTANCIA GLOBAL
 db = Database()
\ No newline at end of file
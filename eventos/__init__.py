@@ -0,0 +1,23 @@
+import os
+from .registro import Suscriptor, SUSCRIPTORES, suscriptor
+from .relay import RelayEventos
+from . import suscriptores
+
+# Instancia global: el relay se inicia como tarea de fondo en main.py
+relay = RelayEventos(
+    intervalo_segundos=float(os.getenv("EVENTOS_INTERVALO_SEGUNDOS", "1")),
+    tamano_lote=int(os.getenv("EVENTOS_TAMANO_LOTE", "500")),
+    espera_hueco_segundos=float(os.getenv("EVENTOS_ESPERA_HUECO_SEGUNDOS", "15")),
+    retencion_dias=int(os.getenv("EVENTOS_RETENCION_DIAS", "7")),
+    max_intentos=int(os.getenv("EVENTOS_MAX_INTENTOS", "5")),
+    reintento_base_segundos=float(os.getenv("EVENTOS_REINTENTO_BASE_SEGUNDOS", "1")),
+    reintento_maximo_segundos=float(os.getenv("EVENTOS_REINTENTO_MAXIMO_SEGUNDOS", "300"))
+)
+
+__all__ = [
+    'RelayEventos',
+    'SUSCRIPTORES',
+    'Suscriptor',
+    'relay',
+    'suscriptor'
+]
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+from typing import Callable
+
+@dataclass
+class Suscriptor:
+    """
+    Un consumidor de eventos del outbox: recibe en lotes los eventos de sus tipos. Los
+    durables guardan su offset en la base de datos y corren en una sola instancia a la vez;
+    los locales reaccionan en cada proceso (avisos en memoria) y empiezan en el último
+    evento al arrancar.
+    """
+    nombre: str
+    tipos: frozenset
+    funcion: Callable
+    durable: bool = True
+
+SUSCRIPTORES = {}
+
+def suscriptor(nombre: str, *tipos: str, durable: bool = True):
+    """Decorador que registra una función como suscriptor; recibe la lista de eventos del lote"""
+    def registrar(funcion):
+        SUSCRIPTORES[nombre] = Suscriptor(nombre, frozenset(tipos), funcion, durable)
+        return funcion
+    return registrar
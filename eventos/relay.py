@@ -0,0 +1,136 @@
+import asyncio
+import time
+from models.outbox_model import OutboxModel
+from .registro import SUSCRIPTORES
+
+class RelayEventos:
+    """
+    Entrega los eventos del outbox a los suscriptores registrados. Cada ronda avanza a
+    cada suscriptor hasta tamano_lote eventos desde su offset; si alguno se quedó con un
+    lote completo la siguiente ronda sale enseguida, si no se espera intervalo_segundos.
+
+    Una entrega que falla no mueve el offset del suscriptor, así que el mismo lote se
+    reintenta (al menos una vez): los suscriptores tienen que tolerar eventos repetidos.
+    Los durables reintentan con backoff y de a un evento, y descartan el evento que agota
+    max_intentos (OutboxModel.consumir); los locales saltan el lote tras max_intentos
+    rondas fallidas. Los durables se reparten entre instancias con el bloqueo de su fila
+    en eventos_offsets; los locales corren en todos los procesos.
+    """
+
+    def __init__(self, intervalo_segundos: float = 1.0, tamano_lote: int = 500,
+                 espera_hueco_segundos: float = 15.0, purgar_segundos: float = 3600.0,
+                 retencion_dias: int = 7, max_intentos: int = 5,
+                 reintento_base_segundos: float = 1.0, reintento_maximo_segundos: float = 300.0):
+        self.intervalo_segundos = intervalo_segundos
+        self.tamano_lote = tamano_lote
+        self.espera_hueco_segundos = espera_hueco_segundos
+        self.purgar_segundos = purgar_segundos
+        self.retencion_dias = retencion_dias
+        self.max_intentos = max(max_intentos, 1)
+        self.reintento_base_segundos = reintento_base_segundos
+        self.reintento_maximo_segundos = reintento_maximo_segundos
+        self._offsets_locales = {}
+        self._intentos_locales = {}
+        self._ultima_purga = 0
+        self.entregados = {}
+        self.errores = {}
+
+    def _filtrar(self, suscriptor, eventos: list) -> list:
+        return [evento for evento in eventos if evento["tipo"] in suscriptor.tipos]
+
+    def _entregar(self, suscriptor, eventos: list):
+        relevantes = self._filtrar(suscriptor, eventos)
+        if relevantes:
+            suscriptor.funcion(relevantes)
+            self.entregados[suscriptor.nombre] = self.entregados.get(suscriptor.nombre, 0) + len(relevantes)
+
+    def iniciar(self):
+        """Registra los offsets durables y fija el punto de partida de los locales"""
+        for suscriptor in SUSCRIPTORES.values():
+            if suscriptor.durable:
+                OutboxModel.registrar_consumidor(suscriptor.nombre)
+        ultimo = OutboxModel.get_ultimo_id()
+        for suscriptor in SUSCRIPTORES.values():
+            if not suscriptor.durable:
+                self._offsets_locales[suscriptor.nombre] = ultimo
+
+    def ronda(self) -> bool:
+        """Una pasada por todos los suscriptores; True si quedaron eventos por entregar"""
+        hay_mas = False
+        for suscriptor in SUSCRIPTORES.values():
+            try:
+                if suscriptor.durable:
+                    _, pendientes = OutboxModel.consumir(
+                        suscriptor.nombre, self.tamano_lote, self.espera_hueco_segundos,
+                        lambda eventos: self._entregar(suscriptor, eventos),
+                        self.max_intentos, self.reintento_base_segundos, self.reintento_maximo_segundos
+                    )
+                else:
+                    pendientes = self._ronda_local(suscriptor)
+                hay_mas = hay_mas or pendientes
+            except Exception as e:
+                self.errores[suscriptor.nombre] = self.errores.get(suscriptor.nombre, 0) + 1
+                print(f"❌ Error entregando eventos a '{suscriptor.nombre}': {e}")
+        if time.monotonic() - self._ultima_purga > self.purgar_segundos:
+            self._ultima_purga = time.monotonic()
+            borrados = OutboxModel.purgar(
+                self.retencion_dias, [suscriptor.nombre for suscriptor in SUSCRIPTORES.values() if suscriptor.durable]
+            )
+            if borrados:
+                print(f"🧹 {borrados} evento(s) del outbox purgados")
+        return hay_mas
+
+    def _ronda_local(self, suscriptor) -> bool:
+        nombre = suscriptor.nombre
+        eventos, pendientes = OutboxModel.leer(
+            self._offsets_locales[nombre], self.tamano_lote, self.espera_hueco_segundos
+        )
+        if not eventos:
+            return pendientes
+        try:
+            self._entregar(suscriptor, eventos)
+        except Exception as e:
+            intentos = self._intentos_locales.get(nombre, 0) + 1
+            if intentos < self.max_intentos:
+                self._intentos_locales[nombre] = intentos
+                raise
+            # Un aviso en memoria no vale frenar al suscriptor: se salta el lote
+            self.errores[nombre] = self.errores.get(nombre, 0) + 1
+            print(f"❌ '{nombre}' falló {intentos} veces; se saltan los eventos "
+                  f"{eventos[0]['id_evento']}-{eventos[-1]['id_evento']}: {e}")
+        self._intentos_locales.pop(nombre, None)
+        self._offsets_locales[nombre] = eventos[-1]["id_evento"]
+        return pendientes
+
+    async def ejecutar(self):
+        """Bucle del relay; corre como tarea de fondo iniciada en main.py"""
+        while True:
+            try:
+                await asyncio.to_thread(self.iniciar)
+                break
+            except Exception as e:
+                print(f"❌ Error iniciando el relay de eventos: {e}")
+                await asyncio.sleep(self.intervalo_segundos * 10)
+        print(f"📬 Relay de eventos iniciado ({len(SUSCRIPTORES)} suscriptores)")
+        while True:
+            try:
+                hay_mas = await asyncio.to_thread(self.ronda)
+            except Exception as e:
+                print(f"❌ Error en el relay de eventos: {e}")
+                hay_mas = False
+            if not hay_mas:
+                await asyncio.sleep(self.intervalo_segundos)
+
+    def estadisticas(self) -> dict:
+        return {
+            "suscriptores": {
+                nombre: {
+                    "durable": suscriptor.durable,
+                    "tipos": sorted(suscriptor.tipos),
+                    "entregados": self.entregados.get(nombre, 0),
+                    "errores": self.errores.get(nombre, 0),
+                    **({} if suscriptor.durable else {"ultimo_evento": self._offsets_locales.get(nombre)}),
+                }
+                for nombre, suscriptor in SUSCRIPTORES.items()
+            },
+        }
@@ -0,0 +1,31 @@
+from models.indicadores_salud_model import IndicadoresSaludModel
+from models.outbox_model import ALERTAS_CAMBIADAS, ALERTAS_RECURRENTES_CAMBIADAS, INDICADORES_CREADOS
+from notificaciones import planificador
+from reglas import motor
+from .registro import suscriptor
+
+@suscriptor("planificador_alertas", ALERTAS_CAMBIADAS, ALERTAS_RECURRENTES_CAMBIADAS, durable=False)
+def avisar_planificador(eventos: list):
+    """El planificador corre en cada proceso web; solo el que tiene el arrendamiento reacciona"""
+    for evento in eventos:
+        for identificador in evento["carga"]["ids"]:
+            if evento["tipo"] == ALERTAS_CAMBIADAS:
+                planificador.invalidar(identificador)
+            else:
+                planificador.invalidar_regla(identificador)
+
+@suscriptor("reglas_clinicas", INDICADORES_CREADOS)
+def evaluar_reglas_clinicas(eventos: list):
+    """
+    Evalúa las lecturas nuevas contra las reglas clínicas y avisa a los médicos. Si el lote
+    se reentrega, el enfriamiento del motor evita duplicar las alertas ya generadas.
+    """
+    lecturas = IndicadoresSaludModel.get_by_ids([
+        indicador_id for evento in eventos for indicador_id in evento["carga"]["ids"]
+    ])
+    try:
+        for inicio in range(0, len(lecturas), motor.max_lote):
+            motor.procesar(lecturas[inicio:inicio + motor.max_lote])
+    except Exception:
+        motor.errores += 1
+        raise
@@ -0,0 +1,31 @@
+import os
+import tempfile
+from .almacen import AlmacenArtefactos
+from .rangos import parsear_rango, respuesta_archivo
+from .render import renderizar_html, VERSION_PLANTILLA
+from .servicio import ServicioExportaciones, hash_contenido
+
+# Instancia global: el trabajador se inicia como tarea de fondo en main.py
+almacen = AlmacenArtefactos(
+    os.getenv("EXPORTACIONES_DIR", os.path.join(tempfile.gettempdir(), "cuidartek_exportaciones")),
+    max_bytes=int(os.getenv("EXPORTACIONES_CACHE_MB", "256")) * 1024 * 1024
+)
+exportador = ServicioExportaciones(
+    almacen,
+    procesos=int(os.getenv("EXPORTACIONES_PROCESOS", "2")),
+    sondeo_segundos=int(os.getenv("EXPORTACIONES_SONDEO_SEGUNDOS", "5")),
+    atasco_segundos=int(os.getenv("EXPORTACIONES_ATASCO_SEGUNDOS", "300")),
+    max_intentos=int(os.getenv("EXPORTACIONES_MAX_INTENTOS", "3"))
+)
+
+__all__ = [
+    'AlmacenArtefactos',
+    'ServicioExportaciones',
+    'VERSION_PLANTILLA',
+    'almacen',
+    'exportador',
+    'hash_contenido',
+    'parsear_rango',
+    'renderizar_html',
+    'respuesta_archivo'
+]
@@ -0,0 +1,91 @@
+import os
+import threading
+import uuid
+
+class AlmacenArtefactos:
+    """
+    Caché en disco local de los artefactos exportados, direccionada por el hash de su
+    contenido: el mismo reporte nunca se genera dos veces mientras siga en disco. Al pasar
+    de max_bytes se borran los menos usados (cada acierto actualiza la fecha del archivo).
+    """
+
+    def __init__(self, directorio: str, max_bytes: int, extension: str = ".html"):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.guardados = 0
+        self.eliminados = 0
+
+    def ruta(self, hash_contenido: str) -> str:
+        return os.path.join(self.directorio, hash_contenido[:2], hash_contenido + self.extension)
+
+    def existe(self, hash_contenido: str) -> bool:
+        """True si el artefacto está en disco; marca el uso para el desalojo"""
+        try:
+            os.utime(self.ruta(hash_contenido))
+        except FileNotFoundError:
+            return False
+        self.aciertos += 1
+        return True
+
+    def guardar(self, hash_contenido: str, contenido: bytes) -> str:
+        """Escritura atómica: nunca se sirve un archivo a medio escribir"""
+        ruta = self.ruta(hash_contenido)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f"{ruta}.{uuid.uuid4().hex}.tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+        self.guardados += 1
+        self._recortar(conservar=ruta)
+        return ruta
+
+    def _artefactos(self) -> list:
+        artefactos = []
+        if not os.path.isdir(self.directorio):
+            return artefactos
+        for carpeta in os.scandir(self.directorio):
+            if not carpeta.is_dir():
+                continue
+            for entrada in os.scandir(carpeta.path):
+                if entrada.name.endswith(self.extension):
+                    try:
+                        info = entrada.stat()
+                    except FileNotFoundError:
+                        continue
+                    artefactos.append((info.st_mtime, info.st_size, entrada.path))
+        return artefactos
+
+    def _recortar(self, conservar: str = None):
+        """
+        Borra los menos usados hasta bajar de max_bytes. 'conservar' (el recién guardado)
+        nunca se borra, aunque solo él ya pase del límite: quien lo guardó lo va a leer.
+        """
+        with self._lock:
+            artefactos = sorted(self._artefactos())
+            total = sum(tamano for _, tamano, _ in artefactos)
+            for _, tamano, ruta in artefactos:
+                if total <= self.max_bytes:
+                    break
+                if ruta == conservar:
+                    continue
+                try:
+                    os.remove(ruta)
+                    self.eliminados += 1
+                except FileNotFoundError:
+                    pass
+                total -= tamano
+
+    def estadisticas(self) -> dict:
+        artefactos = self._artefactos()
+        return {
+            "directorio": self.directorio,
+            "artefactos": len(artefactos),
+            "bytes": sum(tamano for _, tamano, _ in artefactos),
+            "max_bytes": self.max_bytes,
+            "aciertos": self.aciertos,
+            "guardados": self.guardados,
+            "eliminados": self.eliminados,
+        }
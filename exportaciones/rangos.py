@@ -0,0 +1,75 @@
+import os
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+TAMANO_BLOQUE = 64 * 1024
+
+def parsear_rango(encabezado: str, tamano: int):
+    """
+    (inicio, fin) inclusivos de un encabezado Range de un solo rango ('bytes=0-99',
+    'bytes=100-', 'bytes=-500'). None si no hay rango o es de varios rangos (se responde el
+    archivo completo, como permite el RFC 9110). ValueError si no se puede satisfacer.
+    """
+    if not encabezado or not encabezado.startswith("bytes=") or "," in encabezado:
+        return None
+    desde, separador, hasta = encabezado[len("bytes="):].strip().partition("-")
+    if not separador:
+        return None
+    try:
+        if desde == "":
+            sufijo = int(hasta)
+            if sufijo <= 0:
+                raise ValueError("Rango vacío")
+            return max(tamano - sufijo, 0), tamano - 1
+        inicio = int(desde)
+        fin = int(hasta) if hasta else tamano - 1
+    except ValueError:
+        raise ValueError("Rango inválido")
+    if inicio >= tamano or fin < inicio:
+        raise ValueError("Rango fuera del archivo")
+    return inicio, min(fin, tamano - 1)
+
+def _leer(ruta: str, inicio: int, fin: int):
+    with open(ruta, "rb") as archivo:
+        archivo.seek(inicio)
+        restante = fin - inicio + 1
+        while restante > 0:
+            bloque = archivo.read(min(TAMANO_BLOQUE, restante))
+            if not bloque:
+                break
+            restante -= len(bloque)
+            yield bloque
+
+def respuesta_archivo(request: Request, ruta: str, etag: str, media_type: str, nombre: str) -> Response:
+    """
+    Sirve un archivo con soporte de Range (206 / 416), If-Range e If-None-Match. El ETag
+    es el hash del contenido, así que un cliente puede reanudar una descarga cortada.
+    """
+    tamano = os.path.getsize(ruta)
+    etag = f'"{etag}"'
+    encabezados = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Cache-Control": "private, max-age=86400",
+        "Content-Disposition": f'attachment; filename="{nombre}"',
+    }
+    if etag in [valor.strip() for valor in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=encabezados)
+
+    rango = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if rango and if_range and if_range.strip() != etag:
+        rango = None
+    try:
+        limites = parsear_rango(rango, tamano)
+    except ValueError:
+        return Response(status_code=416, headers={**encabezados, "Content-Range": f"bytes */{tamano}"})
+
+    if limites is None:
+        inicio, fin, estado = 0, tamano - 1, 200
+    else:
+        (inicio, fin), estado = limites, 206
+        encabezados["Content-Range"] = f"bytes {inicio}-{fin}/{tamano}"
+    encabezados["Content-Length"] = str(fin - inicio + 1)
+    return StreamingResponse(_leer(ruta, inicio, fin), status_code=estado, media_type=media_type,
+                             headers=encabezados)
@@ -0,0 +1,149 @@
+from html import escape
+
+# Cambiarla invalida los artefactos en disco (entra en el hash del contenido)
+VERSION_PLANTILLA = "1"
+
+ETIQUETAS_METRICAS = {
+    "presion_sistolica": "Presión sistólica (mmHg)",
+    "presion_diastolica": "Presión diastólica (mmHg)",
+    "glucosa": "Glucosa (mg/dL)",
+    "peso": "Peso (kg)",
+    "frecuencia_cardiaca": "Frecuencia cardiaca (lpm)",
+}
+
+ESTILOS = """
+body { font-family: Helvetica, Arial, sans-serif; color: #222; margin: 2em auto; max-width: 900px; }
+h1 { font-size: 1.6em; margin-bottom: 0; }
+h2 { font-size: 1.2em; border-bottom: 2px solid #2a7ab0; padding-bottom: .2em; margin-top: 1.6em; }
+table { border-collapse: collapse; width: 100%; font-size: .9em; }
+th, td { border: 1px solid #ccc; padding: .3em .5em; text-align: left; vertical-align: top; }
+th { background: #eef4f8; }
+.nota { color: #666; font-size: .85em; }
+.riesgo-alto { color: #b00020; font-weight: bold; }
+.riesgo-moderado { color: #c77700; font-weight: bold; }
+.riesgo-bajo { color: #2e7d32; font-weight: bold; }
+svg { vertical-align: middle; }
+@media print { body { margin: 0; max-width: none; } h2 { page-break-after: avoid; } tr { page-break-inside: avoid; } }
+"""
+
+def _texto(valor) -> str:
+    return escape("" if valor is None else str(valor))
+
+def _fecha(valor) -> str:
+    return _texto(valor[:16].replace("T", " ") if isinstance(valor, str) else valor)
+
+def _porcentaje(tasa) -> str:
+    return "—" if tasa is None else f"{tasa * 100:.0f}%"
+
+def _tabla(encabezados: list, filas: list) -> str:
+    if not filas:
+        return '<p class="nota">Sin registros en el periodo.</p>'
+    cabecera = "".join(f"<th>{_texto(encabezado)}</th>" for encabezado in encabezados)
+    cuerpo = "".join("<tr>" + "".join(f"<td>{celda}</td>" for celda in fila) + "</tr>" for fila in filas)
+    return f"<table><thead><tr>{cabecera}</tr></thead><tbody>{cuerpo}</tbody></table>"
+
+def _minigrafica(valores: list, ancho: int = 160, alto: int = 32) -> str:
+    """Línea SVG en línea con los promedios semanales; no necesita scripts ni imágenes"""
+    if len(valores) < 2:
+        return ""
+    minimo, maximo = min(valores), max(valores)
+    rango = (maximo - minimo) or 1.0
+    paso = (ancho - 4) / (len(valores) - 1)
+    puntos = " ".join(
+        f"{2 + i * paso:.1f},{alto - 2 - (valor - minimo) / rango * (alto - 4):.1f}"
+        for i, valor in enumerate(valores)
+    )
+    return (f'<svg width="{ancho}" height="{alto}" viewBox="0 0 {ancho} {alto}">'
+            f'<polyline fill="none" stroke="#2a7ab0" stroke-width="1.5" points="{puntos}"/></svg>')
+
+def _seccion_paciente(paciente: dict, riesgo: dict) -> str:
+    filas = [
+        ("Correo", _texto(paciente["correo"])),
+        ("Edad", _texto(paciente["edad"])),
+        ("Sexo", _texto(paciente["sexo"])),
+        ("Peso actual", _texto(paciente["peso_actual"])),
+        ("Altura", _texto(paciente["altura"])),
+        ("Enfermedades crónicas", _texto(paciente["enfermedades_cronicas"])),
+        ("Medicamentos", _texto(paciente["medicamentos"])),
+    ]
+    if riesgo:
+        filas.append((
+            "Riesgo",
+            f'<span class="riesgo-{_texto(riesgo["nivel"])}">{_texto(riesgo["nivel"])}</span> '
+            f'({riesgo["puntaje"]:.0f}/100: signos {riesgo["signos"]:.0f}, crónicas {riesgo["cronicas"]:.0f}, '
+            f'alertas {riesgo["alertas"]:.0f}, citas {riesgo["citas"]:.0f})'
+        ))
+    return "<h2>Datos del paciente</h2>" + _tabla(["Campo", "Valor"], [(f"<b>{nombre}</b>", valor) for nombre, valor in filas])
+
+def _seccion_signos(signos: dict) -> str:
+    filas = []
+    for metrica, semanas in signos.items():
+        if not semanas:
+            continue
+        promedios = [semana["promedio"] for semana in semanas]
+        minimos = [semana["minimo"] for semana in semanas if semana["minimo"] is not None]
+        maximos = [semana["maximo"] for semana in semanas if semana["maximo"] is not None]
+        filas.append((
+            _texto(ETIQUETAS_METRICAS.get(metrica, metrica)),
+            _texto(sum(semana["cantidad"] for semana in semanas)),
+            _texto(semanas[-1]["promedio"]),
+            f"{_texto(min(minimos, default=None))} – {_texto(max(maximos, default=None))}",
+            _minigrafica(promedios),
+        ))
+    return ("<h2>Signos vitales (últimas 26 semanas)</h2>"
+            + _tabla(["Métrica", "Lecturas", "Promedio última semana", "Rango", "Tendencia semanal"], filas))
+
+def _seccion_alertas(alertas: list, adherencia: dict, tipo_medicacion: str) -> str:
+    filas = [
+        (_texto(alerta["tipo_alerta"]), _texto(alerta["completadas"]), _texto(alerta["omitidas"]),
+         _texto(alerta["pendientes"]))
+        for alerta in alertas
+    ]
+    ventanas = ", ".join(
+        f'{ventana["dias"]} días: {_porcentaje(ventana["tasa"])}' for ventana in adherencia["ventanas"]
+    )
+    return ("<h2>Alertas (últimos 90 días)</h2>"
+            + _tabla(["Tipo", "Completadas", "Omitidas", "Pendientes"], filas)
+            + f"<p>Adherencia a {_texto(tipo_medicacion)}: {ventanas}. "
+            + f'Racha actual: {adherencia["racha_actual"]} días (máxima {adherencia["racha_maxima"]}).</p>')
+
+def _seccion_citas(citas: list) -> str:
+    filas = [
+        (_fecha(cita["fecha_cita"]), _texto(cita["medico"]), _texto(cita["motivo"]),
+         _texto(cita["estatus"]), _texto(cita["duracion_minutos"]))
+        for cita in citas
+    ]
+    return "<h2>Citas médicas</h2>" + _tabla(["Fecha", "Médico", "Motivo", "Estatus", "Minutos"], filas)
+
+def _seccion_reportes(reportes: list) -> str:
+    filas = [
+        (_fecha(reporte["fecha_reporte"]), _texto(reporte["medico"]), _texto(reporte["descripcion_general"]),
+         _texto(reporte["diagnostico"]), _texto(reporte["recomendaciones_medicas"]))
+        for reporte in reportes
+    ]
+    return ("<h2>Reportes médicos recientes</h2>"
+            + _tabla(["Fecha", "Médico", "Descripción", "Diagnóstico", "Recomendaciones"], filas))
+
+def renderizar_html(datos: dict) -> bytes:
+    """
+    Reporte consolidado en HTML imprimible a partir de ExportacionesModel.get_datos_reporte.
+    Es una función pura (mismos datos, mismos bytes), así el artefacto se puede cachear por
+    el hash de sus datos y generar en otro proceso.
+    """
+    paciente = datos["paciente"]
+    secciones = [
+        _seccion_paciente(paciente, datos["riesgo"]),
+        _seccion_signos(datos["signos"]),
+        _seccion_alertas(datos["alertas"], datos["adherencia"], datos["tipo_medicacion"]),
+        _seccion_citas(datos["citas"]),
+        _seccion_reportes(datos["reportes"]),
+    ]
+    documento = (
+        '<!DOCTYPE html><html lang="es"><head><meta charset="utf-8">'
+        f'<title>Reporte de {_texto(paciente["nombre"])}</title><style>{ESTILOS}</style></head><body>'
+        f'<h1>Reporte de salud: {_texto(paciente["nombre"])}</h1>'
+        f'<p class="nota">CuidarTek · datos al {_texto(datos["fecha_corte"])}</p>'
+        + "".join(secciones)
+        + "</body></html>"
+    )
+    return documento.encode("utf-8")
@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from models.exportaciones_model import ExportacionesModel
+from .render import renderizar_html, VERSION_PLANTILLA
+
+def hash_contenido(datos: dict) -> str:
+    """Hash de los datos canónicos del reporte y de la versión de la plantilla"""
+    canonico = json.dumps(datos, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(f"{VERSION_PLANTILLA}\n{canonico}".encode("utf-8")).hexdigest()
+
+class ServicioExportaciones:
+    """
+    Trabajador de la cola de exportaciones (tabla reportes_exportaciones).
+
+    Reclama trabajos de la BD con ExportacionesModel.reclamar, así que varias instancias
+    pueden compartir la cola, y procesa hasta 'procesos' a la vez. La consulta de datos corre
+    en un hilo y el render en un pool de procesos ('spawn'), fuera del loop de la API.
+    Si el hash del contenido ya está en el almacén, el trabajo termina sin renderizar.
+
+    avisar() despierta al trabajador cuando esta instancia encola algo; los trabajos de
+    otras instancias se recogen en el siguiente sondeo.
+    """
+
+    def __init__(self, almacen, procesos: int = 2, sondeo_segundos: int = 5,
+                 atasco_segundos: int = 300, max_intentos: int = 3):
+        self.almacen = almacen
+        self.procesos = max(procesos, 1)
+        self.sondeo_segundos = sondeo_segundos
+        self.atasco_segundos = atasco_segundos
+        self.max_intentos = max_intentos
+        self._pool = None
+        self._cambio = None
+        self._loop = None
+        self._en_curso = set()
+        self.generadas = 0
+        self.desde_cache = 0
+        self.fallidas = 0
+
+    def avisar(self):
+        """Hay un trabajo nuevo en la cola. Se puede llamar desde cualquier hilo"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._cambio.set)
+
+    async def _procesar(self, exportacion: dict):
+        exportacion_id = exportacion["id_exportacion"]
+        try:
+            datos = await asyncio.to_thread(ExportacionesModel.get_datos_reporte, exportacion["id_paciente"])
+            if datos is None:
+                await asyncio.to_thread(ExportacionesModel.marcar_error, exportacion_id, "Paciente no encontrado")
+                self.fallidas += 1
+                return
+            hash_datos = hash_contenido(datos)
+            en_cache = await asyncio.to_thread(self.almacen.existe, hash_datos)
+            if en_cache:
+                self.desde_cache += 1
+            else:
+                contenido = await self._loop.run_in_executor(self._pool, renderizar_html, datos)
+                await asyncio.to_thread(self.almacen.guardar, hash_datos, contenido)
+                self.generadas += 1
+            tamano = await asyncio.to_thread(os.path.getsize, self.almacen.ruta(hash_datos))
+            await asyncio.to_thread(
+                ExportacionesModel.marcar_lista, exportacion_id, hash_datos, tamano, en_cache
+            )
+        except Exception as e:
+            self.fallidas += 1
+            print(f"❌ Error exportando el reporte {exportacion_id}: {e}")
+            try:
+                await asyncio.to_thread(ExportacionesModel.marcar_error, exportacion_id, str(e))
+            except Exception:
+                pass
+        finally:
+            self._cambio.set()
+
+    async def ejecutar(self):
+        """Bucle principal; se lanza como tarea de fondo al iniciar la aplicación"""
+        self._loop = asyncio.get_running_loop()
+        self._cambio = asyncio.Event()
+        self._pool = ProcessPoolExecutor(max_workers=self.procesos, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            while True:
+                self._cambio.clear()
+                try:
+                    while len(self._en_curso) < self.procesos:
+                        exportacion = await asyncio.to_thread(
+                            ExportacionesModel.reclamar, self.atasco_segundos, self.max_intentos
+                        )
+                        if not exportacion:
+                            break
+                        tarea = asyncio.create_task(self._procesar(exportacion))
+                        self._en_curso.add(tarea)
+                        tarea.add_done_callback(self._en_curso.discard)
+                except Exception as e:
+                    print(f"❌ Error en la cola de exportaciones: {e}")
+
+                try:
+                    await asyncio.wait_for(self._cambio.wait(), timeout=self.sondeo_segundos)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for tarea in list(self._en_curso):
+                tarea.cancel()
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._loop = None
+
+    def estadisticas(self) -> dict:
+        return {
+            "activo": self._loop is not None,
+            "procesos": self.procesos,
+            "en_curso": len(self._en_curso),
+            "generadas": self.generadas,
+            "desde_cache": self.desde_cache,
+            "fallidas": self.fallidas,
+            "almacen": self.almacen.estadisticas(),
+        }
@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import time
+from database import db
+from cargadores import Cargador
+from models.paciente_model import PacienteModel
+from models.usuario_model import UsuarioModel
+
+class _ContarConexiones:
+    """Cuenta las conexiones que abre db.get_connection mientras está activo"""
+
+    def __enter__(self):
+        self.conexiones = 0
+        self._original = db.get_connection
+
+        def contar():
+            self.conexiones += 1
+            return self._original()
+
+        db.get_connection = contar
+        return self
+
+    def __exit__(self, *_):
+        db.get_connection = self._original
+
+def _medir(flujo) -> dict:
+    with _ContarConexiones() as contador:
+        inicio = time.perf_counter()
+        flujo()
+        segundos = time.perf_counter() - inicio
+    return {"conexiones": contador.conexiones, "ms": round(segundos * 1000, 1)}
+
+def benchmark_cargadores(cantidad: int = 50) -> dict:
+    """
+    Flujo del panel del médico contra la BD configurada: 'cantidad' pacientes y el usuario
+    de cada uno. 'antes' los busca de a uno (get_by_id sin caché, una conexión por fila),
+    'lote' con get_by_ids (lo que hacen GET /pacientes?ids= y GET /usuarios?ids=) y
+    'cargador' con búsquedas sueltas concurrentes que un Cargador junta en una consulta.
+    """
+    paciente_ids = PacienteModel.get_ids_fragmento(0, 1, limite=cantidad)
+    if not paciente_ids:
+        print("⚠️ No hay pacientes para el benchmark")
+        return {}
+
+    def antes():
+        pacientes = [PacienteModel.get_by_id.__wrapped__(paciente_id) for paciente_id in paciente_ids]
+        for paciente in pacientes:
+            UsuarioModel.get_by_id(paciente["id_usuario"])
+
+    def lote():
+        pacientes = PacienteModel.get_by_ids(paciente_ids)
+        UsuarioModel.get_by_ids([paciente["id_usuario"] for paciente in pacientes.values()])
+
+    def cargador():
+        async def flujo():
+            pacientes, usuarios = Cargador(PacienteModel.get_by_ids), Cargador(UsuarioModel.get_by_ids)
+
+            async def panel(paciente_id):
+                paciente = await pacientes.cargar(paciente_id)
+                return await usuarios.cargar(paciente["id_usuario"])
+
+            await asyncio.gather(*(panel(paciente_id) for paciente_id in paciente_ids))
+        asyncio.run(flujo())
+
+    resultado = {"pacientes": len(paciente_ids)}
+    for nombre, flujo in (("antes", antes), ("lote", lote), ("cargador", cargador)):
+        resultado[nombre] = _medir(flujo)
+    print(f"📊 Panel de {len(paciente_ids)} pacientes: "
+          + ", ".join(f"{nombre} {resultado[nombre]['conexiones']} conexiones en {resultado[nombre]['ms']} ms"
+                      for nombre in ("antes", "lote", "cargador")))
+    return resultado
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de búsquedas por id: de a una vs en lote")
+    parser.add_argument("--cantidad", type=int, default=50)
+    argumentos = parser.parse_args()
+    benchmark_cargadores(argumentos.cantidad)
@@ -0,0 +1,63 @@
+import argparse
+import threading
+import time
+from models.trabajos_model import TrabajosModel
+from trabajos import Trabajador, tarea
+
+COLA_BENCHMARK = "benchmark"
+
+@tarea("benchmark.nada", cola=COLA_BENCHMARK)
+def _nada(**carga):
+    pass
+
+def benchmark_trabajos(cantidad: int = 5000, trabajadores: int = 2, hilos: int = 8, tamano_lote: int = 500) -> dict:
+    """
+    Rendimiento de la cola contra la BD configurada: encola 'cantidad' trabajos vacíos en
+    lotes y los consume con varios trabajadores que compiten por las mismas filas (como
+    procesos 'worker' distintos). Usa su propia cola y la vacía al terminar.
+    """
+    TrabajosModel.vaciar_cola(COLA_BENCHMARK)
+    inicio = time.perf_counter()
+    for desde in range(0, cantidad, tamano_lote):
+        TrabajosModel.encolar_lote([
+            {"tipo": "benchmark.nada", "cola": COLA_BENCHMARK, "carga": {"n": n}}
+            for n in range(desde, min(desde + tamano_lote, cantidad))
+        ])
+    segundos_encolar = time.perf_counter() - inicio
+
+    pool = [Trabajador([COLA_BENCHMARK], hilos=hilos, sondeo_segundos=0.05, sondeo_maximo_segundos=0.2,
+                       purgar_segundos=float("inf")) for _ in range(trabajadores)]
+    hilos_trabajadores = [threading.Thread(target=trabajador.ejecutar) for trabajador in pool]
+    inicio = time.perf_counter()
+    for hilo in hilos_trabajadores:
+        hilo.start()
+    while sum(trabajador.completados + trabajador.fallidos for trabajador in pool) < cantidad:
+        time.sleep(0.05)
+    segundos_consumir = time.perf_counter() - inicio
+    for trabajador in pool:
+        trabajador.detener()
+    for hilo in hilos_trabajadores:
+        hilo.join()
+
+    resumen = {estado["estado"]: estado["cantidad"] for estado in TrabajosModel.get_resumen()
+               if estado["cola"] == COLA_BENCHMARK}
+    TrabajosModel.vaciar_cola(COLA_BENCHMARK)
+    resultado = {
+        "trabajos": cantidad,
+        "encolados_por_segundo": round(cantidad / segundos_encolar, 1),
+        "procesados_por_segundo": round(cantidad / segundos_consumir, 1),
+        "por_estado": resumen,
+        "reclamados_dos_veces": sum(trabajador.completados for trabajador in pool) - resumen.get("completado", 0),
+    }
+    print(f"📊 Cola de trabajos: {resultado['encolados_por_segundo']} encolados/s, "
+          f"{resultado['procesados_por_segundo']} procesados/s con {trabajadores} trabajadores x {hilos} hilos "
+          f"({resumen})")
+    return resultado
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la cola de trabajos")
+    parser.add_argument("--cantidad", type=int, default=5000)
+    parser.add_argument("--trabajadores", type=int, default=2)
+    parser.add_argument("--hilos", type=int, default=8)
+    argumentos = parser.parse_args()
+    benchmark_trabajos(argumentos.cantidad, argumentos.trabajadores, argumentos.hilos)
@@ -0,0 +1,34 @@
+import os
+import socket
+import uuid
+from models.arrendamiento_model import ArrendamientoModel
+from riesgo import recalcular_todos, recalcular_pendientes
+
+PROPIETARIO = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def calcular_riesgo_pacientes(procesos: int = None):
+    """Recálculo nocturno del puntaje de riesgo de toda la población"""
+    if not ArrendamientoModel.adquirir("riesgo_pacientes", PROPIETARIO, 3600):
+        return 0
+    try:
+        resumen = recalcular_todos(procesos)
+        print(f"🩺 Riesgo recalculado para {resumen['pacientes']} pacientes en {resumen['segundos']}s "
+              f"({resumen['pacientes_por_segundo']} pacientes/s)")
+        return resumen["pacientes"]
+    finally:
+        ArrendamientoModel.liberar("riesgo_pacientes", PROPIETARIO)
+
+def calcular_riesgo_pendientes():
+    """Recalcula el riesgo de los pacientes con datos nuevos desde la última pasada"""
+    if not ArrendamientoModel.adquirir("riesgo_pendientes", PROPIETARIO, 300):
+        return 0
+    try:
+        procesados = recalcular_pendientes()
+        if procesados:
+            print(f"🩺 Riesgo actualizado para {procesados} paciente(s) con datos nuevos")
+        return procesados
+    finally:
+        ArrendamientoModel.liberar("riesgo_pendientes", PROPIETARIO)
+
+if __name__ == "__main__":
+    calcular_riesgo_pacientes()
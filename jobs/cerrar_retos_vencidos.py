@@ -0,0 +1,11 @@
+from models.retos_model import RetosModel
+
+def cerrar_retos_vencidos():
+    """Marca como completados o vencidos los retos activos cuya fecha_fin ya pasó"""
+    cerrados = RetosModel.cerrar_vencidos()
+    if cerrados:
+        print(f"🏁 {cerrados} reto(s) vencidos cerrados")
+    return cerrados
+
+if __name__ == "__main__":
+    cerrar_retos_vencidos()
@@ -0,0 +1,14 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+def ejecutar_por_fragmentos(funcion, procesos: int, *argumentos) -> list:
+    """
+    Llama funcion(fragmento, procesos, *argumentos) para cada fragmento de 0 a procesos - 1
+    en un pool de procesos y devuelve sus resultados. Usa 'spawn' para no heredar hilos ni
+    conexiones del proceso de la API. Con un solo proceso corre en el proceso actual.
+    """
+    if procesos <= 1:
+        return [funcion(0, 1, *argumentos)]
+    with ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futuros = [pool.submit(funcion, fragmento, procesos, *argumentos) for fragmento in range(procesos)]
+        return [futuro.result() for futuro in futuros]
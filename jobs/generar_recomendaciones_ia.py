@@ -0,0 +1,30 @@
+import os
+import socket
+import uuid
+from cache import invalidar
+from models.arrendamiento_model import ArrendamientoModel
+from recomendaciones_ia import generar
+
+NOMBRE_ARRENDAMIENTO = "recomendaciones_ia"
+PROPIETARIO = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def generar_recomendaciones_ia(procesos: int = None):
+    """
+    Genera las recomendaciones de origen 'IA' de toda la población. El arrendamiento evita
+    que dos instancias corran el lote a la vez.
+    """
+    if not ArrendamientoModel.adquirir(NOMBRE_ARRENDAMIENTO, PROPIETARIO, 3600):
+        return 0
+    try:
+        resumen = generar(procesos)
+        # Los procesos del pool no comparten la caché en memoria de este proceso
+        for paciente_id in resumen["con_nuevas"]:
+            invalidar(f"paciente:{paciente_id}:recomendaciones")
+        print(f"🤖 Recomendaciones IA: {resumen['creadas']} nuevas para {resumen['pacientes']} pacientes "
+              f"en {resumen['segundos']}s ({resumen['pacientes_por_segundo']} pacientes/s)")
+        return resumen["creadas"]
+    finally:
+        ArrendamientoModel.liberar(NOMBRE_ARRENDAMIENTO, PROPIETARIO)
+
+if __name__ == "__main__":
+    generar_recomendaciones_ia()
@@ -0,0 +1,38 @@
+import asyncio
+from datetime import datetime, timedelta
+
+async def ejecutar_periodicamente(nombre: str, funcion, intervalo_segundos: float):
+    """
+    Ejecuta una función síncrona (acceso a BD) cada intervalo_segundos en un hilo aparte,
+    para no bloquear el event loop. Los errores se registran y la tarea sigue viva.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(funcion)
+        except Exception as e:
+            print(f"❌ Error en tarea periódica '{nombre}': {e}")
+        await asyncio.sleep(intervalo_segundos)
+
+def segundos_hasta(hora: str, ahora: datetime = None) -> float:
+    """Segundos que faltan para la próxima vez que el reloj marque hora ("HH:MM")"""
+    ahora = ahora or datetime.now()
+    horas, minutos = (int(parte) for parte in hora.split(":"))
+    siguiente = ahora.replace(hour=horas, minute=minutos, second=0, microsecond=0)
+    if siguiente <= ahora:
+        siguiente += timedelta(days=1)
+    return (siguiente - ahora).total_seconds()
+
+async def ejecutar_diariamente(nombre: str, funcion, hora: str, al_iniciar: bool = True):
+    """
+    Como ejecutar_periodicamente, pero una vez al día a la hora local indicada ("HH:MM").
+    Con al_iniciar también corre al arrancar, por si un reinicio se saltó la ejecución.
+    """
+    esperar = not al_iniciar
+    while True:
+        if esperar:
+            await asyncio.sleep(segundos_hasta(hora))
+        esperar = True
+        try:
+            await asyncio.to_thread(funcion)
+        except Exception as e:
+            print(f"❌ Error en tarea diaria '{nombre}': {e}")
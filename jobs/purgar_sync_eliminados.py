@@ -0,0 +1,11 @@
+from models.sync_model import SyncModel
+
+def purgar_sync_eliminados():
+    """Borra las lápidas de sincronización más viejas que SYNC_RETENCION_DIAS"""
+    borradas = SyncModel.purgar_eliminados()
+    if borradas:
+        print(f"🧹 {borradas} lápida(s) de sincronización purgadas")
+    return borradas
+
+if __name__ == "__main__":
+    purgar_sync_eliminados()
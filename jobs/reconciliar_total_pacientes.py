@@ -0,0 +1,11 @@
+from models.medico_model import MedicoModel
+
+def reconciliar_total_pacientes():
+    """Corrige la deriva del contador medico.total_pacientes respecto a paciente_medico"""
+    corregidos = MedicoModel.reconciliar_total_pacientes()
+    if corregidos:
+        print(f"🔧 total_pacientes reconciliado en {corregidos} médico(s)")
+    return corregidos
+
+if __name__ == "__main__":
+    reconciliar_total_pacientes()
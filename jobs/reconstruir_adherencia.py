@@ -0,0 +1,10 @@
+from models.adherencia_model import AdherenciaModel
+
+def reconstruir_adherencia(tamano_lote: int = 200):
+    """Regenera adherencia_dias a partir de las alertas y ocurrencias de medicación"""
+    procesados = AdherenciaModel.reconstruir(tamano_lote)
+    print(f"🔧 adherencia_dias reconstruido para {procesados} paciente(s)")
+    return procesados
+
+if __name__ == "__main__":
+    reconstruir_adherencia()
@@ -0,0 +1,10 @@
+from models.indicadores_resumen_model import IndicadoresResumenModel
+
+def reconstruir_indicadores_resumen(tamano_lote: int = 200):
+    """Regenera los resúmenes diarios y semanales a partir de indicadores_salud"""
+    procesados = IndicadoresResumenModel.reconstruir(tamano_lote)
+    print(f"🔧 indicadores_resumen reconstruido para {procesados} paciente(s)")
+    return procesados
+
+if __name__ == "__main__":
+    reconstruir_indicadores_resumen()
@@ -0,0 +1,10 @@
+from models.indicadores_ultimos_model import IndicadoresUltimosModel
+
+def reconstruir_indicadores_ultimos(tamano_lote: int = 500):
+    """Regenera la proyección indicadores_ultimos a partir de indicadores_salud"""
+    procesados = IndicadoresUltimosModel.reconstruir(tamano_lote)
+    print(f"🔧 indicadores_ultimos reconstruido para {procesados} paciente(s)")
+    return procesados
+
+if __name__ == "__main__":
+    reconstruir_indicadores_ultimos()
@@ -0,0 +1,43 @@
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from models.alertas_model import AlertasModel, fecha_recordatorio_cita, descripcion_recordatorio_cita
+from models.arrendamiento_model import ArrendamientoModel
+
+NOMBRE_ARRENDAMIENTO = "recordatorios_citas"
+PROPIETARIO = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def generar_recordatorios_citas(horizonte_horas: int = None, tamano_lote: int = 500):
+    """
+    Crea la alerta tipo 'cita' de cada cita programada dentro del horizonte que todavía no
+    la tenga. Es idempotente: la consulta excluye las citas con recordatorio y
+    create_recordatorios_citas salta las que lo recibieron después (alertas.id_cita es
+    única). El arrendamiento evita que dos instancias corran a la vez.
+    """
+    horizonte_horas = horizonte_horas or int(os.getenv("RECORDATORIO_CITAS_HORIZONTE_HORAS", "168"))
+    if not ArrendamientoModel.adquirir(NOMBRE_ARRENDAMIENTO, PROPIETARIO, 300):
+        return 0
+    try:
+        ahora = datetime.now()
+        citas = AlertasModel.get_citas_sin_recordatorio(ahora, ahora + timedelta(hours=horizonte_horas))
+        creadas = 0
+        for inicio in range(0, len(citas), tamano_lote):
+            creadas += len(AlertasModel.create_recordatorios_citas([
+                {
+                    "id_paciente": cita["id_paciente"],
+                    "tipo_alerta": "cita",
+                    "descripcion": descripcion_recordatorio_cita(cita["fecha_cita"], cita["medico"]),
+                    "fecha_programada": fecha_recordatorio_cita(cita["fecha_cita"]),
+                    "id_cita": cita["id_cita"],
+                }
+                for cita in citas[inicio:inicio + tamano_lote]
+            ]))
+        if creadas:
+            print(f"📅 {creadas} recordatorio(s) de cita creados")
+        return creadas
+    finally:
+        ArrendamientoModel.liberar(NOMBRE_ARRENDAMIENTO, PROPIETARIO)
+
+if __name__ == "__main__":
+    generar_recordatorios_citas()
@@ -1,6 +1,15 @@
+import asyncio
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from database import db
+from cache import cache
+from notificaciones import planificador
+from reglas import motor as motor_reglas
+from exportaciones import exportador
+from eventos import relay as relay_eventos
+from models.outbox_model import OutboxModel
+from trabajos import programar_periodicamente, programar_diariamente
 from middleware.logging_middleware import LoggingMiddleware
 from controllers import (
     auth_controller,
@@ -8,6 +17,7 @@ from controllers import (
     paciente_controller,
     indicadores_salud_controller,
     alertas_controller,
+    alertas_recurrentes_controller,
     recomendaciones_controller,
     retos_controller,
     citas_medicas_controller,
@@ -16,7 +26,10 @@ from controllers import (
     log_accesos_controller,
     mensajes_controller,
     paciente_medico_controller,
-    medico_controller
+    medico_controller,
+    reglas_clinicas_controller,
+    trabajos_controller,
+    sync_controller
 )
 
 app = FastAPI(
@@ -37,10 +50,68 @@ app.add_middleware(
 # Middleware de logging
 app.add_middleware(LoggingMiddleware)
 
+# Tareas en segundo plano iniciadas con la aplicación
+tareas_periodicas = []
+
 # Crear base de datos al iniciar
 @app.on_event("startup")
 async def startup_event():
     db.create_database_and_tables()
+    # La API solo programa los lotes: los encola en 'trabajos' y los ejecuta worker.py.
+    # Con TAREAS_EN_COLA=0 (despliegue sin proceso worker) corren en este proceso.
+    en_cola = os.getenv("TAREAS_EN_COLA", "1") == "1"
+    tareas_periodicas.append(asyncio.create_task(programar_periodicamente(
+        "reconciliar_total_pacientes",
+        int(os.getenv("RECONCILIAR_TOTAL_PACIENTES_SEGUNDOS", "3600")),
+        en_cola=en_cola
+    )))
+    tareas_periodicas.append(asyncio.create_task(programar_periodicamente(
+        "recordatorios_citas",
+        int(os.getenv("RECORDATORIO_CITAS_SEGUNDOS", "900")),
+        en_cola=en_cola
+    )))
+    tareas_periodicas.append(asyncio.create_task(programar_diariamente(
+        "cerrar_retos_vencidos",
+        os.getenv("CERRAR_RETOS_HORA", "00:05"),
+        en_cola=en_cola
+    )))
+    tareas_periodicas.append(asyncio.create_task(programar_diariamente(
+        "recomendaciones_ia",
+        os.getenv("RECOMENDACIONES_IA_HORA", "03:00"),
+        al_iniciar=False,
+        en_cola=en_cola
+    )))
+    tareas_periodicas.append(asyncio.create_task(programar_diariamente(
+        "riesgo_pacientes",
+        os.getenv("RIESGO_HORA", "02:00"),
+        al_iniciar=False,
+        en_cola=en_cola
+    )))
+    tareas_periodicas.append(asyncio.create_task(programar_periodicamente(
+        "riesgo_pendientes",
+        int(os.getenv("RIESGO_PENDIENTES_SEGUNDOS", "300")),
+        en_cola=en_cola
+    )))
+    tareas_periodicas.append(asyncio.create_task(programar_diariamente(
+        "purgar_sync_eliminados",
+        os.getenv("SYNC_PURGA_HORA", "04:00"),
+        al_iniciar=False,
+        en_cola=en_cola
+    )))
+    # Estos tres siguen en la API a propósito: el planificador y el relay reaccionan en
+    # segundos a cambios de este proceso, y las exportaciones se sirven desde el disco
+    # local de la instancia que las renderizó (almacén de artefactos no compartido).
+    if os.getenv("PLANIFICADOR_ALERTAS", "1") == "1":
+        tareas_periodicas.append(asyncio.create_task(planificador.ejecutar()))
+    if os.getenv("EXPORTACIONES_WORKER", "1") == "1":
+        tareas_periodicas.append(asyncio.create_task(exportador.ejecutar()))
+    if os.getenv("EVENTOS_RELAY", "1") == "1":
+        tareas_periodicas.append(asyncio.create_task(relay_eventos.ejecutar()))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for tarea in tareas_periodicas:
+        tarea.cancel()
 
 @app.get("/")
 async def root():
@@ -51,6 +122,7 @@ app.include_router(auth_controller.router)
 app.include_router(usuario_controller.router)
 app.include_router(paciente_controller.router)
 app.include_router(indicadores_salud_controller.router)
+app.include_router(alertas_recurrentes_controller.router)
 app.include_router(alertas_controller.router)
 app.include_router(recomendaciones_controller.router)
 app.include_router(retos_controller.router)
@@ -61,15 +133,40 @@ app.include_router(log_accesos_controller.router)
 app.include_router(mensajes_controller.router)
 app.include_router(paciente_medico_controller.router)
 app.include_router(medico_controller.router)
+app.include_router(reglas_clinicas_controller.router)
+app.include_router(trabajos_controller.router)
+app.include_router(sync_controller.router)
 
 @app.get("/status/database")
 async def verificar_estado_db():
     connection = db.get_connection()
     if connection:
         connection.close()
-        return {"status": "Conectado", "database": db.database}
+        return {"status": "Conectado", "database": db.database,
+                "singleflight": db.singleflight.estadisticas()}
     else:
-        return {"status": "Desconectado", "database": db.database}
+        return {"status": "Desconectado", "database": db.database,
+                "singleflight": db.singleflight.estadisticas()}
+
+@app.get("/status/cache")
+async def verificar_estado_cache():
+    return cache.estadisticas()
+
+@app.get("/status/planificador")
+async def verificar_estado_planificador():
+    return planificador.estadisticas()
+
+@app.get("/status/reglas-clinicas")
+async def verificar_estado_reglas_clinicas():
+    return motor_reglas.estadisticas()
+
+@app.get("/status/exportaciones")
+async def verificar_estado_exportaciones():
+    return exportador.estadisticas()
+
+@app.get("/status/eventos")
+async def verificar_estado_eventos():
+    return {**relay_eventos.estadisticas(), **OutboxModel.get_resumen()}
 
 if __name__ == "__main__":
     import uvicorn
@@ -2,9 +2,13 @@
 from .usuario_model import UsuarioModel
 from .paciente_model import PacienteModel
 from .indicadores_salud_model import IndicadoresSaludModel
+from .indicadores_ultimos_model import IndicadoresUltimosModel
+from .indicadores_resumen_model import IndicadoresResumenModel
 from .alertas_model import AlertasModel
+from .alertas_recurrentes_model import AlertasRecurrentesModel
 from .recomendaciones_model import RecomendacionesModel
 from .retos_model import RetosModel
+from .retos_progreso_model import RetosProgresoModel
 from .citas_medicas_model import CitasMedicasModel
 from .reportes_medicos_model import ReportesMedicosModel
 from .sesiones_wearable_model import SesionesWearableModel
@@ -12,19 +16,43 @@ from .log_accesos_model import LogAccesosModel
 from .mensajes_model import MensajesModel
 from .paciente_medico_model import PacienteMedicoModel
 from .medico_model import MedicoModel
+from .reglas_clinicas_model import ReglasClinicasModel
+from .calendario_model import CalendarioModel
+from .clasificaciones_model import ClasificacionesModel
+from .riesgo_model import RiesgoModel
+from .adherencia_model import AdherenciaModel
+from .exportaciones_model import ExportacionesModel
+from .trabajos_model import TrabajosModel
+from .timeline_model import TimelineModel
+from .sync_model import SyncModel
+from .outbox_model import OutboxModel
 
 __all__ = [
     'UsuarioModel',
     'PacienteModel',
     'IndicadoresSaludModel',
+    'IndicadoresUltimosModel',
+    'IndicadoresResumenModel',
     'AlertasModel',
+    'AlertasRecurrentesModel',
     'RecomendacionesModel',
     'RetosModel',
+    'RetosProgresoModel',
     'CitasMedicasModel',
     'ReportesMedicosModel',
     'SesionesWearableModel',
     'LogAccesosModel',
     'MensajesModel',
     'PacienteMedicoModel',
-    'MedicoModel'
+    'MedicoModel',
+    'ReglasClinicasModel',
+    'CalendarioModel',
+    'ClasificacionesModel',
+    'RiesgoModel',
+    'AdherenciaModel',
+    'ExportacionesModel',
+    'TrabajosModel',
+    'TimelineModel',
+    'SyncModel',
+    'OutboxModel'
 ]
\ No newline at end of file
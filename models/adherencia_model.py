@@ -0,0 +1,184 @@
+from database import db
+import pymysql
+from pymysql import Error
+from datetime import date, datetime, timedelta
+
+TIPO_MEDICACION = "medicación"
+VENTANAS_ADHERENCIA = [7, 30, 90]
+
+def _aporte(registro: dict):
+    """Clave (id_paciente, fecha) y conteos (completadas, omitidas) con que cuenta un registro"""
+    if not registro or registro.get("tipo_alerta") != TIPO_MEDICACION:
+        return None, (0, 0)
+    estatus = registro.get("estatus", "pendiente")
+    fecha = registro["fecha_programada"]
+    fecha = fecha.date() if isinstance(fecha, datetime) else fecha
+    return (registro["id_paciente"], fecha), (int(estatus == "completada"), int(estatus == "omitida"))
+
+def calcular_adherencia(dias: list, hoy: date = None, ventanas: list = None) -> dict:
+    """
+    Tasas de adherencia de las ventanas (completadas / dosis con estatus) y rachas a partir
+    de los días de adherencia_dias. Una racha cuenta días con dosis registradas y ninguna
+    omitida; los días sin dosis no la cortan.
+    """
+    hoy = hoy or date.today()
+    ventanas = ventanas or VENTANAS_ADHERENCIA
+    con_dosis = sorted(
+        (dia for dia in dias if dia["completadas"] + dia["omitidas"] > 0), key=lambda dia: dia["fecha"]
+    )
+    resultado = []
+    for ventana in ventanas:
+        desde = hoy - timedelta(days=ventana - 1)
+        completadas = sum(dia["completadas"] for dia in con_dosis if desde <= dia["fecha"] <= hoy)
+        omitidas = sum(dia["omitidas"] for dia in con_dosis if desde <= dia["fecha"] <= hoy)
+        total = completadas + omitidas
+        resultado.append({
+            "dias": ventana,
+            "completadas": completadas,
+            "omitidas": omitidas,
+            "tasa": round(completadas / total, 4) if total else None,
+        })
+    racha_maxima = racha = 0
+    for dia in con_dosis:
+        racha = racha + 1 if dia["omitidas"] == 0 else 0
+        racha_maxima = max(racha_maxima, racha)
+    return {
+        "ventanas": resultado,
+        "racha_actual": racha,
+        "racha_maxima": racha_maxima,
+        "ultimo_registro": con_dosis[-1]["fecha"] if con_dosis else None,
+    }
+
+class AdherenciaModel:
+    """
+    Resumen diario de adherencia a la medicación (tabla adherencia_dias): dosis
+    completadas y omitidas por paciente y día, de alertas tipo 'medicación' y de las
+    ocurrencias de alertas recurrentes de medicación. Lo mantienen los modelos de alertas
+    dentro de su transacción aplicando la diferencia entre el registro anterior y el nuevo.
+    """
+
+    @staticmethod
+    def aplicar_cambios(cursor, cambios: list):
+        """
+        cambios: pares (anterior, nuevo) de alertas u ocurrencias con id_paciente,
+        tipo_alerta, fecha_programada y estatus; None para altas y bajas.
+        Todas las diferencias se aplican con un único INSERT multi-fila.
+        """
+        deltas = {}
+        for anterior, nuevo in cambios:
+            for registro, signo in ((anterior, -1), (nuevo, 1)):
+                clave, (completadas, omitidas) = _aporte(registro)
+                if clave is None or not (completadas or omitidas):
+                    continue
+                actual = deltas.setdefault(clave, [0, 0])
+                actual[0] += signo * completadas
+                actual[1] += signo * omitidas
+        deltas = {clave: delta for clave, delta in deltas.items() if any(delta)}
+        if not deltas:
+            return
+        cursor.execute(
+            f"""INSERT INTO adherencia_dias (id_paciente, fecha, completadas, omitidas)
+            VALUES {', '.join(['(%s, %s, %s, %s)'] * len(deltas))}
+            ON DUPLICATE KEY UPDATE
+                completadas = completadas + VALUES(completadas),
+                omitidas = omitidas + VALUES(omitidas)""",
+            [valor for clave, delta in deltas.items() for valor in (*clave, *delta)]
+        )
+
+    @staticmethod
+    def aplicar_ocurrencias_regla(cursor, regla_id: int, signo: int):
+        """
+        Suma (signo 1) o resta (signo -1) todas las ocurrencias con estatus de una regla
+        recurrente, p. ej. al borrarla o al cambiar su tipo hacia o desde medicación.
+        """
+        cursor.execute("""
+            INSERT INTO adherencia_dias (id_paciente, fecha, completadas, omitidas)
+            SELECT * FROM (
+                SELECT r.id_paciente, DATE(o.fecha_ocurrencia) AS fecha,
+                    %s * SUM(o.estatus = 'completada') AS completadas,
+                    %s * SUM(o.estatus = 'omitida') AS omitidas
+                FROM alertas_ocurrencias o
+                JOIN alertas_recurrentes r ON r.id_regla = o.id_regla
+                WHERE o.id_regla = %s AND o.estatus IN ('completada', 'omitida')
+                GROUP BY r.id_paciente, DATE(o.fecha_ocurrencia)
+            ) d
+            ON DUPLICATE KEY UPDATE
+                completadas = adherencia_dias.completadas + d.completadas,
+                omitidas = adherencia_dias.omitidas + d.omitidas
+        """, (signo, signo, regla_id))
+
+    @staticmethod
+    def get_dias(paciente_id: int, desde: date) -> list:
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT fecha, completadas, omitidas FROM adherencia_dias
+                WHERE id_paciente = %s AND fecha >= %s
+                ORDER BY fecha
+            """, (paciente_id, desde))
+            return cursor.fetchall()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_adherencia(paciente_id: int, hoy: date = None) -> dict:
+        """Métricas de adherencia del paciente leyendo solo los días de la ventana más larga"""
+        hoy = hoy or date.today()
+        dias = AdherenciaModel.get_dias(paciente_id, hoy - timedelta(days=max(VENTANAS_ADHERENCIA) - 1))
+        return {"id_paciente": paciente_id, **calcular_adherencia(dias, hoy)}
+
+    @staticmethod
+    def reconstruir(tamano_lote: int = 200):
+        """
+        Backfill de adherencia_dias por lotes de pacientes a partir de alertas y
+        ocurrencias, una transacción por lote. Devuelve el número de pacientes procesados.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            procesados = 0
+            ultimo_id = 0
+            while True:
+                cursor.execute(
+                    "SELECT id_paciente FROM paciente WHERE id_paciente > %s ORDER BY id_paciente LIMIT %s",
+                    (ultimo_id, tamano_lote)
+                )
+                ids = [fila["id_paciente"] for fila in cursor.fetchall()]
+                if not ids:
+                    break
+                desde, hasta = ids[0], ids[-1]
+
+                connection.begin()
+                cursor.execute("DELETE FROM adherencia_dias WHERE id_paciente BETWEEN %s AND %s", (desde, hasta))
+                cursor.execute("""
+                    INSERT INTO adherencia_dias (id_paciente, fecha, completadas, omitidas)
+                    SELECT id_paciente, fecha, SUM(estatus = 'completada'), SUM(estatus = 'omitida')
+                    FROM (
+                        SELECT id_paciente, DATE(fecha_programada) AS fecha, estatus
+                        FROM alertas
+                        WHERE id_paciente BETWEEN %s AND %s AND tipo_alerta = %s
+                        AND estatus IN ('completada', 'omitida')
+                        UNION ALL
+                        SELECT r.id_paciente, DATE(o.fecha_ocurrencia), o.estatus
+                        FROM alertas_ocurrencias o
+                        JOIN alertas_recurrentes r ON r.id_regla = o.id_regla
+                        WHERE r.id_paciente BETWEEN %s AND %s AND r.tipo_alerta = %s
+                        AND o.estatus IN ('completada', 'omitida')
+                    ) registros
+                    GROUP BY id_paciente, fecha
+                """, (desde, hasta, TIPO_MEDICACION, desde, hasta, TIPO_MEDICACION))
+                connection.commit()
+
+                procesados += len(ids)
+                ultimo_id = hasta
+            return procesados
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
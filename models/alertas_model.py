@@ -1,7 +1,29 @@
 
 from database import db
+import os
 import pymysql
 from pymysql import Error
+from datetime import datetime, timedelta
+from models.riesgo_model import RiesgoModel
+from models.adherencia_model import AdherenciaModel
+from models.sync_model import SyncModel
+from models.outbox_model import OutboxModel, ALERTAS_CAMBIADAS
+
+# Con cuánta anticipación se programa el recordatorio de una cita
+ANTICIPACION_RECORDATORIO_CITA = timedelta(hours=int(os.getenv("RECORDATORIO_CITAS_ANTICIPACION_HORAS", "24")))
+
+def fecha_recordatorio_cita(fecha_cita: datetime) -> datetime:
+    # Una cita más próxima que la anticipación se recuerda de inmediato
+    return max(fecha_cita - ANTICIPACION_RECORDATORIO_CITA, datetime.now().replace(microsecond=0))
+
+def descripcion_recordatorio_cita(fecha_cita: datetime, medico: str = None) -> str:
+    con = f" con {medico}" if medico else ""
+    return f"Recordatorio: cita médica{con} el {fecha_cita:%d/%m/%Y} a las {fecha_cita:%H:%M}"
+
+def _avisar_planificador(cursor, alerta_ids: list):
+    # Evento en la transacción de quien escribe; el relay avisa al planificador tras el commit
+    if alerta_ids:
+        OutboxModel.publicar(cursor, ALERTAS_CAMBIADAS, {"ids": list(alerta_ids)})
 
 class AlertasModel:
     @staticmethod
@@ -9,6 +31,7 @@ class AlertasModel:
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
+            connection.begin()
             cursor.execute(
                 """INSERT INTO alertas (id_paciente, tipo_alerta, descripcion, fecha_programada, estatus) 
                 VALUES (%s, %s, %s, %s, %s)""",
@@ -16,17 +39,188 @@ class AlertasModel:
                  alerta_data['descripcion'], alerta_data['fecha_programada'],
                  alerta_data.get('estatus', 'pendiente'))
             )
-            connection.commit()
             alerta_id = cursor.lastrowid
             cursor.execute("SELECT * FROM alertas WHERE id_alerta = %s", (alerta_id,))
-            return cursor.fetchone()
+            alerta = cursor.fetchone()
+            AdherenciaModel.aplicar_cambios(cursor, [(None, alerta)])
+            _avisar_planificador(cursor, [alerta_id])
+            connection.commit()
+            return alerta
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def create_lote(alertas: list) -> list:
+        """
+        Inserta varias alertas con un solo INSERT multi-fila. Devuelve las alertas con su
+        id_alerta (un INSERT de varias filas recibe ids consecutivos desde lastrowid).
+        """
+        if not alertas:
+            return []
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            connection.begin()
+            AlertasModel._insertar_lote(cursor, alertas)
+            primero = cursor.lastrowid
+            AdherenciaModel.aplicar_cambios(cursor, [(None, alerta) for alerta in alertas])
+            _avisar_planificador(cursor, range(primero, primero + len(alertas)))
+            connection.commit()
+            creadas = []
+            for desplazamiento, alerta in enumerate(alertas):
+                creada = dict(alerta, id_alerta=primero + desplazamiento)
+                creada.setdefault('estatus', 'pendiente')
+                creadas.append(creada)
+            return creadas
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def _insertar_lote(cursor, alertas: list, sufijo: str = ""):
+        valores = []
+        for alerta in alertas:
+            valores += [alerta['id_paciente'], alerta['tipo_alerta'], alerta['descripcion'],
+                        alerta['fecha_programada'], alerta.get('estatus', 'pendiente'),
+                        alerta.get('id_regla_clinica'), alerta.get('id_cita')]
+        cursor.execute(
+            f"""INSERT INTO alertas (id_paciente, tipo_alerta, descripcion, fecha_programada, estatus,
+            id_regla_clinica, id_cita)
+            VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s)'] * len(alertas))} {sufijo}""",
+            valores
+        )
+
+    @staticmethod
+    def create_recordatorios_citas(alertas: list) -> list:
+        """
+        Como create_lote para los recordatorios de cita (todas con id_cita): la cita que ya
+        tiene recordatorio (uq_alertas_cita) se salta en vez de tumbar el lote, p. ej. si dos
+        corridas se solapan o alguien la recordó entre la consulta y el INSERT. Devuelve
+        solo las alertas creadas, con el id leído de la tabla: con filas saltadas los ids ya
+        no son consecutivos desde lastrowid.
+        """
+        if not alertas:
+            return []
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            connection.begin()
+            AlertasModel._insertar_lote(cursor, alertas, "ON DUPLICATE KEY UPDATE id_alerta = id_alerta")
+            if cursor.rowcount <= 0:
+                connection.commit()
+                return []
+            # lastrowid es el id de la primera fila insertada; las repetidas ya existían (o
+            # las insertó antes otra transacción) y tienen ids menores
+            cursor.execute(f"""
+                SELECT id_alerta, id_cita FROM alertas
+                WHERE id_cita IN ({', '.join(['%s'] * len(alertas))}) AND id_alerta >= %s
+            """, [*(alerta['id_cita'] for alerta in alertas), cursor.lastrowid])
+            ids = {fila['id_cita']: fila['id_alerta'] for fila in cursor.fetchall()}
+            creadas = []
+            for alerta in alertas:
+                if alerta['id_cita'] in ids:
+                    creada = dict(alerta, id_alerta=ids[alerta['id_cita']])
+                    creada.setdefault('estatus', 'pendiente')
+                    creadas.append(creada)
+            AdherenciaModel.aplicar_cambios(cursor, [(None, alerta) for alerta in creadas])
+            _avisar_planificador(cursor, [alerta['id_alerta'] for alerta in creadas])
+            connection.commit()
+            return creadas
         except Error as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
                 cursor.close()
                 connection.close()
 
+    @staticmethod
+    def get_disparadas_por_reglas(paciente_ids: list, desde) -> set:
+        """(id_paciente, id_regla_clinica) con alerta pendiente generada desde 'desde'"""
+        if not paciente_ids:
+            return set()
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                SELECT DISTINCT id_paciente, id_regla_clinica FROM alertas
+                WHERE id_paciente IN ({', '.join(['%s'] * len(paciente_ids))})
+                AND id_regla_clinica IS NOT NULL AND estatus = 'pendiente'
+                AND fecha_programada >= %s
+            """, list(paciente_ids) + [desde])
+            return {(fila["id_paciente"], fila["id_regla_clinica"]) for fila in cursor.fetchall()}
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_citas_sin_recordatorio(desde: datetime, hasta: datetime) -> list:
+        """
+        Citas programadas entre desde y hasta que aún no tienen alerta de recordatorio.
+        Una sola consulta: rango sobre idx_citas_estatus_fecha y anti-join por id_cita.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT c.id_cita, c.id_paciente, c.fecha_cita, u.nombre AS medico
+                FROM citas_medicas c
+                JOIN usuario u ON c.id_medico = u.id_usuario
+                LEFT JOIN alertas a ON a.id_cita = c.id_cita
+                WHERE c.estatus = 'programada' AND c.fecha_cita >= %s AND c.fecha_cita < %s
+                AND a.id_alerta IS NULL
+                ORDER BY c.fecha_cita
+            """, (desde, hasta))
+            return cursor.fetchall()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def sincronizar_recordatorio_cita(cursor, cita: dict) -> list:
+        """
+        Ajusta el recordatorio de una cita modificada, dentro de la transacción de
+        CitasMedicasModel.update. Si la cita dejó de estar programada se borra el recordatorio
+        pendiente; si sigue programada se reprograma (y se reabre si ya se había atendido).
+        Devuelve los id_alerta afectados para avisar al planificador en esa transacción.
+        Las citas que aún no tienen recordatorio las cubre el job de recordatorios.
+        """
+        cursor.execute("SELECT id_alerta FROM alertas WHERE id_cita = %s", (cita["id_cita"],))
+        ids = [fila["id_alerta"] for fila in cursor.fetchall()]
+        if not ids:
+            return []
+        if cita["estatus"] != "programada":
+            AlertasModel.retirar_recordatorio_cita(cursor, cita["id_cita"])
+        else:
+            cursor.execute("SELECT nombre FROM usuario WHERE id_usuario = %s", (cita["id_medico"],))
+            medico = cursor.fetchone()
+            cursor.execute(
+                """UPDATE alertas SET fecha_programada = %s, descripcion = %s, estatus = 'pendiente',
+                notificada_en = NULL
+                WHERE id_cita = %s""",
+                (fecha_recordatorio_cita(cita["fecha_cita"]),
+                 descripcion_recordatorio_cita(cita["fecha_cita"], medico["nombre"] if medico else None),
+                 cita["id_cita"])
+            )
+        return ids
+
+    @staticmethod
+    def retirar_recordatorio_cita(cursor, cita_id: int):
+        """Borra el recordatorio pendiente de una cita cancelada, completada o eliminada"""
+        SyncModel.registrar_eliminados(cursor, "alertas", "id_cita = %s AND estatus = 'pendiente'", (cita_id,))
+        cursor.execute("DELETE FROM alertas WHERE id_cita = %s AND estatus = 'pendiente'", (cita_id,))
+
     @staticmethod
     def get_all():
         connection = db.get_connection()
@@ -64,17 +258,113 @@ class AlertasModel:
                 connection.close()
 
     @staticmethod
-    def get_pendientes():
+    def buscar(paciente_id: int = None, estatus: str = None, desde=None, hasta=None):
+        """
+        Alertas filtradas en la base de datos por paciente, estatus y ventana de
+        fecha_programada (desde inclusive, hasta exclusive). Con paciente y estatus usa
+        idx_alertas_paciente_estatus_fecha; solo con estatus, idx_alertas_estatus_fecha.
+        """
+        condiciones = []
+        valores = []
+        if paciente_id is not None:
+            condiciones.append("id_paciente = %s")
+            valores.append(paciente_id)
+        if estatus is not None:
+            condiciones.append("estatus = %s")
+            valores.append(estatus)
+        if desde is not None:
+            condiciones.append("fecha_programada >= %s")
+            valores.append(desde)
+        if hasta is not None:
+            condiciones.append("fecha_programada < %s")
+            valores.append(hasta)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"SELECT * FROM alertas {where} ORDER BY fecha_programada", valores)
+            return cursor.fetchall()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_pendientes(desde=None, hasta=None):
+        return AlertasModel.buscar(estatus="pendiente", desde=desde, hasta=hasta)
+
+    @staticmethod
+    def get_por_notificar(desde, hasta, limite: int, ids: list = None):
+        """
+        Alertas pendientes aún no notificadas con fecha_programada en [desde, hasta),
+        en orden de vencimiento. Recorre idx_alertas_notificacion sin tocar el resto
+        de la tabla. Con ids, se limita a esas alertas.
+        """
+        filtro_ids = ""
+        valores = [desde, hasta]
+        if ids:
+            filtro_ids = f"AND id_alerta IN ({', '.join(['%s'] * len(ids))})"
+            valores += list(ids)
+        valores.append(limite)
+
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
-            cursor.execute("SELECT * FROM alertas WHERE estatus = 'pendiente' ORDER BY fecha_programada")
+            cursor.execute(f"""
+                SELECT id_alerta, id_paciente, tipo_alerta, descripcion, fecha_programada
+                FROM alertas
+                WHERE estatus = 'pendiente' AND notificada_en IS NULL
+                AND fecha_programada >= %s AND fecha_programada < %s
+                {filtro_ids}
+                ORDER BY fecha_programada
+                LIMIT %s
+            """, valores)
             return cursor.fetchall()
         finally:
             if connection and connection.open:
                 cursor.close()
                 connection.close()
 
+    @staticmethod
+    def marcar_notificada(alerta_id: int, fecha_programada, notificada_en) -> bool:
+        """
+        Reclama la alerta para enviarla. Solo tiene éxito si sigue pendiente, sin notificar
+        y con la misma fecha con la que se programó: así se descartan alertas editadas o
+        borradas desde otra instancia, y nunca se envía dos veces.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                UPDATE alertas SET notificada_en = %s
+                WHERE id_alerta = %s AND estatus = 'pendiente'
+                AND notificada_en IS NULL AND fecha_programada = %s
+            """, (notificada_en, alerta_id, fecha_programada))
+            connection.commit()
+            return cursor.rowcount > 0
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def desmarcar_notificada(alerta_id: int):
+        """Revierte marcar_notificada cuando el envío falla, para reintentarlo"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("UPDATE alertas SET notificada_en = NULL WHERE id_alerta = %s", (alerta_id,))
+            connection.commit()
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
     @staticmethod
     def update(alerta_id: int, alerta_data: dict):
         connection = db.get_connection()
@@ -88,15 +378,29 @@ class AlertasModel:
                     update_fields.append(f"{field} = %s")
                     values.append(value)
             
+            # Reprogramar o reabrir la alerta la vuelve a dejar lista para notificarse
+            if alerta_data.get("fecha_programada") is not None or alerta_data.get("estatus") == "pendiente":
+                update_fields.append("notificada_en = NULL")
+            
             values.append(alerta_id)
             query = f"UPDATE alertas SET {', '.join(update_fields)} WHERE id_alerta = %s"
             
+            connection.begin()
+            cursor.execute("SELECT * FROM alertas WHERE id_alerta = %s FOR UPDATE", (alerta_id,))
+            anterior = cursor.fetchone()
             cursor.execute(query, values)
-            connection.commit()
-            
             cursor.execute("SELECT * FROM alertas WHERE id_alerta = %s", (alerta_id,))
-            return cursor.fetchone()
+            alerta = cursor.fetchone()
+            if anterior and alerta:
+                AdherenciaModel.aplicar_cambios(cursor, [(anterior, alerta)])
+                # Completar u omitir alertas cambia la adherencia que entra en el puntaje de riesgo
+                if alerta_data.get("estatus") is not None:
+                    RiesgoModel.marcar_pendientes(cursor, [alerta["id_paciente"]])
+            _avisar_planificador(cursor, [alerta_id])
+            connection.commit()
+            return alerta
         except Error as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
@@ -108,10 +412,19 @@ class AlertasModel:
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
+            connection.begin()
+            cursor.execute("SELECT * FROM alertas WHERE id_alerta = %s FOR UPDATE", (alerta_id,))
+            anterior = cursor.fetchone()
+            SyncModel.registrar_eliminados(cursor, "alertas", "id_alerta = %s", (alerta_id,))
             cursor.execute("DELETE FROM alertas WHERE id_alerta = %s", (alerta_id,))
+            eliminada = cursor.rowcount > 0
+            if eliminada:
+                AdherenciaModel.aplicar_cambios(cursor, [(anterior, None)])
+            _avisar_planificador(cursor, [alerta_id])
             connection.commit()
-            return cursor.rowcount > 0
+            return eliminada
         except Error as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
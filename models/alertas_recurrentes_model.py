@@ -0,0 +1,416 @@
+from database import db
+import heapq
+import itertools
+import pymysql
+from pymysql import Error
+from datetime import datetime, timedelta
+from models.riesgo_model import RiesgoModel
+from models.adherencia_model import AdherenciaModel, TIPO_MEDICACION
+from models.sync_model import SyncModel
+from models.outbox_model import OutboxModel, ALERTAS_RECURRENTES_CAMBIADAS
+
+# Frecuencias admitidas (FREQ de RRULE con paso fijo); el paso real es paso * intervalo
+PASOS = {
+    "horaria": timedelta(hours=1),
+    "diaria": timedelta(days=1),
+    "semanal": timedelta(weeks=1),
+}
+ESTATUS_OCURRENCIA = ["pendiente", "completada", "omitida"]
+
+def _avisar_planificador(cursor, regla_id: int):
+    # Evento en la transacción de quien escribe; el relay avisa al planificador tras el commit
+    OutboxModel.publicar(cursor, ALERTAS_RECURRENTES_CAMBIADAS, {"ids": [regla_id]})
+
+def generar_ocurrencias(regla: dict, desde: datetime, hasta: datetime = None):
+    """
+    Fechas de la regla en [desde, hasta), en orden. La primera se calcula directamente
+    (sin recorrer las anteriores), así que el costo depende solo de la ventana pedida.
+    """
+    paso = PASOS[regla["frecuencia"]] * regla["intervalo"]
+    inicio = regla["inicio"]
+    # Índice de la primera ocurrencia >= desde (división entera de timedelta, sin redondeos)
+    k = max(0, -((inicio - desde) // paso))
+    while True:
+        if regla["repeticiones"] is not None and k >= regla["repeticiones"]:
+            return
+        fecha = inicio + k * paso
+        if (hasta is not None and fecha >= hasta) or (regla["fin"] is not None and fecha > regla["fin"]):
+            return
+        yield fecha
+        k += 1
+
+def _ultima_ocurrencia(regla: dict):
+    """Última fecha de la regla, o None si no termina"""
+    if regla["repeticiones"] is None:
+        return regla["fin"]
+    ultima = regla["inicio"] + PASOS[regla["frecuencia"]] * regla["intervalo"] * (regla["repeticiones"] - 1)
+    return min(ultima, regla["fin"]) if regla["fin"] is not None else ultima
+
+def _ocurrencia(regla: dict, fecha: datetime, estatus: str = "pendiente") -> dict:
+    """Ocurrencia con la misma forma que una fila de alertas"""
+    return {
+        "id_alerta": None,
+        "id_regla": regla["id_regla"],
+        "id_paciente": regla["id_paciente"],
+        "tipo_alerta": regla["tipo_alerta"],
+        "descripcion": regla["descripcion"],
+        "fecha_programada": fecha,
+        "estatus": estatus,
+        "version": regla["version"],
+    }
+
+class AlertasRecurrentesModel:
+    """
+    Reglas de alertas recurrentes (p. ej. "cada 8 horas durante 30 días") guardadas una
+    sola vez. Las ocurrencias se generan al vuelo para la ventana que se consulta; en
+    alertas_ocurrencias solo se guardan las que cambiaron de estatus o ya se notificaron.
+    """
+
+    @staticmethod
+    def _validar(regla: dict):
+        if regla["frecuencia"] not in PASOS:
+            raise ValueError(f"Frecuencia no válida. Opciones: {', '.join(PASOS)}")
+        if regla["intervalo"] is None or regla["intervalo"] < 1:
+            raise ValueError("El intervalo debe ser mayor o igual a 1")
+        if regla["repeticiones"] is not None and regla["repeticiones"] < 1:
+            raise ValueError("Las repeticiones deben ser mayores o iguales a 1")
+
+    @staticmethod
+    def _primera_pendiente(regla: dict):
+        """Primera ocurrencia desde ahora; es el punto de partida del planificador"""
+        return next(generar_ocurrencias(regla, datetime.now()), None)
+
+    @staticmethod
+    def create(regla_data: dict):
+        regla = {
+            "frecuencia": regla_data["frecuencia"],
+            "intervalo": regla_data.get("intervalo", 1),
+            "inicio": regla_data["inicio"],
+            "fin": regla_data.get("fin"),
+            "repeticiones": regla_data.get("repeticiones"),
+        }
+        AlertasRecurrentesModel._validar(regla)
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            connection.begin()
+            cursor.execute(
+                """INSERT INTO alertas_recurrentes (id_paciente, tipo_alerta, descripcion, inicio,
+                frecuencia, intervalo, fin, repeticiones, ultima_ocurrencia, proxima_ocurrencia)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                (regla_data['id_paciente'], regla_data['tipo_alerta'], regla_data['descripcion'],
+                 regla["inicio"], regla["frecuencia"], regla["intervalo"], regla["fin"],
+                 regla["repeticiones"], _ultima_ocurrencia(regla),
+                 AlertasRecurrentesModel._primera_pendiente(regla))
+            )
+            regla_id = cursor.lastrowid
+            _avisar_planificador(cursor, regla_id)
+            connection.commit()
+            cursor.execute("SELECT * FROM alertas_recurrentes WHERE id_regla = %s", (regla_id,))
+            return cursor.fetchone()
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_by_id(regla_id: int):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT * FROM alertas_recurrentes WHERE id_regla = %s", (regla_id,))
+            return cursor.fetchone()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_by_paciente_id(paciente_id: int):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT * FROM alertas_recurrentes WHERE id_paciente = %s ORDER BY inicio", (paciente_id,)
+            )
+            return cursor.fetchall()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def update(regla_id: int, regla_data: dict):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            connection.begin()
+            cursor.execute("SELECT * FROM alertas_recurrentes WHERE id_regla = %s FOR UPDATE", (regla_id,))
+            regla = cursor.fetchone()
+            if not regla:
+                connection.rollback()
+                return None
+
+            cambios = {campo: valor for campo, valor in regla_data.items() if valor is not None}
+            era_medicacion = regla["tipo_alerta"] == TIPO_MEDICACION
+            regla.update(cambios)
+            AlertasRecurrentesModel._validar(regla)
+            # La versión invalida las ocurrencias que el planificador ya tenga cargadas
+            cambios["ultima_ocurrencia"] = _ultima_ocurrencia(regla)
+            cambios["proxima_ocurrencia"] = AlertasRecurrentesModel._primera_pendiente(regla)
+            update_fields = [f"{campo} = %s" for campo in cambios] + ["version = version + 1"]
+            cursor.execute(
+                f"UPDATE alertas_recurrentes SET {', '.join(update_fields)} WHERE id_regla = %s",
+                list(cambios.values()) + [regla_id]
+            )
+            # Las ocurrencias ya registradas entran o salen de la adherencia con el tipo
+            if era_medicacion != (regla["tipo_alerta"] == TIPO_MEDICACION):
+                AdherenciaModel.aplicar_ocurrencias_regla(cursor, regla_id, -1 if era_medicacion else 1)
+            _avisar_planificador(cursor, regla_id)
+            connection.commit()
+
+            cursor.execute("SELECT * FROM alertas_recurrentes WHERE id_regla = %s", (regla_id,))
+            return cursor.fetchone()
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def delete(regla_id: int):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            connection.begin()
+            cursor.execute(
+                "SELECT tipo_alerta FROM alertas_recurrentes WHERE id_regla = %s FOR UPDATE", (regla_id,)
+            )
+            regla = cursor.fetchone()
+            if regla and regla["tipo_alerta"] == TIPO_MEDICACION:
+                AdherenciaModel.aplicar_ocurrencias_regla(cursor, regla_id, -1)
+            SyncModel.registrar_eliminados(cursor, "alertas_recurrentes", "id_regla = %s", (regla_id,))
+            cursor.execute("DELETE FROM alertas_recurrentes WHERE id_regla = %s", (regla_id,))
+            eliminada = cursor.rowcount > 0
+            _avisar_planificador(cursor, regla_id)
+            connection.commit()
+            return eliminada
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def _estatus_guardados(cursor, reglas_ids: list, desde, hasta) -> dict:
+        """Estatus explícitos (sparse) de las ocurrencias en [desde, hasta)"""
+        if not reglas_ids:
+            return {}
+        cursor.execute(f"""
+            SELECT id_regla, fecha_ocurrencia, estatus, notificada_en
+            FROM alertas_ocurrencias
+            WHERE id_regla IN ({', '.join(['%s'] * len(reglas_ids))})
+            AND fecha_ocurrencia >= %s AND fecha_ocurrencia < %s
+        """, list(reglas_ids) + [desde, hasta])
+        return {(fila["id_regla"], fila["fecha_ocurrencia"]): fila for fila in cursor.fetchall()}
+
+    @staticmethod
+    def get_ocurrencias_paciente(paciente_id: int, desde, hasta, estatus: str = None) -> list:
+        """Ocurrencias de las reglas activas del paciente en [desde, hasta), con su estatus"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT * FROM alertas_recurrentes
+                WHERE id_paciente = %s AND activa = TRUE AND inicio < %s
+                AND (ultima_ocurrencia IS NULL OR ultima_ocurrencia >= %s)
+            """, (paciente_id, hasta, desde))
+            reglas = cursor.fetchall()
+            guardados = AlertasRecurrentesModel._estatus_guardados(
+                cursor, [regla["id_regla"] for regla in reglas], desde, hasta
+            )
+
+            ocurrencias = []
+            for regla in reglas:
+                for fecha in generar_ocurrencias(regla, desde, hasta):
+                    guardado = guardados.get((regla["id_regla"], fecha))
+                    estatus_ocurrencia = guardado["estatus"] if guardado else "pendiente"
+                    if estatus is None or estatus_ocurrencia == estatus:
+                        ocurrencias.append(_ocurrencia(regla, fecha, estatus_ocurrencia))
+            ocurrencias.sort(key=lambda ocurrencia: ocurrencia["fecha_programada"])
+            return ocurrencias
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def avanzar_por_notificar(desde, hasta, limite: int, reglas_ids: list = None):
+        """
+        Adelanta proxima_ocurrencia de las reglas de la ventana hasta su siguiente ocurrencia
+        por notificar (escribe), para que las reglas sin nada pendiente dejen de entrar en
+        ella, y devuelve las ocurrencias pendientes y no notificadas en [desde, hasta), en
+        orden de vencimiento, hasta limite. Solo lee las reglas cuya proxima_ocurrencia cae
+        en la ventana (idx_recurrentes_proxima) y mezcla sus ocurrencias de forma perezosa.
+
+        Devuelve (ocurrencias, horizonte): la lista está completa para fechas < horizonte.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            if reglas_ids:
+                cursor.execute(f"""
+                    SELECT * FROM alertas_recurrentes
+                    WHERE id_regla IN ({', '.join(['%s'] * len(reglas_ids))}) AND activa = TRUE
+                """, list(reglas_ids))
+            else:
+                cursor.execute("""
+                    SELECT * FROM alertas_recurrentes
+                    WHERE activa = TRUE AND proxima_ocurrencia < %s
+                    ORDER BY proxima_ocurrencia
+                    LIMIT %s
+                """, (hasta, limite))
+            reglas = cursor.fetchall()
+            horizonte = hasta
+            if not reglas_ids and len(reglas) >= limite:
+                horizonte = reglas[-1]["proxima_ocurrencia"]
+
+            guardados = AlertasRecurrentesModel._estatus_guardados(
+                cursor, [regla["id_regla"] for regla in reglas], desde, horizonte
+            )
+
+            def por_notificar(regla):
+                # proxima_ocurrencia solo avanza: lo anterior ya se atendió o es previo a la regla
+                for fecha in generar_ocurrencias(regla, max(desde, regla["proxima_ocurrencia"])):
+                    guardado = guardados.get((regla["id_regla"], fecha))
+                    if fecha < horizonte and guardado and (
+                        guardado["estatus"] != "pendiente" or guardado["notificada_en"] is not None
+                    ):
+                        continue
+                    yield fecha, regla["id_regla"], regla
+
+            # Siguiente ocurrencia por notificar de cada regla (puede quedar fuera de la ventana)
+            fuentes = []
+            avances = []
+            for regla in reglas:
+                if regla["proxima_ocurrencia"] is None:
+                    continue
+                fuente = por_notificar(regla)
+                primera = next(fuente, None)
+                siguiente = primera[0] if primera else None
+                if siguiente != regla["proxima_ocurrencia"]:
+                    avances.append((siguiente, regla["id_regla"], regla["version"]))
+                if primera:
+                    fuentes.append(itertools.chain([primera], fuente))
+
+            ocurrencias = []
+            for fecha, _, regla in heapq.merge(*fuentes, key=lambda item: (item[0], item[1])):
+                if fecha >= horizonte or len(ocurrencias) >= limite:
+                    break
+                ocurrencias.append(_ocurrencia(regla, fecha))
+            if len(ocurrencias) >= limite:
+                horizonte = ocurrencias[-1]["fecha_programada"]
+
+            if avances:
+                cursor.executemany(
+                    "UPDATE alertas_recurrentes SET proxima_ocurrencia = %s WHERE id_regla = %s AND version = %s",
+                    avances
+                )
+                connection.commit()
+            return ocurrencias, horizonte
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def marcar_notificada(regla_id: int, fecha_ocurrencia, version: int, notificada_en) -> bool:
+        """
+        Reclama una ocurrencia para enviarla. Falla si la regla se editó (otra versión),
+        se desactivó o la ocurrencia ya se notificó o cerró.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                INSERT INTO alertas_ocurrencias (id_regla, fecha_ocurrencia, estatus, notificada_en)
+                SELECT id_regla, %s, 'pendiente', %s FROM alertas_recurrentes
+                WHERE id_regla = %s AND version = %s AND activa = TRUE
+                ON DUPLICATE KEY UPDATE notificada_en = IF(
+                    alertas_ocurrencias.estatus = 'pendiente' AND alertas_ocurrencias.notificada_en IS NULL,
+                    VALUES(notificada_en), alertas_ocurrencias.notificada_en
+                )
+            """, (fecha_ocurrencia, notificada_en, regla_id, version))
+            connection.commit()
+            return cursor.rowcount > 0
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def desmarcar_notificada(regla_id: int, fecha_ocurrencia):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE alertas_ocurrencias SET notificada_en = NULL WHERE id_regla = %s AND fecha_ocurrencia = %s",
+                (regla_id, fecha_ocurrencia)
+            )
+            connection.commit()
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def actualizar_ocurrencia(regla_id: int, fecha_ocurrencia, estatus: str):
+        """Guarda el estatus de una ocurrencia concreta (p. ej. dosis tomada u omitida)"""
+        if estatus not in ESTATUS_OCURRENCIA:
+            raise ValueError(f"Estatus no válido. Opciones: {', '.join(ESTATUS_OCURRENCIA)}")
+        regla = AlertasRecurrentesModel.get_by_id(regla_id)
+        if not regla:
+            return None
+        if next(generar_ocurrencias(regla, fecha_ocurrencia), None) != fecha_ocurrencia:
+            raise ValueError("La fecha no corresponde a una ocurrencia de la regla")
+
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            connection.begin()
+            cursor.execute(
+                "SELECT estatus FROM alertas_ocurrencias WHERE id_regla = %s AND fecha_ocurrencia = %s FOR UPDATE",
+                (regla_id, fecha_ocurrencia)
+            )
+            guardada = cursor.fetchone()
+            cursor.execute("""
+                INSERT INTO alertas_ocurrencias (id_regla, fecha_ocurrencia, estatus)
+                VALUES (%s, %s, %s)
+                ON DUPLICATE KEY UPDATE estatus = VALUES(estatus)
+            """, (regla_id, fecha_ocurrencia, estatus))
+            AdherenciaModel.aplicar_cambios(cursor, [(
+                _ocurrencia(regla, fecha_ocurrencia, guardada["estatus"] if guardada else "pendiente"),
+                _ocurrencia(regla, fecha_ocurrencia, estatus)
+            )])
+            RiesgoModel.marcar_pendientes(cursor, [regla["id_paciente"]])
+            _avisar_planificador(cursor, regla_id)
+            connection.commit()
+            return _ocurrencia(regla, fecha_ocurrencia, estatus)
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
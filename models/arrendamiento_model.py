@@ -0,0 +1,55 @@
+from database import db
+import pymysql
+from pymysql import Error
+
+class ArrendamientoModel:
+    """
+    Arrendamientos (leases) en la tabla arrendamientos, para que una sola instancia de la
+    API ejecute cada proceso singleton (p. ej. el planificador de alertas). El dueño debe
+    renovarlo antes de que expire; si deja de hacerlo, otra instancia lo toma.
+    """
+
+    @staticmethod
+    def adquirir(nombre: str, propietario: str, duracion_segundos: int) -> bool:
+        """Toma o renueva el arrendamiento. Devuelve True si quedó a nombre de propietario"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            # Las asignaciones se evalúan en orden: si propietario cambió en la primera,
+            # la segunda ya ve al nuevo dueño y renueva la expiración
+            cursor.execute("""
+                INSERT INTO arrendamientos (nombre, propietario, expira)
+                VALUES (%s, %s, NOW() + INTERVAL %s SECOND)
+                ON DUPLICATE KEY UPDATE
+                    propietario = IF(propietario = VALUES(propietario) OR expira < NOW(),
+                                     VALUES(propietario), propietario),
+                    expira = IF(propietario = VALUES(propietario), VALUES(expira), expira)
+            """, (nombre, propietario, duracion_segundos))
+            connection.commit()
+            cursor.execute("SELECT propietario FROM arrendamientos WHERE nombre = %s", (nombre,))
+            fila = cursor.fetchone()
+            return bool(fila) and fila["propietario"] == propietario
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def liberar(nombre: str, propietario: str) -> bool:
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "UPDATE arrendamientos SET expira = NOW() WHERE nombre = %s AND propietario = %s",
+                (nombre, propietario)
+            )
+            connection.commit()
+            return cursor.rowcount > 0
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
@@ -0,0 +1,137 @@
+from database import db
+import hashlib
+import secrets
+import pymysql
+from pymysql import Error
+from cache import cacheado, invalidar
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+class CalendarioModel:
+    """
+    Suscripciones a calendarios .ics. Cada usuario tiene a lo más un token; la URL del
+    feed no lleva otra autenticación, así que solo se guarda el hash del token.
+    """
+
+    @staticmethod
+    def crear_token(usuario_id: int) -> str:
+        """Genera (o rota) el token del usuario; el anterior deja de funcionar"""
+        token = secrets.token_urlsafe(32)
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                """INSERT INTO calendario_tokens (id_usuario, token_hash) VALUES (%s, %s)
+                ON DUPLICATE KEY UPDATE token_hash = VALUES(token_hash), fecha_creacion = CURRENT_TIMESTAMP""",
+                (usuario_id, _hash_token(token))
+            )
+            connection.commit()
+            invalidar("calendario")
+            return token
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def revocar_token(usuario_id: int) -> bool:
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM calendario_tokens WHERE id_usuario = %s", (usuario_id,))
+            connection.commit()
+            invalidar("calendario")
+            return cursor.rowcount > 0
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_suscripcion(token: str):
+        return CalendarioModel._get_suscripcion_por_hash(_hash_token(token))
+
+    @staticmethod
+    @cacheado("calendario.get_suscripcion", lambda token_hash: ["calendario"])
+    def _get_suscripcion_por_hash(token_hash: str):
+        """Usuario dueño del token con su id_paciente (None si no es paciente)"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT u.id_usuario, u.nombre, u.rol, p.id_paciente
+                FROM calendario_tokens t
+                JOIN usuario u ON t.id_usuario = u.id_usuario
+                LEFT JOIN paciente p ON p.id_usuario = u.id_usuario
+                WHERE t.token_hash = %s AND u.estatus = 'Activo'
+            """, (token_hash,))
+            return cursor.fetchone()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def _filtro(suscripcion: dict):
+        if suscripcion["rol"] == "paciente":
+            return "id_paciente", suscripcion["id_paciente"]
+        return "id_medico", suscripcion["id_usuario"]
+
+    @staticmethod
+    def get_version(suscripcion: dict) -> dict:
+        """
+        Última modificación y número de citas del calendario. Se resuelve solo con el índice
+        (id_medico|id_paciente, fecha_actualizacion); el conteo detecta los borrados.
+        """
+        columna, valor = CalendarioModel._filtro(suscripcion)
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                f"""SELECT UNIX_TIMESTAMP(MAX(fecha_actualizacion)) AS modificado, COUNT(*) AS total
+                FROM citas_medicas WHERE {columna} = %s""",
+                (valor,)
+            )
+            return cursor.fetchone()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def iterar_citas(suscripcion: dict, desde, hasta, tamano_lote: int = 200):
+        """
+        Citas del calendario entre desde y hasta, leídas con un cursor del lado del servidor
+        y entregadas por lotes, para poder transmitir el feed sin cargarlo entero.
+        """
+        columna, valor = CalendarioModel._filtro(suscripcion)
+        # En el calendario del médico el título es el paciente; en el del paciente, el médico
+        if columna == "id_medico":
+            union = "JOIN paciente p ON c.id_paciente = p.id_paciente JOIN usuario u ON p.id_usuario = u.id_usuario"
+        else:
+            union = "JOIN usuario u ON c.id_medico = u.id_usuario"
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+            cursor.execute(
+                f"""SELECT c.id_cita, c.fecha_cita, c.duracion_minutos, c.motivo, c.estatus,
+                    UNIX_TIMESTAMP(c.fecha_actualizacion) AS actualizada_epoch, u.nombre AS contraparte
+                FROM citas_medicas c {union}
+                WHERE c.{columna} = %s AND c.fecha_cita >= %s AND c.fecha_cita < %s
+                ORDER BY c.fecha_cita""",
+                (valor, desde, hasta)
+            )
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    break
+                yield from filas
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
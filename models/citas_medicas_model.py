@@ -2,25 +2,67 @@
 from database import db
 import pymysql
 from pymysql import Error
+from datetime import datetime, timedelta
+from models.alertas_model import AlertasModel, _avisar_planificador
+from models.riesgo_model import RiesgoModel
+from models.sync_model import SyncModel
+
+# Tope de duración de una cita: acota hacia atrás el escaneo por (id_medico, fecha_cita)
+DURACION_MAXIMA_MINUTOS = 240
+
+class ConflictoCita(ValueError):
+    """La cita se traslapa con otra cita vigente del mismo médico"""
 
 class CitasMedicasModel:
+    @staticmethod
+    def _verificar_conflicto(cursor, medico_id: int, fecha_cita, duracion: int, excluir_id: int = None):
+        """
+        Debe llamarse dentro de una transacción. Bloquea la fila del médico para serializar
+        las reservas de su agenda y busca traslapes con un escaneo de rango sobre
+        (id_medico, fecha_cita).
+        """
+        cursor.execute("SELECT id_usuario FROM usuario WHERE id_usuario = %s FOR UPDATE", (medico_id,))
+        fin = fecha_cita + timedelta(minutes=duracion)
+        cursor.execute(
+            """SELECT id_cita, fecha_cita FROM citas_medicas
+            WHERE id_medico = %s AND fecha_cita > %s AND fecha_cita < %s
+            AND estatus <> 'cancelada' AND id_cita <> %s
+            AND fecha_cita + INTERVAL duracion_minutos MINUTE > %s
+            LIMIT 1""",
+            (medico_id, fecha_cita - timedelta(minutes=DURACION_MAXIMA_MINUTOS), fin,
+             excluir_id or 0, fecha_cita)
+        )
+        conflicto = cursor.fetchone()
+        if conflicto:
+            raise ConflictoCita(
+                f"El médico ya tiene una cita a las {conflicto['fecha_cita']:%Y-%m-%d %H:%M} en ese horario"
+            )
+
     @staticmethod
     def create(cita_data: dict):
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
+            estatus = cita_data.get('estatus', 'programada')
+            duracion = cita_data.get('duracion_minutos') or 30
+            connection.begin()
+            if estatus != 'cancelada':
+                CitasMedicasModel._verificar_conflicto(
+                    cursor, cita_data['id_medico'], cita_data['fecha_cita'], duracion
+                )
             cursor.execute(
-                """INSERT INTO citas_medicas (id_paciente, id_medico, fecha_cita, motivo, observaciones, estatus) 
-                VALUES (%s, %s, %s, %s, %s, %s)""",
-                (cita_data['id_paciente'], cita_data['id_medico'], cita_data['fecha_cita'],
-                 cita_data.get('motivo'), cita_data.get('observaciones'),
-                 cita_data.get('estatus', 'programada'))
+                """INSERT INTO citas_medicas (id_paciente, id_medico, fecha_cita, duracion_minutos, motivo,
+                observaciones, estatus) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                (cita_data['id_paciente'], cita_data['id_medico'], cita_data['fecha_cita'], duracion,
+                 cita_data.get('motivo'), cita_data.get('observaciones'), estatus)
             )
             connection.commit()
             cita_id = cursor.lastrowid
             cursor.execute("SELECT * FROM citas_medicas WHERE id_cita = %s", (cita_id,))
             return cursor.fetchone()
-        except Error as e:
+        except (Error, ValueError) as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
@@ -76,17 +118,67 @@ class CitasMedicasModel:
                 connection.close()
 
     @staticmethod
-    def get_programadas():
+    def buscar(paciente_id: int = None, medico_id: int = None, estatus: str = None, desde=None, hasta=None):
+        """
+        Citas filtradas en la base de datos por paciente o médico, estatus y ventana de
+        fecha_cita (desde inclusive, hasta exclusive), apoyadas en los índices
+        (id_paciente, estatus, fecha_cita), (id_medico, fecha_cita) y (estatus, fecha_cita).
+        """
+        condiciones = []
+        valores = []
+        if paciente_id is not None:
+            condiciones.append("id_paciente = %s")
+            valores.append(paciente_id)
+        if medico_id is not None:
+            condiciones.append("id_medico = %s")
+            valores.append(medico_id)
+        if estatus is not None:
+            condiciones.append("estatus = %s")
+            valores.append(estatus)
+        if desde is not None:
+            condiciones.append("fecha_cita >= %s")
+            valores.append(desde)
+        if hasta is not None:
+            condiciones.append("fecha_cita < %s")
+            valores.append(hasta)
+        where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
-            cursor.execute("SELECT * FROM citas_medicas WHERE estatus = 'programada' ORDER BY fecha_cita")
+            cursor.execute(f"SELECT * FROM citas_medicas {where} ORDER BY fecha_cita", valores)
             return cursor.fetchall()
         finally:
             if connection and connection.open:
                 cursor.close()
                 connection.close()
 
+    @staticmethod
+    def get_programadas(desde=None, hasta=None):
+        return CitasMedicasModel.buscar(estatus="programada", desde=desde, hasta=hasta)
+
+    @staticmethod
+    def get_ocupados(medico_id: int, desde: datetime, hasta: datetime) -> list:
+        """
+        Intervalos (inicio, fin) ocupados por citas no canceladas del médico que se traslapan
+        con [desde, hasta). Un solo escaneo de rango sobre (id_medico, fecha_cita).
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                """SELECT fecha_cita, duracion_minutos FROM citas_medicas
+                WHERE id_medico = %s AND fecha_cita > %s AND fecha_cita < %s AND estatus <> 'cancelada'
+                ORDER BY fecha_cita""",
+                (medico_id, desde - timedelta(minutes=DURACION_MAXIMA_MINUTOS), hasta)
+            )
+            return [(fila["fecha_cita"], fila["fecha_cita"] + timedelta(minutes=fila["duracion_minutos"]))
+                    for fila in cursor.fetchall()]
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
     @staticmethod
     def update(cita_id: int, cita_data: dict):
         connection = db.get_connection()
@@ -100,15 +192,42 @@ class CitasMedicasModel:
                     update_fields.append(f"{field} = %s")
                     values.append(value)
             
-            values.append(cita_id)
-            query = f"UPDATE citas_medicas SET {', '.join(update_fields)} WHERE id_cita = %s"
-            
-            cursor.execute(query, values)
-            connection.commit()
+            connection.begin()
+            cursor.execute("SELECT * FROM citas_medicas WHERE id_cita = %s FOR UPDATE", (cita_id,))
+            cita = cursor.fetchone()
+            if not cita:
+                connection.rollback()
+                return None
+            resultado = {**cita, **{campo: valor for campo, valor in cita_data.items() if valor is not None}}
+            # Solo se revisa la agenda si la cita se mueve, se alarga o se reactiva
+            if resultado['estatus'] != 'cancelada' and (
+                resultado['fecha_cita'] != cita['fecha_cita']
+                or resultado['duracion_minutos'] != cita['duracion_minutos']
+                or cita['estatus'] == 'cancelada'
+            ):
+                CitasMedicasModel._verificar_conflicto(
+                    cursor, cita['id_medico'], resultado['fecha_cita'], resultado['duracion_minutos'], cita_id
+                )
+
+            if update_fields:
+                values.append(cita_id)
+                query = f"UPDATE citas_medicas SET {', '.join(update_fields)} WHERE id_cita = %s"
+                cursor.execute(query, values)
             
             cursor.execute("SELECT * FROM citas_medicas WHERE id_cita = %s", (cita_id,))
-            return cursor.fetchone()
-        except Error as e:
+            cita_actualizada = cursor.fetchone()
+            # El recordatorio sigue a la cita: se reprograma o se retira en la misma transacción
+            alertas_afectadas = []
+            if (cita_actualizada['fecha_cita'] != cita['fecha_cita']
+                    or cita_actualizada['estatus'] != cita['estatus']):
+                alertas_afectadas = AlertasModel.sincronizar_recordatorio_cita(cursor, cita_actualizada)
+            if cita_actualizada['estatus'] != cita['estatus']:
+                RiesgoModel.marcar_pendientes(cursor, [cita_actualizada['id_paciente']])
+            _avisar_planificador(cursor, alertas_afectadas)
+            connection.commit()
+            return cita_actualizada
+        except (Error, ValueError) as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
@@ -120,10 +239,20 @@ class CitasMedicasModel:
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
+            connection.begin()
+            cursor.execute(
+                "SELECT id_alerta FROM alertas WHERE id_cita = %s AND estatus = 'pendiente'", (cita_id,)
+            )
+            alertas_afectadas = [fila["id_alerta"] for fila in cursor.fetchall()]
+            AlertasModel.retirar_recordatorio_cita(cursor, cita_id)
+            SyncModel.registrar_eliminados(cursor, "citas_medicas", "id_cita = %s", (cita_id,))
             cursor.execute("DELETE FROM citas_medicas WHERE id_cita = %s", (cita_id,))
+            eliminado = cursor.rowcount > 0
+            _avisar_planificador(cursor, alertas_afectadas)
             connection.commit()
-            return cursor.rowcount > 0
+            return eliminado
         except Error as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
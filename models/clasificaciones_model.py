@@ -0,0 +1,99 @@
+from database import db
+import pymysql
+from pymysql import Error
+
+class ClasificacionesModel:
+    """
+    Consultas de puntajes para los tableros de clasificación. El puntaje global y el del
+    panel de un médico es la suma del progreso de los retos del paciente; el de una
+    plantilla, el mejor progreso del paciente en retos de esa plantilla.
+    """
+
+    @staticmethod
+    def get_puntajes_globales() -> dict:
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT id_paciente, SUM(progreso) AS puntaje FROM retos GROUP BY id_paciente")
+            return {fila["id_paciente"]: float(fila["puntaje"]) for fila in cursor.fetchall()}
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_puntajes_plantilla(plantilla: str) -> dict:
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT id_paciente, MAX(progreso) AS puntaje FROM retos WHERE plantilla = %s GROUP BY id_paciente",
+                (plantilla,)
+            )
+            return {fila["id_paciente"]: float(fila["puntaje"]) for fila in cursor.fetchall()}
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_puntajes_medico(medico_id: int) -> dict:
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT r.id_paciente, SUM(r.progreso) AS puntaje
+                FROM paciente_medico pm
+                JOIN retos r ON r.id_paciente = pm.id_paciente
+                WHERE pm.id_medico = %s AND pm.estatus = 'activo'
+                GROUP BY r.id_paciente
+            """, (medico_id,))
+            return {fila["id_paciente"]: float(fila["puntaje"]) for fila in cursor.fetchall()}
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_puntajes_pacientes(paciente_ids: list) -> dict:
+        """{id_paciente: {"total": suma, "plantillas": {plantilla: mejor progreso}}}"""
+        if not paciente_ids:
+            return {}
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                SELECT id_paciente, plantilla, SUM(progreso) AS suma, MAX(progreso) AS maximo
+                FROM retos
+                WHERE id_paciente IN ({', '.join(['%s'] * len(paciente_ids))})
+                GROUP BY id_paciente, plantilla
+            """, list(paciente_ids))
+            puntajes = {}
+            for fila in cursor.fetchall():
+                paciente = puntajes.setdefault(fila["id_paciente"], {"total": 0.0, "plantillas": {}})
+                paciente["total"] += float(fila["suma"])
+                if fila["plantilla"]:
+                    paciente["plantillas"][fila["plantilla"]] = float(fila["maximo"])
+            return puntajes
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_nombres(paciente_ids: list) -> dict:
+        if not paciente_ids:
+            return {}
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                SELECT p.id_paciente, u.nombre FROM paciente p
+                JOIN usuario u ON p.id_usuario = u.id_usuario
+                WHERE p.id_paciente IN ({', '.join(['%s'] * len(paciente_ids))})
+            """, list(paciente_ids))
+            return {fila["id_paciente"]: fila["nombre"] for fila in cursor.fetchall()}
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
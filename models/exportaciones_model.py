@@ -0,0 +1,310 @@
+from database import db
+import hashlib
+from pymysql import Error
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from models.adherencia_model import TIPO_MEDICACION, VENTANAS_ADHERENCIA, calcular_adherencia
+
+# Ventanas del reporte consolidado
+SEMANAS_SIGNOS = 26
+DIAS_ALERTAS = 90
+DIAS_CITAS = 180
+MAX_CITAS = 50
+MAX_REPORTES = 10
+METRICAS_REPORTE = ["presion_sistolica", "presion_diastolica", "glucosa", "peso", "frecuencia_cardiaca"]
+
+def _ventanas(hoy: date) -> dict:
+    return {
+        "signos": hoy - timedelta(weeks=SEMANAS_SIGNOS),
+        "alertas": hoy - timedelta(days=DIAS_ALERTAS - 1),
+        "adherencia": hoy - timedelta(days=max(VENTANAS_ADHERENCIA) - 1),
+        "citas": hoy - timedelta(days=DIAS_CITAS),
+        "manana": hoy + timedelta(days=1),
+    }
+
+def _serializable(valor):
+    """Tipos de la BD a tipos JSON, para hashear y pasar los datos a otro proceso"""
+    if isinstance(valor, Decimal):
+        return int(valor) if valor == valor.to_integral_value() else float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, dict):
+        return {clave: _serializable(v) for clave, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_serializable(v) for v in valor]
+    return valor
+
+class ExportacionesModel:
+    """
+    Exportaciones del reporte consolidado de un paciente (tabla reportes_exportaciones).
+    Cada solicitud guarda la firma de los datos del paciente; el trabajador la reclama, arma
+    el reporte y deja el artefacto en disco bajo el hash de su contenido.
+    """
+
+    @staticmethod
+    def get_firma(paciente_id: int, hoy: date = None) -> str:
+        """
+        Huella barata de todo lo que entra en el reporte, sin traer los datos: por fuente,
+        cantidad de filas y BIT_XOR del CRC32 de cada fila (no depende del orden). Cambia si
+        se agrega, edita o borra cualquier fila de las ventanas, o al cambiar el día.
+        """
+        hoy = hoy or date.today()
+        ventanas = _ventanas(hoy)
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT
+                    (SELECT CONCAT_WS('|', u.nombre, u.correo, p.edad, p.sexo, p.peso_actual, p.altura,
+                            p.enfermedades_cronicas, p.medicamentos)
+                     FROM paciente p JOIN usuario u ON u.id_usuario = p.id_usuario
+                     WHERE p.id_paciente = %s) AS paciente,
+                    (SELECT CONCAT_WS('|', COUNT(*), BIT_XOR(CRC32(CONCAT_WS('|', metrica, inicio, cantidad,
+                            minimo, maximo, suma))))
+                     FROM indicadores_resumen
+                     WHERE id_paciente = %s AND granularidad = 'semana' AND inicio >= %s) AS signos,
+                    (SELECT CONCAT_WS('|', COUNT(*), BIT_XOR(CRC32(CONCAT_WS('|', id_alerta, tipo_alerta,
+                            fecha_programada, estatus))))
+                     FROM alertas
+                     WHERE id_paciente = %s AND fecha_programada >= %s AND fecha_programada < %s) AS alertas,
+                    (SELECT CONCAT_WS('|', COUNT(*), BIT_XOR(CRC32(CONCAT_WS('|', fecha, completadas, omitidas))))
+                     FROM adherencia_dias WHERE id_paciente = %s AND fecha >= %s) AS adherencia,
+                    (SELECT CONCAT_WS('|', COUNT(*), BIT_XOR(CRC32(CONCAT_WS('|', id_cita, fecha_actualizacion))))
+                     FROM citas_medicas WHERE id_paciente = %s AND fecha_cita >= %s) AS citas,
+                    (SELECT CONCAT_WS('|', COUNT(*), BIT_XOR(CRC32(CONCAT_WS('|', id_reporte, id_medico,
+                            fecha_reporte, descripcion_general, diagnostico, recomendaciones_medicas))))
+                     FROM (SELECT * FROM reportes_medicos WHERE id_paciente = %s
+                           ORDER BY fecha_reporte DESC, id_reporte DESC LIMIT %s) r) AS reportes,
+                    (SELECT CONCAT_WS('|', puntaje, nivel, signos, cronicas, alertas, citas)
+                     FROM riesgo_pacientes WHERE id_paciente = %s) AS riesgo
+            """, (paciente_id,
+                  paciente_id, ventanas["signos"],
+                  paciente_id, ventanas["alertas"], ventanas["manana"],
+                  paciente_id, ventanas["adherencia"],
+                  paciente_id, ventanas["citas"],
+                  paciente_id, MAX_REPORTES,
+                  paciente_id))
+            fila = cursor.fetchone()
+            partes = [hoy.isoformat()] + [str(fila[columna]) for columna in
+                                          ["paciente", "signos", "alertas", "adherencia", "citas", "reportes", "riesgo"]]
+            return hashlib.sha256("\n".join(partes).encode("utf-8")).hexdigest()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_datos_reporte(paciente_id: int, hoy: date = None) -> dict:
+        """
+        Todos los datos del reporte consolidado, ya convertidos a tipos JSON. Se llama desde
+        el trabajador de exportaciones, nunca dentro de una petición.
+        """
+        hoy = hoy or date.today()
+        ventanas = _ventanas(hoy)
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT p.id_paciente, u.nombre, u.correo, p.edad, p.sexo, p.peso_actual, p.altura,
+                    p.enfermedades_cronicas, p.medicamentos
+                FROM paciente p JOIN usuario u ON u.id_usuario = p.id_usuario
+                WHERE p.id_paciente = %s
+            """, (paciente_id,))
+            paciente = cursor.fetchone()
+            if not paciente:
+                return None
+
+            cursor.execute("""
+                SELECT metrica, inicio, cantidad, minimo, maximo, suma
+                FROM indicadores_resumen
+                WHERE id_paciente = %s AND granularidad = 'semana' AND inicio >= %s
+                ORDER BY metrica, inicio
+            """, (paciente_id, ventanas["signos"]))
+            signos = {metrica: [] for metrica in METRICAS_REPORTE}
+            for fila in cursor.fetchall():
+                if fila["metrica"] in signos:
+                    signos[fila["metrica"]].append({
+                        "inicio": fila["inicio"],
+                        "cantidad": fila["cantidad"],
+                        "minimo": fila["minimo"],
+                        "maximo": fila["maximo"],
+                        "promedio": round(float(fila["suma"]) / fila["cantidad"], 2),
+                    })
+
+            cursor.execute("""
+                SELECT tipo_alerta, SUM(estatus = 'completada') AS completadas,
+                    SUM(estatus = 'omitida') AS omitidas, SUM(estatus = 'pendiente') AS pendientes
+                FROM alertas
+                WHERE id_paciente = %s AND fecha_programada >= %s AND fecha_programada < %s
+                GROUP BY tipo_alerta
+                ORDER BY tipo_alerta
+            """, (paciente_id, ventanas["alertas"], ventanas["manana"]))
+            alertas = cursor.fetchall()
+
+            cursor.execute("""
+                SELECT fecha, completadas, omitidas FROM adherencia_dias
+                WHERE id_paciente = %s AND fecha >= %s
+            """, (paciente_id, ventanas["adherencia"]))
+            adherencia = calcular_adherencia(cursor.fetchall(), hoy)
+
+            cursor.execute("""
+                SELECT c.id_cita, c.fecha_cita, c.duracion_minutos, c.motivo, c.estatus, u.nombre AS medico
+                FROM citas_medicas c JOIN usuario u ON u.id_usuario = c.id_medico
+                WHERE c.id_paciente = %s AND c.fecha_cita >= %s
+                ORDER BY c.fecha_cita DESC
+                LIMIT %s
+            """, (paciente_id, ventanas["citas"], MAX_CITAS))
+            citas = cursor.fetchall()
+
+            cursor.execute("""
+                SELECT r.id_reporte, r.fecha_reporte, r.descripcion_general, r.diagnostico,
+                    r.recomendaciones_medicas, u.nombre AS medico
+                FROM reportes_medicos r JOIN usuario u ON u.id_usuario = r.id_medico
+                WHERE r.id_paciente = %s
+                ORDER BY r.fecha_reporte DESC, r.id_reporte DESC
+                LIMIT %s
+            """, (paciente_id, MAX_REPORTES))
+            reportes = cursor.fetchall()
+
+            cursor.execute(
+                "SELECT puntaje, nivel, signos, cronicas, alertas, citas FROM riesgo_pacientes WHERE id_paciente = %s",
+                (paciente_id,)
+            )
+            riesgo = cursor.fetchone()
+
+            return _serializable({
+                "fecha_corte": hoy,
+                "paciente": paciente,
+                "signos": signos,
+                "alertas": alertas,
+                "tipo_medicacion": TIPO_MEDICACION,
+                "adherencia": adherencia,
+                "citas": citas,
+                "reportes": reportes,
+                "riesgo": riesgo,
+            })
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def crear(paciente_id: int, solicitado_por: int, firma: str):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                """INSERT INTO reportes_exportaciones (id_paciente, solicitado_por, firma)
+                VALUES (%s, %s, %s)""",
+                (paciente_id, solicitado_por, firma)
+            )
+            connection.commit()
+            cursor.execute("SELECT * FROM reportes_exportaciones WHERE id_exportacion = %s", (cursor.lastrowid,))
+            return cursor.fetchone()
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_by_id(exportacion_id: int):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT * FROM reportes_exportaciones WHERE id_exportacion = %s", (exportacion_id,))
+            return cursor.fetchone()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_vigente(paciente_id: int, firma: str):
+        """Última exportación con la misma firma que no haya fallado (lista o en curso)"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT * FROM reportes_exportaciones
+                WHERE id_paciente = %s AND firma = %s AND estado <> 'error'
+                ORDER BY id_exportacion DESC
+                LIMIT 1
+            """, (paciente_id, firma))
+            return cursor.fetchone()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def reclamar(atasco_segundos: int, max_intentos: int):
+        """
+        Toma la exportación pendiente más antigua (o una en proceso cuyo trabajador dejó de
+        responder) con un solo UPDATE. LAST_INSERT_ID(id) deja el id reclamado en lastrowid.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                UPDATE reportes_exportaciones
+                SET estado = 'error', error = 'Se agotaron los intentos', fecha_fin = NOW()
+                WHERE estado = 'procesando' AND fecha_inicio < NOW() - INTERVAL %s SECOND AND intentos >= %s
+            """, (atasco_segundos, max_intentos))
+            cursor.execute("""
+                UPDATE reportes_exportaciones
+                SET estado = 'procesando', fecha_inicio = NOW(), intentos = intentos + 1,
+                    id_exportacion = LAST_INSERT_ID(id_exportacion)
+                WHERE estado = 'pendiente'
+                OR (estado = 'procesando' AND fecha_inicio < NOW() - INTERVAL %s SECOND)
+                ORDER BY id_exportacion
+                LIMIT 1
+            """, (atasco_segundos,))
+            connection.commit()
+            if cursor.rowcount == 0:
+                return None
+            cursor.execute("SELECT * FROM reportes_exportaciones WHERE id_exportacion = %s", (cursor.lastrowid,))
+            return cursor.fetchone()
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def _terminar(exportacion_id: int, campos: dict):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                f"""UPDATE reportes_exportaciones SET {', '.join(f'{campo} = %s' for campo in campos)}
+                WHERE id_exportacion = %s""",
+                list(campos.values()) + [exportacion_id]
+            )
+            connection.commit()
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def marcar_lista(exportacion_id: int, hash_contenido: str, tamano: int, en_cache: bool):
+        ExportacionesModel._terminar(exportacion_id, {
+            "estado": "listo", "hash_contenido": hash_contenido, "tamano": tamano,
+            "desde_cache": en_cache, "error": None, "fecha_fin": datetime.now(),
+        })
+
+    @staticmethod
+    def marcar_error(exportacion_id: int, error: str):
+        ExportacionesModel._terminar(exportacion_id, {
+            "estado": "error", "error": error[:1000], "fecha_fin": datetime.now(),
+        })
+
+    @staticmethod
+    def reencolar(exportacion_id: int):
+        """Vuelve a pedir el artefacto, p. ej. si no está en el disco de esta instancia"""
+        ExportacionesModel._terminar(exportacion_id, {"estado": "pendiente", "intentos": 0, "fecha_fin": None})
@@ -0,0 +1,221 @@
+from database import db
+import pymysql
+from pymysql import Error
+from datetime import date, datetime, timedelta
+import math
+
+# Métricas numéricas agregadas en los resúmenes
+METRICAS_RESUMEN = ["presion_sistolica", "presion_diastolica", "glucosa", "peso", "frecuencia_cardiaca"]
+GRANULARIDADES = ["dia", "semana"]
+
+# Inicio del periodo en SQL; las semanas empiezan en lunes
+INICIO_PERIODO_SQL = {
+    "dia": "DATE(fecha_registro)",
+    "semana": "DATE_SUB(DATE(fecha_registro), INTERVAL WEEKDAY(fecha_registro) DAY)",
+}
+
+def inicio_periodo(fecha, granularidad: str) -> date:
+    if isinstance(fecha, datetime):
+        fecha = fecha.date()
+    if granularidad == "semana":
+        return fecha - timedelta(days=fecha.weekday())
+    return fecha
+
+def fin_periodo(inicio: date, granularidad: str) -> date:
+    return inicio + timedelta(days=7 if granularidad == "semana" else 1)
+
+class IndicadoresResumenModel:
+    """
+    Resúmenes diarios y semanales por paciente y métrica (tabla indicadores_resumen):
+    cantidad, mínimo, máximo, suma y suma de cuadrados. Con eso se obtienen promedio y
+    desviación estándar sin volver a leer las lecturas crudas. Como la proyección de
+    últimos valores, la mantiene IndicadoresSaludModel dentro de su transacción.
+    """
+
+    @staticmethod
+    def aplicar_lectura(cursor, indicador: dict):
+        IndicadoresResumenModel.aplicar_lote(cursor, [indicador])
+
+    @staticmethod
+    def aplicar_lote(cursor, indicadores: list):
+        """
+        Suma lecturas nuevas a sus periodos. Se agregan primero en memoria por periodo, así
+        un lote entero se aplica con un único INSERT multi-fila.
+        """
+        periodos = {}
+        for indicador in indicadores:
+            for metrica in METRICAS_RESUMEN:
+                valor = indicador.get(metrica)
+                if valor is None:
+                    continue
+                for granularidad in GRANULARIDADES:
+                    clave = (indicador["id_paciente"], metrica, granularidad,
+                             inicio_periodo(indicador["fecha_registro"], granularidad))
+                    actual = periodos.get(clave)
+                    if actual is None:
+                        periodos[clave] = [1, valor, valor, valor, valor * valor]
+                    else:
+                        actual[0] += 1
+                        actual[1] = min(actual[1], valor)
+                        actual[2] = max(actual[2], valor)
+                        actual[3] += valor
+                        actual[4] += valor * valor
+        if not periodos:
+            return
+        cursor.execute(
+            f"""INSERT INTO indicadores_resumen
+                (id_paciente, metrica, granularidad, inicio, cantidad, minimo, maximo, suma, suma_cuadrados)
+            VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s, %s)'] * len(periodos))}
+            ON DUPLICATE KEY UPDATE
+                cantidad = cantidad + VALUES(cantidad),
+                minimo = LEAST(minimo, VALUES(minimo)),
+                maximo = GREATEST(maximo, VALUES(maximo)),
+                suma = suma + VALUES(suma),
+                suma_cuadrados = suma_cuadrados + VALUES(suma_cuadrados)""",
+            [valor for clave, agregado in periodos.items() for valor in (*clave, *agregado)]
+        )
+
+    @staticmethod
+    def recalcular_periodos(cursor, paciente_id: int, fecha):
+        """
+        Recalcula desde indicadores_salud el día y la semana que contienen la fecha.
+        Se usa al editar o borrar: mínimo y máximo no se pueden descontar.
+        """
+        for granularidad in GRANULARIDADES:
+            inicio = inicio_periodo(fecha, granularidad)
+            fin = fin_periodo(inicio, granularidad)
+            cursor.execute(
+                "DELETE FROM indicadores_resumen WHERE id_paciente = %s AND granularidad = %s AND inicio = %s",
+                (paciente_id, granularidad, inicio)
+            )
+            subconsultas = [f"""
+                SELECT '{metrica}' AS metrica, COUNT({metrica}) AS cantidad, MIN({metrica}) AS minimo,
+                    MAX({metrica}) AS maximo, SUM({metrica}) AS suma,
+                    SUM({metrica} * {metrica}) AS suma_cuadrados
+                FROM indicadores_salud
+                WHERE id_paciente = %s AND fecha_registro >= %s AND fecha_registro < %s
+                AND {metrica} IS NOT NULL
+                HAVING COUNT({metrica}) > 0
+            """ for metrica in METRICAS_RESUMEN]
+            cursor.execute(
+                f"""INSERT INTO indicadores_resumen
+                    (id_paciente, metrica, granularidad, inicio, cantidad, minimo, maximo, suma, suma_cuadrados)
+                SELECT %s, r.metrica, %s, %s, r.cantidad, r.minimo, r.maximo, r.suma, r.suma_cuadrados
+                FROM ({' UNION ALL '.join(subconsultas)}) r""",
+                [paciente_id, granularidad, inicio] + [paciente_id, inicio, fin] * len(METRICAS_RESUMEN)
+            )
+
+    @staticmethod
+    def get_tendencia(paciente_id: int, metrica: str, granularidad: str, desde: date, hasta: date):
+        """Serie de una métrica entre dos fechas (inclusive), leída solo de los resúmenes"""
+        if metrica not in METRICAS_RESUMEN or granularidad not in GRANULARIDADES:
+            raise ValueError("Métrica o granularidad no válida")
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT inicio, cantidad, minimo, maximo, suma, suma_cuadrados
+                FROM indicadores_resumen
+                WHERE id_paciente = %s AND metrica = %s AND granularidad = %s
+                AND inicio BETWEEN %s AND %s
+                ORDER BY inicio
+            """, (paciente_id, metrica, granularidad, inicio_periodo(desde, granularidad), hasta))
+            serie = []
+            for fila in cursor.fetchall():
+                cantidad = fila["cantidad"]
+                promedio = float(fila["suma"]) / cantidad
+                varianza = max(float(fila["suma_cuadrados"]) / cantidad - promedio * promedio, 0.0)
+                serie.append({
+                    "inicio": fila["inicio"],
+                    "cantidad": cantidad,
+                    "minimo": float(fila["minimo"]),
+                    "maximo": float(fila["maximo"]),
+                    "promedio": round(promedio, 2),
+                    "desviacion": round(math.sqrt(varianza), 2),
+                })
+            return serie
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def iterar_diarios(paciente_ids: list, metricas: list, desde: date, tamano_lote: int = 5000):
+        """
+        Resúmenes diarios desde 'desde' de un grupo de pacientes, leídos con un cursor del
+        lado del servidor. Entrega tuplas (id_paciente, metrica, inicio, cantidad, suma,
+        suma_cuadrados) para cargarlas directamente en arreglos.
+        """
+        if not paciente_ids:
+            return
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor(pymysql.cursors.SSCursor)
+            cursor.execute(f"""
+                SELECT id_paciente, metrica, inicio, cantidad, suma, suma_cuadrados
+                FROM indicadores_resumen
+                WHERE id_paciente IN ({', '.join(['%s'] * len(paciente_ids))})
+                AND metrica IN ({', '.join(['%s'] * len(metricas))})
+                AND granularidad = 'dia' AND inicio >= %s
+            """, [*paciente_ids, *metricas, desde])
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    break
+                yield from filas
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def reconstruir(tamano_lote: int = 200):
+        """
+        Backfill de los resúmenes por lotes de pacientes: cada lote borra sus filas y las
+        regenera con INSERT ... SELECT agrupado, en una transacción por lote.
+        Devuelve el número de pacientes procesados.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            procesados = 0
+            ultimo_id = 0
+            while True:
+                cursor.execute(
+                    "SELECT id_paciente FROM paciente WHERE id_paciente > %s ORDER BY id_paciente LIMIT %s",
+                    (ultimo_id, tamano_lote)
+                )
+                ids = [fila["id_paciente"] for fila in cursor.fetchall()]
+                if not ids:
+                    break
+                desde, hasta = ids[0], ids[-1]
+
+                connection.begin()
+                cursor.execute(
+                    "DELETE FROM indicadores_resumen WHERE id_paciente BETWEEN %s AND %s", (desde, hasta)
+                )
+                for granularidad in GRANULARIDADES:
+                    inicio = INICIO_PERIODO_SQL[granularidad]
+                    for metrica in METRICAS_RESUMEN:
+                        cursor.execute(f"""
+                            INSERT INTO indicadores_resumen
+                                (id_paciente, metrica, granularidad, inicio, cantidad, minimo, maximo,
+                                suma, suma_cuadrados)
+                            SELECT id_paciente, '{metrica}', '{granularidad}', {inicio}, COUNT(*),
+                                MIN({metrica}), MAX({metrica}), SUM({metrica}), SUM({metrica} * {metrica})
+                            FROM indicadores_salud
+                            WHERE id_paciente BETWEEN %s AND %s AND {metrica} IS NOT NULL
+                            GROUP BY id_paciente, {inicio}
+                        """, (desde, hasta))
+                connection.commit()
+
+                procesados += len(ids)
+                ultimo_id = hasta
+            return procesados
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
@@ -1,29 +1,118 @@
 
 from database import db
+from models.indicadores_ultimos_model import IndicadoresUltimosModel
+from models.indicadores_resumen_model import IndicadoresResumenModel
+from models.retos_progreso_model import RetosProgresoModel
+from models.riesgo_model import RiesgoModel
+from models.sync_model import SyncModel
+from models.outbox_model import OutboxModel, INDICADORES_CREADOS
 import pymysql
 from pymysql import Error
 
+COLUMNAS_LECTURA = ["presion_sistolica", "presion_diastolica", "glucosa", "peso", "frecuencia_cardiaca",
+                    "estado_animo", "actividad_fisica"]
+
+def _evaluar_reglas(cursor, lecturas: list):
+    # Solo publica el evento en la transacción; el relay evalúa las reglas clínicas después
+    # del commit, fuera de la petición
+    pacientes = {lectura["id_paciente"] for lectura in lecturas}
+    OutboxModel.publicar(
+        cursor, INDICADORES_CREADOS, {"ids": [lectura["id_indicador"] for lectura in lecturas]},
+        pacientes.pop() if len(pacientes) == 1 else None
+    )
+
 class IndicadoresSaludModel:
     @staticmethod
     def create(indicador_data: dict):
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
+            connection.begin()
+            # fecha_registro puede venir del dispositivo (wearables); si no, la del servidor
             cursor.execute(
                 """INSERT INTO indicadores_salud (id_paciente, presion_sistolica, presion_diastolica, 
-                glucosa, peso, frecuencia_cardiaca, estado_animo, actividad_fisica, fuente_dato) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                glucosa, peso, frecuencia_cardiaca, estado_animo, actividad_fisica, fuente_dato,
+                fecha_registro) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, COALESCE(%s, CURRENT_TIMESTAMP))""",
                 (indicador_data['id_paciente'], indicador_data.get('presion_sistolica'),
                  indicador_data.get('presion_diastolica'), indicador_data.get('glucosa'),
                  indicador_data.get('peso'), indicador_data.get('frecuencia_cardiaca'),
                  indicador_data.get('estado_animo'), indicador_data.get('actividad_fisica'),
-                 indicador_data.get('fuente_dato', 'manual'))
+                 indicador_data.get('fuente_dato', 'manual'), indicador_data.get('fecha_registro'))
             )
-            connection.commit()
             indicador_id = cursor.lastrowid
             cursor.execute("SELECT * FROM indicadores_salud WHERE id_indicador = %s", (indicador_id,))
-            return cursor.fetchone()
+            indicador = cursor.fetchone()
+            IndicadoresUltimosModel.aplicar_lectura(cursor, indicador)
+            IndicadoresResumenModel.aplicar_lectura(cursor, indicador)
+            pacientes_retos = RetosProgresoModel.aplicar_registros(cursor, [indicador])
+            RiesgoModel.marcar_pendientes(cursor, [indicador["id_paciente"]])
+            _evaluar_reglas(cursor, [indicador])
+            connection.commit()
+            RetosProgresoModel.invalidar_pacientes(pacientes_retos)
+            return indicador
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def insertar_lote(cursor, indicadores: list) -> tuple:
+        """
+        Inserta un lote de lecturas con un INSERT multi-fila y actualiza las proyecciones,
+        en la transacción de quien llama. Devuelve (lecturas creadas, pacientes cuyos retos
+        cambiaron); esos se invalidan con RetosProgresoModel.invalidar_pacientes tras el commit.
+        """
+        if not indicadores:
+            return [], set()
+        valores = []
+        for indicador_data in indicadores:
+            valores.append(indicador_data['id_paciente'])
+            valores += [indicador_data.get(columna) for columna in COLUMNAS_LECTURA]
+            valores += [indicador_data.get('fuente_dato', 'manual'), indicador_data.get('fecha_registro')]
+        fila = f"({', '.join(['%s'] * (len(COLUMNAS_LECTURA) + 2))}, COALESCE(%s, CURRENT_TIMESTAMP))"
+        cursor.execute(
+            f"""INSERT INTO indicadores_salud (id_paciente, {', '.join(COLUMNAS_LECTURA)}, fuente_dato,
+            fecha_registro)
+            VALUES {', '.join([fila] * len(indicadores))}""",
+            valores
+        )
+        # Un INSERT de varias filas recibe ids consecutivos desde lastrowid
+        primero = cursor.lastrowid
+        cursor.execute(
+            "SELECT * FROM indicadores_salud WHERE id_indicador BETWEEN %s AND %s ORDER BY id_indicador",
+            (primero, primero + len(indicadores) - 1)
+        )
+        creados = cursor.fetchall()
+        for indicador in creados:
+            IndicadoresUltimosModel.aplicar_lectura(cursor, indicador)
+        IndicadoresResumenModel.aplicar_lote(cursor, creados)
+        pacientes_retos = RetosProgresoModel.aplicar_registros(cursor, creados)
+        RiesgoModel.marcar_pendientes(cursor, [indicador["id_paciente"] for indicador in creados])
+        _evaluar_reglas(cursor, creados)
+        return creados, pacientes_retos
+
+    @staticmethod
+    def create_lote(indicadores: list) -> list:
+        """
+        Inserta un lote de lecturas con un INSERT multi-fila y actualiza las proyecciones
+        en la misma transacción.
+        """
+        if not indicadores:
+            return []
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            connection.begin()
+            creados, pacientes_retos = IndicadoresSaludModel.insertar_lote(cursor, indicadores)
+            connection.commit()
+            RetosProgresoModel.invalidar_pacientes(pacientes_retos)
+            return creados
         except Error as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
@@ -54,6 +143,24 @@ class IndicadoresSaludModel:
                 cursor.close()
                 connection.close()
 
+    @staticmethod
+    def get_by_ids(indicador_ids: list) -> list:
+        if not indicador_ids:
+            return []
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                f"SELECT * FROM indicadores_salud WHERE id_indicador IN ({', '.join(['%s'] * len(indicador_ids))}) "
+                "ORDER BY id_indicador",
+                list(indicador_ids)
+            )
+            return cursor.fetchall()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
     @staticmethod
     def get_by_paciente_id(paciente_id: int):
         connection = db.get_connection()
@@ -82,12 +189,26 @@ class IndicadoresSaludModel:
             values.append(indicador_id)
             query = f"UPDATE indicadores_salud SET {', '.join(update_fields)} WHERE id_indicador = %s"
             
+            connection.begin()
+            cursor.execute("SELECT * FROM indicadores_salud WHERE id_indicador = %s FOR UPDATE", (indicador_id,))
+            anterior = cursor.fetchone()
             cursor.execute(query, values)
-            connection.commit()
             
             cursor.execute("SELECT * FROM indicadores_salud WHERE id_indicador = %s", (indicador_id,))
-            return cursor.fetchone()
+            indicador = cursor.fetchone()
+            pacientes_retos = set()
+            if indicador:
+                IndicadoresUltimosModel.recalcular(cursor, indicador["id_paciente"])
+                IndicadoresResumenModel.recalcular_periodos(
+                    cursor, indicador["id_paciente"], indicador["fecha_registro"]
+                )
+                RiesgoModel.marcar_pendientes(cursor, [indicador["id_paciente"]])
+                pacientes_retos = RetosProgresoModel.recontar_registros(cursor, [anterior, indicador])
+            connection.commit()
+            RetosProgresoModel.invalidar_pacientes(pacientes_retos)
+            return indicador
         except Error as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
@@ -99,10 +220,30 @@ class IndicadoresSaludModel:
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
+            connection.begin()
+            cursor.execute("SELECT * FROM indicadores_salud WHERE id_indicador = %s FOR UPDATE", (indicador_id,))
+            indicador = cursor.fetchone()
+            pacientes_retos = set()
+            SyncModel.registrar_eliminados(cursor, "indicadores_salud", "id_indicador = %s", (indicador_id,))
             cursor.execute("DELETE FROM indicadores_salud WHERE id_indicador = %s", (indicador_id,))
+            eliminado = cursor.rowcount > 0
+            # Solo hace falta recalcular si se borró la lectura vigente de alguna métrica
+            if eliminado and IndicadoresUltimosModel.referencia_indicador(
+                cursor, indicador["id_paciente"], indicador_id
+            ):
+                IndicadoresUltimosModel.recalcular(cursor, indicador["id_paciente"])
+            if eliminado:
+                IndicadoresResumenModel.recalcular_periodos(
+                    cursor, indicador["id_paciente"], indicador["fecha_registro"]
+                )
+                RiesgoModel.marcar_pendientes(cursor, [indicador["id_paciente"]])
+                # Sin la lectura, sus días en los retos bajan (y un reto puede dejar de estar completo)
+                pacientes_retos = RetosProgresoModel.recontar_registros(cursor, [indicador])
             connection.commit()
-            return cursor.rowcount > 0
+            RetosProgresoModel.invalidar_pacientes(pacientes_retos)
+            return eliminado
         except Error as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
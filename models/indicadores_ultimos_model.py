@@ -0,0 +1,182 @@
+from database import db
+import pymysql
+from pymysql import Error
+
+# Métricas proyectadas: (nombre, columnas de valor). La presión se toma de la misma lectura
+METRICAS_ULTIMAS = [
+    ("presion", ["presion_sistolica", "presion_diastolica"]),
+    ("glucosa", ["glucosa"]),
+    ("peso", ["peso"]),
+    ("frecuencia_cardiaca", ["frecuencia_cardiaca"]),
+]
+
+def _columnas_proyeccion():
+    columnas = []
+    for metrica, valores in METRICAS_ULTIMAS:
+        columnas += valores + [f"fecha_{metrica}", f"id_indicador_{metrica}"]
+    return columnas
+
+COLUMNAS_PROYECCION = _columnas_proyeccion()
+
+class IndicadoresUltimosModel:
+    """
+    Proyección con el último valor de cada métrica por paciente (tabla indicadores_ultimos).
+    La mantienen los métodos de escritura de IndicadoresSaludModel dentro de su misma
+    transacción, por eso los métodos de mantenimiento reciben el cursor.
+    """
+
+    @staticmethod
+    def _valores_de_lectura(indicador: dict) -> list:
+        valores = []
+        for metrica, columnas in METRICAS_ULTIMAS:
+            presente = indicador.get(columnas[0]) is not None
+            valores += [indicador.get(c) if presente else None for c in columnas]
+            valores += [
+                indicador["fecha_registro"] if presente else None,
+                indicador["id_indicador"] if presente else None
+            ]
+        return valores
+
+    @staticmethod
+    def aplicar_lectura(cursor, indicador: dict):
+        """
+        Incorpora una lectura nueva. Solo reemplaza una métrica si la lectura es más
+        reciente que la guardada, así los datos de wearables que llegan desordenados
+        no pisan valores posteriores.
+        """
+        asignaciones = []
+        for metrica, columnas in METRICAS_ULTIMAS:
+            fecha, id_col = f"fecha_{metrica}", f"id_indicador_{metrica}"
+            es_mas_reciente = (
+                f"VALUES({fecha}) IS NOT NULL AND ({fecha} IS NULL OR VALUES({fecha}) > {fecha} "
+                f"OR (VALUES({fecha}) = {fecha} AND VALUES({id_col}) >= {id_col}))"
+            )
+            # La fecha se asigna al final: las condiciones anteriores deben ver la fecha vieja
+            for columna in columnas + [id_col, fecha]:
+                asignaciones.append(
+                    f"{columna} = IF({es_mas_reciente}, VALUES({columna}), {columna})"
+                )
+        cursor.execute(
+            f"""INSERT INTO indicadores_ultimos (id_paciente, {', '.join(COLUMNAS_PROYECCION)})
+            VALUES ({', '.join(['%s'] * (len(COLUMNAS_PROYECCION) + 1))})
+            ON DUPLICATE KEY UPDATE {', '.join(asignaciones)}""",
+            [indicador["id_paciente"]] + IndicadoresUltimosModel._valores_de_lectura(indicador)
+        )
+
+    @staticmethod
+    def recalcular(cursor, paciente_id: int):
+        """Reconstruye la fila de un paciente desde indicadores_salud (tras editar o borrar)"""
+        valores = []
+        alguna = False
+        for metrica, columnas in METRICAS_ULTIMAS:
+            cursor.execute(f"""
+                SELECT id_indicador, fecha_registro, {', '.join(columnas)}
+                FROM indicadores_salud
+                WHERE id_paciente = %s AND {columnas[0]} IS NOT NULL
+                ORDER BY fecha_registro DESC, id_indicador DESC
+                LIMIT 1
+            """, (paciente_id,))
+            lectura = cursor.fetchone()
+            if lectura:
+                alguna = True
+                valores += [lectura[c] for c in columnas]
+                valores += [lectura["fecha_registro"], lectura["id_indicador"]]
+            else:
+                valores += [None] * (len(columnas) + 2)
+
+        if not alguna:
+            cursor.execute("DELETE FROM indicadores_ultimos WHERE id_paciente = %s", (paciente_id,))
+            return
+        cursor.execute(
+            f"""REPLACE INTO indicadores_ultimos (id_paciente, {', '.join(COLUMNAS_PROYECCION)})
+            VALUES ({', '.join(['%s'] * (len(COLUMNAS_PROYECCION) + 1))})""",
+            [paciente_id] + valores
+        )
+
+    @staticmethod
+    def referencia_indicador(cursor, paciente_id: int, indicador_id: int) -> bool:
+        """Indica si la lectura es la vigente de alguna métrica del paciente"""
+        ids = ", ".join(f"id_indicador_{metrica}" for metrica, _ in METRICAS_ULTIMAS)
+        cursor.execute(
+            f"SELECT COUNT(*) AS total FROM indicadores_ultimos WHERE id_paciente = %s AND %s IN ({ids})",
+            (paciente_id, indicador_id)
+        )
+        return cursor.fetchone()["total"] > 0
+
+    @staticmethod
+    def get_by_paciente_id(paciente_id: int):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT * FROM indicadores_ultimos WHERE id_paciente = %s", (paciente_id,))
+            return cursor.fetchone()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def reconstruir(tamano_lote: int = 500):
+        """
+        Backfill de la proyección completa, por lotes de pacientes. Cada lote calcula las
+        últimas lecturas con funciones de ventana y reemplaza sus filas en una transacción.
+        Devuelve el número de pacientes procesados.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            procesados = 0
+            ultimo_id = 0
+            while True:
+                cursor.execute(
+                    "SELECT id_paciente FROM paciente WHERE id_paciente > %s ORDER BY id_paciente LIMIT %s",
+                    (ultimo_id, tamano_lote)
+                )
+                ids = [fila["id_paciente"] for fila in cursor.fetchall()]
+                if not ids:
+                    break
+                desde, hasta = ids[0], ids[-1]
+
+                filas = {}
+                for metrica, columnas in METRICAS_ULTIMAS:
+                    cursor.execute(f"""
+                        SELECT * FROM (
+                            SELECT id_paciente, id_indicador, fecha_registro, {', '.join(columnas)},
+                                ROW_NUMBER() OVER (
+                                    PARTITION BY id_paciente
+                                    ORDER BY fecha_registro DESC, id_indicador DESC
+                                ) AS rn
+                            FROM indicadores_salud
+                            WHERE id_paciente BETWEEN %s AND %s AND {columnas[0]} IS NOT NULL
+                        ) ultimas
+                        WHERE rn = 1
+                    """, (desde, hasta))
+                    for lectura in cursor.fetchall():
+                        fila = filas.setdefault(lectura["id_paciente"], {"id_paciente": lectura["id_paciente"]})
+                        for columna in columnas:
+                            fila[columna] = lectura[columna]
+                        fila[f"fecha_{metrica}"] = lectura["fecha_registro"]
+                        fila[f"id_indicador_{metrica}"] = lectura["id_indicador"]
+
+                connection.begin()
+                cursor.execute(
+                    "DELETE FROM indicadores_ultimos WHERE id_paciente BETWEEN %s AND %s", (desde, hasta)
+                )
+                if filas:
+                    cursor.executemany(
+                        f"""INSERT INTO indicadores_ultimos (id_paciente, {', '.join(COLUMNAS_PROYECCION)})
+                        VALUES ({', '.join(['%s'] * (len(COLUMNAS_PROYECCION) + 1))})""",
+                        [[f["id_paciente"]] + [f.get(c) for c in COLUMNAS_PROYECCION] for f in filas.values()]
+                    )
+                connection.commit()
+
+                procesados += len(ids)
+                ultimo_id = hasta
+            return procesados
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
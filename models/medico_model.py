@@ -1,6 +1,11 @@
 from database import db
+from cache import cacheado, invalidar
 import pymysql
 from pymysql import Error
+import os
+
+# Directorio público de médicos: en memoria cada worker lo invalida solo, el TTL acota el desfase
+DIRECTORIO_TTL = int(os.getenv("CACHE_DIRECTORIO_TTL", "60"))
 
 class MedicoModel:
     @staticmethod
@@ -20,6 +25,7 @@ class MedicoModel:
                  medico_data.get('estatus', 'Activo'))
             )
             connection.commit()
+            invalidar("medicos")
             medico_id = cursor.lastrowid
             cursor.execute("SELECT * FROM medico WHERE id_medico = %s", (medico_id,))
             return cursor.fetchone()
@@ -48,6 +54,7 @@ class MedicoModel:
                 connection.close()
 
     @staticmethod
+    @cacheado("medico.get_by_id", lambda medico_id: ["medicos"], ttl=DIRECTORIO_TTL)
     def get_by_id(medico_id: int):
         connection = db.get_connection()
         try:
@@ -65,6 +72,7 @@ class MedicoModel:
                 connection.close()
 
     @staticmethod
+    @cacheado("medico.get_by_user_id", lambda usuario_id: ["medicos"], ttl=DIRECTORIO_TTL)
     def get_by_user_id(usuario_id: int):
         connection = db.get_connection()
         try:
@@ -82,19 +90,51 @@ class MedicoModel:
                 connection.close()
 
     @staticmethod
+    @cacheado("medico.get_medicos_activos", lambda: ["medicos"], ttl=DIRECTORIO_TTL)
     def get_medicos_activos():
+        # total_pacientes se mantiene en la tabla medico (ver ajustar_total_pacientes)
+        return db.consultar_compartido("""
+            SELECT m.*, u.nombre, u.correo, u.rol
+            FROM medico m
+            JOIN usuario u ON m.id_usuario = u.id_usuario
+            WHERE m.estatus = 'Activo' AND u.estatus = 'Activo'
+        """)
+
+    @staticmethod
+    def ajustar_total_pacientes(cursor, medico_usuario_id: int, delta: int):
+        """
+        Suma delta al contador total_pacientes del médico. Recibe el cursor de quien
+        modifica paciente_medico para que ambos cambios queden en la misma transacción.
+        """
+        cursor.execute(
+            """UPDATE medico SET total_pacientes = GREATEST(total_pacientes + %s, 0)
+            WHERE id_usuario = %s""",
+            (delta, medico_usuario_id)
+        )
+
+    @staticmethod
+    def reconciliar_total_pacientes():
+        """Recalcula total_pacientes desde paciente_medico y devuelve los médicos corregidos"""
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
             cursor.execute("""
-                SELECT m.*, u.nombre, u.correo, u.rol,
-                       (SELECT COUNT(*) FROM paciente_medico pm 
-                        WHERE pm.id_medico = m.id_usuario AND pm.estatus = 'activo') as total_pacientes
-                FROM medico m
-                JOIN usuario u ON m.id_usuario = u.id_usuario
-                WHERE u.estatus = 'Activo' AND m.estatus = 'Activo'
+                UPDATE medico m
+                LEFT JOIN (
+                    SELECT id_medico, COUNT(*) AS total
+                    FROM paciente_medico
+                    WHERE estatus = 'activo'
+                    GROUP BY id_medico
+                ) pm ON pm.id_medico = m.id_usuario
+                SET m.total_pacientes = COALESCE(pm.total, 0)
+                WHERE m.total_pacientes <> COALESCE(pm.total, 0)
             """)
-            return cursor.fetchall()
+            connection.commit()
+            if cursor.rowcount:
+                invalidar("medicos")
+            return cursor.rowcount
+        except Error as e:
+            raise e
         finally:
             if connection and connection.open:
                 cursor.close()
@@ -118,6 +158,7 @@ class MedicoModel:
             
             cursor.execute(query, values)
             connection.commit()
+            invalidar("medicos")
             
             cursor.execute("SELECT * FROM medico WHERE id_medico = %s", (medico_id,))
             return cursor.fetchone()
@@ -135,6 +176,7 @@ class MedicoModel:
             cursor = connection.cursor()
             cursor.execute("DELETE FROM medico WHERE id_medico = %s", (medico_id,))
             connection.commit()
+            invalidar("medicos")
             return cursor.rowcount > 0
         except Error as e:
             raise e
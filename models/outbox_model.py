@@ -0,0 +1,263 @@
+from database import db
+import json
+from pymysql import Error
+
+# Tipos de evento que publican los modelos. La carga lleva los ids afectados; los
+# suscriptores releen las filas si las necesitan, así que un evento repetido no hace daño.
+ALERTAS_CAMBIADAS = "alertas.cambiadas"
+ALERTAS_RECURRENTES_CAMBIADAS = "alertas_recurrentes.cambiadas"
+INDICADORES_CREADOS = "indicadores.creados"
+
+def _prefijo_contiguo(eventos: list, desde_id: int) -> list:
+    """
+    Eventos que se pueden entregar sin saltarse ninguno. Los ids se asignan al insertar pero
+    se confirman en otro orden, así que un hueco puede ser una transacción todavía abierta:
+    se espera en el hueco hasta que el evento que le sigue esté 'asentado' (lo bastante
+    viejo como para que el hueco sea un rollback).
+    """
+    listos, ultimo = [], desde_id
+    for evento in eventos:
+        if evento["id_evento"] != ultimo + 1 and not evento["asentado"]:
+            break
+        listos.append(evento)
+        ultimo = evento["id_evento"]
+    return listos
+
+class OutboxModel:
+    """
+    Outbox transaccional (tabla eventos_outbox). Los modelos publican un evento con el cursor
+    de su transacción, así que el evento existe si y solo si el cambio se confirmó. El relay
+    (eventos.RelayEventos) lo entrega después a los suscriptores en lotes, por orden de id.
+
+    Los suscriptores durables guardan su offset en eventos_offsets y lo avanzan en la misma
+    transacción en la que leen el lote, con la fila del offset bloqueada: una sola instancia
+    consume cada uno a la vez, y si la entrega falla el offset no se mueve y el lote se
+    vuelve a entregar (al menos una vez).
+
+    Tras un fallo el suscriptor espera con backoff exponencial y los reintentos van de a un
+    evento, para aislar el que falla; si ese evento agota max_intentos pasa a
+    eventos_descartados y el offset sigue, así un evento roto no frena al suscriptor.
+    """
+
+    @staticmethod
+    def publicar(cursor, tipo: str, carga: dict, id_paciente: int = None) -> int:
+        cursor.execute(
+            "INSERT INTO eventos_outbox (tipo, id_paciente, carga) VALUES (%s, %s, %s)",
+            (tipo, id_paciente, json.dumps(carga, ensure_ascii=False, default=str))
+        )
+        return cursor.lastrowid
+
+    @staticmethod
+    def _leer(cursor, desde_id: int, limite: int, espera_hueco_segundos: float) -> tuple:
+        """(eventos entregables, True si se leyó un lote completo sin cortar en un hueco)"""
+        cursor.execute("""
+            SELECT id_evento, tipo, id_paciente, carga, fecha_creacion,
+                   fecha_creacion <= NOW(6) - INTERVAL %s MICROSECOND AS asentado
+            FROM eventos_outbox
+            WHERE id_evento > %s
+            ORDER BY id_evento
+            LIMIT %s
+        """, (int(espera_hueco_segundos * 1000000), desde_id, limite))
+        eventos = cursor.fetchall()
+        listos = _prefijo_contiguo(eventos, desde_id)
+        for evento in listos:
+            evento["carga"] = json.loads(evento["carga"]) if evento["carga"] else {}
+            del evento["asentado"]
+        return listos, len(eventos) == limite and len(listos) == len(eventos)
+
+    @staticmethod
+    def leer(desde_id: int, limite: int, espera_hueco_segundos: float) -> tuple:
+        """Lectura sin offset guardado, para los suscriptores locales de cada proceso"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            return OutboxModel._leer(cursor, desde_id, limite, espera_hueco_segundos)
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_ultimo_id() -> int:
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT COALESCE(MAX(id_evento), 0) AS ultimo FROM eventos_outbox")
+            return cursor.fetchone()["ultimo"]
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def registrar_consumidor(consumidor: str):
+        """Un suscriptor durable nuevo empieza en el último evento: no recibe el historial"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                INSERT IGNORE INTO eventos_offsets (consumidor, ultimo_evento)
+                SELECT %s, COALESCE(MAX(id_evento), 0) FROM eventos_outbox
+            """, (consumidor,))
+            connection.commit()
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def _registrar_fallo(cursor, consumidor: str, eventos: list, intentos: int, error: str,
+                         max_intentos: int, reintento_base_segundos: float,
+                         reintento_maximo_segundos: float) -> bool:
+        """
+        Anota un fallo de entrega en el offset del consumidor. Si el lote era un solo evento
+        y agotó los intentos, lo pasa a eventos_descartados y avanza el offset (True).
+        """
+        if intentos >= max_intentos and len(eventos) == 1:
+            evento = eventos[0]
+            cursor.execute("""
+                INSERT INTO eventos_descartados (consumidor, id_evento, tipo, id_paciente, carga, intentos, error)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (consumidor, evento["id_evento"], evento["tipo"], evento["id_paciente"],
+                  json.dumps(evento["carga"], ensure_ascii=False, default=str), intentos, error))
+            cursor.execute("""
+                UPDATE eventos_offsets
+                SET ultimo_evento = %s, intentos = 0, reintentar_en = NULL, ultimo_error = %s
+                WHERE consumidor = %s
+            """, (evento["id_evento"], error, consumidor))
+            return True
+        retraso = min(reintento_maximo_segundos, reintento_base_segundos * 2 ** (intentos - 1))
+        cursor.execute("""
+            UPDATE eventos_offsets
+            SET intentos = %s, reintentar_en = NOW(6) + INTERVAL %s MICROSECOND, ultimo_error = %s
+            WHERE consumidor = %s
+        """, (intentos, int(retraso * 1000000), error, consumidor))
+        return False
+
+    @staticmethod
+    def consumir(consumidor: str, limite: int, espera_hueco_segundos: float, entregar,
+                 max_intentos: int = 5, reintento_base_segundos: float = 1.0,
+                 reintento_maximo_segundos: float = 300.0) -> tuple:
+        """
+        Lee el próximo lote del consumidor, llama entregar(eventos) y avanza su offset, todo
+        en una transacción. Devuelve (eventos entregados, hay más); (None, False) si otra
+        instancia tiene el offset tomado y ([], False) si está esperando para reintentar.
+        Si entregar falla se registra el intento (o se descarta el evento) y se relanza el error.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            connection.begin()
+            cursor.execute("""
+                SELECT ultimo_evento, intentos, reintentar_en > NOW(6) AS esperando
+                FROM eventos_offsets WHERE consumidor = %s FOR UPDATE SKIP LOCKED
+            """, (consumidor,))
+            offset = cursor.fetchone()
+            if offset is None:
+                connection.rollback()
+                return None, False
+            if offset["esperando"]:
+                connection.commit()
+                return [], False
+            # Después de un fallo se reintenta de a un evento para dar con el que falla
+            eventos, hay_mas = OutboxModel._leer(
+                cursor, offset["ultimo_evento"], 1 if offset["intentos"] else limite, espera_hueco_segundos
+            )
+            if not eventos:
+                connection.commit()
+                return eventos, hay_mas
+            try:
+                entregar(eventos)
+            except Exception as e:
+                OutboxModel._registrar_fallo(
+                    cursor, consumidor, eventos, offset["intentos"] + 1, f"{type(e).__name__}: {e}"[:2000],
+                    max_intentos, reintento_base_segundos, reintento_maximo_segundos
+                )
+                connection.commit()
+                raise
+            cursor.execute("""
+                UPDATE eventos_offsets SET ultimo_evento = %s, intentos = 0, reintentar_en = NULL
+                WHERE consumidor = %s
+            """, (eventos[-1]["id_evento"], consumidor))
+            connection.commit()
+            return eventos, hay_mas
+        except Exception as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_resumen() -> dict:
+        """Último evento, atraso, reintentos y eventos descartados de cada suscriptor durable"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT COALESCE(MAX(id_evento), 0) AS ultimo FROM eventos_outbox")
+            ultimo = cursor.fetchone()["ultimo"]
+            cursor.execute("SELECT consumidor, COUNT(*) AS cantidad FROM eventos_descartados GROUP BY consumidor")
+            descartados = {fila["consumidor"]: fila["cantidad"] for fila in cursor.fetchall()}
+            cursor.execute("""
+                SELECT consumidor, ultimo_evento, intentos, reintentar_en, ultimo_error, fecha_actualizacion
+                FROM eventos_offsets
+            """)
+            return {
+                "ultimo_evento": ultimo,
+                "consumidores": {
+                    fila["consumidor"]: {
+                        "ultimo_evento": fila["ultimo_evento"],
+                        "atraso": ultimo - fila["ultimo_evento"],
+                        "intentos": fila["intentos"],
+                        "reintentar_en": fila["reintentar_en"],
+                        "ultimo_error": fila["ultimo_error"],
+                        "descartados": descartados.get(fila["consumidor"], 0),
+                        "fecha_actualizacion": fila["fecha_actualizacion"],
+                    }
+                    for fila in cursor.fetchall()
+                },
+            }
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def purgar(retencion_dias: int, consumidores: list, tamano_lote: int = 5000) -> int:
+        """
+        Borra por lotes los eventos más viejos que la retención que ya pasaron todos los
+        suscriptores durables de 'consumidores' (uno atrasado frena la purga en vez de perder
+        eventos). Los offsets de suscriptores que ya no están registrados no cuentan.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            minimo = None
+            if consumidores:
+                cursor.execute(
+                    f"SELECT MIN(ultimo_evento) AS minimo FROM eventos_offsets "
+                    f"WHERE consumidor IN ({', '.join(['%s'] * len(consumidores))})",
+                    list(consumidores)
+                )
+                minimo = cursor.fetchone()["minimo"]
+            borrados = 0
+            while True:
+                cursor.execute("""
+                    DELETE FROM eventos_outbox
+                    WHERE fecha_creacion < NOW() - INTERVAL %s DAY AND (%s IS NULL OR id_evento <= %s)
+                    ORDER BY id_evento
+                    LIMIT %s
+                """, (retencion_dias, minimo, minimo, tamano_lote))
+                connection.commit()
+                borrados += cursor.rowcount
+                if cursor.rowcount < tamano_lote:
+                    return borrados
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
@@ -1,8 +1,39 @@
 from database import db
 import pymysql
 from pymysql import Error
+from models.medico_model import MedicoModel
+from models.adherencia_model import calcular_adherencia, VENTANAS_ADHERENCIA
+from cache import invalidar
+from datetime import date, timedelta
+
+def _avisar_clasificaciones(*relaciones):
+    # Import diferido: los tableros de clasificación dependen de este modelo
+    from clasificaciones import clasificaciones
+    clasificaciones.descartar_medicos({relacion["id_medico"] for relacion in relaciones if relacion})
+
+# Orden del panel del médico; por riesgo lo resuelve idx_pm_medico_estatus_riesgo
+ORDEN_PANEL = {
+    "fecha": "pm.fecha_asignacion DESC",
+    "riesgo": "pm.riesgo_puntaje DESC, pm.id_relacion DESC",
+}
 
 class PacienteMedicoModel:
+
+    @staticmethod
+    def _ajustar_total_pacientes(cursor, anterior: dict = None, nueva: dict = None):
+        """
+        Actualiza medico.total_pacientes según el cambio de estatus de una relación.
+        Devuelve True si algún contador cambió.
+        """
+        anterior_activa = bool(anterior) and anterior["estatus"] == "activo"
+        nueva_activa = bool(nueva) and nueva["estatus"] == "activo"
+        if anterior_activa and nueva_activa and anterior["id_medico"] == nueva["id_medico"]:
+            return False
+        if anterior_activa:
+            MedicoModel.ajustar_total_pacientes(cursor, anterior["id_medico"], -1)
+        if nueva_activa:
+            MedicoModel.ajustar_total_pacientes(cursor, nueva["id_medico"], 1)
+        return anterior_activa or nueva_activa
     
     @staticmethod
     def create_solicitud(solicitud_data: dict):
@@ -13,18 +44,26 @@ class PacienteMedicoModel:
                 return None
                 
             cursor = connection.cursor()
+            connection.begin()
+            # La relación nace con el último puntaje de riesgo del paciente, si ya tiene uno
             cursor.execute(
                 """INSERT INTO paciente_medico 
-                (id_paciente, id_medico, estatus, notas) 
-                VALUES (%s, %s, %s, %s)""",
+                (id_paciente, id_medico, estatus, notas, riesgo_puntaje) 
+                VALUES (%s, %s, %s, %s,
+                    (SELECT puntaje FROM riesgo_pacientes WHERE id_paciente = %s))""",
                 (solicitud_data['id_paciente'], solicitud_data['id_medico'], 
-                 'pendiente', solicitud_data.get('notas'))
+                 'pendiente', solicitud_data.get('notas'), solicitud_data['id_paciente'])
             )
-            connection.commit()
             relacion_id = cursor.lastrowid
             cursor.execute("SELECT * FROM paciente_medico WHERE id_relacion = %s", (relacion_id,))
-            return cursor.fetchone()
+            nueva = cursor.fetchone()
+            contador_cambio = PacienteMedicoModel._ajustar_total_pacientes(cursor, None, nueva)
+            connection.commit()
+            if contador_cambio:
+                invalidar("medicos")
+            return nueva
         except Error as e:
+            connection.rollback()
             print(f"❌ Error en create_solicitud: {str(e)}")
             return None
         finally:
@@ -76,6 +115,11 @@ class PacienteMedicoModel:
                 return None
                 
             cursor = connection.cursor()
+            connection.begin()
+            cursor.execute(
+                "SELECT * FROM paciente_medico WHERE id_relacion = %s FOR UPDATE", (relacion_id,)
+            )
+            anterior = cursor.fetchone()
             
             if notas:
                 cursor.execute(
@@ -88,10 +132,16 @@ class PacienteMedicoModel:
                     (nuevo_estatus, relacion_id)
                 )
             
-            connection.commit()
             cursor.execute("SELECT * FROM paciente_medico WHERE id_relacion = %s", (relacion_id,))
-            return cursor.fetchone()
+            nueva = cursor.fetchone()
+            contador_cambio = PacienteMedicoModel._ajustar_total_pacientes(cursor, anterior, nueva)
+            connection.commit()
+            if contador_cambio:
+                invalidar("medicos")
+                _avisar_clasificaciones(anterior, nueva)
+            return nueva
         except Error as e:
+            connection.rollback()
             print(f"❌ Error en actualizar_estatus: {str(e)}")
             return None
         finally:
@@ -109,6 +159,11 @@ class PacienteMedicoModel:
                 return None
                 
             cursor = connection.cursor()
+            connection.begin()
+            cursor.execute(
+                "SELECT * FROM paciente_medico WHERE id_relacion = %s FOR UPDATE", (relacion_id,)
+            )
+            anterior = cursor.fetchone()
             
             # Construir la consulta dinámicamente
             update_fields = []
@@ -127,10 +182,16 @@ class PacienteMedicoModel:
             query = f"UPDATE paciente_medico SET {', '.join(update_fields)} WHERE id_relacion = %s"
             cursor.execute(query, params)
             
-            connection.commit()
             cursor.execute("SELECT * FROM paciente_medico WHERE id_relacion = %s", (relacion_id,))
-            return cursor.fetchone()
+            nueva = cursor.fetchone()
+            contador_cambio = PacienteMedicoModel._ajustar_total_pacientes(cursor, anterior, nueva)
+            connection.commit()
+            if contador_cambio:
+                invalidar("medicos")
+                _avisar_clasificaciones(anterior, nueva)
+            return nueva
         except Error as e:
+            connection.rollback()
             print(f"❌ Error en actualizar_relacion: {str(e)}")
             return None
         finally:
@@ -171,10 +232,23 @@ class PacienteMedicoModel:
                 return False
                 
             cursor = connection.cursor()
+            connection.begin()
+            cursor.execute(
+                "SELECT * FROM paciente_medico WHERE id_relacion = %s FOR UPDATE", (relacion_id,)
+            )
+            anterior = cursor.fetchone()
             cursor.execute("DELETE FROM paciente_medico WHERE id_relacion = %s", (relacion_id,))
+            eliminado = cursor.rowcount > 0
+            contador_cambio = eliminado and PacienteMedicoModel._ajustar_total_pacientes(
+                cursor, anterior, None
+            )
             connection.commit()
-            return cursor.rowcount > 0
+            if contador_cambio:
+                invalidar("medicos")
+                _avisar_clasificaciones(anterior)
+            return eliminado
         except Error as e:
+            connection.rollback()
             print(f"❌ Error en delete: {str(e)}")
             return False
         finally:
@@ -218,15 +292,9 @@ class PacienteMedicoModel:
                 connection.close()
 
     @staticmethod
-    def get_pacientes_del_medico(medico_id: int):
-        connection = db.get_connection()
-        cursor = None
+    def get_pacientes_del_medico(medico_id: int, orden: str = "fecha"):
         try:
-            if not connection or not connection.open:
-                return []
-                
-            cursor = connection.cursor()
-            cursor.execute("""
+            return db.consultar_compartido(f"""
                 SELECT pm.*, 
                     p.id_paciente,
                     p.id_usuario as id_usuario_paciente, 
@@ -235,23 +303,38 @@ class PacienteMedicoModel:
                     p.edad, 
                     p.sexo, 
                     p.peso_actual, 
-                    p.altura
+                    p.altura,
+                    r.nivel as riesgo_nivel
                 FROM paciente_medico pm
                 JOIN paciente p ON pm.id_paciente = p.id_paciente
                 JOIN usuario u ON p.id_usuario = u.id_usuario
+                LEFT JOIN riesgo_pacientes r ON r.id_paciente = pm.id_paciente
                 WHERE pm.id_medico = %s 
                 AND pm.estatus = 'activo'
-                ORDER BY pm.fecha_asignacion DESC
+                ORDER BY {ORDEN_PANEL[orden]}
             """, (medico_id,))
-            return cursor.fetchall()
         except Error as e:
             print(f"❌ Error en get_pacientes_del_medico: {str(e)}")
             return []
-        finally:
-            if cursor:
-                cursor.close()
-            if connection and connection.open:
-                connection.close()
+
+    @staticmethod
+    def get_medicos_de_pacientes(paciente_ids: list) -> dict:
+        """id_paciente -> [id_usuario de sus médicos activos], para varios pacientes a la vez"""
+        if not paciente_ids:
+            return {}
+        try:
+            filas = db.consultar_compartido(f"""
+                SELECT id_paciente, id_medico FROM paciente_medico
+                WHERE id_paciente IN ({', '.join(['%s'] * len(paciente_ids))})
+                AND estatus = 'activo'
+            """, tuple(paciente_ids))
+        except Error as e:
+            print(f"❌ Error en get_medicos_de_pacientes: {str(e)}")
+            return {}
+        medicos = {}
+        for fila in filas:
+            medicos.setdefault(fila["id_paciente"], []).append(fila["id_medico"])
+        return medicos
 
     @staticmethod
     def get_by_id(relacion_id: int):
@@ -279,6 +362,104 @@ class PacienteMedicoModel:
         except Error as e:
             print(f"❌ Error en get_by_id: {str(e)}")
             return None
+        finally:
+            if cursor:
+                cursor.close()
+            if connection and connection.open:
+                connection.close()
+
+    @staticmethod
+    def get_resumen_pacientes(medico_id: int, orden: str = "fecha"):
+        """
+        Pacientes activos del médico con su última lectura por métrica, alertas pendientes
+        y próxima cita. Las lecturas salen de la proyección indicadores_ultimos y el resto
+        se obtiene con una consulta para todo el panel (no una por paciente).
+        """
+        connection = db.get_connection()
+        cursor = None
+        try:
+            if not connection or not connection.open:
+                return []
+
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                SELECT pm.id_relacion, pm.fecha_asignacion, pm.riesgo_puntaje, r.nivel as riesgo_nivel,
+                    p.id_paciente,
+                    p.id_usuario as id_usuario_paciente,
+                    u.nombre as nombre_paciente,
+                    u.correo as correo_paciente,
+                    p.edad,
+                    p.sexo,
+                    p.peso_actual,
+                    p.altura,
+                    iu.presion_sistolica, iu.presion_diastolica, iu.fecha_presion,
+                    iu.glucosa, iu.fecha_glucosa,
+                    iu.peso, iu.fecha_peso,
+                    iu.frecuencia_cardiaca, iu.fecha_frecuencia_cardiaca
+                FROM paciente_medico pm
+                JOIN paciente p ON pm.id_paciente = p.id_paciente
+                JOIN usuario u ON p.id_usuario = u.id_usuario
+                LEFT JOIN indicadores_ultimos iu ON iu.id_paciente = p.id_paciente
+                LEFT JOIN riesgo_pacientes r ON r.id_paciente = p.id_paciente
+                WHERE pm.id_medico = %s
+                AND pm.estatus = 'activo'
+                ORDER BY {ORDEN_PANEL[orden]}
+            """, (medico_id,))
+            pacientes = cursor.fetchall()
+            if not pacientes:
+                return []
+
+            resumen = {}
+            for paciente in pacientes:
+                fila = dict(paciente)
+                fila["alertas_pendientes"] = 0
+                fila["proxima_cita"] = None
+                resumen[paciente["id_paciente"]] = fila
+
+            cursor.execute("""
+                SELECT a.id_paciente, COUNT(*) AS alertas_pendientes
+                FROM alertas a
+                JOIN paciente_medico pm ON pm.id_paciente = a.id_paciente
+                WHERE pm.id_medico = %s AND pm.estatus = 'activo'
+                AND a.estatus = 'pendiente'
+                GROUP BY a.id_paciente
+            """, (medico_id,))
+            for fila in cursor.fetchall():
+                resumen[fila["id_paciente"]]["alertas_pendientes"] = fila["alertas_pendientes"]
+
+            cursor.execute("""
+                SELECT c.id_paciente, MIN(c.fecha_cita) AS proxima_cita
+                FROM citas_medicas c
+                JOIN paciente_medico pm ON pm.id_paciente = c.id_paciente
+                WHERE c.id_medico = %s AND pm.id_medico = c.id_medico AND pm.estatus = 'activo'
+                AND c.estatus = 'programada' AND c.fecha_cita >= NOW()
+                GROUP BY c.id_paciente
+            """, (medico_id,))
+            for fila in cursor.fetchall():
+                resumen[fila["id_paciente"]]["proxima_cita"] = fila["proxima_cita"]
+
+            # Adherencia a la medicación desde el resumen diario, para todo el panel a la vez
+            hoy = date.today()
+            cursor.execute("""
+                SELECT ad.id_paciente, ad.fecha, ad.completadas, ad.omitidas
+                FROM adherencia_dias ad
+                JOIN paciente_medico pm ON pm.id_paciente = ad.id_paciente
+                WHERE pm.id_medico = %s AND pm.estatus = 'activo'
+                AND ad.fecha >= %s
+            """, (medico_id, hoy - timedelta(days=max(VENTANAS_ADHERENCIA) - 1)))
+            dias = {}
+            for fila in cursor.fetchall():
+                dias.setdefault(fila["id_paciente"], []).append(fila)
+            for paciente_id, fila in resumen.items():
+                adherencia = calcular_adherencia(dias.get(paciente_id, []), hoy)
+                for ventana in adherencia["ventanas"]:
+                    fila[f"adherencia_{ventana['dias']}"] = ventana["tasa"]
+                fila["racha_adherencia"] = adherencia["racha_actual"]
+
+            return list(resumen.values())
+        except Error as e:
+            print(f"❌ Error en get_resumen_pacientes: {str(e)}")
+            return []
         finally:
             if cursor:
                 cursor.close()
@@ -1,8 +1,10 @@
 # paciente_models.py
 from database import db
+from cache import cacheado, invalidar
 import pymysql
 from pymysql import Error
 import logging
+from models.riesgo_model import RiesgoModel
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +42,8 @@ class PacienteModel:
             cursor.execute(query, tuple(values))
             connection.commit()
             paciente_id = cursor.lastrowid
+            if paciente_data.get("id_usuario") is not None:
+                invalidar(f"paciente:usuario:{paciente_data['id_usuario']}")
 
             cursor.execute("SELECT * FROM paciente WHERE id_paciente = %s", (paciente_id,))
             result = cursor.fetchone()
@@ -72,6 +76,7 @@ class PacienteModel:
                 pass
 
     @staticmethod
+    @cacheado("paciente.get_by_id", lambda paciente_id: [f"paciente:{paciente_id}"])
     def get_by_id(paciente_id: int):
         connection = db.get_connection()
         try:
@@ -87,6 +92,29 @@ class PacienteModel:
                 pass
 
     @staticmethod
+    def get_by_ids(paciente_ids: list) -> dict:
+        """
+        Pacientes de varios ids en una sola consulta, como {id_paciente: fila}. No pasa por
+        la caché de get_by_id: es para lotes que se piden juntos (cargadores, ?ids=).
+        """
+        if not paciente_ids:
+            return {}
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor(pymysql.cursors.DictCursor)
+            marcadores = ", ".join(["%s"] * len(paciente_ids))
+            cursor.execute(f"SELECT * FROM paciente WHERE id_paciente IN ({marcadores})", list(paciente_ids))
+            return {fila["id_paciente"]: fila for fila in cursor.fetchall()}
+        finally:
+            try:
+                if connection and connection.open:
+                    cursor.close()
+                    connection.close()
+            except Exception:
+                pass
+
+    @staticmethod
+    @cacheado("paciente.get_by_usuario_id", lambda usuario_id: [f"paciente:usuario:{usuario_id}"])
     def get_by_usuario_id(usuario_id: int):
         connection = db.get_connection()
         try:
@@ -101,6 +129,31 @@ class PacienteModel:
             except Exception:
                 pass
 
+    @staticmethod
+    def get_ids_fragmento(fragmento: int, total_fragmentos: int, despues_de: int = 0, limite: int = 500):
+        """
+        Ids de pacientes con id_paciente % total_fragmentos = fragmento, en orden y por
+        páginas (despues_de es el último id de la página anterior). Reparte el trabajo por
+        lotes entre procesos sin que dos procesen al mismo paciente.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor(pymysql.cursors.DictCursor)
+            cursor.execute(
+                """SELECT id_paciente FROM paciente
+                WHERE id_paciente > %s AND MOD(id_paciente, %s) = %s
+                ORDER BY id_paciente LIMIT %s""",
+                (despues_de, total_fragmentos, fragmento, limite)
+            )
+            return [fila["id_paciente"] for fila in cursor.fetchall()]
+        finally:
+            try:
+                if connection and connection.open:
+                    cursor.close()
+                    connection.close()
+            except Exception:
+                pass
+
     @staticmethod
     def update(paciente_id: int, paciente_data: dict):
         connection = db.get_connection()
@@ -124,10 +177,15 @@ class PacienteModel:
             query = f"UPDATE paciente SET {', '.join(update_fields)} WHERE id_paciente = %s"
 
             cursor.execute(query, tuple(values))
+            if paciente_data.get("enfermedades_cronicas") is not None:
+                RiesgoModel.marcar_pendientes(cursor, [paciente_id])
             connection.commit()
 
             cursor.execute("SELECT * FROM paciente WHERE id_paciente = %s", (paciente_id,))
-            return cursor.fetchone()
+            paciente = cursor.fetchone()
+            if paciente:
+                invalidar(f"paciente:{paciente_id}", f"paciente:usuario:{paciente['id_usuario']}")
+            return paciente
         except Error as e:
             logger.exception("Error en PacienteModel.update")
             raise e
@@ -144,8 +202,12 @@ class PacienteModel:
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
+            cursor.execute("SELECT id_usuario FROM paciente WHERE id_paciente = %s", (paciente_id,))
+            paciente = cursor.fetchone()
             cursor.execute("DELETE FROM paciente WHERE id_paciente = %s", (paciente_id,))
             connection.commit()
+            if paciente:
+                invalidar(f"paciente:{paciente_id}", f"paciente:usuario:{paciente['id_usuario']}")
             return cursor.rowcount > 0
         except Error as e:
             logger.exception("Error en PacienteModel.delete")
@@ -1,5 +1,7 @@
 
 from database import db
+from cache import cacheado, invalidar
+from models.sync_model import SyncModel
 import pymysql
 from pymysql import Error
 
@@ -17,6 +19,7 @@ class RecomendacionesModel:
             )
             connection.commit()
             recomendacion_id = cursor.lastrowid
+            invalidar(f"paciente:{recomendacion_data['id_paciente']}:recomendaciones")
             cursor.execute("SELECT * FROM recomendaciones WHERE id_recomendacion = %s", (recomendacion_id,))
             return cursor.fetchone()
         except Error as e:
@@ -26,6 +29,56 @@ class RecomendacionesModel:
                 cursor.close()
                 connection.close()
 
+    @staticmethod
+    def create_lote(recomendaciones: list) -> int:
+        """
+        Inserta varias recomendaciones con un solo INSERT multi-fila.
+        Cada una lleva id_paciente, contenido, origen y opcionalmente clave.
+        """
+        if not recomendaciones:
+            return 0
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            valores = []
+            for recomendacion in recomendaciones:
+                valores += [recomendacion['id_paciente'], recomendacion['contenido'],
+                            recomendacion['origen'], recomendacion.get('clave')]
+            cursor.execute(
+                f"""INSERT INTO recomendaciones (id_paciente, contenido, origen, clave)
+                VALUES {', '.join(['(%s, %s, %s, %s)'] * len(recomendaciones))}""",
+                valores
+            )
+            connection.commit()
+            for paciente_id in {recomendacion['id_paciente'] for recomendacion in recomendaciones}:
+                invalidar(f"paciente:{paciente_id}:recomendaciones")
+            return len(recomendaciones)
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_claves_recientes(paciente_ids: list, origen: str, desde) -> set:
+        """(id_paciente, clave) de las recomendaciones de ese origen generadas desde 'desde'"""
+        if not paciente_ids:
+            return set()
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                SELECT DISTINCT id_paciente, clave FROM recomendaciones
+                WHERE id_paciente IN ({', '.join(['%s'] * len(paciente_ids))})
+                AND origen = %s AND fecha_generacion >= %s AND clave IS NOT NULL
+            """, [*paciente_ids, origen, desde])
+            return {(fila["id_paciente"], fila["clave"]) for fila in cursor.fetchall()}
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
     @staticmethod
     def get_all():
         connection = db.get_connection()
@@ -51,6 +104,7 @@ class RecomendacionesModel:
                 connection.close()
 
     @staticmethod
+    @cacheado("recomendacion.get_by_paciente_id", lambda paciente_id: [f"paciente:{paciente_id}:recomendaciones"])
     def get_by_paciente_id(paciente_id: int):
         connection = db.get_connection()
         try:
@@ -82,7 +136,10 @@ class RecomendacionesModel:
             connection.commit()
             
             cursor.execute("SELECT * FROM recomendaciones WHERE id_recomendacion = %s", (recomendacion_id,))
-            return cursor.fetchone()
+            recomendacion = cursor.fetchone()
+            if recomendacion:
+                invalidar(f"paciente:{recomendacion['id_paciente']}:recomendaciones")
+            return recomendacion
         except Error as e:
             raise e
         finally:
@@ -95,10 +152,17 @@ class RecomendacionesModel:
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
+            connection.begin()
+            cursor.execute("SELECT id_paciente FROM recomendaciones WHERE id_recomendacion = %s", (recomendacion_id,))
+            recomendacion = cursor.fetchone()
+            SyncModel.registrar_eliminados(cursor, "recomendaciones", "id_recomendacion = %s", (recomendacion_id,))
             cursor.execute("DELETE FROM recomendaciones WHERE id_recomendacion = %s", (recomendacion_id,))
             connection.commit()
+            if recomendacion:
+                invalidar(f"paciente:{recomendacion['id_paciente']}:recomendaciones")
             return cursor.rowcount > 0
         except Error as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
@@ -0,0 +1,171 @@
+from database import db
+import pymysql
+from pymysql import Error
+
+METRICAS_REGLAS = ["presion_sistolica", "presion_diastolica", "glucosa", "peso", "frecuencia_cardiaca"]
+OPERADORES = [">", ">=", "<", "<="]
+
+def _avisar_motor():
+    # Import diferido: el motor depende de este modelo
+    from reglas import motor
+    motor.invalidar()
+
+class ReglasClinicasModel:
+
+    @staticmethod
+    def _validar(regla: dict):
+        if regla["metrica"] not in METRICAS_REGLAS:
+            raise ValueError(f"Métrica no válida. Opciones: {', '.join(METRICAS_REGLAS)}")
+        if regla["operador"] not in OPERADORES:
+            raise ValueError(f"Operador no válido. Opciones: {', '.join(OPERADORES)}")
+        if regla["tipo"] == "tendencia" and not regla.get("ventana_horas"):
+            raise ValueError("Las reglas de tendencia requieren ventana_horas")
+
+    @staticmethod
+    def create(regla_data: dict):
+        regla_data = dict(regla_data)
+        regla_data.setdefault("tipo", "umbral")
+        ReglasClinicasModel._validar(regla_data)
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                """INSERT INTO reglas_clinicas (id_paciente, metrica, tipo, operador, valor,
+                ventana_horas, severidad, descripcion)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
+                (regla_data.get('id_paciente'), regla_data['metrica'], regla_data['tipo'],
+                 regla_data['operador'], regla_data['valor'], regla_data.get('ventana_horas'),
+                 regla_data.get('severidad', 'advertencia'), regla_data['descripcion'])
+            )
+            connection.commit()
+            regla_id = cursor.lastrowid
+            _avisar_motor()
+            cursor.execute("SELECT * FROM reglas_clinicas WHERE id_regla_clinica = %s", (regla_id,))
+            return cursor.fetchone()
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_by_id(regla_id: int):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT * FROM reglas_clinicas WHERE id_regla_clinica = %s", (regla_id,))
+            return cursor.fetchone()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_all(paciente_id: int = None):
+        """Reglas globales y, si se indica, las propias del paciente"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            if paciente_id is None:
+                cursor.execute("SELECT * FROM reglas_clinicas ORDER BY metrica, id_regla_clinica")
+            else:
+                cursor.execute("""
+                    SELECT * FROM reglas_clinicas
+                    WHERE id_paciente IS NULL OR id_paciente = %s
+                    ORDER BY metrica, id_regla_clinica
+                """, (paciente_id,))
+            return cursor.fetchall()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_activas():
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT * FROM reglas_clinicas WHERE activa = TRUE")
+            return cursor.fetchall()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def update(regla_id: int, regla_data: dict):
+        regla = ReglasClinicasModel.get_by_id(regla_id)
+        if not regla:
+            return None
+        cambios = {campo: valor for campo, valor in regla_data.items() if valor is not None}
+        ReglasClinicasModel._validar({**regla, **cambios})
+        if not cambios:
+            return regla
+
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            update_fields = [f"{campo} = %s" for campo in cambios]
+            cursor.execute(
+                f"UPDATE reglas_clinicas SET {', '.join(update_fields)} WHERE id_regla_clinica = %s",
+                list(cambios.values()) + [regla_id]
+            )
+            connection.commit()
+            _avisar_motor()
+            cursor.execute("SELECT * FROM reglas_clinicas WHERE id_regla_clinica = %s", (regla_id,))
+            return cursor.fetchone()
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def delete(regla_id: int):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM reglas_clinicas WHERE id_regla_clinica = %s", (regla_id,))
+            connection.commit()
+            _avisar_motor()
+            return cursor.rowcount > 0
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_promedios_previos(paciente_ids: list, metrica: str, desde, excluir_ids: list) -> dict:
+        """
+        Promedio de la métrica por paciente desde 'desde', sin contar las lecturas que se
+        están evaluando. Es la línea base de las reglas de tendencia.
+        """
+        if not paciente_ids:
+            return {}
+        if metrica not in METRICAS_REGLAS:
+            raise ValueError("Métrica no válida")
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            excluir = ""
+            valores = list(paciente_ids) + [desde]
+            if excluir_ids:
+                excluir = f"AND id_indicador NOT IN ({', '.join(['%s'] * len(excluir_ids))})"
+                valores += list(excluir_ids)
+            cursor.execute(f"""
+                SELECT id_paciente, AVG({metrica}) AS promedio
+                FROM indicadores_salud
+                WHERE id_paciente IN ({', '.join(['%s'] * len(paciente_ids))})
+                AND fecha_registro >= %s AND {metrica} IS NOT NULL
+                {excluir}
+                GROUP BY id_paciente
+            """, valores)
+            return {fila["id_paciente"]: float(fila["promedio"]) for fila in cursor.fetchall()}
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
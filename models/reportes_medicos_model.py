@@ -1,5 +1,7 @@
 
 from database import db
+from cache import cacheado, invalidar
+from models.sync_model import SyncModel
 import pymysql
 from pymysql import Error
 
@@ -18,6 +20,7 @@ class ReportesMedicosModel:
             )
             connection.commit()
             reporte_id = cursor.lastrowid
+            invalidar(f"paciente:{reporte_data['id_paciente']}:reportes")
             cursor.execute("SELECT * FROM reportes_medicos WHERE id_reporte = %s", (reporte_id,))
             return cursor.fetchone()
         except Error as e:
@@ -52,6 +55,7 @@ class ReportesMedicosModel:
                 connection.close()
 
     @staticmethod
+    @cacheado("reporte.get_by_paciente_id", lambda paciente_id: [f"paciente:{paciente_id}:reportes"])
     def get_by_paciente_id(paciente_id: int):
         connection = db.get_connection()
         try:
@@ -95,7 +99,10 @@ class ReportesMedicosModel:
             connection.commit()
             
             cursor.execute("SELECT * FROM reportes_medicos WHERE id_reporte = %s", (reporte_id,))
-            return cursor.fetchone()
+            reporte = cursor.fetchone()
+            if reporte:
+                invalidar(f"paciente:{reporte['id_paciente']}:reportes")
+            return reporte
         except Error as e:
             raise e
         finally:
@@ -108,10 +115,17 @@ class ReportesMedicosModel:
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
+            connection.begin()
+            cursor.execute("SELECT id_paciente FROM reportes_medicos WHERE id_reporte = %s", (reporte_id,))
+            reporte = cursor.fetchone()
+            SyncModel.registrar_eliminados(cursor, "reportes_medicos", "id_reporte = %s", (reporte_id,))
             cursor.execute("DELETE FROM reportes_medicos WHERE id_reporte = %s", (reporte_id,))
             connection.commit()
+            if reporte:
+                invalidar(f"paciente:{reporte['id_paciente']}:reportes")
             return cursor.rowcount > 0
         except Error as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
@@ -1,23 +1,45 @@
 
 from database import db
+from cache import cacheado
+from models.retos_progreso_model import RetosProgresoModel, METRICAS_RETOS
+from models.sync_model import SyncModel
 import pymysql
 from pymysql import Error
+from datetime import date
+
+def _preparar_reto_automatico(reto_data: dict):
+    """Valida la métrica y completa fecha_inicio y dias_objetivo de un reto automático"""
+    if not reto_data.get('metrica'):
+        return
+    if reto_data['metrica'] not in METRICAS_RETOS:
+        raise ValueError(f"Métrica no válida. Use una de: {', '.join(METRICAS_RETOS)}")
+    reto_data['fecha_inicio'] = reto_data.get('fecha_inicio') or date.today()
+    if not reto_data.get('dias_objetivo'):
+        fecha_fin = reto_data.get('fecha_fin')
+        reto_data['dias_objetivo'] = (fecha_fin - reto_data['fecha_inicio']).days + 1 if fecha_fin else 1
+    if reto_data['dias_objetivo'] < 1:
+        raise ValueError("dias_objetivo debe ser al menos 1")
 
 class RetosModel:
     @staticmethod
     def create(reto_data: dict):
+        _preparar_reto_automatico(reto_data)
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
             cursor.execute(
-                """INSERT INTO retos (id_paciente, titulo, descripcion, progreso, recompensa, fecha_inicio, fecha_fin) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                """INSERT INTO retos (id_paciente, titulo, descripcion, progreso, recompensa, fecha_inicio, fecha_fin,
+                metrica, meta_diaria, dias_objetivo, plantilla) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
                 (reto_data['id_paciente'], reto_data['titulo'], reto_data.get('descripcion'),
                  reto_data.get('progreso', 0), reto_data.get('recompensa'),
-                 reto_data.get('fecha_inicio'), reto_data.get('fecha_fin'))
+                 reto_data.get('fecha_inicio'), reto_data.get('fecha_fin'),
+                 reto_data.get('metrica'), reto_data.get('meta_diaria'), reto_data.get('dias_objetivo'),
+                 reto_data.get('plantilla'))
             )
             connection.commit()
             reto_id = cursor.lastrowid
+            RetosProgresoModel.invalidar_pacientes({reto_data['id_paciente']})
             cursor.execute("SELECT * FROM retos WHERE id_reto = %s", (reto_id,))
             return cursor.fetchone()
         except Error as e:
@@ -52,6 +74,7 @@ class RetosModel:
                 connection.close()
 
     @staticmethod
+    @cacheado("reto.get_by_paciente_id", lambda paciente_id: [f"paciente:{paciente_id}:retos"])
     def get_by_paciente_id(paciente_id: int):
         connection = db.get_connection()
         try:
@@ -64,17 +87,49 @@ class RetosModel:
                 connection.close()
 
     @staticmethod
+    @cacheado("retos.get_activos", lambda: ["retos:activos"])
     def get_activos():
+        # El estado lo mantienen el progreso automático y el cierre nocturno de vencidos,
+        # así que la consulta no depende de la fecha y usa idx_retos_estado_fin
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
-            cursor.execute("SELECT * FROM retos WHERE progreso < 100 AND (fecha_fin IS NULL OR fecha_fin >= CURDATE())")
+            cursor.execute("SELECT * FROM retos WHERE estado = 'activo'")
             return cursor.fetchall()
         finally:
             if connection and connection.open:
                 cursor.close()
                 connection.close()
 
+    @staticmethod
+    def cerrar_vencidos() -> int:
+        """
+        Cierra los retos activos cuya fecha_fin ya pasó: 'completado' si llegaron a 100,
+        'vencido' si no. Lo ejecuta el job nocturno; recorre idx_retos_estado_fin.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT id_reto, id_paciente FROM retos WHERE estado = 'activo' AND fecha_fin < CURDATE()"
+            )
+            vencidos = cursor.fetchall()
+            if not vencidos:
+                return 0
+            cursor.execute(f"""
+                UPDATE retos SET estado = IF(progreso >= 100, 'completado', 'vencido')
+                WHERE id_reto IN ({', '.join(['%s'] * len(vencidos))}) AND estado = 'activo'
+            """, [reto["id_reto"] for reto in vencidos])
+            connection.commit()
+            RetosProgresoModel.invalidar_pacientes({reto["id_paciente"] for reto in vencidos})
+            return cursor.rowcount
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
     @staticmethod
     def update(reto_id: int, reto_data: dict):
         connection = db.get_connection()
@@ -88,15 +143,28 @@ class RetosModel:
                     update_fields.append(f"{field} = %s")
                     values.append(value)
             
+            # El estado se deriva del progreso y de fecha_fin tras cambios manuales
+            update_fields.append("""estado = CASE
+                WHEN progreso >= 100 THEN 'completado'
+                WHEN fecha_fin IS NOT NULL AND fecha_fin < CURDATE() THEN 'vencido'
+                ELSE 'activo' END""")
             values.append(reto_id)
             query = f"UPDATE retos SET {', '.join(update_fields)} WHERE id_reto = %s"
             
+            connection.begin()
             cursor.execute(query, values)
+            # Con otra meta, los días ya registrados se vuelven a evaluar
+            if reto_data.get('meta_diaria') is not None or reto_data.get('dias_objetivo') is not None:
+                RetosProgresoModel.recalcular(cursor, [reto_id])
             connection.commit()
             
             cursor.execute("SELECT * FROM retos WHERE id_reto = %s", (reto_id,))
-            return cursor.fetchone()
+            reto = cursor.fetchone()
+            if reto:
+                RetosProgresoModel.invalidar_pacientes({reto['id_paciente']})
+            return reto
         except Error as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
@@ -108,10 +176,17 @@ class RetosModel:
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
+            connection.begin()
+            cursor.execute("SELECT id_paciente FROM retos WHERE id_reto = %s", (reto_id,))
+            reto = cursor.fetchone()
+            SyncModel.registrar_eliminados(cursor, "retos", "id_reto = %s", (reto_id,))
             cursor.execute("DELETE FROM retos WHERE id_reto = %s", (reto_id,))
             connection.commit()
+            if reto:
+                RetosProgresoModel.invalidar_pacientes({reto['id_paciente']})
             return cursor.rowcount > 0
         except Error as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
@@ -0,0 +1,183 @@
+from database import db
+from cache import invalidar
+import pymysql
+from pymysql import Error
+from datetime import date, datetime, timedelta
+
+# Métricas de indicadores_salud: un día cuenta con tantas lecturas como meta_diaria (1 por defecto)
+METRICAS_REGISTRO = ["presion_sistolica", "presion_diastolica", "glucosa", "peso", "frecuencia_cardiaca",
+                     "estado_animo", "actividad_fisica"]
+# Métricas de actividad que reportan los wearables como totales diarios
+METRICAS_ACTIVIDAD = ["pasos", "minutos_activos"]
+METRICAS_RETOS = METRICAS_REGISTRO + METRICAS_ACTIVIDAD
+
+# Cómo se combina el valor nuevo de un día con el guardado en retos_dias
+SUMAR = "valor + VALUES(valor)"
+MAXIMO = "GREATEST(valor, VALUES(valor))"
+REEMPLAZAR = "VALUES(valor)"
+
+def _avisar_clasificaciones(pacientes: set):
+    # Import diferido: los tableros de clasificación dependen de los modelos
+    from clasificaciones import clasificaciones
+    try:
+        clasificaciones.actualizar_pacientes(pacientes)
+    except Exception as e:
+        print(f"⚠️  No se pudieron actualizar las clasificaciones: {e}")
+
+def _fecha(valor) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, str):
+        return date.fromisoformat(valor[:10])
+    return valor
+
+class RetosProgresoModel:
+    """
+    Progreso automático de los retos con métrica. Cada reto acumula un valor por día en
+    retos_dias; un día se cumple cuando su valor llega a meta_diaria y el progreso es la
+    fracción de dias_objetivo cumplidos. Como las proyecciones de indicadores, lo mantienen
+    los modelos que escriben los datos, dentro de su transacción y por lotes.
+    """
+
+    @staticmethod
+    def aplicar_registros(cursor, indicadores: list) -> set:
+        """Suma al día de cada reto las lecturas nuevas de indicadores_salud"""
+        conteos = {}
+        for indicador in indicadores:
+            for metrica in METRICAS_REGISTRO:
+                if indicador.get(metrica) is not None:
+                    clave = (indicador["id_paciente"], metrica, _fecha(indicador["fecha_registro"]))
+                    conteos[clave] = conteos.get(clave, 0) + 1
+        return RetosProgresoModel._aplicar(cursor, conteos, SUMAR)
+
+    @staticmethod
+    def recontar_registros(cursor, indicadores: list) -> set:
+        """
+        Lecturas de indicadores_salud borradas o editadas (antes y después del cambio); se
+        llama después del DELETE/UPDATE, en la misma transacción. Los días afectados se
+        vuelven a contar desde la tabla en vez de restar: una lectura anterior al reto nunca
+        se sumó. También corrige retos ya completados.
+        """
+        dias = {}
+        for indicador in indicadores:
+            metricas = dias.setdefault((indicador["id_paciente"], _fecha(indicador["fecha_registro"])), set())
+            metricas.update(metrica for metrica in METRICAS_REGISTRO if indicador.get(metrica) is not None)
+        conteos = {}
+        for (paciente_id, fecha), metricas in dias.items():
+            if not metricas:
+                continue
+            inicio = datetime.combine(fecha, datetime.min.time())
+            cursor.execute(f"""
+                SELECT {', '.join(f'COALESCE(SUM({metrica} IS NOT NULL), 0) AS {metrica}' for metrica in sorted(metricas))}
+                FROM indicadores_salud
+                WHERE id_paciente = %s AND fecha_registro >= %s AND fecha_registro < %s
+            """, (paciente_id, inicio, inicio + timedelta(days=1)))
+            fila = cursor.fetchone()
+            for metrica in metricas:
+                conteos[(paciente_id, metrica, fecha)] = int(fila[metrica])
+        return RetosProgresoModel._aplicar(cursor, conteos, REEMPLAZAR, estados=("activo", "completado"))
+
+    @staticmethod
+    def aplicar_actividad(cursor, paciente_id: int, actividad: list) -> set:
+        """
+        Totales diarios de un wearable, p. ej. [{"fecha": "2025-01-01", "pasos": 10234}].
+        Son acumulados del día, así que se conserva el mayor en lugar de sumarlos.
+        """
+        totales = {}
+        for dia in actividad:
+            for metrica in METRICAS_ACTIVIDAD:
+                if dia.get(metrica) is not None:
+                    clave = (paciente_id, metrica, _fecha(dia["fecha"]))
+                    totales[clave] = max(totales.get(clave, 0), float(dia[metrica]))
+        return RetosProgresoModel._aplicar(cursor, totales, MAXIMO)
+
+    @staticmethod
+    def _aplicar(cursor, valores: dict, combinar: str, estados: tuple = ("activo",)) -> set:
+        """
+        valores: {(id_paciente, metrica, fecha): valor}. Busca los retos afectados (en los
+        estados dados) con una consulta, actualiza sus días con un INSERT multi-fila
+        (combinar: SUMAR, MAXIMO o REEMPLAZAR) y recalcula solo esos retos. Devuelve los
+        id_paciente cuyos retos cambiaron.
+        """
+        if not valores:
+            return set()
+        pacientes = sorted({clave[0] for clave in valores})
+        metricas = sorted({clave[1] for clave in valores})
+        cursor.execute(f"""
+            SELECT id_reto, id_paciente, metrica, fecha_inicio, fecha_fin FROM retos
+            WHERE id_paciente IN ({', '.join(['%s'] * len(pacientes))})
+            AND estado IN ({', '.join(['%s'] * len(estados))})
+            AND metrica IN ({', '.join(['%s'] * len(metricas))})
+        """, pacientes + list(estados) + metricas)
+        retos_por_clave = {}
+        for reto in cursor.fetchall():
+            retos_por_clave.setdefault((reto["id_paciente"], reto["metrica"]), []).append(reto)
+
+        filas = []
+        for (paciente_id, metrica, fecha), valor in valores.items():
+            for reto in retos_por_clave.get((paciente_id, metrica), []):
+                if reto["fecha_inicio"] and fecha < reto["fecha_inicio"]:
+                    continue
+                if reto["fecha_fin"] and fecha > reto["fecha_fin"]:
+                    continue
+                filas.append((reto["id_reto"], fecha, valor))
+        if not filas:
+            return set()
+
+        cursor.execute(
+            f"""INSERT INTO retos_dias (id_reto, fecha, valor)
+            VALUES {', '.join(['(%s, %s, %s)'] * len(filas))}
+            ON DUPLICATE KEY UPDATE valor = {combinar}""",
+            [dato for fila in filas for dato in fila]
+        )
+        retos_ids = sorted({fila[0] for fila in filas})
+        RetosProgresoModel.recalcular(cursor, retos_ids)
+        return {reto["id_paciente"] for retos in retos_por_clave.values() for reto in retos
+                if reto["id_reto"] in retos_ids}
+
+    @staticmethod
+    def recalcular(cursor, retos_ids: list):
+        """
+        dias_cumplidos, progreso y estado de los retos dados, a partir de sus filas de
+        retos_dias (a lo más una por día del reto, no del historial de lecturas).
+        """
+        if not retos_ids:
+            return
+        # Las asignaciones de un UPDATE se aplican en orden: progreso y estado ya ven
+        # el dias_cumplidos nuevo
+        cursor.execute(f"""
+            UPDATE retos r
+            SET r.dias_cumplidos = (
+                    SELECT COUNT(*) FROM retos_dias d
+                    WHERE d.id_reto = r.id_reto AND d.valor >= COALESCE(r.meta_diaria, 1)
+                ),
+                r.progreso = LEAST(100, FLOOR(r.dias_cumplidos * 100 / GREATEST(r.dias_objetivo, 1))),
+                r.estado = CASE
+                    WHEN r.dias_cumplidos >= r.dias_objetivo THEN 'completado'
+                    WHEN r.estado = 'completado' THEN 'activo'
+                    ELSE r.estado END
+            WHERE r.id_reto IN ({', '.join(['%s'] * len(retos_ids))}) AND r.metrica IS NOT NULL
+        """, list(retos_ids))
+
+    @staticmethod
+    def invalidar_pacientes(pacientes: set):
+        """Se llama después del commit de quien cambió el progreso: cachés y clasificaciones"""
+        if pacientes:
+            invalidar(*[f"paciente:{paciente_id}:retos" for paciente_id in pacientes], "retos:activos")
+            _avisar_clasificaciones(pacientes)
+
+    @staticmethod
+    def get_dias(reto_id: int):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT d.fecha, d.valor, d.valor >= COALESCE(r.meta_diaria, 1) AS cumplido
+                FROM retos_dias d JOIN retos r ON r.id_reto = d.id_reto
+                WHERE d.id_reto = %s ORDER BY d.fecha
+            """, (reto_id,))
+            return cursor.fetchall()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
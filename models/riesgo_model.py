@@ -0,0 +1,215 @@
+from database import db
+import pymysql
+from pymysql import Error
+
+# Ventanas de cada factor del puntaje
+DIAS_SIGNOS = 30
+DIAS_ALERTAS = 30
+DIAS_CITAS = 90
+
+def _marcadores(cantidad: int) -> str:
+    return ', '.join(['%s'] * cantidad)
+
+class RiesgoModel:
+    """
+    Puntaje de riesgo por paciente (tabla riesgo_pacientes) y cola de pacientes con datos
+    nuevos por recalcular (riesgo_pendientes). El puntaje se copia en
+    paciente_medico.riesgo_puntaje para que el panel del médico se ordene con un índice.
+    """
+
+    @staticmethod
+    def marcar_pendientes(cursor, paciente_ids):
+        """
+        Encola pacientes para el recálculo incremental, en la transacción de quien escribe.
+        Volver a marcar actualiza marcado_en, así un recálculo en curso no borra la marca.
+        """
+        paciente_ids = sorted({paciente_id for paciente_id in paciente_ids if paciente_id})
+        if not paciente_ids:
+            return
+        cursor.execute(
+            f"""INSERT INTO riesgo_pendientes (id_paciente) VALUES {', '.join(['(%s)'] * len(paciente_ids))}
+            ON DUPLICATE KEY UPDATE marcado_en = CURRENT_TIMESTAMP(6)""",
+            paciente_ids
+        )
+
+    @staticmethod
+    def get_pendientes(limite: int = 500) -> list:
+        """Marcas más antiguas de la cola: [{id_paciente, marcado_en}]"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT id_paciente, marcado_en FROM riesgo_pendientes ORDER BY marcado_en LIMIT %s", (limite,)
+            )
+            return cursor.fetchall()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def quitar_pendientes(marcas: list):
+        """Borra las marcas atendidas, salvo las que se volvieron a marcar mientras tanto"""
+        if not marcas:
+            return
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                f"""DELETE FROM riesgo_pendientes
+                WHERE (id_paciente, marcado_en) IN ({', '.join(['(%s, %s)'] * len(marcas))})""",
+                [valor for marca in marcas for valor in (marca["id_paciente"], marca["marcado_en"])]
+            )
+            connection.commit()
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def quitar_pendientes_hasta(hasta):
+        """Tras un recálculo completo, borra las marcas anteriores a su inicio"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("DELETE FROM riesgo_pendientes WHERE marcado_en <= %s", (hasta,))
+            connection.commit()
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_ahora():
+        """Hora del servidor de BD con microsegundos, comparable con marcado_en"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT CURRENT_TIMESTAMP(6) AS ahora")
+            return cursor.fetchone()["ahora"]
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_factores(paciente_ids: list) -> dict:
+        """
+        Datos de entrada del puntaje para un lote de pacientes, con una consulta agrupada
+        por factor: resúmenes diarios de signos vitales, enfermedades crónicas, alertas
+        completadas u omitidas (incluidas las ocurrencias de alertas recurrentes y las
+        pendientes con más de un día de atraso) y citas pasadas por estatus.
+        """
+        if not paciente_ids:
+            return {"signos": [], "pacientes": [], "alertas": [], "citas": []}
+        marcadores = _marcadores(len(paciente_ids))
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                SELECT id_paciente, metrica, SUM(cantidad) AS cantidad, SUM(suma) AS suma,
+                    SUM(suma_cuadrados) AS suma_cuadrados
+                FROM indicadores_resumen
+                WHERE id_paciente IN ({marcadores}) AND granularidad = 'dia'
+                AND inicio >= CURDATE() - INTERVAL %s DAY
+                GROUP BY id_paciente, metrica
+            """, [*paciente_ids, DIAS_SIGNOS])
+            signos = cursor.fetchall()
+
+            cursor.execute(
+                f"SELECT id_paciente, enfermedades_cronicas FROM paciente WHERE id_paciente IN ({marcadores})",
+                paciente_ids
+            )
+            pacientes = cursor.fetchall()
+
+            cursor.execute(f"""
+                SELECT id_paciente, SUM(omitida) AS omitidas, COUNT(*) AS total
+                FROM (
+                    SELECT id_paciente,
+                        estatus = 'omitida' OR (estatus = 'pendiente' AND fecha_programada < NOW() - INTERVAL 1 DAY)
+                            AS omitida
+                    FROM alertas
+                    WHERE id_paciente IN ({marcadores})
+                    AND fecha_programada >= NOW() - INTERVAL %s DAY AND fecha_programada < NOW()
+                    UNION ALL
+                    SELECT r.id_paciente, o.estatus = 'omitida'
+                    FROM alertas_ocurrencias o
+                    JOIN alertas_recurrentes r ON r.id_regla = o.id_regla
+                    WHERE r.id_paciente IN ({marcadores}) AND o.estatus IN ('completada', 'omitida')
+                    AND o.fecha_ocurrencia >= NOW() - INTERVAL %s DAY AND o.fecha_ocurrencia < NOW()
+                ) a
+                GROUP BY id_paciente
+            """, [*paciente_ids, DIAS_ALERTAS, *paciente_ids, DIAS_ALERTAS])
+            alertas = cursor.fetchall()
+
+            # Una cita pasada que sigue 'programada' es una inasistencia
+            cursor.execute(f"""
+                SELECT id_paciente, SUM(estatus = 'cancelada') AS canceladas,
+                    SUM(estatus = 'programada') AS inasistencias, COUNT(*) AS total
+                FROM citas_medicas
+                WHERE id_paciente IN ({marcadores})
+                AND fecha_cita >= NOW() - INTERVAL %s DAY AND fecha_cita < NOW()
+                GROUP BY id_paciente
+            """, [*paciente_ids, DIAS_CITAS])
+            citas = cursor.fetchall()
+            return {"signos": signos, "pacientes": pacientes, "alertas": alertas, "citas": citas}
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def guardar_lote(puntajes: list) -> int:
+        """
+        Guarda los puntajes de un lote con un INSERT multi-fila y los copia a las
+        relaciones médico-paciente que cambiaron, en una sola transacción.
+        """
+        if not puntajes:
+            return 0
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            connection.begin()
+            columnas = ["id_paciente", "puntaje", "nivel", "signos", "cronicas", "alertas", "citas"]
+            cursor.execute(
+                f"""INSERT INTO riesgo_pacientes ({', '.join(columnas)}, calculado_en)
+                VALUES {', '.join([f'({_marcadores(len(columnas))}, NOW())'] * len(puntajes))}
+                ON DUPLICATE KEY UPDATE
+                    puntaje = VALUES(puntaje), nivel = VALUES(nivel), signos = VALUES(signos),
+                    cronicas = VALUES(cronicas), alertas = VALUES(alertas), citas = VALUES(citas),
+                    calculado_en = VALUES(calculado_en)""",
+                [puntaje[columna] for puntaje in puntajes for columna in columnas]
+            )
+            # Asignar fecha_actualizacion a sí misma evita que el recálculo la cambie
+            cursor.execute(f"""
+                UPDATE paciente_medico pm
+                JOIN riesgo_pacientes r ON r.id_paciente = pm.id_paciente
+                SET pm.riesgo_puntaje = r.puntaje, pm.fecha_actualizacion = pm.fecha_actualizacion
+                WHERE pm.id_paciente IN ({_marcadores(len(puntajes))})
+                AND NOT (pm.riesgo_puntaje <=> r.puntaje)
+            """, [puntaje["id_paciente"] for puntaje in puntajes])
+            connection.commit()
+            return len(puntajes)
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_by_paciente(paciente_id: int):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT * FROM riesgo_pacientes WHERE id_paciente = %s", (paciente_id,))
+            return cursor.fetchone()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
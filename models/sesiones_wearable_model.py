@@ -3,10 +3,122 @@ from database import db
 import pymysql
 from pymysql import Error
 import json
+import math
+from datetime import datetime
+from decimal import Decimal
+from models.indicadores_salud_model import IndicadoresSaludModel, COLUMNAS_LECTURA
+from models.retos_progreso_model import RetosProgresoModel, METRICAS_ACTIVIDAD
+from models.sync_model import SyncModel
+
+# Columnas numéricas de una lectura y su tipo en indicadores_salud
+TIPOS_NUMERICOS = {
+    "presion_sistolica": int,
+    "presion_diastolica": int,
+    "glucosa": float,
+    "peso": float,
+    "frecuencia_cardiaca": int,
+}
+
+def _numero(valor, campo: str, tipo=float):
+    if valor is None:
+        return None
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        numero = math.nan
+    if isinstance(valor, bool) or not math.isfinite(numero):
+        raise ValueError(f"Valor no numérico en '{campo}': {valor!r}")
+    return round(numero) if tipo is int else numero
+
+def _fecha_hora(valor, campo: str):
+    if valor is None or isinstance(valor, datetime):
+        return valor
+    try:
+        fecha = datetime.fromisoformat(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f"Fecha inválida en '{campo}': {valor!r}")
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone().replace(tzinfo=None)
+    return fecha
+
+def _lecturas_de_sesion(sesion_data: dict) -> list:
+    """
+    Lecturas incluidas en datos_recibidos["lecturas"], p. ej.
+    [{"frecuencia_cardiaca": 72, "fecha_registro": "2025-01-01T08:00:00"}, ...]
+    Los valores se convierten aquí: uno inválido es un ValueError antes de guardar nada.
+    """
+    lecturas = []
+    for lectura in (sesion_data.get('datos_recibidos') or {}).get('lecturas') or []:
+        if not isinstance(lectura, dict):
+            continue
+        indicador = {columna: lectura.get(columna) for columna in COLUMNAS_LECTURA}
+        if all(valor is None for valor in indicador.values()):
+            continue
+        for columna, tipo in TIPOS_NUMERICOS.items():
+            indicador[columna] = _numero(indicador[columna], columna, tipo)
+        fecha_registro = _fecha_hora(lectura.get('fecha_registro'), 'fecha_registro')
+        indicador.update(
+            id_paciente=sesion_data['id_paciente'], fuente_dato='wearable',
+            # fecha_registro se guarda al segundo: así se compara con las lecturas ya guardadas
+            fecha_registro=fecha_registro.replace(microsecond=0) if fecha_registro else None
+        )
+        lecturas.append(indicador)
+    return lecturas
+
+def _clave_lectura(lectura: dict) -> tuple:
+    # La BD devuelve DECIMAL y el dispositivo manda float: se comparan redondeados
+    valores = []
+    for columna in COLUMNAS_LECTURA:
+        valor = lectura.get(columna)
+        if isinstance(valor, (int, float, Decimal)):
+            valor = round(float(valor), 2)
+        elif valor is not None:
+            valor = str(valor)
+        valores.append(valor)
+    return (lectura["fecha_registro"], *valores)
+
+def _lecturas_nuevas(lecturas: list, existentes: list) -> list:
+    """
+    Descarta las lecturas que ya están guardadas (misma fecha_registro y mismos valores) o
+    repetidas en el mismo envío: un dispositivo que reintenta la sincronización reenvía
+    las mismas lecturas. Las que no traen fecha_registro no se pueden reconocer y se guardan.
+    """
+    vistas = {_clave_lectura(lectura) for lectura in existentes}
+    nuevas = []
+    for lectura in lecturas:
+        if lectura["fecha_registro"] is None:
+            nuevas.append(lectura)
+            continue
+        clave = _clave_lectura(lectura)
+        if clave not in vistas:
+            vistas.add(clave)
+            nuevas.append(lectura)
+    return nuevas
+
+def _actividad_de_sesion(sesion_data: dict) -> list:
+    """
+    Totales diarios incluidos en datos_recibidos["actividad"], p. ej.
+    [{"fecha": "2025-01-01", "pasos": 10234, "minutos_activos": 45}, ...]
+    """
+    actividad = []
+    for dia in (sesion_data.get('datos_recibidos') or {}).get('actividad') or []:
+        if not isinstance(dia, dict) or not dia.get('fecha'):
+            continue
+        if all(dia.get(metrica) is None for metrica in METRICAS_ACTIVIDAD):
+            continue
+        # Valida la fecha y los totales antes de guardar nada
+        _fecha_hora(str(dia['fecha'])[:10], 'fecha')
+        actividad.append({
+            **dia, **{metrica: _numero(dia.get(metrica), metrica) for metrica in METRICAS_ACTIVIDAD}
+        })
+    return actividad
 
 class SesionesWearableModel:
     @staticmethod
     def create(sesion_data: dict):
+        # Se validan antes de guardar la sesión
+        lecturas = _lecturas_de_sesion(sesion_data)
+        actividad = _actividad_de_sesion(sesion_data)
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
@@ -16,16 +128,25 @@ class SesionesWearableModel:
             if datos_recibidos:
                 datos_recibidos = json.dumps(datos_recibidos)
             
+            connection.begin()
             cursor.execute(
                 """INSERT INTO sesiones_wearable (id_paciente, dispositivo, datos_recibidos) 
                 VALUES (%s, %s, %s)""",
                 (sesion_data['id_paciente'], sesion_data.get('dispositivo'), datos_recibidos)
             )
-            connection.commit()
             sesion_id = cursor.lastrowid
+            # Los totales diarios de actividad avanzan los retos (con el máximo del día: un
+            # reintento no los suma de nuevo) y las lecturas del dispositivo se guardan como
+            # indicadores en un solo lote, todo en la transacción de la sesión
+            lecturas = SesionesWearableModel._sin_repetidas(cursor, sesion_data['id_paciente'], lecturas)
+            pacientes_retos = RetosProgresoModel.aplicar_actividad(cursor, sesion_data['id_paciente'], actividad)
+            _, pacientes_lecturas = IndicadoresSaludModel.insertar_lote(cursor, lecturas)
+            connection.commit()
+            RetosProgresoModel.invalidar_pacientes(pacientes_retos | pacientes_lecturas)
             cursor.execute("SELECT * FROM sesiones_wearable WHERE id_sesion = %s", (sesion_id,))
             return cursor.fetchone()
-        except Error as e:
+        except Exception as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
@@ -33,6 +154,23 @@ class SesionesWearableModel:
                 cursor.close()
                 connection.close()
 
+    @staticmethod
+    def _sin_repetidas(cursor, paciente_id: int, lecturas: list) -> list:
+        """
+        Lecturas de la sesión que todavía no están en indicadores_salud. El lock sobre el
+        paciente serializa dos sincronizaciones suyas a la vez (la segunda ve lo que guardó
+        la primera).
+        """
+        fechas = [lectura["fecha_registro"] for lectura in lecturas if lectura["fecha_registro"]]
+        if not fechas:
+            return lecturas
+        cursor.execute("SELECT id_paciente FROM paciente WHERE id_paciente = %s FOR UPDATE", (paciente_id,))
+        cursor.execute(f"""
+            SELECT fecha_registro, {', '.join(COLUMNAS_LECTURA)} FROM indicadores_salud
+            WHERE id_paciente = %s AND fuente_dato = 'wearable' AND fecha_registro BETWEEN %s AND %s
+        """, (paciente_id, min(fechas), max(fechas)))
+        return _lecturas_nuevas(lecturas, cursor.fetchall())
+
     @staticmethod
     def get_all():
         connection = db.get_connection()
@@ -118,10 +256,13 @@ class SesionesWearableModel:
         connection = db.get_connection()
         try:
             cursor = connection.cursor()
+            connection.begin()
+            SyncModel.registrar_eliminados(cursor, "sesiones_wearable", "id_sesion = %s", (sesion_id,))
             cursor.execute("DELETE FROM sesiones_wearable WHERE id_sesion = %s", (sesion_id,))
             connection.commit()
             return cursor.rowcount > 0
         except Error as e:
+            connection.rollback()
             raise e
         finally:
             if connection and connection.open:
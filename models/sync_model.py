@@ -0,0 +1,184 @@
+from database import db
+import base64
+import heapq
+import os
+from datetime import datetime
+from pymysql import Error
+
+# Cambios más nuevos que el margen esperan al próximo pedido (transacciones sin confirmar)
+MARGEN_SEGUNDOS = int(os.getenv("SYNC_MARGEN_SEGUNDOS", "5"))
+# Antigüedad de las lápidas; un token más viejo obliga a la app a sincronizar de cero
+RETENCION_DIAS = int(os.getenv("SYNC_RETENCION_DIAS", "90"))
+
+# Tablas que se sincronizan con la app: (entidad, columna id, columnas). La entidad es el
+# nombre de la tabla; todas tienen id_paciente y fecha_actualizacion con ON UPDATE.
+FUENTES_SYNC = [
+    ("paciente", "id_paciente", "*"),
+    ("indicadores_salud", "id_indicador", "*"),
+    ("alertas", "id_alerta", "*"),
+    ("alertas_recurrentes", "id_regla", "*"),
+    ("citas_medicas", "id_cita", "*"),
+    ("reportes_medicos", "id_reporte", "*"),
+    ("recomendaciones", "id_recomendacion", "*"),
+    ("retos", "id_reto", "*"),
+    # El JSON crudo de la sesión no viaja en la sincronización
+    ("sesiones_wearable", "id_sesion", "id_sesion, id_paciente, dispositivo, fecha_sincronizacion, fecha_actualizacion"),
+]
+COLUMNA_ID_SYNC = {entidad: columna_id for entidad, columna_id, _ in FUENTES_SYNC}
+# Los borrados son una fuente más, después de todas las tablas a igual fecha
+RANGO_ELIMINADOS = len(FUENTES_SYNC)
+
+def codificar_token(clave: tuple) -> str:
+    """Token opaco con la clave (fecha, fuente, id) del último cambio entregado"""
+    fecha, rango, identificador = clave
+    texto = f"{fecha.isoformat()}|{rango}|{identificador}"
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decodificar_token(token: str) -> tuple:
+    """Clave de un token; rango -1 es el horizonte de un pedido sin cambios"""
+    try:
+        texto = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("utf-8")
+        fecha, rango, identificador = texto.split("|")
+        clave = (datetime.fromisoformat(fecha), int(rango), int(identificador))
+    except Exception:
+        raise ValueError("Token de sincronización inválido")
+    if not -1 <= clave[1] <= RANGO_ELIMINADOS:
+        raise ValueError("Token de sincronización inválido")
+    return clave
+
+def _filtro_despues(rango: int, desde: tuple, columna_fecha: str, columna_id: str):
+    """Condición de índice para las filas de una fuente posteriores a la clave 'desde'"""
+    if desde is None:
+        return "", []
+    fecha, rango_desde, id_desde = desde
+    if rango > rango_desde:
+        return f"AND {columna_fecha} >= %s", [fecha]
+    if rango == rango_desde:
+        return f"AND {columna_fecha} >= %s AND ({columna_fecha} > %s OR {columna_id} > %s)", [fecha, fecha, id_desde]
+    return f"AND {columna_fecha} > %s", [fecha]
+
+class SyncModel:
+    """
+    Sincronización incremental de la app móvil. Altas y cambios salen de la columna
+    fecha_actualizacion (ON UPDATE CURRENT_TIMESTAMP) de cada tabla; los borrados, de las
+    lápidas de sync_eliminados, que escriben los modelos en la misma transacción que el
+    DELETE. Un token es la clave (fecha, fuente, id) del último cambio entregado.
+
+    Solo se entregan cambios con fecha anterior a ahora - margen: una transacción que
+    escribió antes pero todavía no confirmó no queda detrás de un token ya entregado.
+    """
+
+    @staticmethod
+    def registrar_eliminados(cursor, entidad: str, condicion: str, parametros) -> int:
+        """
+        Escribe las lápidas de las filas de 'entidad' que cumplen la condición. Se llama justo
+        antes del DELETE con la misma condición, en la transacción de quien borra.
+        """
+        cursor.execute(f"""
+            INSERT INTO sync_eliminados (id_paciente, entidad, id_entidad)
+            SELECT id_paciente, %s, {COLUMNA_ID_SYNC[entidad]} FROM {entidad} WHERE {condicion}
+        """, [entidad, *parametros])
+        return cursor.rowcount
+
+    @staticmethod
+    def get_cambios(paciente_id: int, desde: tuple, limite: int) -> dict:
+        """
+        Hasta 'limite' cambios posteriores a 'desde' (None = sincronización completa), leídos
+        en una instantánea consistente. Cada fuente trae a lo sumo limite + 1 filas por su
+        índice (id_paciente, fecha_actualizacion) y se mezclan por clave con un heap.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+            cursor.execute("""
+                SELECT NOW() - INTERVAL %s SECOND AS horizonte, NOW() - INTERVAL %s DAY AS retencion
+            """, (MARGEN_SEGUNDOS, RETENCION_DIAS))
+            limites = cursor.fetchone()
+            # Las lápidas más viejas que la retención ya se purgaron: hay que empezar de cero
+            reiniciar = desde is not None and desde[0] < limites["retencion"]
+            if reiniciar:
+                desde = None
+
+            listas = []
+            for rango, (entidad, columna_id, columnas) in enumerate(FUENTES_SYNC):
+                filtro, parametros = _filtro_despues(rango, desde, "fecha_actualizacion", columna_id)
+                cursor.execute(f"""
+                    SELECT {columnas} FROM {entidad}
+                    WHERE id_paciente = %s AND fecha_actualizacion <= %s {filtro}
+                    ORDER BY fecha_actualizacion, {columna_id}
+                    LIMIT %s
+                """, [paciente_id, limites["horizonte"], *parametros, limite + 1])
+                listas.append([
+                    ((fila["fecha_actualizacion"], rango, fila[columna_id]), entidad, fila)
+                    for fila in cursor.fetchall()
+                ])
+
+            filtro, parametros = _filtro_despues(RANGO_ELIMINADOS, desde, "fecha_eliminacion", "id_eliminado")
+            cursor.execute(f"""
+                SELECT id_eliminado, entidad, id_entidad, fecha_eliminacion FROM sync_eliminados
+                WHERE id_paciente = %s AND fecha_eliminacion <= %s {filtro}
+                ORDER BY fecha_eliminacion, id_eliminado
+                LIMIT %s
+            """, [paciente_id, limites["horizonte"], *parametros, limite + 1])
+            listas.append([
+                ((fila["fecha_eliminacion"], RANGO_ELIMINADOS, fila["id_eliminado"]), None, fila)
+                for fila in cursor.fetchall()
+            ])
+            connection.commit()
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+        cambios, eliminados, ultima = {}, {}, desde
+        entregados, mas = 0, False
+        for clave, entidad, fila in heapq.merge(*listas, key=lambda cambio: cambio[0]):
+            if entregados == limite:
+                mas = True
+                break
+            entregados += 1
+            if entidad is None:
+                eliminados.setdefault(fila["entidad"], []).append(fila["id_entidad"])
+            else:
+                cambios.setdefault(entidad, []).append(fila)
+            ultima = clave
+        if not entregados:
+            # Sin cambios hasta el horizonte: el token avanza hasta ahí (antes de cualquier
+            # cambio con esa fecha), así una app sin novedades no se queda con un token más
+            # viejo que la retención y un reinicio forzado
+            horizonte = (limites["horizonte"], -1, 0)
+            ultima = horizonte if desde is None else max(desde, horizonte)
+        return {
+            "cambios": cambios,
+            "eliminados": eliminados,
+            "token": codificar_token(ultima),
+            "mas": mas,
+            "reiniciar": reiniciar,
+        }
+
+    @staticmethod
+    def purgar_eliminados(tamano_lote: int = 5000) -> int:
+        """Borra por lotes las lápidas más viejas que la retención"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            borradas = 0
+            while True:
+                cursor.execute(
+                    "DELETE FROM sync_eliminados WHERE fecha_eliminacion < NOW() - INTERVAL %s DAY LIMIT %s",
+                    (RETENCION_DIAS, tamano_lote)
+                )
+                connection.commit()
+                borradas += cursor.rowcount
+                if cursor.rowcount < tamano_lote:
+                    return borradas
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
@@ -0,0 +1,109 @@
+from database import db
+import base64
+import heapq
+from datetime import datetime
+
+# Fuentes de la línea de tiempo: (tipo, tabla, id, fecha, columnas del evento). El orden
+# de la lista desempata eventos de distinto tipo con la misma fecha.
+FUENTES = [
+    ("indicador", "indicadores_salud", "id_indicador", "fecha_registro",
+     ["presion_sistolica", "presion_diastolica", "glucosa", "peso", "frecuencia_cardiaca",
+      "estado_animo", "actividad_fisica", "fuente_dato"]),
+    ("alerta", "alertas", "id_alerta", "fecha_programada", ["tipo_alerta", "descripcion", "estatus"]),
+    ("cita", "citas_medicas", "id_cita", "fecha_cita", ["id_medico", "duracion_minutos", "motivo", "estatus"]),
+    ("reporte", "reportes_medicos", "id_reporte", "fecha_reporte",
+     ["id_medico", "descripcion_general", "diagnostico"]),
+    ("recomendacion", "recomendaciones", "id_recomendacion", "fecha_generacion", ["contenido", "origen"]),
+    ("sesion_wearable", "sesiones_wearable", "id_sesion", "fecha_sincronizacion", ["dispositivo"]),
+]
+RANGO_FUENTE = {fuente[0]: rango for rango, fuente in enumerate(FUENTES)}
+
+def codificar_cursor(clave: tuple) -> str:
+    """Cursor opaco con la clave (fecha, rango de fuente, id) del último evento entregado"""
+    fecha, rango, identificador = clave
+    texto = f"{fecha.isoformat()}|{rango}|{identificador}"
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decodificar_cursor(cursor: str) -> tuple:
+    """Clave de un cursor de página; también acepta una fecha ISO (eventos anteriores a ella)"""
+    try:
+        return (datetime.fromisoformat(cursor), -1, 0)
+    except ValueError:
+        pass
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        fecha, rango, identificador = texto.split("|")
+        clave = (datetime.fromisoformat(fecha), int(rango), int(identificador))
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if not 0 <= clave[1] < len(FUENTES):
+        raise ValueError("Cursor inválido")
+    return clave
+
+class TimelineModel:
+    """
+    Línea de tiempo unificada del paciente: indicadores, alertas, citas, reportes,
+    recomendaciones y sesiones de wearable en orden cronológico inverso. Cada fuente se lee
+    con una consulta limitada sobre su índice (id_paciente, fecha), que ya termina en la
+    clave primaria; fusionar() mezcla los resultados sin cargar historiales completos.
+    """
+
+    @staticmethod
+    def get_eventos(tipo: str, paciente_id: int, antes: tuple, limite: int) -> list:
+        """
+        Eventos de una fuente anteriores al cursor 'antes' (None = desde el más reciente),
+        ya ordenados por (fecha, id) descendente.
+        """
+        rango = RANGO_FUENTE[tipo]
+        _, tabla, columna_id, columna_fecha, columnas = FUENTES[rango]
+        filtro, parametros = "", [paciente_id]
+        if antes is not None:
+            fecha, rango_cursor, id_cursor = antes
+            if rango < rango_cursor:
+                # A igual fecha, esta fuente va después de la del cursor
+                filtro = f"AND {columna_fecha} <= %s"
+                parametros.append(fecha)
+            elif rango == rango_cursor:
+                filtro = f"AND {columna_fecha} <= %s AND ({columna_fecha} < %s OR {columna_id} < %s)"
+                parametros.extend([fecha, fecha, id_cursor])
+            else:
+                filtro = f"AND {columna_fecha} < %s"
+                parametros.append(fecha)
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"""
+                SELECT {columna_id} AS id, {columna_fecha} AS fecha, {', '.join(columnas)}
+                FROM {tabla}
+                WHERE id_paciente = %s AND {columna_fecha} IS NOT NULL {filtro}
+                ORDER BY {columna_fecha} DESC, {columna_id} DESC
+                LIMIT %s
+            """, parametros + [limite])
+            eventos = []
+            for fila in cursor.fetchall():
+                identificador, fecha = fila.pop("id"), fila.pop("fecha")
+                eventos.append({"tipo": tipo, "id": identificador, "fecha": fecha, "datos": fila})
+            return eventos
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def clave(evento: dict) -> tuple:
+        return (evento["fecha"], RANGO_FUENTE[evento["tipo"]], evento["id"])
+
+    @staticmethod
+    def fusionar(listas: list, limite: int) -> dict:
+        """
+        Mezcla k listas ya ordenadas con un heap (heapq.merge, perezoso) y corta en 'limite'.
+        Cada fuente se pidió con limite + 1 filas, así que si sale un evento más hay página
+        siguiente y su cursor es la clave del último evento entregado.
+        """
+        fusion = heapq.merge(*listas, key=TimelineModel.clave, reverse=True)
+        eventos = []
+        for evento in fusion:
+            if len(eventos) == limite:
+                return {"eventos": eventos, "siguiente": codificar_cursor(TimelineModel.clave(eventos[-1]))}
+            eventos.append(evento)
+        return {"eventos": eventos, "siguiente": None}
@@ -0,0 +1,252 @@
+from database import db
+import json
+from pymysql import Error
+
+def _marcadores(cantidad: int) -> str:
+    return ', '.join(['%s'] * cantidad)
+
+class TrabajosModel:
+    """
+    Cola durable de trabajos en segundo plano (tabla trabajos).
+
+    Un trabajo es 'pendiente' hasta que un trabajador lo reclama con SELECT ... FOR UPDATE
+    SKIP LOCKED (dos trabajadores nunca toman el mismo y ninguno espera los bloqueos del
+    otro). Al reclamarlo pasa a 'procesando' con visible_hasta = ahora + su tiempo de
+    visibilidad; si el trabajador muere, recuperar_vencidos lo devuelve a la cola. Las
+    actualizaciones del trabajador llevan su propietario, así un trabajador que perdió el
+    trabajo no pisa el resultado del que lo reclamó después.
+    """
+
+    @staticmethod
+    def encolar(tipo: str, carga: dict = None, cola: str = "default", prioridad: int = 0,
+                retraso_segundos: float = 0, ejecutar_en=None, max_intentos: int = 5,
+                visibilidad_segundos: int = 300, clave: str = None) -> int:
+        """
+        Encola un trabajo y devuelve su id. Con clave, el trabajo es único (uq_trabajos_clave):
+        si ya hay uno con esa clave no se encola otro y se devuelve el id del existente.
+        """
+        trabajo = {
+            "tipo": tipo, "carga": carga, "cola": cola, "prioridad": prioridad,
+            "retraso_segundos": retraso_segundos, "ejecutar_en": ejecutar_en,
+            "max_intentos": max_intentos, "visibilidad_segundos": visibilidad_segundos,
+        }
+        if clave is None:
+            return TrabajosModel.encolar_lote([trabajo])[0]
+
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                """INSERT IGNORE INTO trabajos (cola, tipo, carga, prioridad, ejecutar_en, max_intentos,
+                visibilidad_segundos, clave)
+                VALUES (%s, %s, %s, %s, COALESCE(%s, NOW(6) + INTERVAL %s MICROSECOND), %s, %s, %s)""",
+                [*TrabajosModel._valores(trabajo), clave]
+            )
+            connection.commit()
+            if cursor.rowcount:
+                return cursor.lastrowid
+            cursor.execute("SELECT id_trabajo FROM trabajos WHERE clave = %s", (clave,))
+            return cursor.fetchone()["id_trabajo"]
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def _valores(trabajo: dict) -> list:
+        return [
+            trabajo.get("cola", "default"), trabajo["tipo"],
+            json.dumps(trabajo.get("carga") or {}, ensure_ascii=False, default=str),
+            trabajo.get("prioridad", 0), trabajo.get("ejecutar_en"),
+            int(trabajo.get("retraso_segundos", 0) * 1000000),
+            trabajo.get("max_intentos", 5), trabajo.get("visibilidad_segundos", 300),
+        ]
+
+    @staticmethod
+    def encolar_lote(trabajos: list) -> list:
+        """Encola varios trabajos con un INSERT multi-fila; devuelve sus ids"""
+        if not trabajos:
+            return []
+        valores = []
+        for trabajo in trabajos:
+            valores.extend(TrabajosModel._valores(trabajo))
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                f"""INSERT INTO trabajos (cola, tipo, carga, prioridad, ejecutar_en, max_intentos, visibilidad_segundos)
+                VALUES {', '.join(['(%s, %s, %s, %s, COALESCE(%s, NOW(6) + INTERVAL %s MICROSECOND), %s, %s)'] * len(trabajos))}""",
+                valores
+            )
+            connection.commit()
+            # Los ids de un INSERT multi-fila son consecutivos desde lastrowid
+            return list(range(cursor.lastrowid, cursor.lastrowid + len(trabajos)))
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def reclamar(colas: list, propietario: str, limite: int = 1) -> list:
+        """
+        Reclama hasta 'limite' trabajos vencidos de las colas, por prioridad (mayor primero)
+        y antigüedad. Las filas bloqueadas por otro trabajador se saltan en vez de esperar.
+        """
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            connection.begin()
+            cursor.execute(f"""
+                SELECT id_trabajo FROM trabajos
+                WHERE cola IN ({_marcadores(len(colas))}) AND estado = 'pendiente' AND ejecutar_en <= NOW(6)
+                ORDER BY prioridad DESC, ejecutar_en, id_trabajo
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, [*colas, limite])
+            ids = [fila["id_trabajo"] for fila in cursor.fetchall()]
+            if not ids:
+                connection.commit()
+                return []
+            cursor.execute(f"""
+                UPDATE trabajos
+                SET estado = 'procesando', intentos = intentos + 1, propietario = %s,
+                    fecha_inicio = NOW(6), visible_hasta = NOW(6) + INTERVAL visibilidad_segundos SECOND
+                WHERE id_trabajo IN ({_marcadores(len(ids))})
+            """, [propietario, *ids])
+            cursor.execute(f"""
+                SELECT * FROM trabajos WHERE id_trabajo IN ({_marcadores(len(ids))})
+                ORDER BY prioridad DESC, ejecutar_en, id_trabajo
+            """, ids)
+            trabajos = cursor.fetchall()
+            connection.commit()
+            for trabajo in trabajos:
+                trabajo["carga"] = json.loads(trabajo["carga"]) if trabajo["carga"] else {}
+            return trabajos
+        except Error as e:
+            connection.rollback()
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def _actualizar_propios(sql: str, parametros: list) -> int:
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(sql, parametros)
+            connection.commit()
+            return cursor.rowcount
+        except Error as e:
+            raise e
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def completar(trabajo_id: int, propietario: str) -> bool:
+        return TrabajosModel._actualizar_propios("""
+            UPDATE trabajos SET estado = 'completado', fecha_fin = NOW(6), visible_hasta = NULL
+            WHERE id_trabajo = %s AND propietario = %s AND estado = 'procesando'
+        """, [trabajo_id, propietario]) > 0
+
+    @staticmethod
+    def fallar(trabajo_id: int, propietario: str, error: str, reintentar_en_segundos: float = None) -> bool:
+        """
+        Registra un intento fallido. Con reintentar_en_segundos vuelve a la cola con ese
+        retraso; sin él (o sin intentos restantes) queda 'fallido'.
+        """
+        return TrabajosModel._actualizar_propios("""
+            UPDATE trabajos
+            SET estado = IF(%s IS NOT NULL AND intentos < max_intentos, 'pendiente', 'fallido'),
+                ejecutar_en = IF(%s IS NOT NULL AND intentos < max_intentos,
+                                 NOW(6) + INTERVAL %s MICROSECOND, ejecutar_en),
+                fecha_fin = IF(%s IS NOT NULL AND intentos < max_intentos, NULL, NOW(6)),
+                ultimo_error = %s, propietario = NULL, visible_hasta = NULL
+            WHERE id_trabajo = %s AND propietario = %s AND estado = 'procesando'
+        """, [reintentar_en_segundos, reintentar_en_segundos, int((reintentar_en_segundos or 0) * 1000000),
+              reintentar_en_segundos, error[:2000], trabajo_id, propietario]) > 0
+
+    @staticmethod
+    def extender(trabajo_ids: list, propietario: str) -> int:
+        """Latido: renueva la visibilidad de los trabajos que este trabajador sigue ejecutando"""
+        if not trabajo_ids:
+            return 0
+        return TrabajosModel._actualizar_propios(f"""
+            UPDATE trabajos SET visible_hasta = NOW(6) + INTERVAL visibilidad_segundos SECOND
+            WHERE id_trabajo IN ({_marcadores(len(trabajo_ids))}) AND propietario = %s AND estado = 'procesando'
+        """, [*trabajo_ids, propietario])
+
+    @staticmethod
+    def recuperar_vencidos(limite: int = 500) -> int:
+        """
+        Devuelve a la cola los trabajos cuyo trabajador dejó de dar latidos (o los marca
+        'fallido' si ya agotaron sus intentos). Devuelve cuántos recuperó.
+        """
+        return TrabajosModel._actualizar_propios("""
+            UPDATE trabajos
+            SET estado = IF(intentos < max_intentos, 'pendiente', 'fallido'),
+                fecha_fin = IF(intentos < max_intentos, NULL, NOW(6)),
+                ultimo_error = 'Se venció el tiempo de visibilidad', propietario = NULL, visible_hasta = NULL
+            WHERE estado = 'procesando' AND visible_hasta < NOW(6)
+            ORDER BY visible_hasta
+            LIMIT %s
+        """, [limite])
+
+    @staticmethod
+    def purgar(dias: int, tamano_lote: int = 1000) -> int:
+        """Borra por lotes los trabajos terminados hace más de 'dias' días"""
+        borrados = 0
+        while True:
+            eliminados = TrabajosModel._actualizar_propios("""
+                DELETE FROM trabajos
+                WHERE estado IN ('completado', 'fallido') AND fecha_fin < NOW() - INTERVAL %s DAY
+                LIMIT %s
+            """, [dias, tamano_lote])
+            borrados += eliminados
+            if eliminados < tamano_lote:
+                return borrados
+
+    @staticmethod
+    def vaciar_cola(cola: str) -> int:
+        return TrabajosModel._actualizar_propios("DELETE FROM trabajos WHERE cola = %s", [cola])
+
+    @staticmethod
+    def get_by_id(trabajo_id: int):
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT * FROM trabajos WHERE id_trabajo = %s", (trabajo_id,))
+            trabajo = cursor.fetchone()
+            if trabajo:
+                trabajo["carga"] = json.loads(trabajo["carga"]) if trabajo["carga"] else {}
+            return trabajo
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
+
+    @staticmethod
+    def get_resumen() -> list:
+        """Trabajos por cola y estado, con el vencimiento más antiguo de los pendientes"""
+        connection = db.get_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT cola, estado, COUNT(*) AS cantidad,
+                    MIN(IF(estado = 'pendiente', ejecutar_en, NULL)) AS proximo
+                FROM trabajos
+                GROUP BY cola, estado
+                ORDER BY cola, estado
+            """)
+            return cursor.fetchall()
+        finally:
+            if connection and connection.open:
+                cursor.close()
+                connection.close()
@@ -1,6 +1,7 @@
 import pymysql
 from pymysql import Error
 from database import db
+from cache import invalidar
 
 class UsuarioModel:
     
@@ -78,6 +79,30 @@ class UsuarioModel:
             if connection and connection.open:
                 connection.close()
 
+    @staticmethod
+    def get_by_ids(usuario_ids: list) -> dict:
+        """Usuarios de varios ids en una sola consulta, como {id_usuario: fila}"""
+        if not usuario_ids:
+            return {}
+        connection = db.get_connection()
+        cursor = None
+        try:
+            if not connection or not connection.open:
+                return {}
+
+            cursor = connection.cursor()
+            marcadores = ", ".join(["%s"] * len(usuario_ids))
+            cursor.execute(f"SELECT * FROM usuario WHERE id_usuario IN ({marcadores})", list(usuario_ids))
+            return {fila["id_usuario"]: fila for fila in cursor.fetchall()}
+        except Error as e:
+            print(f"Error obteniendo usuarios por ID: {e}")
+            return {}
+        finally:
+            if cursor:
+                cursor.close()
+            if connection and connection.open:
+                connection.close()
+
     @staticmethod
     def update(usuario_id: int, usuario_data: dict):
         connection = db.get_connection()
@@ -100,6 +125,8 @@ class UsuarioModel:
             
             cursor.execute(query, values)
             connection.commit()
+            # nombre, correo y estatus del usuario forman parte del directorio de médicos
+            invalidar("medicos")
             
             cursor.execute("SELECT * FROM usuario WHERE id_usuario = %s", (usuario_id,))
             return cursor.fetchone()
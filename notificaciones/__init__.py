@@ -0,0 +1,32 @@
+import os
+from .notificadores import Notificador, NotificadorLocal, NotificadorWebhook
+from .planificador_alertas import PlanificadorAlertas
+
+def _crear_notificador():
+    """Selecciona el canal con NOTIFICADOR: local (por defecto) o webhook"""
+    tipo = os.getenv("NOTIFICADOR", "local")
+    if tipo == "webhook":
+        url = os.getenv("NOTIFICADOR_WEBHOOK_URL")
+        if url:
+            return NotificadorWebhook(url)
+        print("⚠️  NOTIFICADOR=webhook sin NOTIFICADOR_WEBHOOK_URL, se usa el notificador local")
+    return NotificadorLocal()
+
+# Instancias globales: el planificador se inicia como tarea de fondo en main.py
+notificador = _crear_notificador()
+planificador = PlanificadorAlertas(
+    notificador,
+    ventana_segundos=int(os.getenv("PLANIFICADOR_VENTANA_SEGUNDOS", "600")),
+    recarga_segundos=int(os.getenv("PLANIFICADOR_RECARGA_SEGUNDOS", "30")),
+    max_en_memoria=int(os.getenv("PLANIFICADOR_MAX_ALERTAS", "10000")),
+    retraso_maximo_segundos=int(os.getenv("PLANIFICADOR_RETRASO_MAXIMO_SEGUNDOS", "3600"))
+)
+
+__all__ = [
+    'Notificador',
+    'NotificadorLocal',
+    'NotificadorWebhook',
+    'PlanificadorAlertas',
+    'notificador',
+    'planificador'
+]
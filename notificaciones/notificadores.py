@@ -0,0 +1,53 @@
+import json
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import deque
+
+class Notificador(ABC):
+    """
+    Canal de salida de las alertas. Las implementaciones solo necesitan enviar() (una
+    subclase sin enviar() falla al instanciarse, no al disparar la primera alerta).
+    Sin destinatario, la alerta va al paciente; con destinatario, a ese usuario
+    (p. ej. el médico que recibe una alerta clínica).
+    """
+
+    @abstractmethod
+    def enviar(self, alerta: dict, destinatario: int = None):
+        ...
+
+    def estadisticas(self) -> dict:
+        return {"tipo": type(self).__name__}
+
+class NotificadorLocal(Notificador):
+    """
+    Stub para desarrollo: registra cada alerta en el log y conserva las últimas enviadas
+    en memoria para poder inspeccionarlas.
+    """
+
+    def __init__(self, max_historial: int = 100):
+        self.enviadas = deque(maxlen=max_historial)
+
+    def enviar(self, alerta: dict, destinatario: int = None):
+        origen = alerta["id_alerta"] or f"recurrente {alerta['id_regla']}"
+        para = f"usuario {destinatario}" if destinatario else f"paciente {alerta['id_paciente']}"
+        print(f"🔔 Alerta {origen} ({alerta['tipo_alerta']}) para {para}: {alerta['descripcion']}")
+        self.enviadas.append(dict(alerta, destinatario=destinatario))
+
+    def estadisticas(self) -> dict:
+        return {"tipo": type(self).__name__, "historial": len(self.enviadas)}
+
+class NotificadorWebhook(Notificador):
+    """Publica cada alerta como JSON en una URL (servicio de push, bot de mensajería, etc.)"""
+
+    def __init__(self, url: str, timeout: float = 5):
+        self.url = url
+        self.timeout = timeout
+
+    def enviar(self, alerta: dict, destinatario: int = None):
+        cuerpo = json.dumps(dict(alerta, destinatario=destinatario), default=str).encode("utf-8")
+        solicitud = urllib.request.Request(
+            self.url, data=cuerpo, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(solicitud, timeout=self.timeout) as respuesta:
+            if respuesta.status >= 300:
+                raise RuntimeError(f"Webhook respondió {respuesta.status}")
@@ -0,0 +1,231 @@
+import asyncio
+import heapq
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from models.alertas_model import AlertasModel
+from models.alertas_recurrentes_model import AlertasRecurrentesModel
+from models.arrendamiento_model import ArrendamientoModel
+
+class PlanificadorAlertas:
+    """
+    Dispara las alertas pendientes en su fecha_programada.
+
+    Solo mantiene en memoria una ventana deslizante (las alertas que vencen en los próximos
+    ventana_segundos, hasta max_en_memoria) dentro de un heap ordenado por vencimiento, así
+    que el tamaño de la tabla no importa. La ventana se recarga cada recarga_segundos; entre
+    recargas, los cambios hechos desde cualquier proceso llegan por invalidar() /
+    invalidar_regla(), que llama el suscriptor 'planificador_alertas' del relay de eventos.
+
+    Las ocurrencias de alertas recurrentes entran en el mismo heap: se generan solo para la
+    ventana y se identifican por (id_regla, fecha) en lugar de id_alerta.
+
+    Solo la instancia que tiene el arrendamiento 'planificador_alertas' despacha. Antes de
+    enviar, cada alerta se reclama en la base de datos (AlertasModel.marcar_notificada), por
+    lo que una alerta editada o borrada después de cargarse no se envía.
+    """
+
+    NOMBRE_ARRENDAMIENTO = "planificador_alertas"
+
+    def __init__(self, notificador, ventana_segundos: int = 600, recarga_segundos: int = 30,
+                 max_en_memoria: int = 10000, retraso_maximo_segundos: int = 3600,
+                 duracion_arrendamiento: int = 90):
+        self.notificador = notificador
+        self.ventana = timedelta(seconds=ventana_segundos)
+        self.recarga_segundos = recarga_segundos
+        self.max_en_memoria = max_en_memoria
+        # Alertas más atrasadas que esto (p. ej. tras una caída larga) ya no se envían
+        self.retraso_maximo = timedelta(seconds=retraso_maximo_segundos)
+        self.duracion_arrendamiento = duracion_arrendamiento
+        self.propietario = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._heap = []        # (fecha_programada, clave)
+        self._alertas = {}     # clave -> alerta vigente; las entradas del heap que no
+                               # coinciden con ella se descartan al salir (borrado perezoso)
+        self._horizonte = None
+        self._invalidadas = set()
+        self._reglas_invalidadas = set()
+        self._lock_invalidadas = threading.Lock()
+        self._cambio = None
+        self._loop = None
+        self.es_lider = False
+        self.enviadas = 0
+        self.fallidas = 0
+
+    def invalidar(self, alerta_id: int):
+        """Avisa que una alerta cambió. Se puede llamar desde cualquier hilo"""
+        self._avisar(self._invalidadas, alerta_id)
+
+    def invalidar_regla(self, regla_id: int):
+        """Avisa que una regla recurrente (o el estatus de una ocurrencia) cambió"""
+        self._avisar(self._reglas_invalidadas, regla_id)
+
+    def _avisar(self, pendientes: set, identificador: int):
+        if self._loop is None or not self.es_lider:
+            return
+        with self._lock_invalidadas:
+            pendientes.add(identificador)
+        self._loop.call_soon_threadsafe(self._cambio.set)
+
+    @staticmethod
+    def _clave(alerta: dict) -> tuple:
+        if alerta.get("id_regla") is not None and alerta.get("id_alerta") is None:
+            return ("regla", alerta["id_regla"], alerta["fecha_programada"])
+        return ("alerta", alerta["id_alerta"])
+
+    def _programar(self, alerta: dict):
+        clave = self._clave(alerta)
+        self._alertas[clave] = alerta
+        heapq.heappush(self._heap, (alerta["fecha_programada"], clave))
+
+    def _vaciar(self):
+        self._heap = []
+        self._alertas = {}
+        self._horizonte = None
+
+    def _recargar(self):
+        # La recarga completa ya refleja cualquier cambio pendiente de aplicar
+        with self._lock_invalidadas:
+            self._invalidadas = set()
+            self._reglas_invalidadas = set()
+        ahora = datetime.now()
+        desde = ahora - self.retraso_maximo
+        hasta = ahora + self.ventana
+        alertas = AlertasModel.get_por_notificar(desde, hasta, self.max_en_memoria)
+        # Si la ventana no cupo completa, el horizonte es la última alerta cargada
+        if len(alertas) >= self.max_en_memoria:
+            hasta = alertas[-1]["fecha_programada"]
+        ocurrencias, horizonte_ocurrencias = AlertasRecurrentesModel.avanzar_por_notificar(
+            desde, hasta, self.max_en_memoria
+        )
+        hasta = min(hasta, horizonte_ocurrencias)
+
+        cargadas = list(heapq.merge(alertas, ocurrencias, key=lambda alerta: alerta["fecha_programada"]))
+        # Solo lo que quedó completo hasta el horizonte; si todo coincide en el mismo
+        # instante, se toma igual para no quedar atascado
+        dentro = [alerta for alerta in cargadas if alerta["fecha_programada"] < hasta] or \
+            [alerta for alerta in cargadas if alerta["fecha_programada"] <= hasta]
+        self._alertas = {self._clave(alerta): alerta for alerta in dentro}
+        self._heap = [(alerta["fecha_programada"], clave) for clave, alerta in self._alertas.items()]
+        heapq.heapify(self._heap)
+        self._horizonte = hasta
+
+    def _aplicar_invalidaciones(self):
+        with self._lock_invalidadas:
+            ids, self._invalidadas = list(self._invalidadas), set()
+            reglas, self._reglas_invalidadas = list(self._reglas_invalidadas), set()
+        if self._horizonte is None:
+            return
+        desde = datetime.now() - self.retraso_maximo
+        if ids:
+            for alerta_id in ids:
+                self._alertas.pop(("alerta", alerta_id), None)
+            for alerta in AlertasModel.get_por_notificar(desde, self._horizonte, len(ids), ids):
+                self._programar(alerta)
+        if reglas:
+            for clave in [clave for clave in self._alertas if clave[0] == "regla" and clave[1] in reglas]:
+                del self._alertas[clave]
+            ocurrencias, _ = AlertasRecurrentesModel.avanzar_por_notificar(
+                desde, self._horizonte, self.max_en_memoria, reglas
+            )
+            for ocurrencia in ocurrencias:
+                self._programar(ocurrencia)
+
+    def _vencidas(self) -> list:
+        ahora = datetime.now()
+        vencidas = []
+        while self._heap and self._heap[0][0] <= ahora:
+            fecha, clave = heapq.heappop(self._heap)
+            alerta = self._alertas.get(clave)
+            if alerta and alerta["fecha_programada"] == fecha:
+                del self._alertas[clave]
+                vencidas.append(alerta)
+        return vencidas
+
+    def _despachar(self, alertas: list):
+        for alerta in alertas:
+            recurrente = alerta["id_alerta"] is None
+            if recurrente:
+                reclamada = AlertasRecurrentesModel.marcar_notificada(
+                    alerta["id_regla"], alerta["fecha_programada"], alerta["version"], datetime.now()
+                )
+            else:
+                reclamada = AlertasModel.marcar_notificada(
+                    alerta["id_alerta"], alerta["fecha_programada"], datetime.now()
+                )
+            if not reclamada:
+                continue
+            try:
+                self.notificador.enviar(alerta)
+                self.enviadas += 1
+            except Exception as e:
+                self.fallidas += 1
+                print(f"❌ Error enviando alerta {self._clave(alerta)}: {e}")
+                if recurrente:
+                    AlertasRecurrentesModel.desmarcar_notificada(alerta["id_regla"], alerta["fecha_programada"])
+                else:
+                    AlertasModel.desmarcar_notificada(alerta["id_alerta"])
+
+    def _segundos_hasta_siguiente(self, proxima_recarga: float) -> float:
+        espera = proxima_recarga - time.monotonic()
+        if self._heap:
+            espera = min(espera, (self._heap[0][0] - datetime.now()).total_seconds())
+        return max(espera, 0.05)
+
+    async def ejecutar(self):
+        """Bucle principal; se lanza como tarea de fondo al iniciar la aplicación"""
+        self._loop = asyncio.get_running_loop()
+        self._cambio = asyncio.Event()
+        proxima_recarga = 0
+        try:
+            while True:
+                try:
+                    if time.monotonic() >= proxima_recarga:
+                        self._cambio.clear()
+                        self.es_lider = await asyncio.to_thread(
+                            ArrendamientoModel.adquirir, self.NOMBRE_ARRENDAMIENTO,
+                            self.propietario, self.duracion_arrendamiento
+                        )
+                        if self.es_lider:
+                            await asyncio.to_thread(self._recargar)
+                        else:
+                            self._vaciar()
+                        proxima_recarga = time.monotonic() + self.recarga_segundos
+                    elif self._cambio.is_set():
+                        self._cambio.clear()
+                        await asyncio.to_thread(self._aplicar_invalidaciones)
+
+                    if self.es_lider:
+                        vencidas = self._vencidas()
+                        if vencidas:
+                            await asyncio.to_thread(self._despachar, vencidas)
+                except Exception as e:
+                    print(f"❌ Error en el planificador de alertas: {e}")
+                    proxima_recarga = time.monotonic() + self.recarga_segundos
+
+                try:
+                    await asyncio.wait_for(self._cambio.wait(),
+                                           timeout=self._segundos_hasta_siguiente(proxima_recarga))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self.es_lider:
+                try:
+                    ArrendamientoModel.liberar(self.NOMBRE_ARRENDAMIENTO, self.propietario)
+                except Exception:
+                    pass
+            self.es_lider = False
+
+    def estadisticas(self) -> dict:
+        return {
+            "es_lider": self.es_lider,
+            "propietario": self.propietario,
+            "en_memoria": len(self._alertas),
+            "horizonte": self._horizonte,
+            "enviadas": self.enviadas,
+            "fallidas": self.fallidas,
+            "notificador": self.notificador.estadisticas(),
+        }
@@ -0,0 +1,11 @@
+from .puntuacion import SeriesDiarias, puntuar, REGLAS, METRICAS_PUNTUACION
+from .generador import generar, procesar_fragmento
+
+__all__ = [
+    'SeriesDiarias',
+    'puntuar',
+    'REGLAS',
+    'METRICAS_PUNTUACION',
+    'generar',
+    'procesar_fragmento'
+]
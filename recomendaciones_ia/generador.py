@@ -0,0 +1,64 @@
+import os
+import time
+from datetime import date, datetime, timedelta
+from models.paciente_model import PacienteModel
+from models.indicadores_resumen_model import IndicadoresResumenModel
+from models.recomendaciones_model import RecomendacionesModel
+from jobs.fragmentos import ejecutar_por_fragmentos
+from .puntuacion import METRICAS_PUNTUACION, SeriesDiarias, puntuar
+
+ORIGEN = "IA"
+
+def procesar_fragmento(fragmento: int, total_fragmentos: int, ventana_dias: int,
+                       dedup_dias: int, tamano_lote: int) -> dict:
+    """
+    Recorre por lotes los pacientes del fragmento: carga sus resúmenes diarios de la
+    ventana en arreglos, aplica las reglas, descarta lo que ya se recomendó en los
+    últimos dedup_dias y guarda el resto con un INSERT multi-fila por lote.
+    Corre en un proceso del pool; devuelve contadores y los pacientes con recomendaciones
+    nuevas para que el proceso principal invalide su caché.
+    """
+    hoy = date.today()
+    desde = hoy - timedelta(days=ventana_dias - 1)
+    desde_dedup = datetime.now() - timedelta(days=dedup_dias)
+    pacientes = creadas = 0
+    con_nuevas = set()
+    ultimo_id = 0
+    while True:
+        ids = PacienteModel.get_ids_fragmento(fragmento, total_fragmentos, ultimo_id, tamano_lote)
+        if not ids:
+            break
+        ultimo_id = ids[-1]
+        filas = IndicadoresResumenModel.iterar_diarios(ids, METRICAS_PUNTUACION, desde)
+        series = SeriesDiarias.desde_filas(ids, filas, desde, ventana_dias)
+        candidatas = puntuar(series)
+        if candidatas:
+            recientes = RecomendacionesModel.get_claves_recientes(
+                list({paciente for paciente, _, _ in candidatas}), ORIGEN, desde_dedup
+            )
+            nuevas = [
+                {"id_paciente": paciente, "clave": clave, "contenido": contenido, "origen": ORIGEN}
+                for paciente, clave, contenido in candidatas if (paciente, clave) not in recientes
+            ]
+            creadas += RecomendacionesModel.create_lote(nuevas)
+            con_nuevas.update(recomendacion["id_paciente"] for recomendacion in nuevas)
+        pacientes += len(ids)
+    return {"pacientes": pacientes, "creadas": creadas, "con_nuevas": con_nuevas}
+
+def generar(procesos: int = None, ventana_dias: int = None, dedup_dias: int = None,
+            tamano_lote: int = 500) -> dict:
+    """Reparte la población en tantos fragmentos como procesos (id_paciente módulo procesos)"""
+    procesos = procesos or int(os.getenv("RECOMENDACIONES_IA_PROCESOS", "0")) or os.cpu_count() or 1
+    ventana_dias = ventana_dias or int(os.getenv("RECOMENDACIONES_IA_VENTANA_DIAS", "28"))
+    dedup_dias = dedup_dias or int(os.getenv("RECOMENDACIONES_IA_DEDUP_DIAS", "7"))
+    inicio = time.perf_counter()
+    resultados = ejecutar_por_fragmentos(procesar_fragmento, procesos, ventana_dias, dedup_dias, tamano_lote)
+    segundos = time.perf_counter() - inicio
+    resumen = {
+        "pacientes": sum(resultado["pacientes"] for resultado in resultados),
+        "creadas": sum(resultado["creadas"] for resultado in resultados),
+        "con_nuevas": set().union(*(resultado["con_nuevas"] for resultado in resultados)),
+        "segundos": round(segundos, 2),
+    }
+    resumen["pacientes_por_segundo"] = round(resumen["pacientes"] / segundos, 1) if segundos > 0 else 0.0
+    return resumen
@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+import numpy as np
+
+# Métricas leídas de los resúmenes diarios para puntuar
+METRICAS_PUNTUACION = ["presion_sistolica", "glucosa", "peso", "frecuencia_cardiaca"]
+
+# Umbrales de las reglas
+PENDIENTE_PRESION_SEMANAL = 5.0     # mmHg por semana
+PRESION_RECIENTE_ALTA = 140.0       # mmHg, promedio de los últimos 7 días
+MIN_DIAS_PRESION = 4
+CV_GLUCOSA = 0.36                   # coeficiente de variación considerado inestable
+MIN_LECTURAS_GLUCOSA = 6
+CAMBIO_PESO = 0.03                  # 3 % entre la primera y la segunda mitad de la ventana
+DIAS_INACTIVIDAD = 7
+
+@dataclass
+class SeriesDiarias:
+    """
+    Resúmenes diarios de un lote de pacientes en arreglos pacientes x días. Por métrica:
+    cantidad de lecturas, suma y suma de cuadrados de cada día (0 si no hubo lecturas).
+    """
+    pacientes: np.ndarray
+    cantidad: dict
+    suma: dict
+    suma_cuadrados: dict
+
+    @classmethod
+    def desde_filas(cls, pacientes: list, filas, desde, dias: int):
+        """filas: tuplas (id_paciente, metrica, inicio, cantidad, suma, suma_cuadrados)"""
+        ids = np.asarray(pacientes, dtype=np.int64)
+        forma = (len(ids), dias)
+        series = cls(ids,
+                     {metrica: np.zeros(forma) for metrica in METRICAS_PUNTUACION},
+                     {metrica: np.zeros(forma) for metrica in METRICAS_PUNTUACION},
+                     {metrica: np.zeros(forma) for metrica in METRICAS_PUNTUACION})
+        filas = list(filas)
+        if not filas:
+            return series
+        columnas = list(zip(*filas))
+        # pacientes viene ordenado, así que la fila de cada lectura sale de una búsqueda binaria
+        fila = np.searchsorted(ids, np.asarray(columnas[0], dtype=np.int64))
+        metricas = np.asarray(columnas[1])
+        dia = (np.asarray(columnas[2], dtype="datetime64[D]") - np.datetime64(desde, "D")).astype(np.int64)
+        cantidad = np.asarray(columnas[3], dtype=float)
+        suma = np.asarray(columnas[4], dtype=float)
+        suma_cuadrados = np.asarray(columnas[5], dtype=float)
+        en_ventana = (dia >= 0) & (dia < dias)
+        for metrica in METRICAS_PUNTUACION:
+            seleccion = en_ventana & (metricas == metrica)
+            posicion = (fila[seleccion], dia[seleccion])
+            series.cantidad[metrica][posicion] = cantidad[seleccion]
+            series.suma[metrica][posicion] = suma[seleccion]
+            series.suma_cuadrados[metrica][posicion] = suma_cuadrados[seleccion]
+        return series
+
+    def promedios_diarios(self, metrica: str) -> np.ndarray:
+        cantidad = self.cantidad[metrica]
+        return np.divide(self.suma[metrica], cantidad, out=np.full(cantidad.shape, np.nan), where=cantidad > 0)
+
+def _pendiente(valores: np.ndarray):
+    """
+    Pendiente por mínimos cuadrados de cada fila respecto al índice del día, ignorando
+    los NaN. Devuelve (pendiente por día, días con dato).
+    """
+    hay = ~np.isnan(valores)
+    x = np.broadcast_to(np.arange(valores.shape[1], dtype=float), valores.shape)
+    y = np.where(hay, valores, 0.0)
+    n = hay.sum(axis=1).astype(float)
+    sx = (x * hay).sum(axis=1)
+    sy = y.sum(axis=1)
+    sxx = (x * x * hay).sum(axis=1)
+    sxy = (x * y).sum(axis=1)
+    denominador = n * sxx - sx * sx
+    pendiente = np.divide(n * sxy - sx * sy, denominador, out=np.zeros_like(n), where=denominador > 0)
+    return pendiente, n
+
+def _promedio_ponderado(series: SeriesDiarias, metrica: str, columnas: slice):
+    cantidad = series.cantidad[metrica][:, columnas].sum(axis=1)
+    suma = series.suma[metrica][:, columnas].sum(axis=1)
+    return np.divide(suma, cantidad, out=np.full(cantidad.shape, np.nan), where=cantidad > 0), cantidad
+
+def regla_presion(series: SeriesDiarias) -> list:
+    """Presión sistólica al alza en la ventana o promedio reciente alto"""
+    diarios = series.promedios_diarios("presion_sistolica")
+    pendiente, dias = _pendiente(diarios)
+    semanal = pendiente * 7
+    reciente, lecturas_recientes = _promedio_ponderado(series, "presion_sistolica", slice(-7, None))
+    al_alza = (dias >= MIN_DIAS_PRESION) & (semanal >= PENDIENTE_PRESION_SEMANAL)
+    alta = (lecturas_recientes >= 3) & (reciente >= PRESION_RECIENTE_ALTA)
+    resultado = []
+    for i in np.nonzero(al_alza | alta)[0]:
+        if al_alza[i]:
+            contenido = (f"Tu presión sistólica viene subiendo unos {semanal[i]:.0f} mmHg por semana. "
+                         "Reduce la sal, mantén tus medicamentos al día y coméntalo con tu médico.")
+        else:
+            contenido = (f"Tu presión sistólica promedio de la última semana es {reciente[i]:.0f} mmHg. "
+                         "Mídela a la misma hora cada día y agenda una revisión con tu médico.")
+        resultado.append((int(series.pacientes[i]), "presion_tendencia", contenido))
+    return resultado
+
+def regla_glucosa(series: SeriesDiarias) -> list:
+    """Variabilidad de la glucosa (coeficiente de variación de todas las lecturas de la ventana)"""
+    n = series.cantidad["glucosa"].sum(axis=1)
+    suma = series.suma["glucosa"].sum(axis=1)
+    suma_cuadrados = series.suma_cuadrados["glucosa"].sum(axis=1)
+    promedio = np.divide(suma, n, out=np.zeros_like(n), where=n > 0)
+    varianza = np.maximum(np.divide(suma_cuadrados, n, out=np.zeros_like(n), where=n > 0) - promedio ** 2, 0)
+    cv = np.divide(np.sqrt(varianza), promedio, out=np.zeros_like(n), where=promedio > 0)
+    resultado = []
+    for i in np.nonzero((n >= MIN_LECTURAS_GLUCOSA) & (cv >= CV_GLUCOSA))[0]:
+        resultado.append((int(series.pacientes[i]), "glucosa_variabilidad",
+                          f"Tu glucosa varía mucho (variación del {cv[i] * 100:.0f} % alrededor de "
+                          f"{promedio[i]:.0f} mg/dL). Procura horarios de comida regulares y revisa tu "
+                          "tratamiento con tu médico."))
+    return resultado
+
+def regla_peso(series: SeriesDiarias) -> list:
+    """Cambio de peso entre la primera y la segunda mitad de la ventana"""
+    mitad = series.cantidad["peso"].shape[1] // 2
+    antes, lecturas_antes = _promedio_ponderado(series, "peso", slice(None, mitad))
+    despues, lecturas_despues = _promedio_ponderado(series, "peso", slice(mitad, None))
+    hay = (lecturas_antes > 0) & (lecturas_despues > 0)
+    cambio = np.divide(despues - antes, antes, out=np.zeros_like(antes), where=hay & (antes > 0))
+    resultado = []
+    for i in np.nonzero(hay & (np.abs(cambio) >= CAMBIO_PESO))[0]:
+        direccion = "subido" if cambio[i] > 0 else "bajado"
+        resultado.append((int(series.pacientes[i]), "peso_cambio",
+                          f"Has {direccion} {abs(despues[i] - antes[i]):.1f} kg en las últimas semanas "
+                          f"({abs(cambio[i]) * 100:.0f} %). Si no es intencional, coméntalo con tu médico."))
+    return resultado
+
+def regla_inactividad(series: SeriesDiarias) -> list:
+    """Días seguidos, hasta hoy, sin ningún registro"""
+    registros = sum(series.cantidad[metrica] for metrica in METRICAS_PUNTUACION) > 0
+    dias = registros.shape[1]
+    # Índice del último día con registro contado desde el final; sin registros = toda la ventana
+    ultimo = np.where(registros.any(axis=1), np.argmax(registros[:, ::-1], axis=1), dias)
+    resultado = []
+    for i in np.nonzero(ultimo >= DIAS_INACTIVIDAD)[0]:
+        resultado.append((int(series.pacientes[i]), "inactividad",
+                          f"Llevas {int(ultimo[i])} días o más sin registrar tus indicadores. Un registro "
+                          "diario ayuda a tu médico a seguir tu evolución."))
+    return resultado
+
+REGLAS = [regla_presion, regla_glucosa, regla_peso, regla_inactividad]
+
+def puntuar(series: SeriesDiarias) -> list:
+    """Recomendaciones (id_paciente, clave, contenido) de todas las reglas para el lote"""
+    return [recomendacion for regla in REGLAS for recomendacion in regla(series)]
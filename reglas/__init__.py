@@ -0,0 +1,16 @@
+import os
+from notificaciones import notificador
+from .motor import MotorReglasClinicas, ReglasCompiladas
+
+# Instancia global: el relay de eventos le entrega las lecturas nuevas confirmadas
+motor = MotorReglasClinicas(
+    notificador,
+    ttl_segundos=int(os.getenv("REGLAS_CLINICAS_TTL", "60")),
+    enfriamiento_horas=int(os.getenv("REGLAS_CLINICAS_ENFRIAMIENTO_HORAS", "6"))
+)
+
+__all__ = [
+    'MotorReglasClinicas',
+    'ReglasCompiladas',
+    'motor'
+]
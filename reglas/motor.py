@@ -0,0 +1,203 @@
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from models.reglas_clinicas_model import ReglasClinicasModel
+from models.alertas_model import AlertasModel
+from models.paciente_medico_model import PacienteMedicoModel
+
+# Códigos de operador usados en los arreglos compilados
+OPERADORES = {">": 0, ">=": 1, "<": 2, "<=": 3}
+# Sentido de la regla: 0 alerta por arriba (> y >=), 1 por abajo (< y <=)
+SENTIDOS = {">": 0, ">=": 0, "<": 1, "<=": 1}
+NOMBRES_METRICAS = {
+    "presion_sistolica": "Presión sistólica",
+    "presion_diastolica": "Presión diastólica",
+    "glucosa": "Glucosa",
+    "peso": "Peso",
+    "frecuencia_cardiaca": "Frecuencia cardiaca",
+}
+
+def _cumple(valores: np.ndarray, operadores: np.ndarray, umbrales: np.ndarray) -> np.ndarray:
+    """Matriz lecturas x reglas con el resultado de comparar cada valor con cada umbral"""
+    v = valores[:, None]
+    u = umbrales[None, :]
+    op = operadores[None, :]
+    return (((op == 0) & (v > u)) | ((op == 1) & (v >= u)) |
+            ((op == 2) & (v < u)) | ((op == 3) & (v <= u)))
+
+class GrupoCompilado:
+    """
+    Reglas de un mismo tipo y métrica en arreglos, para evaluar lotes sin bucles.
+
+    Una regla propia del paciente sustituye solo a las globales del mismo sentido: un
+    umbral propio de glucosa alta deja sin efecto la alerta global de glucosa alta, pero
+    la de hipoglucemia sigue aplicando.
+    """
+
+    def __init__(self, reglas: list):
+        self.reglas = reglas
+        self.ids = np.array([regla["id_regla_clinica"] for regla in reglas])
+        self.pacientes = np.array([regla["id_paciente"] or 0 for regla in reglas])
+        self.operadores = np.array([OPERADORES[regla["operador"]] for regla in reglas])
+        self.sentidos = np.array([SENTIDOS[regla["operador"]] for regla in reglas])
+        self.umbrales = np.array([float(regla["valor"]) for regla in reglas])
+        self.globales = self.pacientes == 0
+        # Pacientes con reglas propias en cada sentido
+        self.con_reglas_propias = [
+            np.unique(self.pacientes[~self.globales & (self.sentidos == sentido)]) for sentido in (0, 1)
+        ]
+
+    def evaluar(self, pacientes: np.ndarray, valores: np.ndarray) -> list:
+        """Pares (índice de lectura, regla) que se disparan; valores NaN no disparan nada"""
+        # lecturas x sentidos: el paciente de la lectura tiene reglas propias en ese sentido
+        sustituidas = np.stack([np.isin(pacientes, propias) for propias in self.con_reglas_propias], axis=1)
+        aplica = (self.pacientes[None, :] == pacientes[:, None]) | (
+            self.globales[None, :] & ~sustituidas[:, self.sentidos]
+        )
+        disparos = aplica & _cumple(valores, self.operadores, self.umbrales) & ~np.isnan(valores)[:, None]
+        filas, columnas = np.nonzero(disparos)
+        return [(int(fila), self.reglas[columna]) for fila, columna in zip(filas, columnas)]
+
+class ReglasCompiladas:
+    def __init__(self, reglas: list):
+        self.umbrales = {}
+        self.tendencias = {}
+        agrupadas = {}
+        for regla in reglas:
+            clave = (regla["tipo"], regla["metrica"], regla.get("ventana_horas") if regla["tipo"] == "tendencia" else None)
+            agrupadas.setdefault(clave, []).append(regla)
+        for (tipo, metrica, ventana), grupo in agrupadas.items():
+            if tipo == "umbral":
+                self.umbrales[metrica] = GrupoCompilado(grupo)
+            else:
+                self.tendencias[(metrica, ventana)] = GrupoCompilado(grupo)
+
+class MotorReglasClinicas:
+    """
+    Evalúa las lecturas nuevas de indicadores contra las reglas clínicas y genera alertas
+    de tipo 'indicador', avisando además a los médicos activos del paciente.
+
+    Las reglas se compilan una vez en arreglos de NumPy por métrica (se recompilan al
+    cambiar o cada ttl_segundos) y cada lote de lecturas se evalúa con operaciones
+    vectorizadas. La evaluación corre en el relay de eventos (suscriptor 'reglas_clinicas'):
+    quien escribe la lectura solo publica un evento en su transacción y no espera.
+    """
+
+    def __init__(self, notificador, ttl_segundos: int = 60, enfriamiento_horas: int = 6,
+                 max_lote: int = 500):
+        self.notificador = notificador
+        self.ttl_segundos = ttl_segundos
+        # Una regla no vuelve a alertar al mismo paciente mientras su alerta siga pendiente
+        # dentro de este periodo
+        self.enfriamiento = timedelta(hours=enfriamiento_horas)
+        self.max_lote = max_lote
+        self._compiladas = None
+        self._compiladas_en = 0
+        self.evaluadas = 0
+        self.alertas_generadas = 0
+        self.errores = 0
+
+    def invalidar(self):
+        self._compiladas = None
+
+    def reglas(self) -> ReglasCompiladas:
+        compiladas = self._compiladas
+        if compiladas is None or time.monotonic() - self._compiladas_en > self.ttl_segundos:
+            compiladas = ReglasCompiladas(ReglasClinicasModel.get_activas())
+            self._compiladas, self._compiladas_en = compiladas, time.monotonic()
+        return compiladas
+
+    def evaluar(self, lecturas: list, lineas_base: dict = None) -> list:
+        """
+        Disparos (lectura, regla, valor observado) de un lote. lineas_base trae, por
+        (métrica, ventana_horas), el promedio previo de cada paciente para las tendencias.
+        """
+        compiladas = self.reglas()
+        lineas_base = lineas_base or {}
+        pacientes = np.array([lectura["id_paciente"] for lectura in lecturas])
+        disparos = []
+
+        for metrica, grupo in compiladas.umbrales.items():
+            valores = np.array([_a_float(lectura.get(metrica)) for lectura in lecturas])
+            for indice, regla in grupo.evaluar(pacientes, valores):
+                disparos.append((lecturas[indice], regla, valores[indice]))
+
+        for (metrica, ventana), grupo in compiladas.tendencias.items():
+            base = lineas_base.get((metrica, ventana), {})
+            valores = np.array([_a_float(lectura.get(metrica)) for lectura in lecturas])
+            promedios = np.array([base.get(lectura["id_paciente"], np.nan) for lectura in lecturas])
+            # Variación respecto al promedio de la ventana previa
+            for indice, regla in grupo.evaluar(pacientes, valores - promedios):
+                disparos.append((lecturas[indice], regla, valores[indice] - promedios[indice]))
+        return disparos
+
+    def procesar(self, lecturas: list) -> list:
+        """Evalúa un lote, guarda las alertas nuevas y avisa a los médicos"""
+        compiladas = self.reglas()
+        paciente_ids = sorted({lectura["id_paciente"] for lectura in lecturas})
+        ids_lote = [lectura["id_indicador"] for lectura in lecturas if lectura.get("id_indicador")]
+
+        lineas_base = {}
+        for metrica, ventana in compiladas.tendencias:
+            con_valor = sorted({l["id_paciente"] for l in lecturas if l.get(metrica) is not None})
+            lineas_base[(metrica, ventana)] = ReglasClinicasModel.get_promedios_previos(
+                con_valor, metrica, datetime.now() - timedelta(hours=ventana), ids_lote
+            )
+
+        disparos = self.evaluar(lecturas, lineas_base)
+        self.evaluadas += len(lecturas)
+        if not disparos:
+            return []
+
+        ya_disparadas = AlertasModel.get_disparadas_por_reglas(paciente_ids, datetime.now() - self.enfriamiento)
+        nuevas = {}
+        for lectura, regla, valor in disparos:
+            clave = (lectura["id_paciente"], regla["id_regla_clinica"])
+            # Una alerta por paciente y regla, con la lectura más reciente del lote
+            if clave in ya_disparadas or (clave in nuevas and nuevas[clave][0]["fecha_registro"] >= lectura["fecha_registro"]):
+                continue
+            nuevas[clave] = (lectura, regla, valor)
+        if not nuevas:
+            return []
+
+        alertas = AlertasModel.create_lote([
+            {
+                "id_paciente": lectura["id_paciente"],
+                "tipo_alerta": "indicador",
+                "descripcion": _describir(regla, valor),
+                "fecha_programada": lectura["fecha_registro"] or datetime.now(),
+                "id_regla_clinica": regla["id_regla_clinica"],
+            }
+            for lectura, regla, valor in nuevas.values()
+        ])
+        self.alertas_generadas += len(alertas)
+
+        medicos = PacienteMedicoModel.get_medicos_de_pacientes(sorted({a["id_paciente"] for a in alertas}))
+        for alerta in alertas:
+            for medico_id in medicos.get(alerta["id_paciente"], []):
+                try:
+                    self.notificador.enviar(alerta, destinatario=medico_id)
+                except Exception as e:
+                    print(f"❌ Error avisando al médico {medico_id}: {e}")
+        return alertas
+
+    def estadisticas(self) -> dict:
+        compiladas = self._compiladas
+        return {
+            "reglas_umbral": sum(len(g.reglas) for g in compiladas.umbrales.values()) if compiladas else None,
+            "reglas_tendencia": sum(len(g.reglas) for g in compiladas.tendencias.values()) if compiladas else None,
+            "evaluadas": self.evaluadas,
+            "alertas_generadas": self.alertas_generadas,
+            "errores": self.errores,
+        }
+
+def _a_float(valor) -> float:
+    return np.nan if valor is None else float(valor)
+
+def _describir(regla: dict, valor: float) -> str:
+    nombre = NOMBRES_METRICAS.get(regla["metrica"], regla["metrica"])
+    umbral = float(regla["valor"])
+    if regla["tipo"] == "tendencia":
+        return (f"{regla['descripcion']}: {nombre} varió {valor:+.1f} respecto al promedio de las "
+                f"últimas {regla['ventana_horas']} h (límite {regla['operador']} {umbral:g})")
+    return f"{regla['descripcion']}: {nombre} {valor:g} ({regla['operador']} {umbral:g})"
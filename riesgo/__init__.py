@@ -0,0 +1,11 @@
+from .puntuacion import puntuar, nivel_riesgo, contar_enfermedades
+from .calculo import calcular_lote, recalcular_todos, recalcular_pendientes
+
+__all__ = [
+    'puntuar',
+    'nivel_riesgo',
+    'contar_enfermedades',
+    'calcular_lote',
+    'recalcular_todos',
+    'recalcular_pendientes'
+]
@@ -0,0 +1,53 @@
+import os
+import time
+from models.paciente_model import PacienteModel
+from models.riesgo_model import RiesgoModel
+from jobs.fragmentos import ejecutar_por_fragmentos
+from .puntuacion import puntuar
+
+def calcular_lote(paciente_ids: list) -> int:
+    """Calcula y guarda el puntaje de un lote de pacientes"""
+    if not paciente_ids:
+        return 0
+    return RiesgoModel.guardar_lote(puntuar(paciente_ids, RiesgoModel.get_factores(paciente_ids)))
+
+def procesar_fragmento(fragmento: int, total_fragmentos: int, tamano_lote: int) -> int:
+    """Recalcula por lotes a todos los pacientes del fragmento; corre en un proceso del pool"""
+    procesados = 0
+    ultimo_id = 0
+    while True:
+        ids = PacienteModel.get_ids_fragmento(fragmento, total_fragmentos, ultimo_id, tamano_lote)
+        if not ids:
+            return procesados
+        ultimo_id = ids[-1]
+        procesados += calcular_lote(ids)
+
+def recalcular_todos(procesos: int = None, tamano_lote: int = 500) -> dict:
+    """
+    Recálculo completo, repartido por fragmentos de pacientes entre procesos. Las marcas de
+    la cola incremental anteriores al inicio quedan atendidas y se borran al terminar.
+    """
+    procesos = procesos or int(os.getenv("RIESGO_PROCESOS", "0")) or os.cpu_count() or 1
+    corte = RiesgoModel.get_ahora()
+    inicio = time.perf_counter()
+    pacientes = sum(ejecutar_por_fragmentos(procesar_fragmento, procesos, tamano_lote))
+    RiesgoModel.quitar_pendientes_hasta(corte)
+    segundos = time.perf_counter() - inicio
+    return {
+        "pacientes": pacientes,
+        "segundos": round(segundos, 2),
+        "pacientes_por_segundo": round(pacientes / segundos, 1) if segundos > 0 else 0.0,
+    }
+
+def recalcular_pendientes(tamano_lote: int = 500, max_lotes: int = 20) -> int:
+    """Recálculo incremental de los pacientes marcados con datos nuevos"""
+    procesados = 0
+    for _ in range(max_lotes):
+        marcas = RiesgoModel.get_pendientes(tamano_lote)
+        if not marcas:
+            break
+        procesados += calcular_lote([marca["id_paciente"] for marca in marcas])
+        RiesgoModel.quitar_pendientes(marcas)
+        if len(marcas) < tamano_lote:
+            break
+    return procesados
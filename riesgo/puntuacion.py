@@ -0,0 +1,100 @@
+import re
+import numpy as np
+
+# Puntos máximos de cada componente; el puntaje total va de 0 a 100
+MAX_SIGNOS = 40.0
+MAX_CRONICAS = 20.0
+MAX_ALERTAS = 20.0
+MAX_CITAS = 20.0
+
+PUNTOS_POR_ENFERMEDAD = 7.0
+MIN_ALERTAS = 3
+CV_GLUCOSA = 0.36
+NIVELES = [(60.0, "alto"), (30.0, "moderado"), (0.0, "bajo")]
+
+_SEPARADORES_ENFERMEDADES = re.compile(r"[,;\n/]|\by\b", re.IGNORECASE)
+_SIN_ENFERMEDADES = {"ninguna", "ninguno", "no", "n/a", "na", "sin enfermedades"}
+
+def contar_enfermedades(texto) -> int:
+    """Número de enfermedades crónicas en el texto libre del paciente"""
+    if not texto or texto.strip().lower() in _SIN_ENFERMEDADES:
+        return 0
+    return sum(1 for parte in _SEPARADORES_ENFERMEDADES.split(texto) if parte.strip())
+
+def nivel_riesgo(puntaje: float) -> str:
+    return next(nombre for minimo, nombre in NIVELES if puntaje >= minimo)
+
+def _escala(valores: np.ndarray, desde: float, hasta: float) -> np.ndarray:
+    """0 en 'desde', 1 en 'hasta', recortado; NaN cuenta como 0"""
+    return np.nan_to_num(np.clip((valores - desde) / (hasta - desde), 0.0, 1.0))
+
+def puntuar(paciente_ids: list, factores: dict) -> list:
+    """
+    Puntaje compuesto de un lote a partir de RiesgoModel.get_factores. Los factores se
+    cargan en arreglos alineados con paciente_ids y cada componente se calcula sin bucles.
+    """
+    ids = np.asarray(paciente_ids, dtype=np.int64)
+    n = len(ids)
+    fila_de = {paciente_id: i for i, paciente_id in enumerate(paciente_ids)}
+
+    def arreglo(filas, columna, filtro=None):
+        valores = np.zeros(n)
+        for fila in filas:
+            if filtro is None or filtro(fila):
+                valores[fila_de[fila["id_paciente"]]] = float(fila[columna] or 0)
+        return valores
+
+    promedios = {}
+    cv_glucosa = np.zeros(n)
+    for metrica in ["presion_sistolica", "glucosa", "frecuencia_cardiaca"]:
+        es_metrica = lambda fila, metrica=metrica: fila["metrica"] == metrica
+        cantidad = arreglo(factores["signos"], "cantidad", es_metrica)
+        suma = arreglo(factores["signos"], "suma", es_metrica)
+        promedios[metrica] = np.divide(suma, cantidad, out=np.full(n, np.nan), where=cantidad > 0)
+        if metrica == "glucosa":
+            suma_cuadrados = arreglo(factores["signos"], "suma_cuadrados", es_metrica)
+            media = np.nan_to_num(promedios[metrica])
+            varianza = np.maximum(
+                np.divide(suma_cuadrados, cantidad, out=np.zeros(n), where=cantidad > 0) - media ** 2, 0.0
+            )
+            cv_glucosa = np.divide(np.sqrt(varianza), media, out=np.zeros(n), where=media > 0)
+
+    frecuencia = promedios["frecuencia_cardiaca"]
+    signos = np.minimum(
+        15.0 * _escala(promedios["presion_sistolica"], 120.0, 160.0)
+        + 15.0 * _escala(promedios["glucosa"], 100.0, 200.0)
+        + 5.0 * (cv_glucosa >= CV_GLUCOSA)
+        + 5.0 * (np.nan_to_num(frecuencia, nan=75.0) > 100.0)
+        + 5.0 * (np.nan_to_num(frecuencia, nan=75.0) < 50.0),
+        MAX_SIGNOS
+    )
+
+    enfermedades = np.zeros(n)
+    for fila in factores["pacientes"]:
+        enfermedades[fila_de[fila["id_paciente"]]] = contar_enfermedades(fila["enfermedades_cronicas"])
+    cronicas = np.minimum(enfermedades * PUNTOS_POR_ENFERMEDAD, MAX_CRONICAS)
+
+    omitidas = arreglo(factores["alertas"], "omitidas")
+    total_alertas = arreglo(factores["alertas"], "total")
+    alertas = MAX_ALERTAS * np.divide(omitidas, total_alertas, out=np.zeros(n), where=total_alertas >= MIN_ALERTAS)
+
+    # Una cancelación pesa la mitad que una inasistencia
+    canceladas = arreglo(factores["citas"], "canceladas")
+    inasistencias = arreglo(factores["citas"], "inasistencias")
+    total_citas = arreglo(factores["citas"], "total")
+    citas = MAX_CITAS * np.divide(0.5 * canceladas + inasistencias, total_citas,
+                                  out=np.zeros(n), where=total_citas > 0)
+
+    total = np.round(signos + cronicas + alertas + citas, 2)
+    return [
+        {
+            "id_paciente": int(ids[i]),
+            "puntaje": float(total[i]),
+            "nivel": nivel_riesgo(total[i]),
+            "signos": round(float(signos[i]), 2),
+            "cronicas": round(float(cronicas[i]), 2),
+            "alertas": round(float(alertas[i]), 2),
+            "citas": round(float(citas[i]), 2),
+        }
+        for i in range(n)
+    ]
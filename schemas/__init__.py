@@ -1,36 +1,53 @@
 
 from .usuario_schema import Usuario, UsuarioCreate, UsuarioUpdate
-from .paciente_schema import Paciente, PacienteCreate, PacienteUpdate
-from .indicadores_salud_schema import IndicadoresSalud, IndicadoresSaludCreate, IndicadoresSaludUpdate
-from .alertas_schema import Alertas, AlertasCreate, AlertasUpdate
+from .paciente_schema import Paciente, PacienteCreate, PacienteUpdate, EventoTimeline, TimelinePaciente
+from .indicadores_salud_schema import (
+    IndicadoresSalud, IndicadoresSaludCreate, IndicadoresSaludUpdate, IndicadoresUltimos,
+    TendenciaIndicador
+)
+from .alertas_schema import Alertas, AlertasCreate, AlertasUpdate, Adherencia, AdherenciaVentana
+from .alertas_recurrentes_schema import (
+    AlertasRecurrentes, AlertasRecurrentesCreate, AlertasRecurrentesUpdate, OcurrenciaUpdate
+)
 from .recomendaciones_schema import Recomendaciones, RecomendacionesCreate, RecomendacionesUpdate
-from .retos_schema import Retos, RetosCreate, RetosUpdate
-from .citas_medicas_schema import CitasMedicas, CitasMedicasCreate, CitasMedicasUpdate
-from .reportes_medicos_schema import ReportesMedicos, ReportesMedicosCreate, ReportesMedicosUpdate
+from .retos_schema import (
+    Retos, RetosCreate, RetosUpdate, RetoDia, EntradaClasificacion, Clasificacion
+)
+from .citas_medicas_schema import (
+    CitasMedicas, CitasMedicasCreate, CitasMedicasUpdate, EspacioDisponible, DisponibilidadDia
+)
+from .reportes_medicos_schema import ReportesMedicos, ReportesMedicosCreate, ReportesMedicosUpdate, ReporteExportacion
 from .sesiones_wearable_schema import SesionesWearable, SesionesWearableCreate, SesionesWearableUpdate
 from .log_accesos_schema import LogAccesos, LogAccesosCreate, LogAccesosUpdate
 from .mensajes_schema import Mensaje, MensajeCreate, MensajeUpdate, MensajeConNombres, ConversacionResponse
 from .paciente_medico_schema import (
     PacienteMedico, PacienteMedicoCreate, PacienteMedicoUpdate,
-    PacienteMedicoConNombres, SolicitudPendiente, PacienteConInfo
+    PacienteMedicoConNombres, SolicitudPendiente, PacienteConInfo, PacienteResumen
 )
+from .reglas_clinicas_schema import ReglasClinicas, ReglasClinicasCreate, ReglasClinicasUpdate
+from .trabajos_schema import Trabajo, TrabajoCreate, ResumenCola
+from .sync_schema import CambiosSync
 from .medico_schema import Medico, MedicoCreate, MedicoUpdate, MedicoConUsuario, MedicoConPacientes
 
 __all__ = [
     'Usuario', 'UsuarioCreate', 'UsuarioUpdate',
-    'Paciente', 'PacienteCreate', 'PacienteUpdate',
-    'IndicadoresSalud', 'IndicadoresSaludCreate', 'IndicadoresSaludUpdate',
-    'Alertas', 'AlertasCreate', 'AlertasUpdate',
+    'Paciente', 'PacienteCreate', 'PacienteUpdate', 'EventoTimeline', 'TimelinePaciente',
+    'IndicadoresSalud', 'IndicadoresSaludCreate', 'IndicadoresSaludUpdate', 'IndicadoresUltimos', 'TendenciaIndicador',
+    'Alertas', 'AlertasCreate', 'AlertasUpdate', 'Adherencia', 'AdherenciaVentana',
+    'AlertasRecurrentes', 'AlertasRecurrentesCreate', 'AlertasRecurrentesUpdate', 'OcurrenciaUpdate',
     'Recomendaciones', 'RecomendacionesCreate', 'RecomendacionesUpdate',
-    'Retos', 'RetosCreate', 'RetosUpdate',
-    'CitasMedicas', 'CitasMedicasCreate', 'CitasMedicasUpdate',
-    'ReportesMedicos', 'ReportesMedicosCreate', 'ReportesMedicosUpdate',
+    'Retos', 'RetosCreate', 'RetosUpdate', 'RetoDia', 'EntradaClasificacion', 'Clasificacion',
+    'CitasMedicas', 'CitasMedicasCreate', 'CitasMedicasUpdate', 'EspacioDisponible', 'DisponibilidadDia',
+    'ReportesMedicos', 'ReportesMedicosCreate', 'ReportesMedicosUpdate', 'ReporteExportacion',
     'SesionesWearable', 'SesionesWearableCreate', 'SesionesWearableUpdate',
     'LogAccesos', 'LogAccesosCreate', 'LogAccesosUpdate',
     'Mensaje', 'MensajeCreate', 'MensajeUpdate', 'MensajeConNombres', 'ConversacionResponse',
     
     'PacienteMedico', 'PacienteMedicoCreate', 'PacienteMedicoUpdate',
-    'PacienteMedicoConNombres', 'SolicitudPendiente', 'PacienteConInfo',
-    'Medico', 'MedicoCreate', 'MedicoUpdate', 'MedicoConUsuario', 'MedicoConPacientes'
+    'PacienteMedicoConNombres', 'SolicitudPendiente', 'PacienteConInfo', 'PacienteResumen',
+    'Medico', 'MedicoCreate', 'MedicoUpdate', 'MedicoConUsuario', 'MedicoConPacientes',
+    'ReglasClinicas', 'ReglasClinicasCreate', 'ReglasClinicasUpdate',
+    'Trabajo', 'TrabajoCreate', 'ResumenCola',
+    'CambiosSync'
 
 ]
\ No newline at end of file
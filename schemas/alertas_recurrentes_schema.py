@@ -0,0 +1,40 @@
+
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class AlertasRecurrentesBase(BaseModel):
+    tipo_alerta: str
+    descripcion: str
+    inicio: datetime
+    # Regla estilo RRULE: FREQ (horaria/diaria/semanal) + INTERVAL + UNTIL/COUNT
+    frecuencia: str
+    intervalo: int = 1
+    fin: Optional[datetime] = None
+    repeticiones: Optional[int] = None
+
+class AlertasRecurrentesCreate(AlertasRecurrentesBase):
+    id_paciente: int
+
+class AlertasRecurrentesUpdate(BaseModel):
+    tipo_alerta: Optional[str] = None
+    descripcion: Optional[str] = None
+    inicio: Optional[datetime] = None
+    frecuencia: Optional[str] = None
+    intervalo: Optional[int] = None
+    fin: Optional[datetime] = None
+    repeticiones: Optional[int] = None
+    activa: Optional[bool] = None
+
+class AlertasRecurrentes(AlertasRecurrentesBase):
+    id_regla: int
+    id_paciente: int
+    activa: bool
+    fecha_creacion: datetime
+
+    class Config:
+        from_attributes = True
+
+class OcurrenciaUpdate(BaseModel):
+    fecha_ocurrencia: datetime
+    estatus: str
@@ -1,7 +1,7 @@
 
 from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Optional
 
 class AlertasBase(BaseModel):
     tipo_alerta: str
@@ -19,8 +19,27 @@ class AlertasUpdate(BaseModel):
     estatus: Optional[str] = None
 
 class Alertas(AlertasBase):
-    id_alerta: int
+    # Las ocurrencias de una alerta recurrente no tienen fila propia: id_alerta es None
+    # y se identifican por id_regla + fecha_programada
+    id_alerta: Optional[int] = None
     id_paciente: int
+    id_regla: Optional[int] = None
+    id_regla_clinica: Optional[int] = None
+    id_cita: Optional[int] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class AdherenciaVentana(BaseModel):
+    dias: int
+    completadas: int
+    omitidas: int
+    # completadas / (completadas + omitidas); None si no hubo dosis con estatus
+    tasa: Optional[float] = None
+
+class Adherencia(BaseModel):
+    id_paciente: int
+    ventanas: List[AdherenciaVentana]
+    racha_actual: int
+    racha_maxima: int
+    ultimo_registro: Optional[date] = None
\ No newline at end of file
@@ -1,10 +1,11 @@
 
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, Field
+from datetime import datetime, date
+from typing import Optional, List
 
 class CitasMedicasBase(BaseModel):
     fecha_cita: datetime
+    duracion_minutos: int = Field(30, ge=5, le=240)
     motivo: Optional[str] = None
     observaciones: Optional[str] = None
     estatus: str = "programada"
@@ -15,6 +16,7 @@ class CitasMedicasCreate(CitasMedicasBase):
 
 class CitasMedicasUpdate(BaseModel):
     fecha_cita: Optional[datetime] = None
+    duracion_minutos: Optional[int] = Field(None, ge=5, le=240)
     motivo: Optional[str] = None
     observaciones: Optional[str] = None
     estatus: Optional[str] = None
@@ -25,4 +27,12 @@ class CitasMedicas(CitasMedicasBase):
     id_medico: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class EspacioDisponible(BaseModel):
+    inicio: datetime
+    fin: datetime
+
+class DisponibilidadDia(BaseModel):
+    fecha: date
+    espacios: List[EspacioDisponible]
\ No newline at end of file
@@ -1,6 +1,6 @@
 
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional
 
 class IndicadoresSaludBase(BaseModel):
@@ -15,6 +15,8 @@ class IndicadoresSaludBase(BaseModel):
 
 class IndicadoresSaludCreate(IndicadoresSaludBase):
     id_paciente: int
+    # Momento de la medición según el dispositivo; por defecto, la hora de registro
+    fecha_registro: Optional[datetime] = None
 
 class IndicadoresSaludUpdate(BaseModel):
     presion_sistolica: Optional[int] = None
@@ -32,4 +34,27 @@ class IndicadoresSalud(IndicadoresSaludBase):
     fecha_registro: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class IndicadoresUltimos(BaseModel):
+    id_paciente: int
+    presion_sistolica: Optional[int] = None
+    presion_diastolica: Optional[int] = None
+    fecha_presion: Optional[datetime] = None
+    glucosa: Optional[float] = None
+    fecha_glucosa: Optional[datetime] = None
+    peso: Optional[float] = None
+    fecha_peso: Optional[datetime] = None
+    frecuencia_cardiaca: Optional[int] = None
+    fecha_frecuencia_cardiaca: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class TendenciaIndicador(BaseModel):
+    inicio: date
+    cantidad: int
+    minimo: float
+    maximo: float
+    promedio: float
+    desviacion: float
@@ -51,4 +51,23 @@ class PacienteConInfo(BaseModel):
     sexo: Optional[str] = None
     peso_actual: Optional[float] = None
     altura: Optional[float] = None
-    fecha_asignacion: datetime
\ No newline at end of file
+    fecha_asignacion: datetime
+    riesgo_puntaje: Optional[float] = None
+    riesgo_nivel: Optional[str] = None
+
+class PacienteResumen(PacienteConInfo):
+    presion_sistolica: Optional[int] = None
+    presion_diastolica: Optional[int] = None
+    fecha_presion: Optional[datetime] = None
+    glucosa: Optional[float] = None
+    fecha_glucosa: Optional[datetime] = None
+    peso: Optional[float] = None
+    fecha_peso: Optional[datetime] = None
+    frecuencia_cardiaca: Optional[int] = None
+    fecha_frecuencia_cardiaca: Optional[datetime] = None
+    alertas_pendientes: int = 0
+    proxima_cita: Optional[datetime] = None
+    adherencia_7: Optional[float] = None
+    adherencia_30: Optional[float] = None
+    adherencia_90: Optional[float] = None
+    racha_adherencia: int = 0
\ No newline at end of file
@@ -1,6 +1,7 @@
 # paciente_schema.py
 from pydantic import BaseModel
-from typing import Optional
+from datetime import datetime
+from typing import Optional, List
 
 class PacienteBase(BaseModel):
     edad: Optional[int] = None
@@ -29,3 +30,15 @@ class Paciente(PacienteBase):
 
     class Config:
         orm_mode = True
+
+class EventoTimeline(BaseModel):
+    tipo: str
+    id: int
+    fecha: datetime
+    datos: dict
+
+class TimelinePaciente(BaseModel):
+    id_paciente: int
+    eventos: List[EventoTimeline]
+    # Cursor para pedir la página siguiente en 'before'; None si no hay más eventos
+    siguiente: Optional[str] = None
@@ -1,6 +1,7 @@
 
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 class RecomendacionesBase(BaseModel):
     contenido: str
@@ -17,6 +18,7 @@ class Recomendaciones(RecomendacionesBase):
     id_recomendacion: int
     id_paciente: int
     fecha_generacion: datetime
+    clave: Optional[str] = None
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -0,0 +1,35 @@
+
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class ReglasClinicasBase(BaseModel):
+    metrica: str
+    tipo: str = "umbral"
+    operador: str
+    valor: float
+    # Solo para tendencias: se compara la lectura con el promedio de estas horas previas
+    ventana_horas: Optional[int] = None
+    severidad: str = "advertencia"
+    descripcion: str
+
+class ReglasClinicasCreate(ReglasClinicasBase):
+    # Sin paciente, la regla es global
+    id_paciente: Optional[int] = None
+
+class ReglasClinicasUpdate(BaseModel):
+    operador: Optional[str] = None
+    valor: Optional[float] = None
+    ventana_horas: Optional[int] = None
+    severidad: Optional[str] = None
+    descripcion: Optional[str] = None
+    activa: Optional[bool] = None
+
+class ReglasClinicas(ReglasClinicasBase):
+    id_regla_clinica: int
+    id_paciente: Optional[int] = None
+    activa: bool
+    fecha_creacion: datetime
+
+    class Config:
+        from_attributes = True
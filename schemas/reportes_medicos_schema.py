@@ -1,7 +1,7 @@
 
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Literal
 
 class ReportesMedicosBase(BaseModel):
     descripcion_general: Optional[str] = None
@@ -23,5 +23,23 @@ class ReportesMedicos(ReportesMedicosBase):
     id_medico: int
     fecha_reporte: datetime
 
+    class Config:
+        from_attributes = True
+
+class ReporteExportacion(BaseModel):
+    id_exportacion: int
+    id_paciente: int
+    solicitado_por: int
+    estado: Literal["pendiente", "procesando", "listo", "error"]
+    hash_contenido: Optional[str] = None
+    tamano: Optional[int] = None
+    desde_cache: bool = False
+    intentos: int = 0
+    error: Optional[str] = None
+    fecha_solicitud: datetime
+    fecha_inicio: Optional[datetime] = None
+    fecha_fin: Optional[datetime] = None
+    url_descarga: Optional[str] = None
+
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -1,7 +1,7 @@
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date
-from typing import Optional
+from typing import Optional, List
 
 class RetosBase(BaseModel):
     titulo: str
@@ -10,6 +10,12 @@ class RetosBase(BaseModel):
     recompensa: Optional[str] = None
     fecha_inicio: Optional[date] = None
     fecha_fin: Optional[date] = None
+    # Retos automáticos: métrica de indicadores o de actividad del wearable y meta por día
+    metrica: Optional[str] = None
+    meta_diaria: Optional[float] = Field(None, gt=0)
+    dias_objetivo: Optional[int] = Field(None, ge=1)
+    # Agrupa retos equivalentes de distintos pacientes en una misma clasificación
+    plantilla: Optional[str] = Field(None, max_length=100)
 
 class RetosCreate(RetosBase):
     id_paciente: int
@@ -21,10 +27,31 @@ class RetosUpdate(BaseModel):
     recompensa: Optional[str] = None
     fecha_inicio: Optional[date] = None
     fecha_fin: Optional[date] = None
+    meta_diaria: Optional[float] = Field(None, gt=0)
+    dias_objetivo: Optional[int] = Field(None, ge=1)
+    plantilla: Optional[str] = Field(None, max_length=100)
 
 class Retos(RetosBase):
     id_reto: int
     id_paciente: int
+    dias_cumplidos: int = 0
+    estado: str = "activo"
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class RetoDia(BaseModel):
+    fecha: date
+    valor: float
+    cumplido: bool
+
+class EntradaClasificacion(BaseModel):
+    posicion: int
+    id_paciente: int
+    nombre: Optional[str] = None
+    puntaje: float
+
+class Clasificacion(BaseModel):
+    total: int
+    entradas: List[EntradaClasificacion]
+    posicion_propia: Optional[EntradaClasificacion] = None
\ No newline at end of file
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import Dict, List
+
+class CambiosSync(BaseModel):
+    # Filas nuevas o modificadas, completas y agrupadas por tabla
+    cambios: Dict[str, List[dict]]
+    # Ids borrados, agrupados por tabla
+    eliminados: Dict[str, List[int]]
+    # Se manda en 'since' en el próximo pedido
+    token: str
+    # Quedan cambios pendientes: pedir de nuevo con el token antes de dar la sync por terminada
+    mas: bool
+    # El token venció: la respuesta es una sincronización completa y la app debe descartar su copia
+    reiniciar: bool = False
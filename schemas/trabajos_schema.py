@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, Literal
+
+class TrabajoCreate(BaseModel):
+    tipo: str
+    carga: dict = {}
+    # Sin estos campos se usan los valores por defecto del tipo de trabajo
+    prioridad: Optional[int] = None
+    retraso_segundos: float = Field(0, ge=0)
+    ejecutar_en: Optional[datetime] = None
+
+class Trabajo(BaseModel):
+    id_trabajo: int
+    cola: str
+    tipo: str
+    carga: dict
+    prioridad: int
+    estado: Literal["pendiente", "procesando", "completado", "fallido"]
+    ejecutar_en: datetime
+    intentos: int
+    max_intentos: int
+    visibilidad_segundos: int
+    visible_hasta: Optional[datetime] = None
+    propietario: Optional[str] = None
+    ultimo_error: Optional[str] = None
+    fecha_creacion: datetime
+    fecha_inicio: Optional[datetime] = None
+    fecha_fin: Optional[datetime] = None
+    # Solo las tareas programadas: una por tramo de tiempo
+    clave: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class ResumenCola(BaseModel):
+    cola: str
+    estado: str
+    cantidad: int
+    proximo: Optional[datetime] = None
@@ -0,0 +1,155 @@
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# Fechas como texto de ancho fijo: se comparan bien como cadenas dentro de SQLite
+FORMATO = "%Y-%m-%d %H:%M:%S.%f"
+UNIDADES = {"MICROSECOND": "microseconds", "SECOND": "seconds", "DAY": "days"}
+
+ES_FECHA = re.compile(r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{6}$")
+
+sqlite3.register_converter("FECHA", lambda valor: datetime.fromisoformat(valor.decode()))
+
+def _valor(valor):
+    # Como pymysql, las expresiones de fecha (NOW() - INTERVAL ...) vuelven como datetime
+    return datetime.fromisoformat(valor) if isinstance(valor, str) and ES_FECHA.match(valor) else valor
+
+def traducir(sql: str) -> str:
+    """Dialecto MySQL de los modelos -> SQLite"""
+    sql = re.sub(
+        r"NOW\(6?\)\s*([+-])\s*INTERVAL\s+(%s|\w+)\s+(MICROSECOND|SECOND|DAY)",
+        r"INTERVALO(NOW(), '\1', \2, '\3')", sql
+    )
+    sql = sql.replace("NOW(6)", "NOW()")
+    sql = re.sub(r"\bIF\(", "IIF(", sql)
+    sql = sql.replace("FOR UPDATE SKIP LOCKED", "").replace("INSERT IGNORE", "INSERT OR IGNORE")
+    sql = re.sub(r"ON DUPLICATE KEY UPDATE (\w+) = \1\b", "ON CONFLICT DO NOTHING", sql)
+    sql = sql.replace("%s", "?")
+    # SQLite no admite ORDER BY / LIMIT en UPDATE y DELETE: se limita por rowid
+    limitado = re.match(
+        r"\s*(UPDATE\s+(\w+)\s+SET\s+.*?|DELETE\s+FROM\s+(\w+)\s+)WHERE\s+(.*?)\s*(ORDER BY\s+.*?\s*)?LIMIT\s+(\?|\d+)\s*$",
+        sql, re.S
+    )
+    if limitado:
+        inicio, tabla_update, tabla_delete, condicion, orden, limite = limitado.groups()
+        sql = (f"{inicio}WHERE rowid IN (SELECT rowid FROM {tabla_update or tabla_delete} "
+               f"WHERE {condicion} {orden or ''}LIMIT {limite})")
+    return sql
+
+def _parametro(valor):
+    return valor.strftime(FORMATO) if isinstance(valor, datetime) else valor
+
+class BaseDatosSQLite:
+    """
+    Sustituto de MySQL para las pruebas: una BD SQLite en memoria con un reloj que se
+    controla desde la prueba (NOW() devuelve self.ahora) y una conexión con la interfaz
+    de pymysql que usan los modelos (cursor de diccionarios, begin/commit/rollback).
+
+    Las transacciones se serializan con un lock: alcanza para que SELECT ... FOR UPDATE
+    SKIP LOCKED no entregue la misma fila dos veces, pero no prueba el salto de filas
+    bloqueadas de MySQL (eso lo mide jobs/benchmark_trabajos.py contra la BD real).
+    """
+
+    def __init__(self, esquema: str, ahora: datetime = datetime(2026, 1, 1, 12, 0)):
+        self.ahora = ahora
+        self.lock = threading.RLock()
+        self.sqlite = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None,
+                                      detect_types=sqlite3.PARSE_DECLTYPES)
+        self.sqlite.row_factory = lambda cursor, fila: {
+            columna[0]: _valor(valor) for columna, valor in zip(cursor.description, fila)
+        }
+        self.sqlite.create_function("NOW", -1, lambda *_: self.ahora.strftime(FORMATO))
+        self.sqlite.create_function("INTERVALO", 4, self._intervalo)
+        self.sqlite.executescript(esquema)
+
+    def _intervalo(self, fecha: str, signo: str, cantidad, unidad: str) -> str:
+        delta = timedelta(**{UNIDADES[unidad]: float(cantidad)})
+        fecha = datetime.fromisoformat(fecha)
+        return (fecha + delta if signo == "+" else fecha - delta).strftime(FORMATO)
+
+    def avanzar(self, **delta):
+        self.ahora += timedelta(**delta)
+
+    def conectar(self):
+        return ConexionSQLite(self)
+
+    def filas(self, sql: str, parametros=()) -> list:
+        with self.lock:
+            return self.sqlite.execute(sql, parametros).fetchall()
+
+class CursorSQLite:
+    def __init__(self, conexion):
+        self.conexion = conexion
+        self.rowcount = -1
+        self.lastrowid = None
+        self._filas = []
+
+    def execute(self, sql: str, parametros=None):
+        bd = self.conexion.bd
+        if sql.lstrip().upper().startswith("START TRANSACTION"):
+            self.conexion.begin()
+            return 0
+        insercion = re.match(r"\s*INSERT\s+(?:IGNORE\s+)?INTO\s+(\w+)", sql, re.I)
+        with bd.lock:
+            if insercion:
+                anterior = bd.sqlite.execute(f"SELECT MAX(rowid) AS id FROM {insercion.group(1)}").fetchone()["id"]
+            cursor = bd.sqlite.execute(traducir(sql), [_parametro(valor) for valor in parametros or []])
+            self._filas = cursor.fetchall() if cursor.description else []
+            self.rowcount = cursor.rowcount
+            self.lastrowid = cursor.lastrowid
+            # MySQL devuelve el primer id de un INSERT multi-fila; SQLite, el último. No se
+            # resta rowcount: las filas saltadas por clave repetida también gastan ids
+            if insercion and self.rowcount > 1:
+                self.lastrowid = bd.sqlite.execute(
+                    f"SELECT MIN(rowid) AS id FROM {insercion.group(1)} WHERE rowid > ?", (anterior or 0,)
+                ).fetchone()["id"]
+        return self.rowcount
+
+    def executemany(self, sql: str, filas):
+        total = 0
+        for parametros in filas:
+            total += max(self.execute(sql, parametros), 0)
+        self.rowcount = total
+        return total
+
+    def fetchone(self):
+        return self._filas.pop(0) if self._filas else None
+
+    def fetchall(self):
+        filas, self._filas = self._filas, []
+        return filas
+
+    def close(self):
+        pass
+
+class ConexionSQLite:
+    def __init__(self, bd: BaseDatosSQLite):
+        self.bd = bd
+        self.open = True
+        self._en_transaccion = False
+
+    def cursor(self, *_):
+        return CursorSQLite(self)
+
+    def begin(self):
+        self.bd.lock.acquire()
+        self.bd.sqlite.execute("BEGIN")
+        self._en_transaccion = True
+
+    def _terminar(self, sentencia: str):
+        if self._en_transaccion:
+            self._en_transaccion = False
+            self.bd.sqlite.execute(sentencia)
+            self.bd.lock.release()
+
+    def commit(self):
+        self._terminar("COMMIT")
+
+    def rollback(self):
+        self._terminar("ROLLBACK")
+
+    def close(self):
+        # Como MySQL: cerrar sin commit descarta la transacción
+        self.rollback()
+        self.open = False
@@ -0,0 +1,12 @@
+import pytest
+from database import db
+from bd_sqlite import BaseDatosSQLite
+
+@pytest.fixture
+def crear_bd(monkeypatch):
+    """Crea una BaseDatosSQLite con el esquema dado y la usa como db.get_connection"""
+    def crear(esquema: str) -> BaseDatosSQLite:
+        bd = BaseDatosSQLite(esquema)
+        monkeypatch.setattr(db, "get_connection", bd.conectar)
+        return bd
+    return crear
@@ -0,0 +1,99 @@
+from datetime import date, datetime
+import pytest
+from models.adherencia_model import AdherenciaModel, calcular_adherencia, TIPO_MEDICACION
+
+HOY = date(2026, 3, 31)
+
+def _dia(dia: int, completadas: int = 1, omitidas: int = 0, mes: int = 3):
+    return {"fecha": date(2026, mes, dia), "completadas": completadas, "omitidas": omitidas}
+
+# ---- calcular_adherencia ----
+
+def test_ventanas_cuentan_solo_sus_dias():
+    dias = [_dia(31, 2, 0), _dia(25, 1, 1), _dia(24, 0, 1), _dia(2, 3, 1), _dia(1, 1, 0, mes=1)]
+    ventanas = {ventana["dias"]: ventana for ventana in calcular_adherencia(dias, HOY)["ventanas"]}
+    # 7 días: del 25 al 31 inclusive
+    assert (ventanas[7]["completadas"], ventanas[7]["omitidas"], ventanas[7]["tasa"]) == (3, 1, 0.75)
+    # 30 días: del 2 al 31
+    assert (ventanas[30]["completadas"], ventanas[30]["omitidas"]) == (6, 3)
+    assert ventanas[30]["tasa"] == round(6 / 9, 4)
+    assert (ventanas[90]["completadas"], ventanas[90]["omitidas"]) == (7, 3)
+
+def test_ventana_sin_dosis_no_tiene_tasa():
+    resultado = calcular_adherencia([_dia(1, mes=1)], HOY, ventanas=[7])
+    assert resultado["ventanas"] == [{"dias": 7, "completadas": 0, "omitidas": 0, "tasa": None}]
+
+def test_los_dias_futuros_no_cuentan():
+    resultado = calcular_adherencia([_dia(31), {**_dia(1), "fecha": date(2026, 4, 1)}], HOY, ventanas=[7])
+    assert resultado["ventanas"][0]["completadas"] == 1
+
+@pytest.mark.parametrize("dias, actual, maxima", [
+    ([], 0, 0),
+    ([_dia(1), _dia(2), _dia(3)], 3, 3),
+    # Los días sin dosis (sin fila o con fila en cero) no cortan la racha
+    ([_dia(1), _dia(5), _dia(6, 0, 0), _dia(20)], 3, 3),
+    # Una omisión la corta, aunque ese día también haya completadas
+    ([_dia(1), _dia(2), _dia(3, 1, 1), _dia(4)], 1, 2),
+    ([_dia(1), _dia(2, 0, 1)], 0, 1),
+    # El orden de entrada no importa
+    ([_dia(4), _dia(1, 0, 1), _dia(3), _dia(2)], 3, 3),
+])
+def test_rachas(dias, actual, maxima):
+    resultado = calcular_adherencia(dias, HOY)
+    assert (resultado["racha_actual"], resultado["racha_maxima"]) == (actual, maxima)
+
+def test_ultimo_registro_ignora_dias_sin_dosis():
+    assert calcular_adherencia([_dia(10), _dia(12, 0, 0)], HOY)["ultimo_registro"] == date(2026, 3, 10)
+    assert calcular_adherencia([], HOY)["ultimo_registro"] is None
+
+# ---- aplicar_cambios ----
+
+class _Cursor:
+    def __init__(self):
+        self.consultas = []
+
+    def execute(self, consulta, parametros=None):
+        self.consultas.append((consulta, parametros))
+
+def _deltas(cambios) -> dict:
+    cursor = _Cursor()
+    AdherenciaModel.aplicar_cambios(cursor, cambios)
+    if not cursor.consultas:
+        return {}
+    (_, valores), = cursor.consultas
+    return {(paciente, fecha): (completadas, omitidas)
+            for paciente, fecha, completadas, omitidas in zip(*[iter(valores)] * 4)}
+
+def _alerta(estatus="pendiente", tipo=TIPO_MEDICACION, fecha=datetime(2026, 3, 10, 8), paciente=5):
+    return {"id_paciente": paciente, "tipo_alerta": tipo, "fecha_programada": fecha, "estatus": estatus}
+
+DIA = (5, date(2026, 3, 10))
+
+@pytest.mark.parametrize("anterior, nuevo, deltas", [
+    (_alerta(), _alerta("completada"), {DIA: (1, 0)}),
+    (_alerta("completada"), _alerta("omitida"), {DIA: (-1, 1)}),
+    (_alerta("omitida"), _alerta("completada"), {DIA: (1, -1)}),
+    (_alerta("completada"), _alerta("pendiente"), {DIA: (-1, 0)}),
+    (None, _alerta("omitida"), {DIA: (0, 1)}),
+    (_alerta("completada"), None, {DIA: (-1, 0)}),
+    # Cambiar el tipo hacia o desde medicación suma o resta la dosis
+    (_alerta("completada", tipo="cita"), _alerta("completada"), {DIA: (1, 0)}),
+    (_alerta("omitida"), _alerta("omitida", tipo="cita"), {DIA: (0, -1)}),
+    # Mover la fecha pasa la dosis de un día a otro
+    (_alerta("completada"), _alerta("completada", fecha=date(2026, 3, 11)),
+     {DIA: (-1, 0), (5, date(2026, 3, 11)): (1, 0)}),
+    # Sin cambio que cuente, no hay consulta
+    (_alerta(), _alerta(fecha=datetime(2026, 3, 12)), {}),
+    (_alerta("completada", tipo="cita"), _alerta("omitida", tipo="cita"), {}),
+    (_alerta("completada"), _alerta("completada"), {}),
+])
+def test_aplicar_cambios(anterior, nuevo, deltas):
+    assert _deltas([(anterior, nuevo)]) == deltas
+
+def test_aplicar_cambios_junta_el_lote_en_un_insert():
+    cambios = [
+        (_alerta(), _alerta("completada")),
+        (_alerta(), _alerta("omitida")),
+        (None, _alerta("completada", paciente=6)),
+    ]
+    assert _deltas(cambios) == {DIA: (1, 1), (6, date(2026, 3, 10)): (1, 0)}
@@ -0,0 +1,102 @@
+from datetime import date, datetime
+import pytest
+from agenda import parsear_horario, restar_intervalos, calcular_disponibilidad
+
+def _h(hora: int, minutos: int = 0) -> int:
+    return hora * 60 + minutos
+
+# ---- parsear_horario ----
+
+def test_texto_libre_con_rangos_de_dias_y_bloques():
+    horario = parsear_horario("Lunes a Viernes 9:00-14:00 y 16:00-19:00; Sábado 9 a 13")
+    assert sorted(horario) == [0, 1, 2, 3, 4, 5]
+    assert horario[2] == [(_h(9), _h(14)), (_h(16), _h(19))]
+    assert horario[5] == [(_h(9), _h(13))]
+
+def test_rango_de_dias_que_da_la_vuelta_y_dias_sueltos():
+    assert sorted(parsear_horario("viernes a lunes 10-12")) == [0, 4, 5, 6]
+    assert sorted(parsear_horario("Lun, Mié. y Vie 8:30-12")) == [0, 2, 4]
+
+def test_segmento_sin_dias_hereda_los_anteriores():
+    horario = parsear_horario("martes 9-11\n15:00-17:00")
+    assert horario == {1: [(_h(9), _h(11)), (_h(15), _h(17))]}
+
+def test_am_pm():
+    assert parsear_horario("jueves 1-5pm") == {3: [(_h(13), _h(17))]}
+    assert parsear_horario("jueves 9am-1pm") == {3: [(_h(9), _h(13))]}
+    assert parsear_horario("jueves 12am-6am") == {3: [(0, _h(6))]}
+
+def test_bloques_que_se_traslapan_se_unen():
+    assert parsear_horario("lunes 9-12 y 11-14") == {0: [(_h(9), _h(14))]}
+
+def test_json():
+    horario = parsear_horario('{"Miércoles": [["09:00", "12:30"], ["15:00", "18:00"]]}')
+    assert horario == {2: [(_h(9), _h(12, 30)), (_h(15), _h(18))]}
+
+@pytest.mark.parametrize("texto", [None, "", "   ", "consultar por teléfono"])
+def test_sin_horario(texto):
+    assert parsear_horario(texto) == {}
+
+@pytest.mark.parametrize("texto", [
+    "9:00-14:00",
+    "L-V 9-17",
+    "de 8 a 12; lunes 14-18",
+])
+def test_horas_sin_dias_es_error(texto):
+    with pytest.raises(ValueError, match="no días"):
+        parsear_horario(texto)
+
+@pytest.mark.parametrize("texto", [
+    "lunes 14-9",
+    "lunes 9-25",
+    '{"feriado": [["09:00", "12:00"]]}',
+    '{"lunes": "todo el día"}',
+])
+def test_horario_invalido(texto):
+    with pytest.raises(ValueError, match="Horario de consultorio no válido|Día no reconocido"):
+        parsear_horario(texto)
+
+# ---- restar_intervalos ----
+
+def test_restar_intervalos():
+    assert restar_intervalos([(0, 100)], []) == [(0, 100)]
+    assert restar_intervalos([(0, 100)], [(10, 20), (50, 60)]) == [(0, 10), (20, 50), (60, 100)]
+    # Ocupados que tocan o desbordan los bordes
+    assert restar_intervalos([(0, 100)], [(-10, 0), (90, 120)]) == [(0, 90)]
+    assert restar_intervalos([(0, 100)], [(0, 100)]) == []
+    # Un ocupado que cruza dos intervalos
+    assert restar_intervalos([(0, 10), (20, 30)], [(5, 25)]) == [(0, 5), (25, 30)]
+
+def test_restar_intervalos_desde_primero():
+    ocupados = [(0, 5), (10, 20)]
+    # Saltar los ya descartados no cambia el resultado
+    assert restar_intervalos([(8, 30)], ocupados, primero=1) == restar_intervalos([(8, 30)], ocupados)
+
+# ---- calcular_disponibilidad ----
+
+LUNES = date(2026, 3, 9)
+
+def _inicios(dias: list) -> list:
+    return [espacio["inicio"].strftime("%d %H:%M") for dia in dias for espacio in dia["espacios"]]
+
+def test_espacios_alineados_al_bloque_alrededor_de_las_citas():
+    horario = {0: [(_h(9), _h(11))]}
+    ocupados = [(datetime(2026, 3, 9, 9, 40), datetime(2026, 3, 9, 10, 0))]
+    dias = calcular_disponibilidad(horario, ocupados, LUNES, LUNES, 30)
+    # 9:30 choca con la cita; 10:00 es el siguiente punto de la rejilla
+    assert _inicios(dias) == ["09 09:00", "09 10:00", "09 10:30"]
+    assert dias[0]["espacios"][0]["fin"] == datetime(2026, 3, 9, 9, 30)
+
+def test_solo_dias_con_horario_y_espacios_libres():
+    horario = {0: [(_h(9), _h(10))], 1: [(_h(9), _h(10))]}
+    ocupados = [(datetime(2026, 3, 10, 8, 0), datetime(2026, 3, 10, 12, 0))]
+    dias = calcular_disponibilidad(horario, ocupados, LUNES, date(2026, 3, 15), 60)
+    assert [dia["fecha"] for dia in dias] == [LUNES]
+
+def test_no_ofrece_espacios_en_el_pasado():
+    horario = {0: [(_h(9), _h(12))]}
+    dias = calcular_disponibilidad(horario, [], LUNES, LUNES, 60, ahora=datetime(2026, 3, 9, 9, 30))
+    assert _inicios(dias) == ["09 10:00", "09 11:00"]
+
+def test_bloque_mas_corto_que_la_duracion():
+    assert calcular_disponibilidad({0: [(_h(9), _h(9, 20))]}, [], LUNES, LUNES, 30) == []
@@ -0,0 +1,51 @@
+import json
+from datetime import datetime
+import pytest
+from models.alertas_model import AlertasModel
+
+ESQUEMA = """
+CREATE TABLE alertas (
+    id_alerta INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_paciente INTEGER NOT NULL,
+    tipo_alerta TEXT NOT NULL,
+    descripcion TEXT,
+    fecha_programada FECHA NOT NULL,
+    estatus TEXT NOT NULL DEFAULT 'pendiente',
+    id_regla_clinica INTEGER,
+    id_cita INTEGER UNIQUE
+);
+CREATE TABLE eventos_outbox (
+    id_evento INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo TEXT NOT NULL,
+    id_paciente INTEGER,
+    carga TEXT NOT NULL,
+    fecha_creacion FECHA
+);
+"""
+
+@pytest.fixture
+def bd(crear_bd):
+    return crear_bd(ESQUEMA)
+
+def _recordatorio(cita_id: int) -> dict:
+    return {"id_paciente": 1, "tipo_alerta": "cita", "descripcion": f"Cita {cita_id}",
+            "fecha_programada": datetime(2026, 3, 10, 9, 0), "id_cita": cita_id}
+
+def _avisados(bd) -> list:
+    return [json.loads(fila["carga"])["ids"] for fila in bd.filas("SELECT carga FROM eventos_outbox")]
+
+def test_recordatorios_saltan_las_citas_que_ya_tienen_uno(bd):
+    previa = AlertasModel.create_recordatorios_citas([_recordatorio(20)])[0]["id_alerta"]
+
+    creadas = AlertasModel.create_recordatorios_citas([_recordatorio(cita) for cita in (10, 20, 30)])
+    assert [alerta["id_cita"] for alerta in creadas] == [10, 30]
+    guardadas = {fila["id_cita"]: fila["id_alerta"] for fila in bd.filas("SELECT * FROM alertas")}
+    assert {alerta["id_cita"]: alerta["id_alerta"] for alerta in creadas} == {10: guardadas[10], 30: guardadas[30]}
+    assert guardadas[20] == previa and all(alerta["estatus"] == "pendiente" for alerta in creadas)
+    # Solo las creadas se avisan al planificador
+    assert _avisados(bd) == [[previa], [guardadas[10], guardadas[30]]]
+
+def test_lote_de_recordatorios_ya_creados(bd):
+    AlertasModel.create_recordatorios_citas([_recordatorio(10), _recordatorio(20)])
+    assert AlertasModel.create_recordatorios_citas([_recordatorio(20), _recordatorio(10)]) == []
+    assert len(bd.filas("SELECT * FROM alertas")) == 2 and len(_avisados(bd)) == 1
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from models.alertas_recurrentes_model import generar_ocurrencias, _ultima_ocurrencia
+
+def _regla(**campos):
+    regla = {
+        "frecuencia": "horaria",
+        "intervalo": 8,
+        "inicio": datetime(2026, 1, 1, 8, 0),
+        "fin": None,
+        "repeticiones": None,
+    }
+    regla.update(campos)
+    return regla
+
+def test_ventana_acotada():
+    fechas = list(generar_ocurrencias(_regla(), datetime(2026, 1, 1), datetime(2026, 1, 2, 8, 0)))
+    assert fechas == [datetime(2026, 1, 1, 8), datetime(2026, 1, 1, 16), datetime(2026, 1, 2, 0)]
+
+def test_empieza_en_la_primera_ocurrencia_desde():
+    # 'desde' entre dos ocurrencias, y 'desde' justo en una (incluida)
+    regla = _regla(frecuencia="diaria", intervalo=1)
+    assert next(generar_ocurrencias(regla, datetime(2026, 3, 10, 9, 0))) == datetime(2026, 3, 11, 8, 0)
+    assert next(generar_ocurrencias(regla, datetime(2026, 3, 10, 8, 0))) == datetime(2026, 3, 10, 8, 0)
+
+def test_desde_anterior_al_inicio():
+    regla = _regla(frecuencia="semanal", intervalo=2)
+    fechas = list(generar_ocurrencias(regla, datetime(2025, 1, 1), datetime(2026, 1, 20)))
+    assert fechas == [datetime(2026, 1, 1, 8), datetime(2026, 1, 15, 8)]
+
+def test_hasta_es_exclusivo():
+    fechas = list(generar_ocurrencias(_regla(), datetime(2026, 1, 1), datetime(2026, 1, 1, 16, 0)))
+    assert fechas == [datetime(2026, 1, 1, 8)]
+
+def test_repeticiones():
+    regla = _regla(repeticiones=3)
+    assert list(generar_ocurrencias(regla, datetime(2026, 1, 1))) == [
+        datetime(2026, 1, 1, 8), datetime(2026, 1, 1, 16), datetime(2026, 1, 2, 0)
+    ]
+    # Con la ventana después de la última repetición no queda nada
+    assert list(generar_ocurrencias(regla, datetime(2026, 1, 2, 1))) == []
+
+def test_fin_inclusivo():
+    regla = _regla(fin=datetime(2026, 1, 1, 16, 0))
+    assert list(generar_ocurrencias(regla, datetime(2026, 1, 1))) == [
+        datetime(2026, 1, 1, 8), datetime(2026, 1, 1, 16)
+    ]
+
+def test_ventana_lejana_no_recorre_las_anteriores():
+    regla = _regla(frecuencia="horaria", intervalo=1)
+    desde = regla["inicio"] + timedelta(hours=10 ** 6, minutes=30)
+    assert next(generar_ocurrencias(regla, desde)) == regla["inicio"] + timedelta(hours=10 ** 6 + 1)
+
+def test_ultima_ocurrencia():
+    assert _ultima_ocurrencia(_regla()) is None
+    assert _ultima_ocurrencia(_regla(repeticiones=3)) == datetime(2026, 1, 2, 0)
+    assert _ultima_ocurrencia(_regla(repeticiones=3, fin=datetime(2026, 1, 1, 20))) == datetime(2026, 1, 1, 20)
@@ -0,0 +1,129 @@
+import threading
+import pytest
+from cache import backends
+from cache.backends import BackendMemoriaLRU, BackendCompartido, ClienteCompartidoLocal
+from cache.etiquetas import CacheEtiquetada
+
+@pytest.fixture(params=["memoria", "compartido"])
+def cache(request):
+    if request.param == "memoria":
+        return CacheEtiquetada(BackendMemoriaLRU(100), ttl_por_defecto=60)
+    return CacheEtiquetada(BackendCompartido(ClienteCompartidoLocal()), ttl_por_defecto=60)
+
+@pytest.fixture
+def reloj(monkeypatch):
+    ahora = [1000.0]
+    monkeypatch.setattr(backends.time, "monotonic", lambda: ahora[0])
+    return ahora
+
+def test_invalidar_etiqueta_recalcula_solo_sus_entradas(cache):
+    llamadas = []
+
+    @cache.cacheado("paciente", lambda paciente_id: [f"paciente:{paciente_id}"])
+    def get_paciente(paciente_id):
+        llamadas.append(paciente_id)
+        return {"id_paciente": paciente_id}
+
+    get_paciente(1), get_paciente(1), get_paciente(2)
+    assert llamadas == [1, 2]
+    cache.invalidar("paciente:1")
+    get_paciente(1), get_paciente(2)
+    assert llamadas == [1, 2, 1]
+
+def test_expira_por_ttl(cache, reloj):
+    llamadas = []
+
+    @cache.cacheado("medicos", lambda: ["medicos"], ttl=10)
+    def get_medicos():
+        llamadas.append(1)
+        return [{"id_medico": 1}]
+
+    get_medicos()
+    reloj[0] += 9
+    get_medicos()
+    assert len(llamadas) == 1
+    reloj[0] += 2
+    get_medicos()
+    assert len(llamadas) == 2
+
+def test_no_guarda_none(cache):
+    llamadas = []
+
+    @cache.cacheado("usuario", lambda usuario_id: [f"usuario:{usuario_id}"])
+    def get_usuario(usuario_id):
+        llamadas.append(usuario_id)
+        return None
+
+    assert get_usuario(1) is None and get_usuario(1) is None
+    assert llamadas == [1, 1]
+
+def test_modificar_el_resultado_no_toca_la_cache(cache):
+    @cache.cacheado("paciente", lambda paciente_id: [f"paciente:{paciente_id}"])
+    def get_paciente(paciente_id):
+        return {"id_paciente": paciente_id, "alergias": ["penicilina"]}
+
+    get_paciente(1)["alergias"].append("polen")
+    primero = get_paciente(1)
+    primero["id_paciente"] = 99
+    assert get_paciente(1) == {"id_paciente": 1, "alergias": ["penicilina"]}
+
+def test_singleflight_coalesce_fallos_concurrentes(cache):
+    entrar, soltar = threading.Event(), threading.Event()
+    llamadas = []
+
+    @cache.cacheado("lento", lambda: ["lento"])
+    def lento():
+        llamadas.append(1)
+        entrar.set()
+        soltar.wait(5)
+        return {"valor": 42}
+
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(lento())) for _ in range(5)]
+    hilos[0].start()
+    entrar.wait(5)
+    for hilo in hilos[1:]:
+        hilo.start()
+    while cache._singleflight.estadisticas()["coalescidas"] < 4:
+        threading.Event().wait(0.01)
+    soltar.set()
+    for hilo in hilos:
+        hilo.join(5)
+
+    assert len(llamadas) == 1
+    assert resultados == [{"valor": 42}] * 5
+    # Cada hilo recibe su propia copia
+    assert len({id(resultado) for resultado in resultados}) == 5
+
+def test_singleflight_propaga_la_excepcion_a_todos():
+    from cache.singleflight import GrupoSingleFlight
+    grupo = GrupoSingleFlight()
+    with pytest.raises(RuntimeError):
+        grupo.ejecutar("clave", lambda: (_ for _ in ()).throw(RuntimeError("bd caída")))
+    assert grupo.estadisticas()["en_curso"] == 0
+
+def test_versiones_de_etiquetas_acotadas():
+    backend = BackendMemoriaLRU(max_entradas=100, max_versiones=3)
+    for paciente_id in range(1000):
+        backend.incrementar_version(f"paciente:{paciente_id}")
+    assert len(backend._versiones) == 3
+
+def test_desalojar_una_version_no_revive_entradas_viejas():
+    cache = CacheEtiquetada(BackendMemoriaLRU(max_entradas=100, max_versiones=2))
+    valores = {1: "viejo"}
+
+    @cache.cacheado("paciente", lambda paciente_id: [f"paciente:{paciente_id}"])
+    def get_paciente(paciente_id):
+        return valores.get(paciente_id, "otro")
+
+    assert get_paciente(1) == "viejo"
+    valores[1] = "nuevo"
+    cache.invalidar("paciente:1")
+    assert get_paciente(1) == "nuevo"
+    # Otras invalidaciones sacan 'paciente:1' del diccionario de versiones
+    cache.invalidar("paciente:2", "paciente:3", "paciente:4")
+    assert "paciente:1" not in cache.backend._versiones
+    assert get_paciente(1) == "nuevo"
+    valores[1] = "más nuevo"
+    cache.invalidar("paciente:1")
+    assert get_paciente(1) == "más nuevo"
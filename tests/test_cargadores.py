@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from cargadores import Cargador, parsear_ids
+
+class _Lotes:
+    """funcion_lote de prueba: anota cada lote pedido y devuelve las claves pares"""
+
+    def __init__(self, fallar: int = 0):
+        self.pedidos = []
+        self.fallar = fallar
+
+    def __call__(self, claves: list) -> dict:
+        self.pedidos.append(list(claves))
+        if self.fallar:
+            self.fallar -= 1
+            raise RuntimeError("BD caída")
+        return {clave: {"id": clave} for clave in claves if clave % 2 == 0}
+
+def test_junta_las_claves_de_la_misma_vuelta_en_un_lote():
+    lotes = _Lotes()
+
+    async def flujo():
+        cargador = Cargador(lotes)
+        filas = await asyncio.gather(*(cargador.cargar(clave) for clave in (2, 4, 3)))
+        return filas, cargador.lotes
+
+    filas, cantidad = asyncio.run(flujo())
+    assert filas == [{"id": 2}, {"id": 4}, None]
+    assert lotes.pedidos == [[2, 4, 3]] and cantidad == 1
+
+def test_cada_clave_se_busca_una_sola_vez():
+    lotes = _Lotes()
+
+    async def flujo():
+        cargador = Cargador(lotes)
+        primera = await cargador.cargar_muchos([2, 2, 4])
+        segunda = await cargador.cargar_muchos([4, 6])
+        return primera, segunda
+
+    primera, segunda = asyncio.run(flujo())
+    assert primera == [{"id": 2}, {"id": 2}, {"id": 4}]
+    assert segunda == [{"id": 4}, {"id": 6}]
+    assert lotes.pedidos == [[2, 4], [6]]
+
+def test_parte_en_lotes_de_max_lote():
+    lotes = _Lotes()
+
+    async def flujo():
+        cargador = Cargador(lotes, max_lote=2)
+        return await cargador.cargar_muchos([0, 2, 4, 6, 8])
+
+    assert asyncio.run(flujo()) == [{"id": clave} for clave in (0, 2, 4, 6, 8)]
+    # Los lotes corren a la vez en el pool de hilos: el orden en que llegan no está fijo
+    assert sorted(lotes.pedidos) == [[0, 2], [4, 6], [8]]
+
+def test_un_error_no_queda_memorizado():
+    lotes = _Lotes(fallar=1)
+
+    async def flujo():
+        cargador = Cargador(lotes)
+        resultados = await asyncio.gather(cargador.cargar(2), cargador.cargar(4), return_exceptions=True)
+        return resultados, await cargador.cargar(2)
+
+    resultados, reintento = asyncio.run(flujo())
+    assert all(isinstance(resultado, RuntimeError) for resultado in resultados)
+    assert reintento == {"id": 2}
+    assert lotes.pedidos == [[2, 4], [2]]
+
+def test_cancelar_un_pedido_no_cancela_el_lote():
+    lotes = _Lotes()
+
+    async def flujo():
+        cargador = Cargador(lotes)
+        cancelado = asyncio.ensure_future(cargador.cargar(2))
+        otro = asyncio.ensure_future(cargador.cargar(2))
+        await asyncio.sleep(0)
+        cancelado.cancel()
+        return await otro, cancelado.cancelled()
+
+    assert asyncio.run(flujo()) == ({"id": 2}, True)
+    assert lotes.pedidos == [[2]]
+
+def test_parsear_ids():
+    assert parsear_ids("3, 1,3,,2") == [3, 1, 2]
+    for texto, mensaje in (("1,a", "enteros"), (" , ", "vacío"), ("1,2,3", "hasta 2")):
+        with pytest.raises(ValueError, match=mensaje):
+            parsear_ids(texto, maximo=2)
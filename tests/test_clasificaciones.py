@@ -0,0 +1,110 @@
+import pytest
+from clasificaciones.almacenes import TableroOrdenado, AlmacenMemoria, AlmacenRedis
+
+# ---- TableroOrdenado ----
+
+def test_orden_por_puntaje_y_empate_gana_el_id_menor():
+    tablero = TableroOrdenado({7: 50.0, 3: 80.0, 9: 50.0, 1: 50.0})
+    assert tablero.rango(0, 10) == [(3, 80.0), (1, 50.0), (7, 50.0), (9, 50.0)]
+    assert [tablero.posicion(miembro) for miembro in (3, 1, 7, 9)] == [0, 1, 2, 3]
+    assert tablero.total() == 4
+
+def test_actualizar_mueve_al_miembro():
+    tablero = TableroOrdenado({1: 10.0, 2: 20.0, 3: 30.0})
+    tablero.actualizar(1, 40.0)
+    tablero.actualizar(4, 20.0)
+    # Repetir el mismo puntaje no lo duplica
+    tablero.actualizar(2, 20.0)
+    assert tablero.rango(0, 10) == [(1, 40.0), (3, 30.0), (2, 20.0), (4, 20.0)]
+    assert tablero.posicion(4) == 3 and tablero.puntaje(1) == 40.0 and tablero.total() == 4
+
+def test_quitar():
+    tablero = TableroOrdenado({1: 10.0, 2: 20.0})
+    tablero.quitar(2)
+    tablero.quitar(5)
+    assert tablero.rango(0, 10) == [(1, 10.0)]
+    assert tablero.posicion(2) is None and tablero.puntaje(2) is None
+
+def test_rango_pagina():
+    tablero = TableroOrdenado({miembro: float(miembro) for miembro in range(1, 6)})
+    assert tablero.rango(1, 2) == [(4, 4.0), (3, 3.0)]
+    assert tablero.rango(4, 10) == [(1, 1.0)]
+    assert tablero.rango(10, 5) == []
+
+# ---- Mismo orden en memoria y en Redis ----
+
+class _RedisFalso:
+    """Sorted sets con la regla de Redis: empates de ZREVRANGE en orden lexicográfico inverso"""
+
+    def __init__(self):
+        self.sets = {}
+        self.marcas = set()
+        self._pendientes = None
+
+    def pipeline(self):
+        self._pendientes = []
+        return self
+
+    def execute(self):
+        resultados, self._pendientes = self._pendientes, None
+        return resultados
+
+    def _responder(self, resultado):
+        if self._pendientes is None:
+            return resultado
+        self._pendientes.append(resultado)
+        return self
+
+    def _orden(self, clave):
+        miembros = self.sets.get(clave, {})
+        return sorted(miembros.items(), key=lambda item: (item[1], item[0]), reverse=True)
+
+    def exists(self, clave):
+        return clave in self.marcas
+
+    def set(self, clave, valor, ex=None):
+        self.marcas.add(clave)
+        return self._responder(True)
+
+    def delete(self, *claves):
+        for clave in claves:
+            self.sets.pop(clave, None)
+            self.marcas.discard(clave)
+        return self._responder(len(claves))
+
+    def zadd(self, clave, puntajes):
+        self.sets.setdefault(clave, {}).update({miembro.encode(): score for miembro, score in puntajes.items()})
+        return self._responder(len(puntajes))
+
+    def zrem(self, clave, *miembros):
+        for miembro in miembros:
+            self.sets.get(clave, {}).pop(miembro.encode(), None)
+        return self._responder(len(miembros))
+
+    def zcard(self, clave):
+        return self._responder(len(self.sets.get(clave, {})))
+
+    def zscore(self, clave, miembro):
+        return self._responder(self.sets.get(clave, {}).get(miembro.encode()))
+
+    def zrevrank(self, clave, miembro):
+        miembros = [item[0] for item in self._orden(clave)]
+        return self._responder(miembros.index(miembro.encode()) if miembro.encode() in miembros else None)
+
+    def zrevrange(self, clave, inicio, fin, withscores=False):
+        return self._responder(self._orden(clave)[inicio:fin + 1])
+
+@pytest.mark.parametrize("puntajes", [
+    {2: 100.0, 10: 100.0, 9: 100.0, 1: 0.0},
+    {11: 250.0, 3: 250.0, 200: 40.0, 25: 40.0, 4: 0.0},
+])
+def test_memoria_y_redis_ordenan_igual(puntajes):
+    memoria, redis = AlmacenMemoria(), AlmacenRedis(_RedisFalso())
+    for almacen in (memoria, redis):
+        almacen.reemplazar("global", puntajes)
+        almacen.actualizar("global", {7: 100.0}, [1])
+
+    assert redis.pagina("global", 0, 10) == memoria.pagina("global", 0, 10)
+    for miembro in list(puntajes) + [7]:
+        assert redis.posicion("global", miembro) == memoria.posicion("global", miembro)
+    assert redis.posicion("global", 1) is None
@@ -0,0 +1,117 @@
+import os
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from exportaciones.almacen import AlmacenArtefactos
+from exportaciones.rangos import parsear_rango, respuesta_archivo
+
+CONTENIDO = bytes(range(256)) * 4
+ETAG = "abc123"
+
+# ---- parsear_rango ----
+
+@pytest.mark.parametrize("encabezado, limites", [
+    (None, None),
+    ("", None),
+    ("items=0-10", None),
+    ("bytes=10", None),
+    # Varios rangos: se responde el archivo completo
+    ("bytes=0-9, 20-29", None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 1023)),
+    ("bytes=1000-5000", (1000, 1023)),
+    ("bytes=1023-1023", (1023, 1023)),
+    # Sufijo: los últimos N bytes, todo el archivo si N es mayor
+    ("bytes=-24", (1000, 1023)),
+    ("bytes=-5000", (0, 1023)),
+])
+def test_parsear_rango(encabezado, limites):
+    assert parsear_rango(encabezado, len(CONTENIDO)) == limites
+
+@pytest.mark.parametrize("encabezado", [
+    "bytes=1024-", "bytes=2000-3000", "bytes=50-10", "bytes=-0", "bytes=a-10", "bytes=0-b", "bytes=-",
+])
+def test_parsear_rango_insatisfacible(encabezado):
+    with pytest.raises(ValueError):
+        parsear_rango(encabezado, len(CONTENIDO))
+
+# ---- respuesta_archivo ----
+
+@pytest.fixture
+def cliente(tmp_path):
+    ruta = tmp_path / "reporte.html"
+    ruta.write_bytes(CONTENIDO)
+    app = FastAPI()
+
+    @app.get("/reporte")
+    def reporte(request: Request):
+        return respuesta_archivo(request, str(ruta), ETAG, "text/html", "reporte.html")
+
+    return TestClient(app)
+
+def test_sin_rango_entrega_todo(cliente):
+    respuesta = cliente.get("/reporte")
+    assert respuesta.status_code == 200 and respuesta.content == CONTENIDO
+    assert respuesta.headers["accept-ranges"] == "bytes"
+    assert respuesta.headers["etag"] == f'"{ETAG}"'
+    assert "content-range" not in respuesta.headers
+
+@pytest.mark.parametrize("rango, inicio, fin", [
+    ("bytes=0-99", 0, 99),
+    ("bytes=1000-", 1000, 1023),
+    ("bytes=-10", 1014, 1023),
+])
+def test_rango_parcial(cliente, rango, inicio, fin):
+    respuesta = cliente.get("/reporte", headers={"Range": rango})
+    assert respuesta.status_code == 206
+    assert respuesta.content == CONTENIDO[inicio:fin + 1]
+    assert respuesta.headers["content-range"] == f"bytes {inicio}-{fin}/{len(CONTENIDO)}"
+    assert respuesta.headers["content-length"] == str(fin - inicio + 1)
+
+def test_varios_rangos_entrega_todo(cliente):
+    respuesta = cliente.get("/reporte", headers={"Range": "bytes=0-9,20-29"})
+    assert respuesta.status_code == 200 and respuesta.content == CONTENIDO
+
+def test_rango_fuera_del_archivo_es_416(cliente):
+    respuesta = cliente.get("/reporte", headers={"Range": "bytes=5000-"})
+    assert respuesta.status_code == 416
+    assert respuesta.headers["content-range"] == f"bytes */{len(CONTENIDO)}"
+
+def test_if_range(cliente):
+    # Mismo ETag: se reanuda desde el rango pedido
+    respuesta = cliente.get("/reporte", headers={"Range": "bytes=10-19", "If-Range": f'"{ETAG}"'})
+    assert respuesta.status_code == 206 and respuesta.content == CONTENIDO[10:20]
+    # El archivo cambió: se entrega completo, aunque el rango fuera inválido
+    for rango in ("bytes=10-19", "bytes=5000-"):
+        respuesta = cliente.get("/reporte", headers={"Range": rango, "If-Range": '"otro"'})
+        assert respuesta.status_code == 200 and respuesta.content == CONTENIDO
+
+def test_if_none_match(cliente):
+    respuesta = cliente.get("/reporte", headers={"If-None-Match": f'"viejo", "{ETAG}"'})
+    assert respuesta.status_code == 304 and respuesta.content == b""
+
+# ---- AlmacenArtefactos ----
+
+def test_recortar_borra_los_menos_usados(tmp_path):
+    almacen = AlmacenArtefactos(str(tmp_path), max_bytes=250)
+    for indice, hash_contenido in enumerate(("aa01", "bb02", "cc03")):
+        ruta = almacen.guardar(hash_contenido, b"x" * 100)
+        os.utime(ruta, (indice, indice))
+    # El más viejo se borró al guardar el tercero; el de en medio se usa y pasa a ser el más nuevo
+    assert not almacen.existe("aa01")
+    assert almacen.existe("bb02")
+    almacen.guardar("dd04", b"x" * 100)
+    assert not almacen.existe("cc03") and almacen.existe("bb02") and almacen.existe("dd04")
+    assert almacen.eliminados == 2
+
+def test_recortar_no_borra_el_recien_guardado(tmp_path):
+    almacen = AlmacenArtefactos(str(tmp_path), max_bytes=50)
+    viejo = almacen.guardar("aa01", b"x" * 10)
+    os.utime(viejo, (0, 0))
+    # Mayor que el límite por sí solo: se borra el resto, pero él queda para quien lo lee
+    ruta = almacen.guardar("bb02", b"x" * 100)
+    assert os.path.getsize(ruta) == 100 and not os.path.exists(viejo)
+    # Aunque su fecha sea la más vieja (reloj de otro host)
+    os.utime(ruta, (-1, -1))
+    almacen._recortar(conservar=ruta)
+    assert os.path.getsize(ruta) == 100
@@ -0,0 +1,21 @@
+import pytest
+from notificaciones import Notificador, NotificadorLocal
+
+def _alerta(**campos):
+    return {"id_alerta": 5, "id_regla": None, "id_paciente": 3, "tipo_alerta": "medicamento",
+            "descripcion": "Tomar la dosis", **campos}
+
+def test_subclase_sin_enviar_falla_al_instanciarse():
+    class SinEnviar(Notificador):
+        pass
+
+    with pytest.raises(TypeError, match="enviar"):
+        SinEnviar()
+
+def test_notificador_local_guarda_el_historial():
+    notificador = NotificadorLocal(max_historial=2)
+    for alerta_id in (1, 2, 3):
+        notificador.enviar(_alerta(id_alerta=alerta_id), destinatario=9 if alerta_id == 3 else None)
+    assert [alerta["id_alerta"] for alerta in notificador.enviadas] == [2, 3]
+    assert notificador.enviadas[-1]["destinatario"] == 9
+    assert notificador.estadisticas() == {"tipo": "NotificadorLocal", "historial": 2}
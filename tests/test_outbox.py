@@ -0,0 +1,223 @@
+import sys
+from datetime import timedelta
+import pytest
+from eventos.registro import Suscriptor
+from eventos.relay import RelayEventos
+from models.outbox_model import OutboxModel, _prefijo_contiguo
+
+ESQUEMA = """
+CREATE TABLE eventos_outbox (
+    id_evento INTEGER PRIMARY KEY AUTOINCREMENT,
+    tipo TEXT NOT NULL,
+    id_paciente INTEGER,
+    carga TEXT NOT NULL,
+    fecha_creacion FECHA
+);
+CREATE TRIGGER eventos_outbox_fecha AFTER INSERT ON eventos_outbox BEGIN
+    UPDATE eventos_outbox SET fecha_creacion = NOW() WHERE id_evento = NEW.id_evento;
+END;
+CREATE TABLE eventos_offsets (
+    consumidor TEXT PRIMARY KEY,
+    ultimo_evento INTEGER NOT NULL,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    reintentar_en FECHA,
+    ultimo_error TEXT,
+    fecha_actualizacion FECHA DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE eventos_descartados (
+    id_descarte INTEGER PRIMARY KEY AUTOINCREMENT,
+    consumidor TEXT NOT NULL,
+    id_evento INTEGER NOT NULL,
+    tipo TEXT NOT NULL,
+    id_paciente INTEGER,
+    carga TEXT NOT NULL,
+    intentos INTEGER NOT NULL,
+    error TEXT,
+    fecha_descarte FECHA DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+@pytest.fixture
+def bd(crear_bd):
+    return crear_bd(ESQUEMA)
+
+def _publicar(bd, cantidad: int, tipo: str = "indicadores.creados") -> list:
+    cursor = bd.conectar().cursor()
+    return [OutboxModel.publicar(cursor, tipo, {"ids": [n]}, id_paciente=1) for n in range(cantidad)]
+
+def _offset(bd, consumidor: str = "lector") -> dict:
+    return bd.filas("SELECT * FROM eventos_offsets WHERE consumidor = ?", (consumidor,))[0]
+
+def _consumir(entregar, limite: int = 10, **opciones):
+    return OutboxModel.consumir("lector", limite, 0, entregar, **opciones)
+
+# ---- _prefijo_contiguo ----
+
+def _eventos(*ids, asentados=()):
+    return [{"id_evento": id_evento, "asentado": id_evento in asentados} for id_evento in ids]
+
+def test_prefijo_sin_huecos():
+    assert [e["id_evento"] for e in _prefijo_contiguo(_eventos(4, 5, 6), 3)] == [4, 5, 6]
+
+def test_prefijo_corta_en_un_hueco_reciente():
+    # 6 puede ser una transacción todavía abierta: 7 espera
+    assert [e["id_evento"] for e in _prefijo_contiguo(_eventos(4, 5, 7, 8), 3)] == [4, 5]
+    # El hueco puede estar justo después del offset
+    assert _prefijo_contiguo(_eventos(5, 6), 3) == []
+
+def test_prefijo_salta_el_hueco_cuando_el_siguiente_esta_asentado():
+    eventos = _eventos(4, 7, 8, 10, asentados={7, 8})
+    assert [e["id_evento"] for e in _prefijo_contiguo(eventos, 3)] == [4, 7, 8]
+
+# ---- consumir ----
+
+def test_consumir_entrega_y_avanza_el_offset(bd):
+    OutboxModel.registrar_consumidor("lector")
+    ids = _publicar(bd, 3)
+    recibidos = []
+    eventos, hay_mas = _consumir(recibidos.extend, limite=2)
+    assert [evento["id_evento"] for evento in recibidos] == ids[:2] and hay_mas
+    assert recibidos[0]["carga"] == {"ids": [0]}
+    _consumir(recibidos.extend)
+    assert [evento["id_evento"] for evento in recibidos] == ids
+    assert _offset(bd)["ultimo_evento"] == ids[-1]
+
+def test_un_consumidor_nuevo_no_recibe_el_historial(bd):
+    _publicar(bd, 2)
+    OutboxModel.registrar_consumidor("lector")
+    assert _consumir(lambda eventos: None) == ([], False)
+
+def test_fallo_transitorio_reintenta_con_backoff_de_a_un_evento(bd):
+    OutboxModel.registrar_consumidor("lector")
+    ids = _publicar(bd, 3)
+    lotes, fallar = [], [True]
+
+    def entregar(eventos):
+        lotes.append([evento["id_evento"] for evento in eventos])
+        if fallar.pop(0) if fallar else False:
+            raise RuntimeError("caído")
+
+    with pytest.raises(RuntimeError):
+        _consumir(entregar, reintento_base_segundos=2)
+    offset = _offset(bd)
+    assert offset["ultimo_evento"] == 0 and offset["intentos"] == 1
+    assert offset["reintentar_en"] == bd.ahora + timedelta(seconds=2)
+    assert offset["ultimo_error"] == "RuntimeError: caído"
+
+    # Durante el backoff no se entrega nada
+    assert _consumir(entregar) == ([], False)
+    bd.avanzar(seconds=2)
+    _consumir(entregar)
+    assert _offset(bd)["intentos"] == 0
+    _consumir(entregar)
+    assert lotes == [ids, ids[:1], ids[1:]]
+
+def test_evento_que_siempre_falla_se_descarta_y_el_resto_sigue(bd):
+    OutboxModel.registrar_consumidor("lector")
+    ids = _publicar(bd, 3)
+    entregados = []
+
+    def entregar(eventos):
+        if any(evento["id_evento"] == ids[1] for evento in eventos):
+            raise ValueError("carga rota")
+        entregados.extend(evento["id_evento"] for evento in eventos)
+
+    with pytest.raises(ValueError):
+        _consumir(entregar, max_intentos=3)
+    # El reintento va de a uno: el primero pasa, el contador vuelve a cero y el lote
+    # siguiente empieza en el roto, que falla hasta agotar sus intentos
+    bd.avanzar(seconds=300)
+    _consumir(entregar, max_intentos=3)
+    assert entregados == ids[:1] and _offset(bd)["intentos"] == 0
+    for intentos in (1, 2, 3):
+        with pytest.raises(ValueError):
+            _consumir(entregar, max_intentos=3)
+        bd.avanzar(seconds=300)
+    assert _offset(bd)["ultimo_evento"] == ids[1] and _offset(bd)["intentos"] == 0
+
+    descartados = bd.filas("SELECT * FROM eventos_descartados")
+    assert [(fila["consumidor"], fila["id_evento"], fila["intentos"]) for fila in descartados] == [
+        ("lector", ids[1], 3)
+    ]
+    assert descartados[0]["error"] == "ValueError: carga rota"
+
+    _consumir(entregar, max_intentos=3)
+    assert entregados == [ids[0], ids[2]]
+    resumen = OutboxModel.get_resumen()["consumidores"]["lector"]
+    assert resumen["descartados"] == 1 and resumen["atraso"] == 0
+
+def test_el_backoff_crece_hasta_el_maximo(bd):
+    OutboxModel.registrar_consumidor("lector")
+    _publicar(bd, 1)
+
+    def fallar(eventos):
+        raise RuntimeError("caído")
+
+    for retraso in (1, 2, 4, 5, 5):
+        with pytest.raises(RuntimeError):
+            _consumir(fallar, max_intentos=10, reintento_base_segundos=1, reintento_maximo_segundos=5)
+        assert _offset(bd)["reintentar_en"] == bd.ahora + timedelta(seconds=retraso)
+        bd.avanzar(seconds=retraso)
+
+# ---- purgar ----
+
+def test_purgar_solo_cuenta_suscriptores_registrados(bd):
+    OutboxModel.registrar_consumidor("abandonado")
+    ids = _publicar(bd, 4)
+    OutboxModel.registrar_consumidor("activo")
+    bd.filas("UPDATE eventos_offsets SET ultimo_evento = ? WHERE consumidor = 'activo'", (ids[2],))
+    bd.avanzar(days=8)
+
+    # Un offset de un suscriptor que ya no existe no frena la purga
+    assert OutboxModel.purgar(7, ["abandonado", "activo"]) == 0
+    assert OutboxModel.purgar(7, ["activo"], tamano_lote=2) == 3
+    assert [fila["id_evento"] for fila in bd.filas("SELECT id_evento FROM eventos_outbox")] == [ids[3]]
+    assert OutboxModel.purgar(7, []) == 1
+
+def test_purgar_respeta_la_retencion(bd):
+    _publicar(bd, 2)
+    bd.avanzar(days=6)
+    assert OutboxModel.purgar(7, []) == 0
+
+# ---- relay ----
+
+def test_relay_salta_el_lote_de_un_local_que_siempre_falla(bd, monkeypatch):
+    recibidos, rotos = [], []
+
+    def aviso(eventos):
+        if any(evento["id_evento"] in rotos for evento in eventos):
+            raise RuntimeError("roto")
+        recibidos.extend(evento["id_evento"] for evento in eventos)
+
+    monkeypatch.setattr(sys.modules[RelayEventos.__module__], "SUSCRIPTORES", {
+        "aviso": Suscriptor("aviso", frozenset({"indicadores.creados"}), aviso, durable=False)
+    })
+    relay = RelayEventos(espera_hueco_segundos=0, max_intentos=2, purgar_segundos=float("inf"))
+    relay.iniciar()
+    rotos.extend(_publicar(bd, 1))
+    relay.ronda()
+    assert relay.errores == {"aviso": 1} and relay._offsets_locales["aviso"] == 0
+    relay.ronda()
+    assert relay.errores == {"aviso": 2} and relay._offsets_locales["aviso"] == rotos[0]
+
+    ids = _publicar(bd, 2)
+    relay.ronda()
+    assert recibidos == ids and relay.errores == {"aviso": 2}
+
+def test_relay_descarta_con_los_intentos_configurados(bd, monkeypatch):
+    def rompe(eventos):
+        raise RuntimeError("roto")
+
+    monkeypatch.setattr(sys.modules[RelayEventos.__module__], "SUSCRIPTORES", {
+        "durable": Suscriptor("durable", frozenset({"indicadores.creados"}), rompe)
+    })
+    relay = RelayEventos(espera_hueco_segundos=0, max_intentos=2, reintento_base_segundos=1,
+                         purgar_segundos=float("inf"))
+    relay.iniciar()
+    ids = _publicar(bd, 1)
+    relay.ronda()
+    bd.avanzar(seconds=1)
+    relay.ronda()
+    assert relay.errores == {"durable": 2}
+    assert [fila["id_evento"] for fila in bd.filas("SELECT id_evento FROM eventos_descartados")] == ids
+    assert _offset(bd, "durable")["ultimo_evento"] == ids[0]
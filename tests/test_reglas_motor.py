@@ -0,0 +1,46 @@
+import numpy as np
+from reglas.motor import GrupoCompilado
+
+def _regla(id_regla, operador, valor, id_paciente=None, metrica="glucosa"):
+    return {"id_regla_clinica": id_regla, "id_paciente": id_paciente, "tipo": "umbral",
+            "metrica": metrica, "operador": operador, "valor": valor}
+
+def _disparos(grupo, pacientes, valores):
+    return sorted((indice, regla["id_regla_clinica"])
+                  for indice, regla in grupo.evaluar(np.array(pacientes), np.array(valores, dtype=float)))
+
+GLOBALES = [_regla(1, ">", 180), _regla(2, "<", 70)]
+
+def test_reglas_globales():
+    grupo = GrupoCompilado(GLOBALES)
+    assert _disparos(grupo, [5, 5, 5], [200, 100, 50]) == [(0, 1), (2, 2)]
+
+def test_operadores_inclusivos_y_exclusivos():
+    grupo = GrupoCompilado([_regla(1, ">", 180), _regla(2, ">=", 180), _regla(3, "<", 70), _regla(4, "<=", 70)])
+    assert _disparos(grupo, [5, 5], [180, 70]) == [(0, 2), (1, 4)]
+
+def test_nan_no_dispara():
+    grupo = GrupoCompilado(GLOBALES)
+    assert _disparos(grupo, [5], [np.nan]) == []
+
+def test_regla_propia_sustituye_a_la_global_del_mismo_sentido():
+    # El paciente 5 tolera glucosa alta hasta 250; el resto sigue con 180
+    grupo = GrupoCompilado(GLOBALES + [_regla(10, ">", 250, id_paciente=5)])
+    assert _disparos(grupo, [5, 5, 6], [200, 260, 200]) == [(1, 10), (2, 1)]
+
+def test_regla_propia_no_apaga_la_global_del_sentido_contrario():
+    # Caso mixto: umbral propio de glucosa alta y la alerta global de hipoglucemia sigue activa
+    grupo = GrupoCompilado(GLOBALES + [_regla(10, ">", 250, id_paciente=5)])
+    assert _disparos(grupo, [5, 5], [50, 260]) == [(0, 2), (1, 10)]
+
+def test_reglas_propias_en_ambos_sentidos():
+    grupo = GrupoCompilado(GLOBALES + [_regla(10, ">", 250, id_paciente=5), _regla(11, "<", 60, id_paciente=5)])
+    assert _disparos(grupo, [5, 5, 5], [65, 55, 200]) == [(1, 11)]
+
+def test_reglas_de_otro_paciente_no_aplican():
+    grupo = GrupoCompilado(GLOBALES + [_regla(10, ">", 100, id_paciente=7)])
+    assert _disparos(grupo, [5, 7], [150, 150]) == [(1, 10)]
+
+def test_solo_reglas_propias():
+    grupo = GrupoCompilado([_regla(10, "<", 60, id_paciente=5)])
+    assert _disparos(grupo, [5, 6], [50, 50]) == [(0, 10)]
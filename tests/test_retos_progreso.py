@@ -0,0 +1,56 @@
+from datetime import date, datetime
+from models.retos_progreso_model import RetosProgresoModel, REEMPLAZAR
+
+class _Cursor:
+    """Anota las consultas; el recuento de cada día sale de conteos[(id_paciente, fecha)]"""
+
+    def __init__(self, conteos: dict, retos: list):
+        self.conteos = conteos
+        self.retos = retos
+        self.consultas = []
+        self._resultado = None
+
+    def execute(self, consulta, parametros=None):
+        self.consultas.append((" ".join(consulta.split()), parametros))
+        if "FROM indicadores_salud" in consulta:
+            paciente_id, inicio, _ = parametros
+            self._resultado = self.conteos[(paciente_id, inicio.date())]
+        elif "FROM retos" in consulta:
+            self._resultado = self.retos
+
+    def fetchone(self):
+        return self._resultado
+
+    def fetchall(self):
+        return self._resultado
+
+def _reto(id_reto, metrica):
+    return {"id_reto": id_reto, "id_paciente": 5, "metrica": metrica,
+            "fecha_inicio": date(2026, 1, 1), "fecha_fin": date(2026, 1, 31)}
+
+def test_recontar_registros_reemplaza_con_el_recuento_del_dia():
+    cursor = _Cursor(
+        conteos={(5, date(2026, 1, 10)): {"glucosa": 0, "peso": 2}, (5, date(2026, 1, 12)): {"glucosa": 1}},
+        retos=[_reto(1, "glucosa"), _reto(2, "peso")],
+    )
+    borrada = {"id_paciente": 5, "fecha_registro": datetime(2026, 1, 10, 8), "glucosa": 100, "peso": 70}
+    editada = {"id_paciente": 5, "fecha_registro": datetime(2026, 1, 12, 9), "glucosa": 110, "peso": None}
+
+    assert RetosProgresoModel.recontar_registros(cursor, [borrada, editada]) == {5}
+
+    consultas = [consulta for consulta, _ in cursor.consultas]
+    # Los retos ya completados también se corrigen
+    retos = next(parametros for consulta, parametros in cursor.consultas if "FROM retos WHERE" in consulta)
+    assert "activo" in retos and "completado" in retos
+    insercion, valores = next((c, p) for c, p in cursor.consultas if c.startswith("INSERT INTO retos_dias"))
+    assert insercion.endswith(f"ON DUPLICATE KEY UPDATE valor = {REEMPLAZAR}")
+    assert sorted(zip(valores[0::3], valores[1::3], valores[2::3])) == [
+        (1, date(2026, 1, 10), 0), (1, date(2026, 1, 12), 1), (2, date(2026, 1, 10), 2)
+    ]
+    assert any(consulta.startswith("UPDATE retos r") for consulta in consultas)
+
+def test_recontar_sin_metricas_no_toca_nada():
+    cursor = _Cursor(conteos={}, retos=[])
+    sin_metricas = {"id_paciente": 5, "fecha_registro": datetime(2026, 1, 10), "glucosa": None}
+    assert RetosProgresoModel.recontar_registros(cursor, [sin_metricas]) == set()
+    assert cursor.consultas == []
@@ -0,0 +1,106 @@
+import pytest
+from riesgo.puntuacion import (
+    puntuar, contar_enfermedades, nivel_riesgo,
+    MAX_SIGNOS, MAX_CRONICAS, MAX_ALERTAS, MAX_CITAS, MIN_ALERTAS, PUNTOS_POR_ENFERMEDAD
+)
+
+PACIENTE = 1
+
+def _signo(metrica, valores):
+    return {"id_paciente": PACIENTE, "metrica": metrica, "cantidad": len(valores),
+            "suma": sum(valores), "suma_cuadrados": sum(valor ** 2 for valor in valores)}
+
+def _factores(signos=(), enfermedades=None, alertas=None, citas=None):
+    return {
+        "signos": list(signos),
+        "pacientes": [{"id_paciente": PACIENTE, "enfermedades_cronicas": enfermedades}],
+        "alertas": [{"id_paciente": PACIENTE, **alertas}] if alertas else [],
+        "citas": [{"id_paciente": PACIENTE, **citas}] if citas else [],
+    }
+
+def _puntuar(**factores) -> dict:
+    return puntuar([PACIENTE], _factores(**factores))[0]
+
+# ---- contar_enfermedades ----
+
+@pytest.mark.parametrize("texto, cantidad", [
+    (None, 0),
+    ("", 0),
+    ("   ", 0),
+    ("Ninguna", 0),
+    (" NO ", 0),
+    ("n/a", 0),
+    ("sin enfermedades", 0),
+    ("diabetes", 1),
+    ("diabetes, hipertensión", 2),
+    ("diabetes; asma/hipertensión", 3),
+    ("diabetes\nasma", 2),
+    ("diabetes y asma", 2),
+    ("Diabetes Y asma", 2),
+    # "y" solo separa como palabra suelta
+    ("hipotiroidismo", 1),
+    ("diabetes,, ;asma", 2),
+])
+def test_contar_enfermedades(texto, cantidad):
+    assert contar_enfermedades(texto) == cantidad
+
+# ---- puntuar ----
+
+@pytest.mark.parametrize("factores, componente, esperado", [
+    # Sin lecturas: los promedios son NaN y no suman (ni la frecuencia cuenta como baja)
+    ({}, "signos", 0.0),
+    ({"signos": [_signo("frecuencia_cardiaca", [])]}, "signos", 0.0),
+    ({"signos": [_signo("presion_sistolica", [140.0])]}, "signos", 7.5),
+    ({"signos": [_signo("presion_sistolica", [200.0])]}, "signos", 15.0),
+    ({"signos": [_signo("glucosa", [150.0, 150.0])]}, "signos", 7.5),
+    # Glucosa variable (CV >= 0.36) suma 5 aunque el promedio sea normal
+    ({"signos": [_signo("glucosa", [40.0, 120.0])]}, "signos", 5.0),
+    ({"signos": [_signo("frecuencia_cardiaca", [110.0])]}, "signos", 5.0),
+    ({"signos": [_signo("frecuencia_cardiaca", [45.0])]}, "signos", 5.0),
+    ({"signos": [_signo("presion_sistolica", [180.0]), _signo("glucosa", [100.0, 300.0]),
+                 _signo("frecuencia_cardiaca", [130.0])]}, "signos", MAX_SIGNOS),
+    ({"enfermedades": "diabetes"}, "cronicas", PUNTOS_POR_ENFERMEDAD),
+    ({"enfermedades": "diabetes, asma, hipertensión, epoc"}, "cronicas", MAX_CRONICAS),
+    # Menos de MIN_ALERTAS alertas no alcanzan para medir la adherencia
+    ({"alertas": {"omitidas": MIN_ALERTAS - 1, "total": MIN_ALERTAS - 1}}, "alertas", 0.0),
+    ({"alertas": {"omitidas": MIN_ALERTAS, "total": MIN_ALERTAS}}, "alertas", MAX_ALERTAS),
+    ({"alertas": {"omitidas": 1, "total": 4}}, "alertas", MAX_ALERTAS / 4),
+    # Una cancelación pesa la mitad que una inasistencia
+    ({"citas": {"canceladas": 2, "inasistencias": 0, "total": 4}}, "citas", MAX_CITAS / 4),
+    ({"citas": {"canceladas": 0, "inasistencias": 2, "total": 4}}, "citas", MAX_CITAS / 2),
+    ({"citas": {"canceladas": 0, "inasistencias": 3, "total": 3}}, "citas", MAX_CITAS),
+    ({"citas": {"canceladas": None, "inasistencias": None, "total": 0}}, "citas", 0.0),
+])
+def test_puntuar_componentes(factores, componente, esperado):
+    puntaje = _puntuar(**factores)
+    assert puntaje[componente] == pytest.approx(esperado)
+    assert puntaje["puntaje"] == pytest.approx(
+        sum(puntaje[nombre] for nombre in ("signos", "cronicas", "alertas", "citas"))
+    )
+
+def test_puntaje_maximo_es_100():
+    puntaje = _puntuar(
+        signos=[_signo("presion_sistolica", [220.0]), _signo("glucosa", [100.0, 400.0]),
+                _signo("frecuencia_cardiaca", [150.0])],
+        enfermedades="diabetes, asma, epoc, hipertensión",
+        alertas={"omitidas": 10, "total": 10},
+        citas={"canceladas": 0, "inasistencias": 5, "total": 5},
+    )
+    assert puntaje["puntaje"] == MAX_SIGNOS + MAX_CRONICAS + MAX_ALERTAS + MAX_CITAS == 100.0
+    assert puntaje["nivel"] == "alto"
+
+def test_puntuar_lote_alinea_los_factores_por_paciente():
+    factores = {
+        "signos": [{**_signo("presion_sistolica", [160.0]), "id_paciente": 8}],
+        "pacientes": [{"id_paciente": 3, "enfermedades_cronicas": "asma"},
+                      {"id_paciente": 8, "enfermedades_cronicas": None}],
+        "alertas": [],
+        "citas": [],
+    }
+    assert [(fila["id_paciente"], fila["puntaje"]) for fila in puntuar([3, 8, 5], factores)] == [
+        (3, PUNTOS_POR_ENFERMEDAD), (8, 15.0), (5, 0.0)
+    ]
+
+@pytest.mark.parametrize("puntaje, nivel", [(0.0, "bajo"), (29.99, "bajo"), (30.0, "moderado"), (60.0, "alto")])
+def test_nivel_riesgo(puntaje, nivel):
+    assert nivel_riesgo(puntaje) == nivel
@@ -0,0 +1,160 @@
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from models import sesiones_wearable_model
+from models.indicadores_salud_model import COLUMNAS_LECTURA
+from models.sesiones_wearable_model import (
+    SesionesWearableModel, _lecturas_de_sesion, _actividad_de_sesion, _lecturas_nuevas
+)
+
+def _sesion(**datos):
+    return {"id_paciente": 5, "dispositivo": "reloj", "datos_recibidos": datos}
+
+def test_lecturas_convierte_valores():
+    lecturas = _lecturas_de_sesion(_sesion(lecturas=[
+        {"frecuencia_cardiaca": "72.4", "glucosa": "101.5", "fecha_registro": "2026-01-01T08:00:00"},
+        {"peso": None},
+        "no es un dict",
+    ]))
+    assert len(lecturas) == 1
+    assert lecturas[0]["frecuencia_cardiaca"] == 72
+    assert lecturas[0]["glucosa"] == 101.5
+    assert lecturas[0]["fecha_registro"] == datetime(2026, 1, 1, 8, 0)
+    assert lecturas[0]["fuente_dato"] == "wearable" and lecturas[0]["id_paciente"] == 5
+
+@pytest.mark.parametrize("lectura", [
+    {"glucosa": "alta"},
+    {"frecuencia_cardiaca": float("nan")},
+    {"peso": True},
+    {"glucosa": 100, "fecha_registro": "ayer"},
+    {"glucosa": 100, "fecha_registro": 1700000000},
+])
+def test_lecturas_invalidas_son_value_error(lectura):
+    with pytest.raises(ValueError):
+        _lecturas_de_sesion(_sesion(lecturas=[lectura]))
+
+def test_actividad_valida_fecha_y_totales():
+    assert _actividad_de_sesion(_sesion(actividad=[{"fecha": "2026-01-01", "pasos": "1200"}])) == [
+        {"fecha": "2026-01-01", "pasos": 1200.0, "minutos_activos": None}
+    ]
+    with pytest.raises(ValueError):
+        _actividad_de_sesion(_sesion(actividad=[{"fecha": "01/02/2026", "pasos": 10}]))
+    with pytest.raises(ValueError):
+        _actividad_de_sesion(_sesion(actividad=[{"fecha": "2026-01-01", "pasos": "muchos"}]))
+
+class _Cursor:
+    lastrowid = 1
+
+    def execute(self, consulta, parametros=None):
+        pass
+
+    def fetchone(self):
+        return {"id_sesion": 1}
+
+    def close(self):
+        pass
+
+class _Conexion:
+    open = True
+
+    def __init__(self):
+        self.confirmada = self.revertida = False
+
+    def cursor(self):
+        return _Cursor()
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        self.confirmada = True
+
+    def rollback(self):
+        self.revertida = True
+
+    def close(self):
+        pass
+
+def test_sesion_lecturas_y_retos_en_una_transaccion(monkeypatch):
+    conexion = _Conexion()
+    monkeypatch.setattr(sesiones_wearable_model.db, "get_connection", lambda: conexion)
+    monkeypatch.setattr(sesiones_wearable_model.RetosProgresoModel, "aplicar_actividad",
+                        lambda cursor, paciente_id, actividad: {5})
+    invalidados = []
+    monkeypatch.setattr(sesiones_wearable_model.RetosProgresoModel, "invalidar_pacientes", invalidados.append)
+
+    def falla(cursor, lecturas):
+        raise RuntimeError("lote inválido")
+
+    monkeypatch.setattr(sesiones_wearable_model.IndicadoresSaludModel, "insertar_lote", falla)
+    sesion = _sesion(lecturas=[{"glucosa": 100}], actividad=[{"fecha": "2026-01-01", "pasos": 10}])
+    with pytest.raises(RuntimeError):
+        SesionesWearableModel.create(sesion)
+    assert conexion.revertida and not conexion.confirmada
+    assert invalidados == []
+
+    conexion = _Conexion()
+    monkeypatch.setattr(sesiones_wearable_model.IndicadoresSaludModel, "insertar_lote",
+                        lambda cursor, lecturas: ([], {6}))
+    assert SesionesWearableModel.create(sesion) == {"id_sesion": 1}
+    assert conexion.confirmada and not conexion.revertida
+    assert invalidados == [{5, 6}]
+
+# ---- Lecturas reenviadas ----
+
+def test_fecha_registro_se_guarda_al_segundo():
+    lecturas = _lecturas_de_sesion(_sesion(lecturas=[
+        {"glucosa": 100, "fecha_registro": "2026-01-01T08:00:00.750"}
+    ]))
+    assert lecturas[0]["fecha_registro"] == datetime(2026, 1, 1, 8, 0)
+
+def _lectura(fecha, **valores):
+    return {"id_paciente": 5, "fuente_dato": "wearable", "fecha_registro": fecha,
+            **{columna: valores.get(columna) for columna in COLUMNAS_LECTURA}}
+
+def test_lecturas_nuevas_descarta_las_guardadas_y_las_repetidas():
+    ocho, nueve = datetime(2026, 1, 1, 8), datetime(2026, 1, 1, 9)
+    guardadas = [_lectura(ocho, glucosa=Decimal("101.50"), frecuencia_cardiaca=72)]
+    lecturas = [
+        _lectura(ocho, glucosa=101.5, frecuencia_cardiaca=72),
+        # Misma hora, otros valores: es otra lectura
+        _lectura(ocho, glucosa=101.5, frecuencia_cardiaca=80),
+        _lectura(nueve, peso=70.0),
+        _lectura(nueve, peso=70.0),
+        # Sin fecha no se puede reconocer: se guarda siempre
+        _lectura(None, peso=70.0),
+        _lectura(None, peso=70.0),
+    ]
+    assert _lecturas_nuevas(lecturas, guardadas) == [lecturas[1], lecturas[2], lecturas[4], lecturas[5]]
+
+class _CursorGuardadas(_Cursor):
+    def __init__(self, guardadas):
+        self.guardadas = guardadas
+        self.consultas = []
+
+    def execute(self, consulta, parametros=None):
+        self.consultas.append((consulta, parametros))
+
+    def fetchall(self):
+        return self.guardadas
+
+def test_reintento_de_sesion_no_guarda_dos_veces(monkeypatch):
+    ocho = datetime(2026, 1, 1, 8)
+    cursor = _CursorGuardadas([_lectura(ocho, glucosa=Decimal("100.00"))])
+    conexion = _Conexion()
+    conexion.cursor = lambda: cursor
+    monkeypatch.setattr(sesiones_wearable_model.db, "get_connection", lambda: conexion)
+    monkeypatch.setattr(sesiones_wearable_model.RetosProgresoModel, "aplicar_actividad",
+                        lambda cursor, paciente_id, actividad: set())
+    monkeypatch.setattr(sesiones_wearable_model.RetosProgresoModel, "invalidar_pacientes", lambda pacientes: None)
+    insertadas = []
+    monkeypatch.setattr(sesiones_wearable_model.IndicadoresSaludModel, "insertar_lote",
+                        lambda cursor, lecturas: (insertadas.extend(lecturas), set()))
+
+    SesionesWearableModel.create(_sesion(lecturas=[
+        {"glucosa": 100, "fecha_registro": "2026-01-01T08:00:00"},
+        {"glucosa": 120, "fecha_registro": "2026-01-01T10:00:00"},
+    ]))
+    assert [lectura["fecha_registro"] for lectura in insertadas] == [datetime(2026, 1, 1, 10)]
+    assert any("FOR UPDATE" in consulta for consulta, _ in cursor.consultas)
+    assert (5, ocho, datetime(2026, 1, 1, 10)) in [parametros for _, parametros in cursor.consultas]
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+import pytest
+from bd_sqlite import FORMATO
+from models.sync_model import (
+    SyncModel, FUENTES_SYNC, RANGO_ELIMINADOS, RETENCION_DIAS, MARGEN_SEGUNDOS,
+    codificar_token, decodificar_token
+)
+
+PACIENTE = 7
+
+def _esquema() -> str:
+    tablas = []
+    for entidad, columna_id, _ in FUENTES_SYNC:
+        columnas = [f"{columna_id} INTEGER PRIMARY KEY AUTOINCREMENT", "fecha_actualizacion FECHA NOT NULL",
+                    "dispositivo TEXT", "fecha_sincronizacion FECHA"]
+        if columna_id != "id_paciente":
+            columnas.append("id_paciente INTEGER NOT NULL")
+        tablas.append(f"CREATE TABLE {entidad} ({', '.join(columnas)});")
+    tablas.append("""CREATE TABLE sync_eliminados (
+        id_eliminado INTEGER PRIMARY KEY AUTOINCREMENT, id_paciente INTEGER NOT NULL,
+        entidad TEXT NOT NULL, id_entidad INTEGER NOT NULL, fecha_eliminacion FECHA NOT NULL);""")
+    return "\n".join(tablas)
+
+@pytest.fixture
+def bd(crear_bd):
+    return crear_bd(_esquema())
+
+def _cambiar(bd, entidad: str, paciente_id: int = PACIENTE) -> int:
+    """Inserta una fila de la entidad con fecha_actualizacion = ahora; devuelve su id"""
+    if entidad == "paciente":
+        bd.filas("INSERT INTO paciente (id_paciente, fecha_actualizacion) VALUES (?, ?)",
+                 (paciente_id, bd.ahora.strftime(FORMATO)))
+        return paciente_id
+    bd.filas(f"INSERT INTO {entidad} (id_paciente, fecha_actualizacion) VALUES (?, ?)",
+             (paciente_id, bd.ahora.strftime(FORMATO)))
+    return bd.filas("SELECT last_insert_rowid() AS id")[0]["id"]
+
+def _borrar(bd, entidad: str, id_entidad: int):
+    bd.filas("INSERT INTO sync_eliminados (id_paciente, entidad, id_entidad, fecha_eliminacion) VALUES (?, ?, ?, ?)",
+             (PACIENTE, entidad, id_entidad, bd.ahora.strftime(FORMATO)))
+
+def _sincronizar(token: str = None, limite: int = 100) -> dict:
+    return SyncModel.get_cambios(PACIENTE, decodificar_token(token) if token else None, limite)
+
+# ---- Token ----
+
+@pytest.mark.parametrize("clave", [
+    (datetime(2026, 3, 10, 8, 30, 15, 250000), 0, 42),
+    (datetime(2026, 3, 10, 8, 30), RANGO_ELIMINADOS, 3),
+    # El token de un pedido sin cambios (horizonte, -1, 0) también tiene que volver
+    (datetime(2026, 3, 10, 8, 30), -1, 0),
+])
+def test_token_ida_y_vuelta(clave):
+    assert decodificar_token(codificar_token(clave)) == clave
+
+@pytest.mark.parametrize("token", [
+    "no-es-un-token",
+    codificar_token((datetime(2026, 1, 1), -2, 0)),
+    codificar_token((datetime(2026, 1, 1), RANGO_ELIMINADOS + 1, 0)),
+])
+def test_token_invalido(token):
+    with pytest.raises(ValueError, match="Token de sincronización inválido"):
+        decodificar_token(token)
+
+# ---- get_cambios ----
+
+def test_sincronizacion_completa_por_paginas(bd):
+    ids = [_cambiar(bd, "indicadores_salud") for _ in range(3)]
+    bd.avanzar(seconds=1)
+    cita = _cambiar(bd, "citas_medicas")
+    _cambiar(bd, "citas_medicas", paciente_id=PACIENTE + 1)
+    bd.avanzar(seconds=1)
+    _borrar(bd, "alertas", 99)
+    bd.avanzar(seconds=MARGEN_SEGUNDOS)
+
+    primera = _sincronizar(limite=2)
+    assert [fila["id_indicador"] for fila in primera["cambios"]["indicadores_salud"]] == ids[:2]
+    assert primera["mas"]
+
+    segunda = _sincronizar(primera["token"], limite=10)
+    assert [fila["id_indicador"] for fila in segunda["cambios"]["indicadores_salud"]] == ids[2:]
+    assert [fila["id_cita"] for fila in segunda["cambios"]["citas_medicas"]] == [cita]
+    assert segunda["eliminados"] == {"alertas": [99]}
+    assert not segunda["mas"] and not segunda["reiniciar"]
+
+    assert _sincronizar(segunda["token"])["cambios"] == {}
+
+def test_cambios_dentro_del_margen_esperan_al_proximo_pedido(bd):
+    _cambiar(bd, "retos")
+    assert _sincronizar()["cambios"] == {}
+    bd.avanzar(seconds=MARGEN_SEGUNDOS)
+    assert len(_sincronizar()["cambios"]["retos"]) == 1
+
+def test_sin_cambios_el_token_avanza_hasta_el_horizonte(bd):
+    token = _sincronizar()["token"]
+    bd.avanzar(minutes=10)
+    respuesta = _sincronizar(token)
+    assert respuesta["cambios"] == {} and not respuesta["reiniciar"]
+    assert decodificar_token(respuesta["token"]) == (bd.ahora - timedelta(seconds=MARGEN_SEGUNDOS), -1, 0)
+
+    # Un cambio con fecha igual al horizonte todavía no se entregó: tiene que salir después
+    bd.avanzar(seconds=-MARGEN_SEGUNDOS)
+    reto = _cambiar(bd, "retos")
+    bd.avanzar(seconds=MARGEN_SEGUNDOS + 1)
+    assert [fila["id_reto"] for fila in _sincronizar(respuesta["token"])["cambios"]["retos"]] == [reto]
+
+def test_app_sin_novedades_no_se_reinicia_por_retencion(bd):
+    _cambiar(bd, "paciente")
+    bd.avanzar(seconds=MARGEN_SEGUNDOS)
+    token = _sincronizar()["token"]
+    for _ in range(3):
+        bd.avanzar(days=RETENCION_DIAS // 2 + 1)
+        respuesta = _sincronizar(token)
+        assert not respuesta["reiniciar"] and respuesta["cambios"] == {}
+        token = respuesta["token"]
+
+def test_token_mas_viejo_que_la_retencion_reinicia(bd):
+    token = _sincronizar()["token"]
+    _cambiar(bd, "paciente")
+    bd.avanzar(days=RETENCION_DIAS + 1)
+    respuesta = _sincronizar(token)
+    assert respuesta["reiniciar"]
+    assert [fila["id_paciente"] for fila in respuesta["cambios"]["paciente"]] == [PACIENTE]
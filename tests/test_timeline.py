@@ -0,0 +1,41 @@
+from datetime import datetime
+import pytest
+from models.timeline_model import TimelineModel, codificar_cursor, decodificar_cursor, RANGO_FUENTE
+
+def _evento(tipo, fecha, identificador):
+    return {"tipo": tipo, "fecha": fecha, "id": identificador}
+
+def test_cursor_ida_y_vuelta():
+    clave = (datetime(2026, 3, 10, 8, 30, 15, 250000), RANGO_FUENTE["cita"], 42)
+    cursor = codificar_cursor(clave)
+    assert "=" not in cursor
+    assert decodificar_cursor(cursor) == clave
+
+def test_cursor_fecha_iso_va_antes_de_todos_los_eventos_de_esa_fecha():
+    fecha = datetime(2026, 3, 10, 8, 0)
+    clave = decodificar_cursor("2026-03-10T08:00:00")
+    assert clave == (fecha, -1, 0)
+    # El orden es descendente: todo evento de esa misma fecha queda después del cursor
+    assert all((fecha, rango, 1) > clave for rango in RANGO_FUENTE.values())
+
+@pytest.mark.parametrize("cursor", [
+    "no-es-un-cursor",
+    codificar_cursor((datetime(2026, 1, 1), 0, 1))[:-3],
+    codificar_cursor((datetime(2026, 1, 1), len(RANGO_FUENTE), 1)),
+    codificar_cursor((datetime(2026, 1, 1), -1, 1)),
+])
+def test_cursor_invalido(cursor):
+    with pytest.raises(ValueError, match="Cursor inválido"):
+        decodificar_cursor(cursor)
+
+def test_fusionar_pagina_y_continua_desde_el_cursor():
+    fecha = datetime(2026, 3, 10, 8, 0)
+    indicadores = [_evento("indicador", fecha, 9), _evento("indicador", datetime(2026, 3, 9), 3)]
+    citas = [_evento("cita", fecha, 5), _evento("cita", datetime(2026, 3, 8), 2)]
+
+    pagina = TimelineModel.fusionar([indicadores, citas], limite=2)
+    # Misma fecha: desempata el rango de la fuente (descendente, la cita primero)
+    assert [(evento["tipo"], evento["id"]) for evento in pagina["eventos"]] == [("cita", 5), ("indicador", 9)]
+    assert decodificar_cursor(pagina["siguiente"]) == (fecha, RANGO_FUENTE["indicador"], 9)
+
+    assert TimelineModel.fusionar([indicadores, citas], limite=4)["siguiente"] is None
@@ -0,0 +1,209 @@
+from datetime import datetime, timedelta
+import pytest
+from models.trabajos_model import TrabajosModel
+from trabajos import Tarea, Trabajador, encolar, retraso_reintento
+from trabajos.programador import clave_periodica, clave_diaria
+from trabajos.registro import TAREAS
+
+ESQUEMA = """
+CREATE TABLE trabajos (
+    id_trabajo INTEGER PRIMARY KEY AUTOINCREMENT,
+    cola TEXT NOT NULL DEFAULT 'default',
+    tipo TEXT NOT NULL,
+    carga TEXT NOT NULL,
+    prioridad INTEGER NOT NULL DEFAULT 0,
+    estado TEXT NOT NULL DEFAULT 'pendiente',
+    ejecutar_en FECHA NOT NULL,
+    intentos INTEGER NOT NULL DEFAULT 0,
+    max_intentos INTEGER NOT NULL DEFAULT 5,
+    visibilidad_segundos INTEGER NOT NULL DEFAULT 300,
+    visible_hasta FECHA,
+    propietario TEXT,
+    ultimo_error TEXT,
+    fecha_creacion FECHA DEFAULT CURRENT_TIMESTAMP,
+    fecha_inicio FECHA,
+    fecha_fin FECHA,
+    clave TEXT UNIQUE
+);
+"""
+
+@pytest.fixture
+def bd(crear_bd):
+    return crear_bd(ESQUEMA)
+
+@pytest.fixture
+def registrar(monkeypatch):
+    """Registra una tarea de prueba en TAREAS solo durante la prueba"""
+    def registrar_tarea(tipo, funcion, **opciones):
+        monkeypatch.setitem(TAREAS, tipo, Tarea(tipo, funcion, **opciones))
+        return TAREAS[tipo]
+    return registrar_tarea
+
+def _estado(trabajo_id):
+    return TrabajosModel.get_by_id(trabajo_id)["estado"]
+
+# ---- Reclamo ----
+
+def test_reclama_por_prioridad_y_antiguedad(bd):
+    baja = TrabajosModel.encolar("a", prioridad=0)
+    bd.avanzar(seconds=1)
+    alta_nueva = TrabajosModel.encolar("a", prioridad=5)
+    alta_vieja = TrabajosModel.encolar("a", prioridad=5, ejecutar_en=bd.ahora - timedelta(minutes=1))
+
+    reclamados = TrabajosModel.reclamar(["default"], "t1", limite=10)
+    assert [trabajo["id_trabajo"] for trabajo in reclamados] == [alta_vieja, alta_nueva, baja]
+    assert all(trabajo["estado"] == "procesando" and trabajo["intentos"] == 1 for trabajo in reclamados)
+    assert reclamados[0]["visible_hasta"] == bd.ahora + timedelta(seconds=300)
+
+def test_no_reclama_trabajos_futuros_ni_de_otras_colas(bd):
+    futuro = TrabajosModel.encolar("a", retraso_segundos=60)
+    TrabajosModel.encolar("a", cola="lotes")
+    assert TrabajosModel.reclamar(["default"], "t1") == []
+
+    bd.avanzar(seconds=60)
+    assert [trabajo["id_trabajo"] for trabajo in TrabajosModel.reclamar(["default"], "t1")] == [futuro]
+
+def test_respeta_el_limite_y_no_entrega_dos_veces(bd):
+    ids = TrabajosModel.encolar_lote([{"tipo": "a", "carga": {"n": n}} for n in range(5)])
+    assert ids == list(range(ids[0], ids[0] + 5))
+
+    primeros = TrabajosModel.reclamar(["default"], "t1", limite=3)
+    restantes = TrabajosModel.reclamar(["default"], "t2", limite=3)
+    assert len(primeros) == 3 and len(restantes) == 2
+    assert {trabajo["id_trabajo"] for trabajo in primeros + restantes} == set(ids)
+    assert TrabajosModel.reclamar(["default"], "t3", limite=3) == []
+    assert primeros[0]["carga"] == {"n": 0}
+
+def test_clave_no_duplica_el_trabajo(bd):
+    primero = TrabajosModel.encolar("a", clave="a:1")
+    assert TrabajosModel.encolar("a", clave="a:1") == primero
+    assert TrabajosModel.encolar("a", clave="a:2") != primero
+    assert bd.filas("SELECT COUNT(*) AS n FROM trabajos")[0]["n"] == 2
+
+# ---- Visibilidad y propietario ----
+
+def test_recupera_trabajos_sin_latido(bd):
+    trabajo_id = TrabajosModel.encolar("a", visibilidad_segundos=30)
+    TrabajosModel.reclamar(["default"], "caido")
+
+    bd.avanzar(seconds=29)
+    assert TrabajosModel.recuperar_vencidos() == 0
+    bd.avanzar(seconds=2)
+    assert TrabajosModel.recuperar_vencidos() == 1
+
+    trabajo = TrabajosModel.get_by_id(trabajo_id)
+    assert trabajo["estado"] == "pendiente" and trabajo["propietario"] is None
+    assert TrabajosModel.reclamar(["default"], "otro")[0]["intentos"] == 2
+
+def test_el_latido_extiende_la_visibilidad(bd):
+    trabajo_id = TrabajosModel.encolar("a", visibilidad_segundos=30)
+    TrabajosModel.reclamar(["default"], "t1")
+    bd.avanzar(seconds=20)
+    assert TrabajosModel.extender([trabajo_id], "t1") == 1
+    bd.avanzar(seconds=20)
+    assert TrabajosModel.recuperar_vencidos() == 0
+    assert _estado(trabajo_id) == "procesando"
+
+def test_recuperar_sin_intentos_restantes_lo_marca_fallido(bd):
+    trabajo_id = TrabajosModel.encolar("a", max_intentos=1, visibilidad_segundos=30)
+    TrabajosModel.reclamar(["default"], "caido")
+    bd.avanzar(seconds=31)
+    TrabajosModel.recuperar_vencidos()
+    trabajo = TrabajosModel.get_by_id(trabajo_id)
+    assert trabajo["estado"] == "fallido" and trabajo["fecha_fin"] == bd.ahora
+
+def test_un_propietario_viejo_no_pisa_al_nuevo(bd):
+    trabajo_id = TrabajosModel.encolar("a", visibilidad_segundos=30)
+    TrabajosModel.reclamar(["default"], "viejo")
+    bd.avanzar(seconds=31)
+    TrabajosModel.recuperar_vencidos()
+    TrabajosModel.reclamar(["default"], "nuevo")
+
+    assert TrabajosModel.extender([trabajo_id], "viejo") == 0
+    assert not TrabajosModel.completar(trabajo_id, "viejo")
+    assert not TrabajosModel.fallar(trabajo_id, "viejo", "tarde", 10)
+    assert _estado(trabajo_id) == "procesando"
+
+    assert TrabajosModel.completar(trabajo_id, "nuevo")
+    assert _estado(trabajo_id) == "completado"
+    # Completado una vez, ya no se puede fallar ni volver a completar
+    assert not TrabajosModel.fallar(trabajo_id, "nuevo", "otra vez")
+    assert not TrabajosModel.completar(trabajo_id, "nuevo")
+
+# ---- Reintentos y fallo definitivo ----
+
+def test_retraso_reintento_exponencial_con_tope():
+    for intentos, esperado in ((1, 10), (2, 20), (4, 80), (20, 3600)):
+        for _ in range(50):
+            assert esperado / 2 <= retraso_reintento(intentos, 10, 3600) <= esperado
+
+def test_reintenta_con_backoff_y_luego_falla(bd, registrar, monkeypatch):
+    monkeypatch.setattr("trabajos.trabajador.random.uniform", lambda minimo, maximo: maximo)
+
+    def rompe():
+        raise RuntimeError("sin conexión")
+
+    registrar("rompe", rompe, max_intentos=3, reintento_base_segundos=10)
+    trabajo_id = encolar("rompe")
+    trabajador = Trabajador()
+
+    for intento, retraso in ((1, 10), (2, 20)):
+        trabajo = TrabajosModel.reclamar(["default"], trabajador.propietario)[0]
+        trabajador._ejecutar_trabajo(trabajo)
+        guardado = TrabajosModel.get_by_id(trabajo_id)
+        assert guardado["estado"] == "pendiente" and guardado["intentos"] == intento
+        assert guardado["ejecutar_en"] == bd.ahora + timedelta(seconds=retraso)
+        assert guardado["ultimo_error"] == "RuntimeError: sin conexión"
+        assert TrabajosModel.reclamar(["default"], trabajador.propietario) == []
+        bd.avanzar(seconds=retraso)
+
+    trabajador._ejecutar_trabajo(TrabajosModel.reclamar(["default"], trabajador.propietario)[0])
+    guardado = TrabajosModel.get_by_id(trabajo_id)
+    assert guardado["estado"] == "fallido" and guardado["fecha_fin"] == bd.ahora
+    assert (trabajador.reintentados, trabajador.fallidos) == (2, 1)
+    bd.avanzar(days=1)
+    assert TrabajosModel.reclamar(["default"], trabajador.propietario) == []
+
+def test_completa_el_trabajo(bd, registrar):
+    recibidos = []
+    registrar("anotar", lambda valor: recibidos.append(valor))
+    trabajo_id = encolar("anotar", {"valor": 7})
+    trabajador = Trabajador()
+    trabajador._ejecutar_trabajo(TrabajosModel.reclamar(["default"], trabajador.propietario)[0])
+    assert recibidos == [7]
+    assert _estado(trabajo_id) == "completado" and trabajador.completados == 1
+
+# ---- Validación de la carga ----
+
+def test_encolar_valida_la_carga(bd, registrar):
+    registrar("anotar", lambda valor, extra=None: None)
+    with pytest.raises(ValueError, match="anotar"):
+        encolar("anotar", {"otro": 1})
+    with pytest.raises(ValueError):
+        encolar("anotar")
+    with pytest.raises(ValueError, match="desconocido"):
+        encolar("no_existe")
+    assert bd.filas("SELECT COUNT(*) AS n FROM trabajos")[0]["n"] == 0
+
+def test_carga_invalida_en_la_cola_falla_sin_reintentos(bd, registrar):
+    llamadas = []
+    registrar("anotar", lambda valor: llamadas.append(valor), max_intentos=5)
+    # Encolado sin pasar por la validación (p. ej. antes de cambiar la firma)
+    trabajo_id = TrabajosModel.encolar("anotar", {"otro": 1}, max_intentos=5)
+    trabajador = Trabajador()
+    trabajador._ejecutar_trabajo(TrabajosModel.reclamar(["default"], trabajador.propietario)[0])
+    guardado = TrabajosModel.get_by_id(trabajo_id)
+    assert guardado["estado"] == "fallido" and "Carga inválida" in guardado["ultimo_error"]
+    assert llamadas == [] and trabajador.reintentados == 0
+
+# ---- Claves de las tareas programadas ----
+
+def test_clave_periodica_por_tramo():
+    assert clave_periodica("riesgo", 60, ahora=120.0) == clave_periodica("riesgo", 60, ahora=179.9) == "riesgo:2"
+    assert clave_periodica("riesgo", 60, ahora=180.0) == "riesgo:3"
+
+def test_clave_diaria_antes_y_despues_de_la_hora():
+    assert clave_diaria("citas", "08:00", datetime(2026, 3, 10, 7, 0)) == "citas:2026-03-09"
+    assert clave_diaria("citas", "08:00", datetime(2026, 3, 10, 9, 0)) == "citas:2026-03-10"
+    # Un despertar unos milisegundos antes de la hora cuenta como el día que empieza
+    assert clave_diaria("citas", "08:00", datetime(2026, 3, 10, 7, 59, 59, 990000)) == "citas:2026-03-10"
@@ -0,0 +1,16 @@
+from .registro import Tarea, TAREAS, tarea, encolar, validar_carga
+from .trabajador import Trabajador, retraso_reintento
+from .programador import programar_periodicamente, programar_diariamente
+from . import tareas
+
+__all__ = [
+    'TAREAS',
+    'Tarea',
+    'Trabajador',
+    'encolar',
+    'programar_diariamente',
+    'programar_periodicamente',
+    'retraso_reintento',
+    'tarea',
+    'validar_carga'
+]
@@ -0,0 +1,52 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from jobs.periodicos import ejecutar_periodicamente, ejecutar_diariamente, segundos_hasta
+from .registro import TAREAS, encolar
+
+# Margen para no tomar como "ayer" un despertar unos milisegundos antes de la hora
+_TOLERANCIA = timedelta(seconds=5)
+
+def clave_periodica(tipo: str, intervalo_segundos: float, ahora: float = None) -> str:
+    """Clave del tramo de intervalo_segundos en curso (tramos alineados a la época Unix)"""
+    ahora = time.time() if ahora is None else ahora
+    return f"{tipo}:{int(ahora // intervalo_segundos)}"
+
+def clave_diaria(tipo: str, hora: str, ahora: datetime = None) -> str:
+    """Clave de la última vez que el reloj marcó hora ("HH:MM"); antes de la hora, la de ayer"""
+    ahora = (ahora or datetime.now()) + _TOLERANCIA
+    ultima = ahora + timedelta(seconds=segundos_hasta(hora, ahora)) - timedelta(days=1)
+    return f"{tipo}:{ultima.date().isoformat()}"
+
+def _encolar_programado(tipo: str, clave: str):
+    try:
+        encolar(tipo, clave=clave)
+    except Exception as e:
+        print(f"❌ No se pudo encolar la tarea programada '{tipo}': {e}")
+
+async def programar_periodicamente(tipo: str, intervalo_segundos: float, en_cola: bool = True):
+    """
+    Encola el trabajo 'tipo' una vez por tramo de intervalo_segundos para que lo ejecute
+    worker.py. La clave del tramo hace que varias instancias de la API encolen un solo
+    trabajo. Con en_cola=False la función corre en este proceso (sin proceso worker).
+    """
+    if not en_cola:
+        return await ejecutar_periodicamente(tipo, TAREAS[tipo].funcion, intervalo_segundos)
+    while True:
+        await asyncio.to_thread(_encolar_programado, tipo, clave_periodica(tipo, intervalo_segundos))
+        await asyncio.sleep(intervalo_segundos - time.time() % intervalo_segundos)
+
+async def programar_diariamente(tipo: str, hora: str, al_iniciar: bool = True, en_cola: bool = True):
+    """
+    Como programar_periodicamente, una vez al día a la hora local indicada. Con al_iniciar
+    encola al arrancar el trabajo del último día: si ya se encoló (otra instancia, o antes
+    del reinicio) la clave lo descarta.
+    """
+    if not en_cola:
+        return await ejecutar_diariamente(tipo, TAREAS[tipo].funcion, hora, al_iniciar)
+    esperar = not al_iniciar
+    while True:
+        if esperar:
+            await asyncio.sleep(segundos_hasta(hora))
+        esperar = True
+        await asyncio.to_thread(_encolar_programado, tipo, clave_diaria(tipo, hora))
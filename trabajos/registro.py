@@ -0,0 +1,51 @@
+import inspect
+from dataclasses import dataclass
+from typing import Callable
+from models.trabajos_model import TrabajosModel
+
+@dataclass
+class Tarea:
+    """Un tipo de trabajo: la función que lo ejecuta y sus opciones por defecto"""
+    tipo: str
+    funcion: Callable
+    cola: str = "default"
+    prioridad: int = 0
+    max_intentos: int = 5
+    visibilidad_segundos: int = 300
+    reintento_base_segundos: float = 10.0
+    reintento_maximo_segundos: float = 3600.0
+
+TAREAS = {}
+
+def tarea(tipo: str, **opciones):
+    """Decorador que registra una función como tipo de trabajo; recibe la carga como kwargs"""
+    def registrar(funcion):
+        TAREAS[tipo] = Tarea(tipo, funcion, **opciones)
+        return funcion
+    return registrar
+
+def validar_carga(definicion: Tarea, carga: dict):
+    """La carga son los kwargs de la función: ValueError si no coinciden con su firma"""
+    try:
+        inspect.signature(definicion.funcion).bind(**(carga or {}))
+    except TypeError as e:
+        raise ValueError(f"Carga inválida para '{definicion.tipo}': {e}")
+
+def encolar(tipo: str, carga: dict = None, **opciones) -> int:
+    """
+    Encola un trabajo de un tipo registrado con sus opciones por defecto; cualquier opción
+    (cola, prioridad, retraso_segundos, ejecutar_en, max_intentos, visibilidad_segundos,
+    clave) se puede cambiar para este trabajo. La carga se valida contra la firma de la
+    función antes de encolar, para no gastar reintentos en un trabajo que nunca correrá.
+    """
+    definicion = TAREAS.get(tipo)
+    if definicion is None:
+        raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+    validar_carga(definicion, carga)
+    return TrabajosModel.encolar(tipo, carga, **{
+        "cola": definicion.cola,
+        "prioridad": definicion.prioridad,
+        "max_intentos": definicion.max_intentos,
+        "visibilidad_segundos": definicion.visibilidad_segundos,
+        **opciones,
+    })
@@ -0,0 +1,25 @@
+from jobs.calcular_riesgo import calcular_riesgo_pacientes, calcular_riesgo_pendientes
+from jobs.cerrar_retos_vencidos import cerrar_retos_vencidos
+from jobs.generar_recomendaciones_ia import generar_recomendaciones_ia
+from jobs.purgar_sync_eliminados import purgar_sync_eliminados
+from jobs.reconciliar_total_pacientes import reconciliar_total_pacientes
+from jobs.reconstruir_adherencia import reconstruir_adherencia
+from jobs.reconstruir_indicadores_resumen import reconstruir_indicadores_resumen
+from jobs.reconstruir_indicadores_ultimos import reconstruir_indicadores_ultimos
+from jobs.recordatorios_citas import generar_recordatorios_citas
+from .registro import tarea
+
+# Tipos de trabajo que acepta la cola. Los lotes largos renuevan su visibilidad con el
+# latido del trabajador, así que el tiempo de visibilidad solo cuenta si el proceso muere.
+tarea("recordatorios_citas", prioridad=10, max_intentos=5)(generar_recordatorios_citas)
+tarea("riesgo_pacientes", cola="lotes", max_intentos=3, visibilidad_segundos=900)(calcular_riesgo_pacientes)
+tarea("riesgo_pendientes", prioridad=5, max_intentos=3)(calcular_riesgo_pendientes)
+tarea("recomendaciones_ia", cola="lotes", max_intentos=3, visibilidad_segundos=900)(generar_recomendaciones_ia)
+tarea("reconstruir_adherencia", cola="lotes", max_intentos=2, visibilidad_segundos=900)(reconstruir_adherencia)
+tarea("reconstruir_indicadores_resumen", cola="lotes", max_intentos=2,
+      visibilidad_segundos=900)(reconstruir_indicadores_resumen)
+tarea("reconstruir_indicadores_ultimos", cola="lotes", max_intentos=2,
+      visibilidad_segundos=900)(reconstruir_indicadores_ultimos)
+tarea("purgar_sync_eliminados", cola="lotes", max_intentos=3)(purgar_sync_eliminados)
+tarea("cerrar_retos_vencidos", max_intentos=3)(cerrar_retos_vencidos)
+tarea("reconciliar_total_pacientes", cola="lotes", max_intentos=2)(reconciliar_total_pacientes)
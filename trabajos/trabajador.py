@@ -0,0 +1,150 @@
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from models.trabajos_model import TrabajosModel
+from .registro import TAREAS, validar_carga
+
+def retraso_reintento(intentos: int, base: float, maximo: float) -> float:
+    """Backoff exponencial con jitter: entre la mitad y el total de base * 2^(intentos-1)"""
+    retraso = min(maximo, base * 2 ** max(intentos - 1, 0))
+    return random.uniform(retraso / 2, retraso)
+
+class Trabajador:
+    """
+    Consume la cola de trabajos (TrabajosModel) con un pool de hilos. Reclama en lote
+    tantos trabajos como hilos libres tenga; cuando la cola está vacía espera cada vez más
+    (hasta sondeo_maximo_segundos) y vuelve al sondeo corto en cuanto encuentra trabajo.
+
+    Mientras un trabajo corre, el trabajador renueva su visibilidad cada latido_segundos;
+    de paso devuelve a la cola los trabajos de trabajadores caídos y purga los terminados.
+    detener() deja de reclamar y espera a que terminen los trabajos en curso.
+    """
+
+    def __init__(self, colas: list = None, hilos: int = 4, sondeo_segundos: float = 0.5,
+                 sondeo_maximo_segundos: float = 5.0, latido_segundos: float = 30.0,
+                 recuperar_segundos: float = 30.0, purgar_segundos: float = 3600.0,
+                 retencion_dias: int = 7):
+        self.colas = colas or ["default"]
+        self.hilos = max(hilos, 1)
+        self.sondeo_segundos = sondeo_segundos
+        self.sondeo_maximo_segundos = sondeo_maximo_segundos
+        self.latido_segundos = latido_segundos
+        self.recuperar_segundos = recuperar_segundos
+        self.purgar_segundos = purgar_segundos
+        self.retencion_dias = retencion_dias
+        self.propietario = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._en_curso = set()
+        self._lock = threading.Lock()
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self.completados = 0
+        self.reintentados = 0
+        self.fallidos = 0
+
+    def detener(self):
+        """Se puede llamar desde un manejador de señales o desde otro hilo"""
+        self._detener.set()
+        self._despertar.set()
+
+    def _ejecutar_trabajo(self, trabajo: dict):
+        trabajo_id = trabajo["id_trabajo"]
+        definicion = TAREAS.get(trabajo["tipo"])
+        inicio = time.monotonic()
+        ejecutable = False
+        try:
+            if definicion is None:
+                raise LookupError(f"Tipo de trabajo desconocido: {trabajo['tipo']}")
+            validar_carga(definicion, trabajo["carga"])
+            ejecutable = True
+            definicion.funcion(**trabajo["carga"])
+            TrabajosModel.completar(trabajo_id, self.propietario)
+            self.completados += 1
+        except Exception as e:
+            # Un tipo desconocido o una carga que no encaja con la función no se arreglan
+            # reintentando: el trabajo falla de una vez
+            reintentar = ejecutable and trabajo["intentos"] < trabajo["max_intentos"]
+            retraso = retraso_reintento(
+                trabajo["intentos"], definicion.reintento_base_segundos, definicion.reintento_maximo_segundos
+            ) if reintentar else None
+            try:
+                TrabajosModel.fallar(trabajo_id, self.propietario, f"{type(e).__name__}: {e}", retraso)
+            except Exception as error_bd:
+                print(f"❌ No se pudo registrar el fallo del trabajo {trabajo_id}: {error_bd}")
+            if reintentar:
+                self.reintentados += 1
+                print(f"⚠️  Trabajo {trabajo_id} ({trabajo['tipo']}) falló en el intento {trabajo['intentos']}, "
+                      f"se reintenta en {retraso:.0f}s: {e}")
+            else:
+                self.fallidos += 1
+                print(f"❌ Trabajo {trabajo_id} ({trabajo['tipo']}) falló definitivamente: {e}")
+        finally:
+            with self._lock:
+                self._en_curso.discard(trabajo_id)
+            self._despertar.set()
+            duracion = time.monotonic() - inicio
+            if duracion > self.latido_segundos:
+                print(f"⏱️  Trabajo {trabajo_id} ({trabajo['tipo']}) tardó {duracion:.0f}s")
+
+    def _mantenimiento(self, ahora: float, proximos: dict):
+        if ahora >= proximos["latido"]:
+            with self._lock:
+                en_curso = list(self._en_curso)
+            TrabajosModel.extender(en_curso, self.propietario)
+            proximos["latido"] = ahora + self.latido_segundos
+        if ahora >= proximos["recuperar"]:
+            recuperados = TrabajosModel.recuperar_vencidos()
+            if recuperados:
+                print(f"♻️  {recuperados} trabajo(s) sin latido devueltos a la cola")
+            proximos["recuperar"] = ahora + self.recuperar_segundos
+        if ahora >= proximos["purgar"]:
+            TrabajosModel.purgar(self.retencion_dias)
+            proximos["purgar"] = ahora + self.purgar_segundos
+
+    def ejecutar(self):
+        """Bucle principal del proceso trabajador; vuelve cuando se llama a detener()"""
+        proximos = {"latido": 0, "recuperar": 0, "purgar": 0}
+        espera = self.sondeo_segundos
+        with ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="trabajo") as pool:
+            while not self._detener.is_set():
+                self._despertar.clear()
+                reclamados = []
+                libres = self.hilos
+                try:
+                    self._mantenimiento(time.monotonic(), proximos)
+                    with self._lock:
+                        libres = self.hilos - len(self._en_curso)
+                    if libres > 0:
+                        reclamados = TrabajosModel.reclamar(self.colas, self.propietario, libres)
+                except Exception as e:
+                    print(f"❌ Error en el trabajador de la cola: {e}")
+
+                for trabajo in reclamados:
+                    with self._lock:
+                        self._en_curso.add(trabajo["id_trabajo"])
+                    pool.submit(self._ejecutar_trabajo, trabajo)
+
+                if libres <= 0 or len(reclamados) == libres:
+                    # Todos los hilos ocupados: se espera a que uno termine (o al próximo latido)
+                    espera = self.sondeo_segundos
+                    self._despertar.wait(self.latido_segundos)
+                    continue
+                espera = self.sondeo_segundos if reclamados else min(espera * 2, self.sondeo_maximo_segundos)
+                self._despertar.wait(espera)
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            en_curso = len(self._en_curso)
+        return {
+            "propietario": self.propietario,
+            "colas": self.colas,
+            "hilos": self.hilos,
+            "en_curso": en_curso,
+            "completados": self.completados,
+            "reintentados": self.reintentados,
+            "fallidos": self.fallidos,
+        }
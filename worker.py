@@ -0,0 +1,26 @@
+import os
+import signal
+from trabajos import Trabajador, TAREAS
+
+def main():
+    """
+    Proceso trabajador de la cola durable (línea 'worker' del Procfile). Se pueden correr
+    varios en paralelo; TRABAJOS_COLAS elige qué colas atiende cada uno.
+    """
+    trabajador = Trabajador(
+        colas=[cola.strip() for cola in os.getenv("TRABAJOS_COLAS", "default,lotes").split(",") if cola.strip()],
+        hilos=int(os.getenv("TRABAJOS_HILOS", "4")),
+        sondeo_maximo_segundos=float(os.getenv("TRABAJOS_SONDEO_MAXIMO_SEGUNDOS", "5")),
+        latido_segundos=float(os.getenv("TRABAJOS_LATIDO_SEGUNDOS", "30")),
+        retencion_dias=int(os.getenv("TRABAJOS_RETENCION_DIAS", "7"))
+    )
+    # SIGTERM (p. ej. al reiniciar el dyno): deja de reclamar y termina lo que está en curso
+    signal.signal(signal.SIGTERM, lambda *_: trabajador.detener())
+    signal.signal(signal.SIGINT, lambda *_: trabajador.detener())
+    print(f"👷 Trabajador {trabajador.propietario} atendiendo {trabajador.colas} con {trabajador.hilos} hilos "
+          f"({len(TAREAS)} tipos de trabajo)")
+    trabajador.ejecutar()
+    print(f"👋 Trabajador detenido: {trabajador.estadisticas()}")
+
+if __name__ == "__main__":
+    main()